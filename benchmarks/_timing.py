@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Small timing helpers shared by the benchmark scripts."""
+
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, Dict
+
+
+def _summarize(samples, number: int) -> Dict[str, float]:
+    per_call = [sample / number * 1e6 for sample in samples]
+    return {
+        "number": number,
+        "repeat": len(samples),
+        "best_us": min(per_call),
+        "median_us": statistics.median(per_call),
+    }
+
+
+def measure(
+    func: Callable[[], object], *, number: int = 1000, repeat: int = 5
+) -> Dict[str, float]:
+    """Time ``func`` and return per-call statistics in microseconds.
+
+    Args:
+        func (Callable[[], object]): The zero-argument callable to time.
+        number (int): How many calls make up one sample.
+        repeat (int): How many samples to take.
+
+    Returns:
+        Dict[str, float]: The best and median per-call time of the samples.
+    """
+    func()  # Warm up caches and lazily created objects.
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append(time.perf_counter() - start)
+    return _summarize(samples, number)
+
+
+def measure_async(
+    factory: Callable[[], Callable[[], Awaitable[object]]],
+    *,
+    number: int = 1000,
+    repeat: int = 5,
+) -> Dict[str, float]:
+    """Time a coroutine function on a fresh event loop.
+
+    Args:
+        factory (Callable[[], Callable[[], Awaitable[object]]]): Called once
+            inside the running event loop (so that asyncio channels can be
+            created); returns the zero-argument coroutine function to time.
+        number (int): How many awaited calls make up one sample.
+        repeat (int): How many samples to take.
+
+    Returns:
+        Dict[str, float]: The best and median per-call time of the samples.
+    """
+
+    async def run_all():
+        func = factory()
+        await func()
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                await func()
+            samples.append(time.perf_counter() - start)
+        return samples
+
+    return _summarize(asyncio.run(run_all()), number)
+
+
+def per_item(stats: Dict[str, float], items: int) -> Dict[str, float]:
+    """Scale timing statistics for a batch down to a single item."""
+    return dict(
+        stats,
+        best_us=stats["best_us"] / items,
+        median_us=stats["median_us"] / items,
+        items=items,
+    )
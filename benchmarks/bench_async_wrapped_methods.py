@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Per-call overhead of the asyncio client with precomputed wrapped methods.
+
+Compares ``CloudBillingAsyncClient.get_project_billing_info``, which looks
+its wrapped RPC up in the transport's ``_wrapped_methods`` table, with the
+previous behaviour of calling ``gapic_v1.method_async.wrap_method`` (and
+building a fresh ``Retry``) on every invocation. The gRPC stub is replaced
+with an in-memory fake so only client-side cost is measured.
+
+Run with ``python benchmarks/bench_async_wrapped_methods.py``.
+"""
+
+import asyncio
+import json
+from unittest import mock
+
+from google.api_core import exceptions
+from google.api_core import gapic_v1
+from google.api_core import grpc_helpers_async
+from google.api_core import retry as retries
+from google.auth import credentials
+
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingAsyncClient
+from google.cloud.billing_v1.types import cloud_billing
+
+from _timing import measure_async
+
+
+NAME = "projects/benchmark-project/billingInfo"
+
+
+def _fake_stub(response):
+    def __call__(self, request, **kwargs):
+        return grpc_helpers_async.FakeUnaryUnaryCall(response)
+
+    return __call__
+
+
+def _make_client():
+    return CloudBillingAsyncClient(credentials=credentials.AnonymousCredentials())
+
+
+def _stub_type():
+    # The stub class is only reachable from a live asyncio channel, so build
+    # one throwaway client on its own loop to discover it.
+    async def probe():
+        return type(_make_client().transport.get_project_billing_info)
+
+    return asyncio.run(probe())
+
+
+def cached_factory():
+    client = _make_client()
+
+    async def call():
+        return await client.get_project_billing_info(name=NAME)
+
+    return call
+
+
+def rewrapped_factory():
+    client = _make_client()
+    transport = client.transport
+
+    async def call():
+        rpc = gapic_v1.method_async.wrap_method(
+            transport.get_project_billing_info,
+            default_retry=retries.Retry(
+                initial=0.1,
+                maximum=60.0,
+                multiplier=1.3,
+                predicate=retries.if_exception_type(
+                    exceptions.DeadlineExceeded, exceptions.ServiceUnavailable,
+                ),
+            ),
+            default_timeout=60.0,
+            client_info=gapic_v1.client_info.DEFAULT_CLIENT_INFO,
+        )
+        request = cloud_billing.GetProjectBillingInfoRequest(name=NAME)
+        metadata = (gapic_v1.routing_header.to_grpc_metadata((("name", NAME),)),)
+        return await rpc(request, metadata=metadata)
+
+    return call
+
+
+def run(number: int = 2000, repeat: int = 5):
+    response = cloud_billing.ProjectBillingInfo(name=NAME, billing_enabled=True)
+    with mock.patch.object(_stub_type(), "__call__", _fake_stub(response)):
+        return {
+            "get_project_billing_info.cached": measure_async(
+                cached_factory, number=number, repeat=repeat
+            ),
+            "get_project_billing_info.rewrapped": measure_async(
+                rewrapped_factory, number=number, repeat=repeat
+            ),
+        }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2, sort_keys=True))
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Warm-start cost of ``CatalogSnapshot.load`` on a synthetic catalog.
+
+Run with ``python benchmarks/bench_catalog_snapshot.py``.
+"""
+
+import json
+import os
+import tempfile
+
+from google.cloud.billing_v1.catalog_snapshot import CatalogSnapshot
+from google.cloud.billing_v1.types import cloud_catalog
+from google.type import money_pb2 as money
+
+from _timing import measure
+
+
+def make_snapshot(services: int = 200, skus_per_service: int = 250):
+    service_list = cloud_catalog.ListServicesResponse()
+    skus = {}
+    for s in range(services):
+        name = "services/SVC-{:04d}".format(s)
+        cloud_catalog.ListServicesResponse.pb(service_list).services.add(
+            name=name, service_id="SVC-{:04d}".format(s)
+        )
+        page = cloud_catalog.ListSkusResponse()
+        page_pb = cloud_catalog.ListSkusResponse.pb(page)
+        for k in range(skus_per_service):
+            sku = page_pb.skus.add(
+                name="{}/skus/SKU-{:05d}".format(name, k),
+                sku_id="SKU-{:05d}".format(k),
+                description="Synthetic SKU {}".format(k),
+                service_regions=["us-central1", "europe-west4"],
+            )
+            sku.category.resource_family = "Compute"
+            sku.category.usage_type = "OnDemand"
+            expression = sku.pricing_info.add().pricing_expression
+            expression.usage_unit = "GiBy"
+            expression.base_unit_conversion_factor = 2 ** 30
+            for tier in range(3):
+                rate = expression.tiered_rates.add(start_usage_amount=tier * 100)
+                rate.unit_price.CopyFrom(
+                    money.Money(currency_code="USD", nanos=(3 - tier) * 10000000)
+                )
+        skus[name] = page
+    return CatalogSnapshot(service_list, skus)
+
+
+def run(repeat: int = 5):
+    snapshot = make_snapshot()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "catalog.bin")
+        snapshot.dump(path)
+        return {
+            "catalog_snapshot.load": dict(
+                measure(lambda: CatalogSnapshot.load(path), number=1, repeat=repeat),
+                file_bytes=os.path.getsize(path),
+                skus=sum(1 for _ in snapshot.skus()),
+            ),
+        }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2, sort_keys=True))
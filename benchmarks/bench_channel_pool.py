@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Concurrent call throughput over one channel versus a ``ChannelPool``.
+
+A local server limits every connection to a few concurrent streams, as a
+production frontend does at a larger scale, and answers each call after a
+short delay. Throughput then scales with the number of connections.
+
+Run with ``python benchmarks/bench_channel_pool.py``.
+"""
+
+import concurrent.futures
+import json
+
+import grpc
+
+from google.cloud.billing_v1.fake_server import FakeBillingServer
+from google.cloud.billing_v1.services import _channel_pool
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingClient
+from google.cloud.billing_v1.services.cloud_billing.transports import (
+    CloudBillingGrpcTransport,
+)
+
+from _timing import measure, per_item
+
+
+MAX_CONCURRENT_STREAMS = 4
+SERVER_DELAY = 0.005
+
+
+def make_client(address: str, pool_size: int) -> CloudBillingClient:
+    channel = _channel_pool.create_channel_pool(
+        grpc.insecure_channel, pool_size, address
+    )
+    return CloudBillingClient(transport=CloudBillingGrpcTransport(channel=channel))
+
+
+def run(calls: int = 256, concurrency: int = 32, repeat: int = 3):
+    server = FakeBillingServer(
+        latency=SERVER_DELAY,
+        max_workers=64,
+        options=[("grpc.max_concurrent_streams", MAX_CONCURRENT_STREAMS)],
+    ).start()
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=concurrency)
+    results = {}
+    try:
+        for pool_size in (1, 2, 4, 8):
+            client = make_client(server.address, pool_size)
+
+            def call(number):
+                return client.get_project_billing_info(
+                    name="projects/project-{}".format(number % 100 + 1)
+                )
+
+            def burst():
+                list(executor.map(call, range(calls)))
+
+            stats = per_item(measure(burst, number=1, repeat=repeat), calls)
+            stats["calls_per_second"] = 1e6 / stats["best_us"]
+            results["channel_pool.size_{}.per_call".format(pool_size)] = stats
+            client.transport.grpc_channel.close()
+    finally:
+        executor.shutdown()
+        server.stop()
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2, sort_keys=True))
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Client-side cost of the generated code on every call.
+
+Covers response deserialization, pager iteration, client construction,
+routing headers and the per-call overhead of the sync and async clients.
+The gRPC stubs are replaced with in-memory fakes, so no time is spent in
+the network and the numbers track changes to the generated code.
+
+Run with ``python benchmarks/bench_client.py``.
+"""
+
+import asyncio
+import json
+from unittest import mock
+
+from google.api_core import gapic_v1
+from google.api_core import grpc_helpers_async
+from google.auth import credentials
+
+from google.cloud.billing_v1.fake_server import SyntheticDataset
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingAsyncClient
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingClient
+from google.cloud.billing_v1.services.cloud_catalog import pagers
+from google.cloud.billing_v1.types import cloud_billing
+from google.cloud.billing_v1.types import cloud_catalog
+
+from _timing import measure, measure_async, per_item
+
+
+NAME = "projects/benchmark-project"
+PAGE_SIZE = 5000
+
+
+def make_pages(skus: int, page_size: int):
+    """Serialize a catalog of synthetic SKUs into pages, by page token."""
+    dataset = SyntheticDataset(services=1, skus_per_service=skus)
+    all_skus = next(iter(dataset.skus.values()))
+    pages = {}
+    for start in range(0, skus, page_size):
+        end = start + page_size
+        page = cloud_catalog.ListSkusResponse.pb()(
+            next_page_token=str(end) if end < skus else ""
+        )
+        page.skus.extend(all_skus[start:end])
+        pages[str(start) if start else ""] = page.SerializeToString()
+    return pages
+
+
+def iterate_pager(pages):
+    def method(request, metadata=()):
+        return cloud_catalog.ListSkusResponse.deserialize(pages[request.page_token])
+
+    request = cloud_catalog.ListSkusRequest(parent="services/benchmark")
+    pager = pagers.ListSkusPager(method, request, method(request))
+    return sum(1 for _ in pager)
+
+
+def _anonymous():
+    return credentials.AnonymousCredentials()
+
+
+def _sync_stub_type():
+    client = CloudBillingClient(credentials=_anonymous())
+    return type(client.transport.get_project_billing_info)
+
+
+def _async_stub_type():
+    # The stub class is only reachable from a live asyncio channel, so build
+    # one throwaway client on its own loop to discover it.
+    async def probe():
+        client = CloudBillingAsyncClient(credentials=_anonymous())
+        return type(client.transport.get_project_billing_info)
+
+    return asyncio.run(probe())
+
+
+def sync_call(response):
+    client = CloudBillingClient(credentials=_anonymous())
+    with mock.patch.object(
+        _sync_stub_type(), "__call__", lambda self, request, **kwargs: response
+    ):
+        return measure(lambda: client.get_project_billing_info(name=NAME), number=2000)
+
+
+def async_call(response):
+    def fake_call(self, request, **kwargs):
+        return grpc_helpers_async.FakeUnaryUnaryCall(response)
+
+    def factory():
+        client = CloudBillingAsyncClient(credentials=_anonymous())
+
+        async def call():
+            return await client.get_project_billing_info(name=NAME)
+
+        return call
+
+    with mock.patch.object(_async_stub_type(), "__call__", fake_call):
+        return measure_async(factory, number=2000)
+
+
+def run(skus: int = 20000, repeat: int = 5):
+    pages = make_pages(skus, PAGE_SIZE)
+    response = cloud_billing.ProjectBillingInfo(
+        name=NAME + "/billingInfo", billing_enabled=True
+    )
+    return {
+        "client.list_skus_response.deserialize.per_sku": per_item(
+            measure(
+                lambda: cloud_catalog.ListSkusResponse.deserialize(pages[""]),
+                number=1,
+                repeat=repeat,
+            ),
+            PAGE_SIZE,
+        ),
+        "client.list_skus_pager.iterate.per_sku": per_item(
+            measure(lambda: iterate_pager(pages), number=1, repeat=repeat), skus,
+        ),
+        "client.cloud_billing_client.init": measure(
+            lambda: CloudBillingClient(credentials=_anonymous()), number=200
+        ),
+        "client.routing_header.to_grpc_metadata": measure(
+            lambda: gapic_v1.routing_header.to_grpc_metadata((("name", NAME),)),
+            number=10000,
+        ),
+        "client.get_project_billing_info.sync": sync_call(response),
+        "client.get_project_billing_info.async": async_call(response),
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2, sort_keys=True))
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Time to import the library, in a fresh interpreter each time.
+
+Each sample starts a new ``python`` process, so that no module is cached,
+and times one import statement in it. Run ``python -X importtime -c
+"<statement>"`` to see where the time goes.
+
+Run with ``python benchmarks/bench_import.py``.
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+
+
+STATEMENTS = {
+    "package": "import google.cloud.billing",
+    "catalog_client": "from google.cloud.billing import CloudCatalogClient",
+    "billing_client": "from google.cloud.billing import CloudBillingClient",
+    "all_clients": (
+        "from google.cloud.billing import CloudBillingClient, "
+        "CloudBillingAsyncClient, CloudCatalogClient, CloudCatalogAsyncClient"
+    ),
+}
+
+_TIMED = """\
+import time
+start = time.perf_counter()
+{}
+print(time.perf_counter() - start)
+"""
+
+
+def import_time(statement: str) -> float:
+    output = subprocess.check_output([sys.executable, "-c", _TIMED.format(statement)])
+    return float(output)
+
+
+def run(repeat: int = 10):
+    results = {}
+    for name, statement in STATEMENTS.items():
+        samples = [import_time(statement) * 1e6 for _ in range(repeat)]
+        results["import.{}".format(name)] = {
+            "number": 1,
+            "repeat": repeat,
+            "best_us": min(samples),
+            "median_us": statistics.median(samples),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2, sort_keys=True))
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Reading a ``ListSkus`` page through proto-plus versus raw protobuf.
+
+Both paths parse the same serialized page, as the gRPC stubs of
+``list_skus`` and ``list_skus_raw`` do, then read the fields a bulk
+consumer typically needs from every SKU.
+
+Run with ``python benchmarks/bench_list_skus_raw.py``.
+"""
+
+import json
+
+from google.cloud.billing_v1.types import cloud_catalog
+from google.type import money_pb2 as money
+
+from _timing import measure, per_item
+
+
+def make_payload(skus: int = 5000) -> bytes:
+    page = cloud_catalog.ListSkusResponse.pb()()
+    for k in range(skus):
+        sku = page.skus.add(
+            name="services/SVC/skus/SKU-{:05d}".format(k),
+            sku_id="SKU-{:05d}".format(k),
+            description="Synthetic SKU {}".format(k),
+            service_regions=["us-central1", "europe-west4"],
+        )
+        sku.category.resource_family = "Compute"
+        sku.category.usage_type = "OnDemand"
+        expression = sku.pricing_info.add().pricing_expression
+        expression.usage_unit = "GiBy"
+        for tier in range(3):
+            rate = expression.tiered_rates.add(start_usage_amount=tier * 100)
+            rate.unit_price.CopyFrom(
+                money.Money(currency_code="USD", nanos=(3 - tier) * 10000000)
+            )
+    return page.SerializeToString()
+
+
+def read(page):
+    total = 0
+    for sku in page.skus:
+        total += len(sku.name) + len(sku.category.resource_family)
+        for info in sku.pricing_info:
+            for rate in info.pricing_expression.tiered_rates:
+                total += rate.unit_price.nanos
+    return total
+
+
+def run(skus: int = 5000, repeat: int = 5):
+    payload = make_payload(skus)
+    raw_type = cloud_catalog.ListSkusResponse.pb()
+    return {
+        "list_skus.proto_plus.per_sku": per_item(
+            measure(
+                lambda: read(cloud_catalog.ListSkusResponse.deserialize(payload)),
+                number=1,
+                repeat=repeat,
+            ),
+            skus,
+        ),
+        "list_skus_raw.protobuf.per_sku": per_item(
+            measure(
+                lambda: read(raw_type.FromString(payload)), number=1, repeat=repeat
+            ),
+            skus,
+        ),
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2, sort_keys=True))
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Batched ``PriceTimeline.lookup`` versus walking ``pricing_info`` per row.
+
+Run with ``python benchmarks/bench_price_history.py``.
+"""
+
+import json
+
+import numpy
+
+from google.cloud.billing_v1.price_history import PriceTimeline
+from google.cloud.billing_v1.types import cloud_catalog
+
+from _timing import measure, per_item
+
+
+START = 1577836800  # 2020-01-01T00:00:00Z
+DAY = 86400
+
+
+def make_skus(count: int = 10000, versions: int = 12):
+    skus = []
+    for number in range(count):
+        sku = cloud_catalog.Sku(sku_id="SKU-{:05d}".format(number))
+        sku_pb = cloud_catalog.Sku.pb(sku)
+        for version in range(versions):
+            info = sku_pb.pricing_info.add(summary="v{}".format(version))
+            info.effective_time.seconds = START + version * 30 * DAY + number
+        skus.append(sku)
+    return skus
+
+
+def python_loop(skus_by_id, sku_ids, times):
+    # The per-row traversal this module replaces.
+    found = []
+    for sku_id, when in zip(sku_ids, times):
+        current = None
+        for info in skus_by_id[sku_id].pricing_info:
+            if info.effective_time.timestamp() <= when:
+                current = info
+        found.append(current)
+    return found
+
+
+def run(rows: int = 1000000, repeat: int = 3):
+    skus = make_skus()
+    timeline = PriceTimeline(skus)
+    rng = numpy.random.RandomState(0)
+    sku_ids = numpy.asarray(timeline.sku_ids)[rng.randint(0, len(skus), size=rows)]
+    times = rng.uniform(START, START + 365 * DAY, size=rows)
+    codes = timeline.codes(sku_ids)
+    skus_by_id = {sku.sku_id: sku for sku in skus}
+    sample = 2000
+    return {
+        "price_history.build.per_entry": per_item(
+            measure(lambda: PriceTimeline(skus), number=1, repeat=repeat),
+            len(timeline),
+        ),
+        "price_history.lookup_ids.per_row": per_item(
+            measure(lambda: timeline.lookup(sku_ids, times), number=1, repeat=repeat),
+            rows,
+        ),
+        "price_history.lookup_codes.per_row": per_item(
+            measure(lambda: timeline.lookup(codes, times), number=1, repeat=repeat),
+            rows,
+        ),
+        "price_history.python_loop.per_row": per_item(
+            measure(
+                lambda: python_loop(
+                    skus_by_id, sku_ids[:sample].tolist(), times[:sample].tolist()
+                ),
+                number=1,
+                repeat=repeat,
+            ),
+            sample,
+        ),
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2, sort_keys=True))
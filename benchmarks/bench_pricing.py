@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Batched ``TieredPricing`` evaluation versus a per-row Python loop.
+
+Run with ``python benchmarks/bench_pricing.py``.
+"""
+
+import json
+
+import numpy
+
+from google.cloud.billing_v1.pricing import TieredPricing
+from google.cloud.billing_v1.types import cloud_catalog
+from google.type import money_pb2 as money
+
+from _timing import measure, per_item
+
+
+def make_expression(tiers: int = 4):
+    return cloud_catalog.PricingExpression(
+        usage_unit="GiBy",
+        base_unit_conversion_factor=2 ** 30,
+        tiered_rates=[
+            cloud_catalog.PricingExpression.TierRate(
+                start_usage_amount=tier * 1000,
+                unit_price=money.Money(
+                    currency_code="USD", nanos=(10 - tier) * 10 ** 7
+                ),
+            )
+            for tier in range(tiers)
+        ],
+    )
+
+
+def python_loop(expression, usage):
+    # The hand-rolled evaluation this module replaces.
+    rates = expression.tiered_rates
+    costs = []
+    for quantity in usage:
+        total = 0.0
+        for i, rate in enumerate(rates):
+            end = (
+                rates[i + 1].start_usage_amount if i + 1 < len(rates) else float("inf")
+            )
+            if quantity > rate.start_usage_amount:
+                price = rate.unit_price.units + rate.unit_price.nanos / 1e9
+                total += (min(quantity, end) - rate.start_usage_amount) * price
+        costs.append(total)
+    return costs
+
+
+def run(rows: int = 1000000, repeat: int = 3):
+    expression = make_expression()
+    compiled = TieredPricing.from_expression(expression)
+    usage = numpy.random.RandomState(0).uniform(0, 5000, size=rows)
+    sample = usage[:10000].tolist()
+    return {
+        "pricing.compile": measure(
+            lambda: TieredPricing.from_expression(expression), number=1000
+        ),
+        "pricing.cost_nanos.per_row": per_item(
+            measure(lambda: compiled.cost_nanos(usage), number=1, repeat=repeat), rows,
+        ),
+        "pricing.python_loop.per_row": per_item(
+            measure(lambda: python_loop(expression, sample), number=1, repeat=repeat),
+            len(sample),
+        ),
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2, sort_keys=True))
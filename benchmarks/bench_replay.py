@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Client-side cost of a recorded workload, replayed with no network.
+
+The workload lists the billing accounts, reads one, and lists every SKU of
+the catalog page by page. It is recorded once against a local server, or
+read from the cassette given as ``--cassette``, e.g. one recorded against
+the service; it is then replayed with no delay, so that the numbers only
+count the time spent in the client.
+
+Run with ``python benchmarks/bench_replay.py [--cassette PATH]``.
+"""
+
+import argparse
+import json
+
+import grpc
+
+from google.cloud.billing_v1.cassette import Cassette
+from google.cloud.billing_v1.fake_server import FakeBillingServer
+from google.cloud.billing_v1.fake_server import SyntheticDataset
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingAsyncClient
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingClient
+from google.cloud.billing_v1.services.cloud_catalog import CloudCatalogAsyncClient
+from google.cloud.billing_v1.services.cloud_catalog import CloudCatalogClient
+
+from _timing import measure, measure_async
+
+
+DATASET = SyntheticDataset(accounts=20, services=5, skus_per_service=200)
+PAGE_SIZE = 100
+
+
+def workload(billing, catalog) -> int:
+    accounts = list(billing.list_billing_accounts())
+    billing.get_billing_account(name=accounts[0].name)
+    skus = 0
+    for service in catalog.list_services():
+        skus += sum(1 for _ in catalog.list_skus(parent=service.name))
+    return skus
+
+
+async def workload_async(billing, catalog) -> int:
+    pager = await billing.list_billing_accounts()
+    accounts = [account async for account in pager]
+    await billing.get_billing_account(name=accounts[0].name)
+    skus = 0
+    async for service in await catalog.list_services():
+        async for _ in await catalog.list_skus(parent=service.name):
+            skus += 1
+    return skus
+
+
+def record() -> Cassette:
+    cassette = Cassette()
+    with FakeBillingServer(DATASET, page_size=PAGE_SIZE) as server:
+        clients = []
+        for client_class in (CloudBillingClient, CloudCatalogClient):
+            transport_class = client_class.get_transport_class("grpc")
+            channel = cassette.record(grpc.insecure_channel(server.address))
+            clients.append(client_class(transport=transport_class(channel=channel)))
+        workload(*clients)
+    return cassette
+
+
+def run(cassette=None):
+    cassette = cassette or record()
+
+    def replay():
+        return workload(
+            cassette.replay_client(CloudBillingClient),
+            cassette.replay_client(CloudCatalogClient),
+        )
+
+    def replay_async_factory():
+        async def replay_async():
+            return await workload_async(
+                cassette.replay_client(CloudBillingAsyncClient),
+                cassette.replay_client(CloudCatalogAsyncClient),
+            )
+
+        return replay_async
+
+    return {
+        "replay.workload": measure(replay, number=5, repeat=5),
+        "replay.workload_async": measure_async(
+            replay_async_factory, number=5, repeat=5
+        ),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cassette", help="A cassette to replay.")
+    args = parser.parse_args()
+    loaded = Cassette.load(args.cassette) if args.cassette else None
+    print(json.dumps(run(loaded), indent=2, sort_keys=True))
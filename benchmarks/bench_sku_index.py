@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""``SkuIndex`` queries versus a linear scan over a synthetic catalog.
+
+Run with ``python benchmarks/bench_sku_index.py``.
+"""
+
+import json
+import random
+
+from google.cloud.billing_v1.sku_index import SkuIndex
+from google.cloud.billing_v1.types import cloud_catalog
+
+from _timing import measure, per_item
+
+
+REGIONS = ["region-{:02d}".format(i) for i in range(30)]
+GROUPS = ["GPU", "CPU", "RAM", "SSD", "Network", "License"]
+USAGE_TYPES = ["OnDemand", "Preemptible", "Commit1Yr", "Commit3Yr"]
+
+
+def make_skus(count: int = 50000):
+    rng = random.Random(0)
+    skus = []
+    for number in range(count):
+        sku = cloud_catalog.Sku(
+            name="services/SVC-{:03d}/skus/{}".format(number % 200, number)
+        )
+        sku_pb = cloud_catalog.Sku.pb(sku)
+        sku_pb.service_regions.extend(rng.sample(REGIONS, 2))
+        sku_pb.category.resource_family = "Compute"
+        sku_pb.category.resource_group = rng.choice(GROUPS)
+        sku_pb.category.usage_type = rng.choice(USAGE_TYPES)
+        skus.append(sku)
+    return skus
+
+
+def linear_scan(skus, region, group, usage_type):
+    # The scan the index replaces.
+    return [
+        sku
+        for sku in skus
+        if region in sku.service_regions
+        and sku.category.resource_group == group
+        and sku.category.usage_type == usage_type
+    ]
+
+
+def run(count: int = 50000, repeat: int = 5):
+    skus = make_skus(count)
+    index = SkuIndex(skus)
+    query = dict(
+        service_region="region-07", resource_group="GPU", usage_type="Preemptible"
+    )
+    return {
+        "sku_index.build.per_sku": per_item(
+            measure(lambda: SkuIndex(skus), number=1, repeat=repeat), count
+        ),
+        "sku_index.query": dict(
+            measure(lambda: index.query(**query), number=100, repeat=repeat),
+            skus=count,
+            matches=index.count(**query),
+        ),
+        "sku_index.linear_scan": measure(
+            lambda: linear_scan(skus, "region-07", "GPU", "Preemptible"),
+            number=1,
+            repeat=repeat,
+        ),
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2, sort_keys=True))
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Latency of the first call of a new client, with and without warm-up.
+
+Each sample builds a client on a new channel with its own connection, as a
+cold-started process does, spends ``INIT_WORK`` seconds on the rest of its
+initialization, and then times its first call against a local server:
+
+* ``cold``: the channel connects on the first call.
+* ``eager_connect``: the client is built with ``eager_connect=True``, so
+  the channel connects during the rest of the initialization.
+* ``warmup``: ``warmup()`` is called before the rest of the
+  initialization.
+
+Against a local server, the connection only costs a TCP and HTTP/2
+handshake; against the service, TLS and the token fetch add to it.
+
+Run with ``python benchmarks/bench_startup.py``.
+"""
+
+import json
+import statistics
+import time
+
+import grpc
+
+from google.cloud.billing_v1.fake_server import FakeBillingServer
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingClient
+from google.cloud.billing_v1.services.cloud_billing.transports import (
+    CloudBillingGrpcTransport,
+)
+
+
+INIT_WORK = 0.05
+MODES = ("cold", "eager_connect", "warmup")
+
+# Without it, the channels of successive samples would share a connection.
+_OPTIONS = [("grpc.use_local_subchannel_pool", 1)]
+
+
+def first_call(address: str, mode: str, name: str) -> float:
+    channel = grpc.insecure_channel(address, options=_OPTIONS)
+    client = CloudBillingClient(
+        transport=CloudBillingGrpcTransport(
+            channel=channel, eager_connect=mode == "eager_connect"
+        )
+    )
+    if mode == "warmup":
+        client.warmup(timeout=10)
+    time.sleep(INIT_WORK)
+    start = time.perf_counter()
+    client.get_billing_account(name=name)
+    elapsed = time.perf_counter() - start
+    channel.close()
+    return elapsed
+
+
+def run(repeat: int = 20):
+    server = FakeBillingServer().start()
+    name = next(iter(server.dataset.accounts))
+    results = {}
+    try:
+        for mode in MODES:
+            samples = [
+                first_call(server.address, mode, name) * 1e6 for _ in range(repeat)
+            ]
+            results["startup.{}.first_call".format(mode)] = {
+                "number": 1,
+                "repeat": repeat,
+                "best_us": min(samples),
+                "median_us": statistics.median(samples),
+            }
+    finally:
+        server.stop()
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2, sort_keys=True))
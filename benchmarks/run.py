@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Run the benchmark suite and report the results as JSON.
+
+Every ``bench_*.py`` module next to this script exposes a ``run()``
+function returning its results by name. The runner merges them, together
+with a description of the environment, into one JSON document with sorted
+keys, so that the output of two commits can be diffed or compared with
+``--compare``.
+
+Run with ``nox -s benchmark`` or ``python benchmarks/run.py``::
+
+    python benchmarks/run.py --output before.json
+    python benchmarks/run.py client pricing --compare before.json
+"""
+
+import argparse
+import glob
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+
+import pkg_resources
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+_PACKAGES = (
+    "google-api-core",
+    "google-cloud-billing",
+    "grpcio",
+    "numpy",
+    "proto-plus",
+    "protobuf",
+)
+
+
+def available() -> list:
+    """Return the names of the benchmark modules, without ``bench_``."""
+    paths = glob.glob(os.path.join(HERE, "bench_*.py"))
+    return sorted(os.path.basename(path)[len("bench_") : -len(".py")] for path in paths)
+
+
+def _version(package: str):
+    try:
+        return pkg_resources.get_distribution(package).version
+    except pkg_resources.DistributionNotFound:
+        return None
+
+
+def _commit():
+    try:
+        output = subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=HERE, stderr=subprocess.DEVNULL
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.decode("ascii").strip()
+
+
+def environment() -> dict:
+    """Describe what the results were measured with."""
+    return {
+        "commit": _commit(),
+        "machine": platform.machine(),
+        "packages": {package: _version(package) for package in _PACKAGES},
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "python_implementation": platform.python_implementation(),
+    }
+
+
+def run(names) -> dict:
+    """Run benchmark modules and merge their results.
+
+    Args:
+        names (Sequence[str]): The modules to run, as listed by
+            :func:`available`.
+
+    Returns:
+        dict: The environment and the results, by benchmark name.
+    """
+    if HERE not in sys.path:
+        sys.path.insert(0, HERE)
+    results = {}
+    for name in names:
+        print("Running bench_{}...".format(name), file=sys.stderr)
+        module = importlib.import_module("bench_" + name)
+        results.update(module.run())
+    return {"environment": environment(), "results": results}
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> bool:
+    """Print how each shared result changed against a baseline.
+
+    Args:
+        baseline (dict): Earlier output of :func:`run`.
+        current (dict): Later output of :func:`run`.
+        threshold (float): The ratio of best times above which a result
+            is reported as a regression.
+
+    Returns:
+        bool: Whether any result regressed.
+    """
+    regressed = False
+    before, after = baseline["results"], current["results"]
+    for name in sorted(set(before) & set(after)):
+        ratio = after[name]["best_us"] / before[name]["best_us"]
+        flag = ""
+        if ratio > threshold:
+            flag = "  REGRESSION"
+            regressed = True
+        print(
+            "{:<60} {:>12.3f} -> {:>12.3f} us  x{:.2f}{}".format(
+                name, before[name]["best_us"], after[name]["best_us"], ratio, flag
+            ),
+            file=sys.stderr,
+        )
+    return regressed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "names",
+        nargs="*",
+        metavar="NAME",
+        help="benchmarks to run, of: {} (default: all)".format(", ".join(available())),
+    )
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--compare", help="compare with the results in this file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.2,
+        help="slowdown ratio reported as a regression (default: 1.2)",
+    )
+    args = parser.parse_args(argv)
+
+    names = args.names or available()
+    unknown = sorted(set(names) - set(available()))
+    if unknown:
+        parser.error("unknown benchmarks: {}".format(", ".join(unknown)))
+
+    results = run(names)
+    document = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(document + "\n")
+    else:
+        print(document)
+
+    if args.compare:
+        with open(args.compare) as baseline:
+            if compare(json.load(baseline), results, args.threshold):
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
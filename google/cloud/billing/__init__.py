@@ -15,35 +15,81 @@
 # limitations under the License.
 #
 
-from google.cloud.billing_v1.services.cloud_billing.async_client import (
-    CloudBillingAsyncClient,
-)
-from google.cloud.billing_v1.services.cloud_billing.client import CloudBillingClient
-from google.cloud.billing_v1.services.cloud_catalog.async_client import (
-    CloudCatalogAsyncClient,
+
+import typing
+
+from google.cloud.billing_v1 import _lazy
+
+if typing.TYPE_CHECKING:  # pragma: NO COVER
+    from google.cloud.billing_v1.services.cloud_billing.async_client import (
+        CloudBillingAsyncClient,
+    )
+    from google.cloud.billing_v1.services.cloud_billing.client import CloudBillingClient
+    from google.cloud.billing_v1.services.cloud_catalog.async_client import (
+        CloudCatalogAsyncClient,
+    )
+    from google.cloud.billing_v1.services.cloud_catalog.client import CloudCatalogClient
+    from google.cloud.billing_v1.types.cloud_billing import BillingAccount
+    from google.cloud.billing_v1.types.cloud_billing import CreateBillingAccountRequest
+    from google.cloud.billing_v1.types.cloud_billing import GetBillingAccountRequest
+    from google.cloud.billing_v1.types.cloud_billing import GetProjectBillingInfoRequest
+    from google.cloud.billing_v1.types.cloud_billing import ListBillingAccountsRequest
+    from google.cloud.billing_v1.types.cloud_billing import ListBillingAccountsResponse
+    from google.cloud.billing_v1.types.cloud_billing import (
+        ListProjectBillingInfoRequest,
+    )
+    from google.cloud.billing_v1.types.cloud_billing import (
+        ListProjectBillingInfoResponse,
+    )
+    from google.cloud.billing_v1.types.cloud_billing import ProjectBillingInfo
+    from google.cloud.billing_v1.types.cloud_billing import UpdateBillingAccountRequest
+    from google.cloud.billing_v1.types.cloud_billing import (
+        UpdateProjectBillingInfoRequest,
+    )
+    from google.cloud.billing_v1.types.cloud_catalog import AggregationInfo
+    from google.cloud.billing_v1.types.cloud_catalog import Category
+    from google.cloud.billing_v1.types.cloud_catalog import ListServicesRequest
+    from google.cloud.billing_v1.types.cloud_catalog import ListServicesResponse
+    from google.cloud.billing_v1.types.cloud_catalog import ListSkusRequest
+    from google.cloud.billing_v1.types.cloud_catalog import ListSkusResponse
+    from google.cloud.billing_v1.types.cloud_catalog import PricingExpression
+    from google.cloud.billing_v1.types.cloud_catalog import PricingInfo
+    from google.cloud.billing_v1.types.cloud_catalog import Service
+    from google.cloud.billing_v1.types.cloud_catalog import Sku
+
+_SERVICES = "google.cloud.billing_v1.services."
+_TYPES = "google.cloud.billing_v1.types."
+
+__getattr__, __dir__ = _lazy.attach(
+    __name__,
+    {
+        "CloudBillingAsyncClient": _SERVICES + "cloud_billing.async_client",
+        "CloudBillingClient": _SERVICES + "cloud_billing.client",
+        "CloudCatalogAsyncClient": _SERVICES + "cloud_catalog.async_client",
+        "CloudCatalogClient": _SERVICES + "cloud_catalog.client",
+        "BillingAccount": _TYPES + "cloud_billing",
+        "CreateBillingAccountRequest": _TYPES + "cloud_billing",
+        "GetBillingAccountRequest": _TYPES + "cloud_billing",
+        "GetProjectBillingInfoRequest": _TYPES + "cloud_billing",
+        "ListBillingAccountsRequest": _TYPES + "cloud_billing",
+        "ListBillingAccountsResponse": _TYPES + "cloud_billing",
+        "ListProjectBillingInfoRequest": _TYPES + "cloud_billing",
+        "ListProjectBillingInfoResponse": _TYPES + "cloud_billing",
+        "ProjectBillingInfo": _TYPES + "cloud_billing",
+        "UpdateBillingAccountRequest": _TYPES + "cloud_billing",
+        "UpdateProjectBillingInfoRequest": _TYPES + "cloud_billing",
+        "AggregationInfo": _TYPES + "cloud_catalog",
+        "Category": _TYPES + "cloud_catalog",
+        "ListServicesRequest": _TYPES + "cloud_catalog",
+        "ListServicesResponse": _TYPES + "cloud_catalog",
+        "ListSkusRequest": _TYPES + "cloud_catalog",
+        "ListSkusResponse": _TYPES + "cloud_catalog",
+        "PricingExpression": _TYPES + "cloud_catalog",
+        "PricingInfo": _TYPES + "cloud_catalog",
+        "Service": _TYPES + "cloud_catalog",
+        "Sku": _TYPES + "cloud_catalog",
+    },
 )
-from google.cloud.billing_v1.services.cloud_catalog.client import CloudCatalogClient
-from google.cloud.billing_v1.types.cloud_billing import BillingAccount
-from google.cloud.billing_v1.types.cloud_billing import CreateBillingAccountRequest
-from google.cloud.billing_v1.types.cloud_billing import GetBillingAccountRequest
-from google.cloud.billing_v1.types.cloud_billing import GetProjectBillingInfoRequest
-from google.cloud.billing_v1.types.cloud_billing import ListBillingAccountsRequest
-from google.cloud.billing_v1.types.cloud_billing import ListBillingAccountsResponse
-from google.cloud.billing_v1.types.cloud_billing import ListProjectBillingInfoRequest
-from google.cloud.billing_v1.types.cloud_billing import ListProjectBillingInfoResponse
-from google.cloud.billing_v1.types.cloud_billing import ProjectBillingInfo
-from google.cloud.billing_v1.types.cloud_billing import UpdateBillingAccountRequest
-from google.cloud.billing_v1.types.cloud_billing import UpdateProjectBillingInfoRequest
-from google.cloud.billing_v1.types.cloud_catalog import AggregationInfo
-from google.cloud.billing_v1.types.cloud_catalog import Category
-from google.cloud.billing_v1.types.cloud_catalog import ListServicesRequest
-from google.cloud.billing_v1.types.cloud_catalog import ListServicesResponse
-from google.cloud.billing_v1.types.cloud_catalog import ListSkusRequest
-from google.cloud.billing_v1.types.cloud_catalog import ListSkusResponse
-from google.cloud.billing_v1.types.cloud_catalog import PricingExpression
-from google.cloud.billing_v1.types.cloud_catalog import PricingInfo
-from google.cloud.billing_v1.types.cloud_catalog import Service
-from google.cloud.billing_v1.types.cloud_catalog import Sku
 
 __all__ = (
     "AggregationInfo",
@@ -15,30 +15,67 @@
 # limitations under the License.
 #
 
-from .services.cloud_billing import CloudBillingClient
-from .services.cloud_catalog import CloudCatalogClient
-from .types.cloud_billing import BillingAccount
-from .types.cloud_billing import CreateBillingAccountRequest
-from .types.cloud_billing import GetBillingAccountRequest
-from .types.cloud_billing import GetProjectBillingInfoRequest
-from .types.cloud_billing import ListBillingAccountsRequest
-from .types.cloud_billing import ListBillingAccountsResponse
-from .types.cloud_billing import ListProjectBillingInfoRequest
-from .types.cloud_billing import ListProjectBillingInfoResponse
-from .types.cloud_billing import ProjectBillingInfo
-from .types.cloud_billing import UpdateBillingAccountRequest
-from .types.cloud_billing import UpdateProjectBillingInfoRequest
-from .types.cloud_catalog import AggregationInfo
-from .types.cloud_catalog import Category
-from .types.cloud_catalog import ListServicesRequest
-from .types.cloud_catalog import ListServicesResponse
-from .types.cloud_catalog import ListSkusRequest
-from .types.cloud_catalog import ListSkusResponse
-from .types.cloud_catalog import PricingExpression
-from .types.cloud_catalog import PricingInfo
-from .types.cloud_catalog import Service
-from .types.cloud_catalog import Sku
 
+import typing
+
+from google.cloud.billing_v1 import _lazy
+
+if typing.TYPE_CHECKING:  # pragma: NO COVER
+    from .services.cloud_billing import CloudBillingClient
+    from .services.cloud_catalog import CloudCatalogClient
+    from .types.cloud_billing import BillingAccount
+    from .types.cloud_billing import CreateBillingAccountRequest
+    from .types.cloud_billing import GetBillingAccountRequest
+    from .types.cloud_billing import GetProjectBillingInfoRequest
+    from .types.cloud_billing import ListBillingAccountsRequest
+    from .types.cloud_billing import ListBillingAccountsResponse
+    from .types.cloud_billing import ListProjectBillingInfoRequest
+    from .types.cloud_billing import ListProjectBillingInfoResponse
+    from .types.cloud_billing import ProjectBillingInfo
+    from .types.cloud_billing import UpdateBillingAccountRequest
+    from .types.cloud_billing import UpdateProjectBillingInfoRequest
+    from .types.cloud_catalog import AggregationInfo
+    from .types.cloud_catalog import Category
+    from .types.cloud_catalog import ListServicesRequest
+    from .types.cloud_catalog import ListServicesResponse
+    from .types.cloud_catalog import ListSkusRequest
+    from .types.cloud_catalog import ListSkusResponse
+    from .types.cloud_catalog import PricingExpression
+    from .types.cloud_catalog import PricingInfo
+    from .types.cloud_catalog import Service
+    from .types.cloud_catalog import Sku
+
+_SERVICES = ".services."
+_TYPES = ".types."
+
+__getattr__, __dir__ = _lazy.attach(
+    __name__,
+    {
+        "CloudBillingClient": _SERVICES + "cloud_billing",
+        "CloudCatalogClient": _SERVICES + "cloud_catalog",
+        "BillingAccount": _TYPES + "cloud_billing",
+        "CreateBillingAccountRequest": _TYPES + "cloud_billing",
+        "GetBillingAccountRequest": _TYPES + "cloud_billing",
+        "GetProjectBillingInfoRequest": _TYPES + "cloud_billing",
+        "ListBillingAccountsRequest": _TYPES + "cloud_billing",
+        "ListBillingAccountsResponse": _TYPES + "cloud_billing",
+        "ListProjectBillingInfoRequest": _TYPES + "cloud_billing",
+        "ListProjectBillingInfoResponse": _TYPES + "cloud_billing",
+        "ProjectBillingInfo": _TYPES + "cloud_billing",
+        "UpdateBillingAccountRequest": _TYPES + "cloud_billing",
+        "UpdateProjectBillingInfoRequest": _TYPES + "cloud_billing",
+        "AggregationInfo": _TYPES + "cloud_catalog",
+        "Category": _TYPES + "cloud_catalog",
+        "ListServicesRequest": _TYPES + "cloud_catalog",
+        "ListServicesResponse": _TYPES + "cloud_catalog",
+        "ListSkusRequest": _TYPES + "cloud_catalog",
+        "ListSkusResponse": _TYPES + "cloud_catalog",
+        "PricingExpression": _TYPES + "cloud_catalog",
+        "PricingInfo": _TYPES + "cloud_catalog",
+        "Service": _TYPES + "cloud_catalog",
+        "Sku": _TYPES + "cloud_catalog",
+    },
+)
 
 __all__ = (
     "AggregationInfo",
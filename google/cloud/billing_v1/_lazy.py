@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Load the public names of a package on first use.
+
+Importing the clients imports gRPC, ``google.api_core`` and the IAM
+protos. The packages export their names through a module ``__getattr__``
+(PEP 562) instead, so that a script pays only for the names it uses.
+"""
+
+import importlib
+import sys
+from typing import Callable, Dict, List, Tuple
+
+
+def attach(
+    package: str, exports: Dict[str, str]
+) -> Tuple[Callable[[str], object], Callable[[], List[str]]]:
+    """Make the names of a package load from their modules on first use.
+
+    Use it as::
+
+        __getattr__, __dir__ = _lazy.attach(__name__, {"Name": ".module"})
+
+    Python 3.6 does not call a module's ``__getattr__``, so there the
+    names are loaded at once.
+
+    Args:
+        package (str): The name of the package.
+        exports (Dict[str, str]): The module that defines each name,
+            absolute or relative to ``package``.
+
+    Returns:
+        Tuple[Callable[[str], object], Callable[[], List[str]]]: The
+            package's ``__getattr__`` and ``__dir__``.
+    """
+    namespace = vars(sys.modules[package])
+
+    def __getattr__(name: str) -> object:
+        try:
+            module = exports[name]
+        except KeyError:
+            raise AttributeError(
+                "module {!r} has no attribute {!r}".format(package, name)
+            ) from None
+        value = getattr(importlib.import_module(module, package), name)
+        # Later lookups find the name without calling __getattr__.
+        namespace[name] = value
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(namespace) | set(exports))
+
+    if sys.version_info < (3, 7):
+        for name in exports:
+            __getattr__(name)
+    return __getattr__, __dir__
@@ -0,0 +1,788 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Record the calls of a client to a file, and replay them offline.
+
+A :class:`Cassette` holds the unary calls of a client: for each, the
+method, the serialized request and response, the status and how long the
+call took. :meth:`Cassette.record` wraps the channel of a transport to
+fill the cassette from live calls, and :meth:`Cassette.dump` saves it.
+:meth:`Cassette.replay` returns a channel that answers the calls from the
+cassette without a network: as slowly as they were recorded, faster, or
+at once. A workload captured once can then be replayed by benchmarks and
+tests, to compare the client-side cost of two releases.
+
+The cassette sits below the transport, so the stock gRPC transports, and
+the concurrency limiter, hedging and circuit breaker they may carry, run
+as they do against the service. A recorded call is replayed for a call of
+the same method with the same serialized request, in the order in which
+the calls were recorded.
+
+Example:
+    >>> cassette = Cassette()
+    >>> transport = CloudBillingGrpcTransport(channel=cassette.record(channel))
+    >>> client = CloudBillingClient(transport=transport)
+    >>> ...
+    >>> cassette.dump("workload.cassette")
+
+    >>> cassette = Cassette.load("workload.cassette")
+    >>> client = cassette.replay_client(CloudBillingClient, speed=10)
+"""
+
+import asyncio
+import collections
+from concurrent import futures
+import functools
+import json
+import threading
+import time
+from typing import (
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+import grpc  # type: ignore
+from grpc.experimental import aio  # type: ignore
+import proto  # type: ignore
+
+from google.api_core import exceptions  # type: ignore
+from google.cloud.billing_v1.services import _forwarding_channel
+from google.cloud.billing_v1.services import _records
+
+
+_MAGIC = b"GCBCASv1"
+_RECORD_CALL = 1
+_RECORD_REQUEST = 2
+_RECORD_RESPONSE = 3
+
+_UNARY_ONLY = "A cassette only records and replays unary calls."
+
+
+class UnrecordedCallError(exceptions.GoogleAPICallError):
+    """Raised when a replayed client makes a call that was not recorded.
+
+    Attributes:
+        method (str): The full name of the method.
+    """
+
+    def __init__(self, method: str):
+        super().__init__(
+            "No recorded call of {} matches the request, or all have been "
+            "replayed.".format(method)
+        )
+        self.method = method
+
+
+class Interaction:
+    """A recorded unary call.
+
+    Attributes:
+        method (str): The full name of the method, e.g.
+            ``"/google.cloud.billing.v1.CloudBilling/GetBillingAccount"``.
+        request (bytes): The serialized request.
+        response (bytes): The serialized response; empty if the call
+            failed.
+        code (grpc.StatusCode): The status of the call.
+        details (str): The error message of a failed call.
+        start (float): When the call started, in seconds after the first
+            recorded call.
+        duration (float): How long the call took, in seconds.
+    """
+
+    __slots__ = (
+        "method",
+        "request",
+        "response",
+        "code",
+        "details",
+        "start",
+        "duration",
+    )
+
+    def __init__(
+        self,
+        method: str,
+        request: bytes,
+        response: bytes = b"",
+        *,
+        code: grpc.StatusCode = grpc.StatusCode.OK,
+        details: str = "",
+        start: float = 0.0,
+        duration: float = 0.0,
+    ):
+        self.method = method
+        self.request = request
+        self.response = response
+        self.code = code
+        self.details = details
+        self.start = start
+        self.duration = duration
+
+    def __repr__(self) -> str:
+        return "{0}<method={1!r}, code={2}, duration={3:.6f}>".format(
+            self.__class__.__name__, self.method, self.code.name, self.duration
+        )
+
+
+class Cassette:
+    """The recorded unary calls of one or more clients.
+
+    The same instance may record the channels of several transports, from
+    threads and event loops at once.
+    """
+
+    def __init__(
+        self,
+        interactions: Iterable[Interaction] = (),
+        *,
+        timer: Callable[[], float] = time.perf_counter,
+    ):
+        """Instantiate the cassette.
+
+        Args:
+            interactions (Iterable[~.Interaction]): The calls already
+                recorded.
+            timer (Callable[[], float]): The clock that times recorded
+                calls, in seconds.
+        """
+        self._interactions = list(interactions)
+        self._timer = timer
+        self._origin = None  # type: Optional[float]
+        self._lock = threading.Lock()
+
+    @property
+    def interactions(self) -> List[Interaction]:
+        """List[~.Interaction]: The recorded calls, in the order they ended."""
+        with self._lock:
+            return list(self._interactions)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._interactions)
+
+    def _start(self) -> float:
+        started = self._timer()
+        with self._lock:
+            if self._origin is None:
+                self._origin = started
+        return started
+
+    def _add(
+        self,
+        method: str,
+        request: bytes,
+        started: float,
+        response=None,
+        error: Optional[grpc.RpcError] = None,
+    ) -> None:
+        duration = self._timer() - started
+        if error is None:
+            interaction = Interaction(method, request, _serialize(response))
+        else:
+            interaction = Interaction(
+                method, request, code=error.code(), details=error.details() or ""
+            )
+        interaction.duration = duration
+        with self._lock:
+            interaction.start = started - self._origin
+            self._interactions.append(interaction)
+
+    def record(self, channel):
+        """Wrap a channel so that its unary calls are recorded.
+
+        Args:
+            channel (Union[grpc.Channel, aio.Channel]): The channel to the
+                service.
+
+        Returns:
+            Union[grpc.Channel, aio.Channel]: The recording channel, to
+                give to a transport.
+        """
+        if isinstance(channel, aio.Channel):
+            return _RecordingAioChannel(channel, self)
+        return _RecordingChannel(channel, self)
+
+    def replay(
+        self, *, speed: Optional[float] = None, repeat: bool = False
+    ) -> grpc.Channel:
+        """Create a channel that answers calls from the cassette.
+
+        Each channel replays the cassette from its start.
+
+        Args:
+            speed (Optional[float]): How much faster than recorded the calls
+                complete: 1 at the recorded speed, 10 ten times faster.
+                ``None`` completes them at once.
+            repeat (bool): Answer a call whose recorded calls have all been
+                replayed with the last of them, instead of failing it.
+
+        Returns:
+            grpc.Channel: The channel, to give to a transport.
+
+        Raises:
+            ValueError: If ``speed`` is not positive.
+        """
+        return _ReplayChannel(_Player(self.interactions, speed, repeat))
+
+    def replay_async(
+        self, *, speed: Optional[float] = None, repeat: bool = False
+    ) -> aio.Channel:
+        """Create an asyncio channel that answers calls from the cassette.
+
+        Args:
+            speed (Optional[float]): As for :meth:`replay`.
+            repeat (bool): As for :meth:`replay`.
+
+        Returns:
+            aio.Channel: The channel, to give to a transport.
+
+        Raises:
+            ValueError: If ``speed`` is not positive.
+        """
+        return _ReplayAioChannel(_Player(self.interactions, speed, repeat))
+
+    def replay_client(
+        self,
+        client_class: type,
+        *,
+        speed: Optional[float] = None,
+        repeat: bool = False,
+        **kwargs,
+    ):
+        """Create a stock client that answers calls from the cassette.
+
+        Args:
+            client_class (type): ``CloudBillingClient``,
+                ``CloudCatalogClient`` or one of their async variants.
+            speed (Optional[float]): As for :meth:`replay`.
+            repeat (bool): As for :meth:`replay`.
+            kwargs: Passed to the transport, e.g. ``circuit_breaker``.
+
+        Returns:
+            The client.
+        """
+        if client_class.__name__.endswith("AsyncClient"):
+            transport_class = client_class.get_transport_class("grpc_asyncio")
+            channel = self.replay_async(speed=speed, repeat=repeat)
+        else:
+            transport_class = client_class.get_transport_class("grpc")
+            channel = self.replay(speed=speed, repeat=repeat)
+        return client_class(transport=transport_class(channel=channel, **kwargs))
+
+    def dump(self, path: str) -> None:
+        """Write the cassette to ``path``.
+
+        The file is written to a temporary sibling and then renamed into
+        place, so that readers never see a partial cassette.
+        """
+        _records.write(path, _MAGIC, self._iter_records())
+
+    def _iter_records(self) -> Iterator[Tuple[int, bytes]]:
+        for interaction in self.interactions:
+            call = {
+                "method": interaction.method,
+                "code": interaction.code.name,
+                "details": interaction.details,
+                "start": interaction.start,
+                "duration": interaction.duration,
+            }
+            yield _RECORD_CALL, json.dumps(call).encode("utf-8")
+            yield _RECORD_REQUEST, interaction.request
+            yield _RECORD_RESPONSE, interaction.response
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        """Read a cassette previously written with :meth:`dump`.
+
+        Raises:
+            ValueError: If ``path`` does not contain a cassette.
+        """
+        interactions = []
+        for kind, payload in _records.read(path, _MAGIC, "cassette"):
+            if kind == _RECORD_CALL:
+                call = json.loads(payload.decode("utf-8"))
+                interactions.append(
+                    Interaction(
+                        call["method"],
+                        b"",
+                        code=grpc.StatusCode[call["code"]],
+                        details=call["details"],
+                        start=call["start"],
+                        duration=call["duration"],
+                    )
+                )
+            elif kind in (_RECORD_REQUEST, _RECORD_RESPONSE):
+                if not interactions:
+                    raise ValueError("Malformed cassette {!r}.".format(path))
+                if kind == _RECORD_REQUEST:
+                    interactions[-1].request = payload
+                else:
+                    interactions[-1].response = payload
+            # Unknown record kinds are skipped for forward compatibility.
+
+        return cls(interactions)
+
+    def __repr__(self) -> str:
+        return "{0}<interactions={1}>".format(self.__class__.__name__, len(self))
+
+
+def _serialize(message) -> bytes:
+    if isinstance(message, proto.Message):
+        return type(message).serialize(message)
+    if isinstance(message, bytes):
+        return message
+    # A protobuf message, e.g. an IAM policy.
+    return message.SerializeToString()
+
+
+def _identity(value):
+    return value
+
+
+# Recording.
+
+
+class _RecordingChannel(_forwarding_channel.ForwardingChannel):
+    def __init__(self, channel: grpc.Channel, cassette: Cassette):
+        super().__init__(channel)
+        self._cassette = cassette
+
+    def unary_unary(
+        self, method, request_serializer=None, response_deserializer=None, **kwargs
+    ):
+        return _RecordingUnaryUnaryMultiCallable(
+            self._cassette,
+            method,
+            request_serializer or _identity,
+            self._channel.unary_unary(
+                method,
+                request_serializer=request_serializer,
+                response_deserializer=response_deserializer,
+                **kwargs,
+            ),
+        )
+
+
+class _RecordingUnaryUnaryMultiCallable(grpc.UnaryUnaryMultiCallable):
+    def __init__(self, cassette: Cassette, method: str, serializer, callable_):
+        self._cassette = cassette
+        self._method = method
+        self._serializer = serializer
+        self._callable = callable_
+
+    def _add(self, request, started, response=None, error=None):
+        self._cassette._add(
+            self._method, self._serializer(request), started, response, error
+        )
+
+    def __call__(self, request, *args, **kwargs):
+        started = self._cassette._start()
+        try:
+            response = self._callable(request, *args, **kwargs)
+        except grpc.RpcError as exc:
+            self._add(request, started, error=exc)
+            raise
+        self._add(request, started, response)
+        return response
+
+    def with_call(self, request, *args, **kwargs):
+        started = self._cassette._start()
+        try:
+            response, call = self._callable.with_call(request, *args, **kwargs)
+        except grpc.RpcError as exc:
+            self._add(request, started, error=exc)
+            raise
+        self._add(request, started, response)
+        return response, call
+
+    def future(self, request, *args, **kwargs):
+        started = self._cassette._start()
+        future = self._callable.future(request, *args, **kwargs)
+        future.add_done_callback(lambda done: self._done(request, started, done))
+        return future
+
+    def _done(self, request, started, future):
+        # A hedged call cancels the attempts it does not need.
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is None:
+            self._add(request, started, future.result())
+        else:
+            self._add(request, started, error=error)
+
+
+class _RecordingAioChannel(_forwarding_channel.ForwardingAioChannel):
+    def __init__(self, channel: aio.Channel, cassette: Cassette):
+        super().__init__(channel)
+        self._cassette = cassette
+
+    def unary_unary(
+        self, method, request_serializer=None, response_deserializer=None, **kwargs
+    ):
+        return _RecordingAioUnaryUnaryMultiCallable(
+            self._cassette,
+            method,
+            request_serializer or _identity,
+            self._channel.unary_unary(
+                method,
+                request_serializer=request_serializer,
+                response_deserializer=response_deserializer,
+                **kwargs,
+            ),
+        )
+
+
+class _RecordingAioUnaryUnaryMultiCallable(aio.UnaryUnaryMultiCallable):
+    def __init__(self, cassette: Cassette, method: str, serializer, callable_):
+        self._cassette = cassette
+        self._method = method
+        self._serializer = serializer
+        self._callable = callable_
+
+    def __call__(self, request, *args, **kwargs):
+        started = self._cassette._start()
+        call = self._callable(request, *args, **kwargs)
+        return _RecordingAioCall(
+            functools.partial(
+                self._cassette._add, self._method, self._serializer(request), started
+            ),
+            call,
+        )
+
+
+class _RecordingAioCall:
+    """An awaitable unary call that records its outcome."""
+
+    def __init__(self, add: Callable, call):
+        self._add = add
+        self._call = call
+
+    async def _run(self):
+        try:
+            response = await self._call
+        except grpc.RpcError as exc:
+            self._add(error=exc)
+            raise
+        self._add(response)
+        return response
+
+    def __await__(self):
+        return self._run().__await__()
+
+    def cancel(self) -> bool:
+        return self._call.cancel()
+
+
+# Replay.
+
+
+class _Player:
+    """Matches the calls of a replay channel with the recorded calls."""
+
+    def __init__(
+        self, interactions: Iterable[Interaction], speed: Optional[float], repeat: bool
+    ):
+        if speed is not None and speed <= 0:
+            raise ValueError("speed must be positive.")
+        self._speed = speed
+        self._repeat = repeat
+        self._queues = {}  # type: Dict[Tuple[str, bytes], Deque[Interaction]]
+        for interaction in interactions:
+            key = (interaction.method, interaction.request)
+            self._queues.setdefault(key, collections.deque()).append(interaction)
+        self._last = {}  # type: Dict[Tuple[str, bytes], Interaction]
+        self._lock = threading.Lock()
+
+    def play(
+        self, method: str, request: bytes, deserializer, timeout: Optional[float]
+    ) -> Tuple[Callable[[], object], float]:
+        """Find the recorded call of a call.
+
+        Returns:
+            Tuple[Callable[[], object], float]: A function that returns the
+                response or raises the error of the call, and how long to
+                wait before calling it.
+        """
+        key = (method, request)
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue:
+                interaction = self._last[key] = queue.popleft()
+            elif self._repeat and key in self._last:
+                interaction = self._last[key]
+            else:
+                raise UnrecordedCallError(method)
+
+        delay = 0.0 if self._speed is None else interaction.duration / self._speed
+        if timeout is not None and delay > timeout:
+            error = _ReplayedRpcError(
+                grpc.StatusCode.DEADLINE_EXCEEDED, "Deadline Exceeded"
+            )
+            return functools.partial(_raise, error), timeout
+        if interaction.code != grpc.StatusCode.OK:
+            error = _ReplayedRpcError(interaction.code, interaction.details)
+            return functools.partial(_raise, error), delay
+        return functools.partial(deserializer, interaction.response), delay
+
+
+def _raise(error: Exception):
+    raise error
+
+
+class _ReplayedRpcError(grpc.RpcError, grpc.Call):
+    """The error of a replayed call that failed."""
+
+    def __init__(self, code: grpc.StatusCode, details: str):
+        super().__init__(details)
+        self._code = code
+        self._details = details
+
+    def code(self):
+        return self._code
+
+    def details(self):
+        return self._details
+
+    def initial_metadata(self):
+        return ()
+
+    def trailing_metadata(self):
+        return ()
+
+    def is_active(self):
+        return False
+
+    def time_remaining(self):
+        return None
+
+    def cancel(self):
+        return False
+
+    def add_callback(self, callback):
+        return False
+
+
+class _OfflineChannel(grpc.Channel):
+    """A channel without a connection, which is always ready."""
+
+    def _unary_only(self, method, *args, **kwargs):
+        raise NotImplementedError(_UNARY_ONLY)
+
+    unary_unary = unary_stream = stream_unary = stream_stream = _unary_only
+
+    def subscribe(self, callback, try_to_connect=False):
+        # There is no connection to wait for.
+        callback(grpc.ChannelConnectivity.READY)
+
+    def unsubscribe(self, callback):
+        pass
+
+    def close(self):
+        pass
+
+
+class _ReplayChannel(_forwarding_channel.ForwardingChannel):
+    def __init__(self, player: _Player):
+        super().__init__(_OfflineChannel())
+        self._player = player
+
+    def unary_unary(
+        self, method, request_serializer=None, response_deserializer=None, **kwargs
+    ):
+        return _ReplayUnaryUnaryMultiCallable(
+            self._player,
+            method,
+            request_serializer or _identity,
+            response_deserializer or _identity,
+        )
+
+
+class _ReplayUnaryUnaryMultiCallable(grpc.UnaryUnaryMultiCallable):
+    def __init__(self, player: _Player, method: str, serializer, deserializer):
+        self._player = player
+        self._method = method
+        self._serializer = serializer
+        self._deserializer = deserializer
+
+    def __call__(self, request, *args, **kwargs):
+        return self.future(request, *args, **kwargs).result()
+
+    def with_call(self, request, *args, **kwargs):
+        future = self.future(request, *args, **kwargs)
+        return future.result(), future
+
+    def future(self, request, timeout=None, *args, **kwargs):
+        outcome, delay = self._player.play(
+            self._method, self._serializer(request), self._deserializer, timeout
+        )
+        return _ReplayFuture(outcome, delay)
+
+
+class _ReplayFuture(futures.Future, grpc.Future, grpc.Call):
+    """A replayed call, which completes after the recorded delay."""
+
+    def __init__(self, outcome: Callable[[], object], delay: float):
+        super().__init__()
+        self._outcome = outcome
+        self._pending = None  # type: Optional[threading.Timer]
+        if delay > 0:
+            self._pending = threading.Timer(delay, self._complete)
+            self._pending.daemon = True
+            self._pending.start()
+        else:
+            self._complete()
+
+    def _complete(self):
+        if not self.set_running_or_notify_cancel():
+            return
+        try:
+            self.set_result(self._outcome())
+        except Exception as exc:
+            # Not only the recorded errors: a response the deserializer
+            # rejects must fail the call too, or it never completes.
+            self.set_exception(exc)
+
+    def cancel(self):
+        if self._pending is not None:
+            self._pending.cancel()
+        return super().cancel()
+
+    def traceback(self, timeout=None):
+        error = self.exception(timeout)
+        return None if error is None else error.__traceback__
+
+    def code(self):
+        if self.cancelled():
+            return grpc.StatusCode.CANCELLED
+        error = self.exception()
+        return grpc.StatusCode.OK if error is None else error.code()
+
+    def details(self):
+        if self.cancelled():
+            return "Cancelled"
+        error = self.exception()
+        return None if error is None else error.details()
+
+    def initial_metadata(self):
+        return ()
+
+    def trailing_metadata(self):
+        return ()
+
+    def is_active(self):
+        return not self.done()
+
+    def time_remaining(self):
+        return None
+
+    def add_callback(self, callback):
+        self.add_done_callback(lambda future: callback())
+        return True
+
+
+class _OfflineAioChannel(aio.Channel):
+    """An asyncio channel without a connection, which is always ready."""
+
+    def _unary_only(self, method, *args, **kwargs):
+        raise NotImplementedError(_UNARY_ONLY)
+
+    unary_unary = unary_stream = stream_unary = stream_stream = _unary_only
+
+    def get_state(self, try_to_connect=False):
+        return grpc.ChannelConnectivity.READY
+
+    async def wait_for_state_change(self, last_observed_state):
+        # The channel is always ready, so its state never changes.
+        await asyncio.get_event_loop().create_future()
+
+    async def channel_ready(self):
+        pass
+
+    async def close(self, grace=None):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+class _ReplayAioChannel(_forwarding_channel.ForwardingAioChannel):
+    def __init__(self, player: _Player):
+        super().__init__(_OfflineAioChannel())
+        self._player = player
+
+    def unary_unary(
+        self, method, request_serializer=None, response_deserializer=None, **kwargs
+    ):
+        return _ReplayAioUnaryUnaryMultiCallable(
+            self._player,
+            method,
+            request_serializer or _identity,
+            response_deserializer or _identity,
+        )
+
+
+class _ReplayAioUnaryUnaryMultiCallable(aio.UnaryUnaryMultiCallable):
+    def __init__(self, player: _Player, method: str, serializer, deserializer):
+        self._player = player
+        self._method = method
+        self._serializer = serializer
+        self._deserializer = deserializer
+
+    def __call__(self, request, *, timeout=None, **kwargs):
+        # Match the call now, so that calls are matched in the order they
+        # are made rather than awaited.
+        outcome, delay = self._player.play(
+            self._method, self._serializer(request), self._deserializer, timeout
+        )
+        return _ReplayAioCall(outcome, delay)
+
+
+class _ReplayAioCall:
+    """An awaitable replayed call."""
+
+    def __init__(self, outcome: Callable[[], object], delay: float):
+        self._outcome = outcome
+        self._delay = delay
+
+    async def _run(self):
+        if self._delay > 0:
+            await asyncio.sleep(self._delay)
+        return self._outcome()
+
+    def __await__(self):
+        return self._run().__await__()
+
+    def cancel(self) -> bool:
+        # Cancelling the task that awaits the call cancels the delay.
+        return False
+
+
+__all__ = (
+    "Cassette",
+    "Interaction",
+    "UnrecordedCallError",
+)
@@ -0,0 +1,385 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Crawl the SKUs of many services concurrently.
+
+Paging through ``ListSkus`` for a single service is inherently sequential,
+because each page token comes from the previous response, but different
+services are independent. The crawlers in this module page through several
+services at once, bounded by a concurrency cap, and stream the results back
+to the caller as they arrive.
+"""
+
+import asyncio
+import concurrent.futures
+import inspect
+import queue
+import threading
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from google.cloud.billing_v1.services.cloud_catalog import CloudCatalogAsyncClient
+from google.cloud.billing_v1.services.cloud_catalog import CloudCatalogClient
+from google.cloud.billing_v1.types import cloud_catalog
+
+
+DEFAULT_MAX_CONCURRENCY = 8
+
+# How long a worker blocks on a full result queue before re-checking whether
+# the consumer has gone away.
+_PUT_POLL_INTERVAL = 0.1
+
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+def _make_request(
+    template: Optional[cloud_catalog.ListSkusRequest], parent: str
+) -> cloud_catalog.ListSkusRequest:
+    request = cloud_catalog.ListSkusRequest(template)
+    request.parent = parent
+    request.page_token = ""
+    return request
+
+
+class CatalogCrawler:
+    """Fan ``list_skus`` out across services on a bounded thread pool.
+
+    Example:
+        >>> crawler = CatalogCrawler(CloudCatalogClient(), max_concurrency=16)
+        >>> for sku in crawler.iter_skus():
+        ...     index.add(sku)
+    """
+
+    def __init__(
+        self,
+        client: CloudCatalogClient,
+        *,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_buffered_pages: Optional[int] = None,
+    ):
+        """Instantiate the crawler.
+
+        Args:
+            client (~.CloudCatalogClient): The client used to list SKUs.
+            max_concurrency (int): The maximum number of services paged
+                through at the same time.
+            max_buffered_pages (Optional[int]): The maximum number of pages
+                fetched but not yet consumed. Workers pause when the buffer
+                is full. Defaults to twice ``max_concurrency``.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+        self._client = client
+        self._max_concurrency = max_concurrency
+        self._max_buffered_pages = max_buffered_pages or 2 * max_concurrency
+
+    def _list_service_names(self) -> Iterable[str]:
+        return [service.name for service in self._client.list_services()]
+
+    def iter_pages(
+        self,
+        services: Optional[Iterable[str]] = None,
+        *,
+        request: Optional[cloud_catalog.ListSkusRequest] = None,
+    ) -> Iterator[Tuple[str, cloud_catalog.ListSkusResponse]]:
+        """Iterate over ``ListSkus`` pages of many services as they arrive.
+
+        Pages of one service are yielded in order; pages of different
+        services are interleaved.
+
+        Args:
+            services (Optional[Iterable[str]]): The resource names of the
+                services to crawl. Defaults to every service returned by
+                ``list_services``.
+            request (Optional[:class:`~.cloud_catalog.ListSkusRequest`]): A
+                template for every request, e.g. to set ``currency_code``
+                or a time range. Its ``parent`` is replaced per service.
+
+        Returns:
+            Iterator[Tuple[str, :class:`~.cloud_catalog.ListSkusResponse`]]:
+                Pairs of service resource name and response page.
+
+        Raises:
+            google.api_core.exceptions.GoogleAPICallError: If listing any
+                service fails. The remaining work is abandoned.
+        """
+        if services is None:
+            services = self._list_service_names()
+        requests = [_make_request(request, parent) for parent in services]
+        for list_request, page in self.iter_request_pages(requests):
+            yield list_request.parent, page
+
+    def iter_request_pages(
+        self, requests: Iterable[cloud_catalog.ListSkusRequest]
+    ) -> Iterator[Tuple[cloud_catalog.ListSkusRequest, cloud_catalog.ListSkusResponse]]:
+        """Iterate over the pages of many ``ListSkus`` requests as they arrive.
+
+        This is the general form of :meth:`iter_pages`, for crawls that
+        differ in more than their ``parent``, such as the same service over
+        several time ranges.
+
+        Args:
+            requests (Iterable[:class:`~.cloud_catalog.ListSkusRequest`]):
+                The requests to page through.
+
+        Returns:
+            Iterator[Tuple[~.ListSkusRequest, ~.ListSkusResponse]]: Pairs
+                of the originating request and a response page. Pages of
+                one request are yielded in order.
+
+        Raises:
+            google.api_core.exceptions.GoogleAPICallError: If any request
+                fails. The remaining work is abandoned.
+        """
+        requests = list(requests)
+        if not requests:
+            return
+
+        results = queue.Queue(maxsize=self._max_buffered_pages)
+        stop = threading.Event()
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    results.put(item, timeout=_PUT_POLL_INTERVAL)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def crawl(list_request: cloud_catalog.ListSkusRequest) -> None:
+            try:
+                pager = self._client.list_skus(request=list_request)
+                for page in pager.pages:
+                    if not put((list_request, page)):
+                        return
+            except Exception as exc:
+                put(_Failure(exc))
+            finally:
+                put(_DONE)
+
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(self._max_concurrency, len(requests))
+        )
+        futures = [executor.submit(crawl, list_request) for list_request in requests]
+        try:
+            pending = len(futures)
+            while pending:
+                item = results.get()
+                if item is _DONE:
+                    pending -= 1
+                elif isinstance(item, _Failure):
+                    raise item.exc
+                else:
+                    yield item
+        finally:
+            # Unblock and retire the workers, whether the crawl finished,
+            # failed, or the caller stopped iterating early.
+            stop.set()
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def iter_skus(
+        self,
+        services: Optional[Iterable[str]] = None,
+        *,
+        request: Optional[cloud_catalog.ListSkusRequest] = None,
+    ) -> Iterator[cloud_catalog.Sku]:
+        """Iterate over the SKUs of many services as they arrive.
+
+        Takes the same arguments as :meth:`iter_pages`.
+        """
+        for _, page in self.iter_pages(services, request=request):
+            yield from page.skus
+
+    def crawl(
+        self,
+        callback: Callable[[cloud_catalog.Sku], None],
+        services: Optional[Iterable[str]] = None,
+        *,
+        request: Optional[cloud_catalog.ListSkusRequest] = None,
+    ) -> int:
+        """Call ``callback`` with every SKU of many services.
+
+        The callback runs on the calling thread, so it needs no locking.
+        Takes the same arguments as :meth:`iter_pages`.
+
+        Returns:
+            int: The number of SKUs crawled.
+        """
+        count = 0
+        for sku in self.iter_skus(services, request=request):
+            callback(sku)
+            count += 1
+        return count
+
+
+class AsyncCatalogCrawler:
+    """Fan ``list_skus`` out across services with bounded asyncio concurrency.
+
+    Example:
+        >>> crawler = AsyncCatalogCrawler(CloudCatalogAsyncClient())
+        >>> async for sku in crawler.iter_skus():
+        ...     index.add(sku)
+    """
+
+    def __init__(
+        self,
+        client: CloudCatalogAsyncClient,
+        *,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_buffered_pages: Optional[int] = None,
+    ):
+        """Instantiate the crawler.
+
+        Args:
+            client (~.CloudCatalogAsyncClient): The client used to list SKUs.
+            max_concurrency (int): The maximum number of services paged
+                through at the same time.
+            max_buffered_pages (Optional[int]): The maximum number of pages
+                fetched but not yet consumed. Defaults to twice
+                ``max_concurrency``.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+        self._client = client
+        self._max_concurrency = max_concurrency
+        self._max_buffered_pages = max_buffered_pages or 2 * max_concurrency
+
+    async def _list_service_names(self) -> Iterable[str]:
+        pager = await self._client.list_services()
+        return [service.name async for service in pager]
+
+    async def iter_pages(
+        self,
+        services: Optional[Iterable[str]] = None,
+        *,
+        request: Optional[cloud_catalog.ListSkusRequest] = None,
+    ) -> AsyncIterator[Tuple[str, cloud_catalog.ListSkusResponse]]:
+        """Iterate over ``ListSkus`` pages of many services as they arrive.
+
+        See :meth:`CatalogCrawler.iter_pages`.
+        """
+        if services is None:
+            services = await self._list_service_names()
+        requests = [_make_request(request, parent) for parent in services]
+        async for list_request, page in self.iter_request_pages(requests):
+            yield list_request.parent, page
+
+    async def iter_request_pages(
+        self, requests: Iterable[cloud_catalog.ListSkusRequest]
+    ) -> AsyncIterator[
+        Tuple[cloud_catalog.ListSkusRequest, cloud_catalog.ListSkusResponse]
+    ]:
+        """Iterate over the pages of many ``ListSkus`` requests as they arrive.
+
+        See :meth:`CatalogCrawler.iter_request_pages`.
+        """
+        requests = list(requests)
+        if not requests:
+            return
+
+        results = asyncio.Queue(maxsize=self._max_buffered_pages)
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        async def crawl(list_request: cloud_catalog.ListSkusRequest) -> None:
+            try:
+                async with semaphore:
+                    pager = await self._client.list_skus(request=list_request)
+                    async for page in pager.pages:
+                        await results.put((list_request, page))
+            except asyncio.CancelledError:
+                # Before Python 3.8 this is an Exception subclass; let it
+                # end the task rather than report it as a failure.
+                raise
+            except Exception as exc:
+                await results.put(_Failure(exc))
+            await results.put(_DONE)
+
+        tasks = [
+            asyncio.ensure_future(crawl(list_request)) for list_request in requests
+        ]
+        try:
+            pending = len(tasks)
+            while pending:
+                item = await results.get()
+                if item is _DONE:
+                    pending -= 1
+                elif isinstance(item, _Failure):
+                    raise item.exc
+                else:
+                    yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def iter_skus(
+        self,
+        services: Optional[Iterable[str]] = None,
+        *,
+        request: Optional[cloud_catalog.ListSkusRequest] = None,
+    ) -> AsyncIterator[cloud_catalog.Sku]:
+        """Iterate over the SKUs of many services as they arrive.
+
+        Takes the same arguments as :meth:`iter_pages`.
+        """
+        async for _, page in self.iter_pages(services, request=request):
+            for sku in page.skus:
+                yield sku
+
+    async def crawl(
+        self,
+        callback: Callable[[cloud_catalog.Sku], Union[None, Awaitable[None]]],
+        services: Optional[Iterable[str]] = None,
+        *,
+        request: Optional[cloud_catalog.ListSkusRequest] = None,
+    ) -> int:
+        """Call ``callback`` with every SKU of many services.
+
+        ``callback`` may be a plain function or a coroutine function.
+        Takes the same arguments as :meth:`iter_pages`.
+
+        Returns:
+            int: The number of SKUs crawled.
+        """
+        count = 0
+        async for sku in self.iter_skus(services, request=request):
+            result = callback(sku)
+            if inspect.isawaitable(result):
+                await result
+            count += 1
+        return count
+
+
+__all__ = (
+    "AsyncCatalogCrawler",
+    "CatalogCrawler",
+)
@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""On-disk snapshots of the public Cloud Billing SKU catalog.
+
+A snapshot stores every :class:`~.cloud_catalog.Service` and its
+:class:`~.cloud_catalog.Sku` list as length-delimited serialized
+``ListServicesResponse`` / ``ListSkusResponse`` records, so that a worker
+can warm-start from a local file instead of re-crawling the catalog.
+"""
+
+import datetime
+import itertools
+import json
+from typing import Dict, Iterable, Iterator, Optional, Sequence
+
+from google.protobuf import message  # type: ignore
+
+from google.cloud.billing_v1 import catalog_crawler
+from google.cloud.billing_v1.services import _records
+from google.cloud.billing_v1.services.cloud_catalog import CloudCatalogClient
+from google.cloud.billing_v1.types import cloud_catalog
+
+
+# ``PricingInfo.effective_time`` is documented to be at most 12 hours old
+# for the latest pricing, so a snapshot older than this may be out of date.
+DEFAULT_MAX_AGE = datetime.timedelta(hours=12)
+
+_MAGIC = b"GCBCATv1"
+_RECORD_HEADER = 0
+_RECORD_SERVICES = 1
+_RECORD_SKUS = 2
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+class CatalogSnapshot:
+    """A point-in-time copy of the public service and SKU catalog.
+
+    Snapshots are usually created with :meth:`fetch` (or
+    :meth:`load_or_fetch`), persisted with :meth:`dump`, and restored with
+    :meth:`load`. SKUs are kept as one ``ListSkusResponse`` per service, so
+    loading a snapshot only parses the wire format; proto-plus wrappers are
+    created lazily as individual SKUs are accessed.
+    """
+
+    def __init__(
+        self,
+        services: cloud_catalog.ListServicesResponse,
+        skus: Dict[str, cloud_catalog.ListSkusResponse],
+        *,
+        create_time: Optional[datetime.datetime] = None,
+        currency_code: str = "",
+        scope: Optional[Iterable[str]] = None,
+    ):
+        """Instantiate the snapshot.
+
+        Args:
+            services (:class:`~.cloud_catalog.ListServicesResponse`): A
+                response holding every service in the catalog.
+            skus (Dict[str, :class:`~.cloud_catalog.ListSkusResponse`]): A
+                response holding every SKU, keyed by service resource name.
+            create_time (Optional[datetime.datetime]): When the catalog
+                was read. Defaults to now.
+            currency_code (str): The ISO 4217 currency code the SKU prices
+                were requested in. Empty means the API default (USD).
+            scope (Optional[Iterable[str]]): The service resource names the
+                catalog was restricted to, or ``None`` for every service.
+        """
+        self._services = services
+        self._skus = skus
+        self.create_time = create_time or _utcnow()
+        self.currency_code = currency_code
+        self.scope = None if scope is None else frozenset(scope)
+
+    @property
+    def services(self) -> Sequence[cloud_catalog.Service]:
+        """Sequence[~.cloud_catalog.Service]: Every service in the snapshot."""
+        return self._services.services
+
+    def skus(self, service: Optional[str] = None) -> Iterator[cloud_catalog.Sku]:
+        """Iterate over SKUs in the snapshot.
+
+        Args:
+            service (Optional[str]): The resource name of a service, e.g.
+                ``services/DA34-426B-A397``. If omitted, the SKUs of every
+                service are returned.
+
+        Returns:
+            Iterator[~.cloud_catalog.Sku]: The matching SKUs.
+        """
+        if service is not None:
+            page = self._skus.get(service)
+            if page is not None:
+                yield from page.skus
+            return
+        for page in self._skus.values():
+            yield from page.skus
+
+    def age(self, now: Optional[datetime.datetime] = None) -> datetime.timedelta:
+        """Return how long ago the snapshot was taken."""
+        return (now or _utcnow()) - self.create_time
+
+    def is_fresh(
+        self,
+        max_age: datetime.timedelta = DEFAULT_MAX_AGE,
+        now: Optional[datetime.datetime] = None,
+    ) -> bool:
+        """Return whether the snapshot is younger than ``max_age``.
+
+        The default matches the 12 hour window within which the API
+        reports the latest pricing, see
+        :attr:`~.cloud_catalog.PricingInfo.effective_time`.
+        """
+        return self.age(now) < max_age
+
+    @classmethod
+    def fetch(
+        cls,
+        client: CloudCatalogClient,
+        *,
+        currency_code: str = "",
+        services: Optional[Iterable[str]] = None,
+        page_size: int = 0,
+        max_concurrency: int = catalog_crawler.DEFAULT_MAX_CONCURRENCY,
+    ) -> "CatalogSnapshot":
+        """Read the catalog with ``client`` and return it as a snapshot.
+
+        Args:
+            client (~.CloudCatalogClient): The client used to list services
+                and SKUs.
+            currency_code (str): The ISO 4217 currency code to request SKU
+                prices in. Defaults to USD.
+            services (Optional[Iterable[str]]): Restrict the snapshot to
+                these service resource names. Defaults to every service.
+            page_size (int): The page size to request from ``ListSkus``.
+            max_concurrency (int): How many services to page through at the
+                same time, see :class:`~.catalog_crawler.CatalogCrawler`.
+
+        Returns:
+            CatalogSnapshot: The snapshot.
+        """
+        create_time = _utcnow()
+
+        all_services = cloud_catalog.ListServicesResponse()
+        services_pb = cloud_catalog.ListServicesResponse.pb(all_services)
+        for page in client.list_services().pages:
+            services_pb.services.extend(
+                cloud_catalog.ListServicesResponse.pb(page).services
+            )
+
+        wanted = None if services is None else set(services)
+        if wanted is not None:
+            kept = [s for s in services_pb.services if s.name in wanted]
+            del services_pb.services[:]
+            services_pb.services.extend(kept)
+
+        # Keep the services' listing order, whatever order pages arrive in.
+        skus = {
+            service.name: cloud_catalog.ListSkusResponse()
+            for service in services_pb.services
+        }
+        crawler = catalog_crawler.CatalogCrawler(
+            client, max_concurrency=max_concurrency
+        )
+        pages = crawler.iter_pages(
+            list(skus),
+            request=cloud_catalog.ListSkusRequest(
+                currency_code=currency_code, page_size=page_size,
+            ),
+        )
+        for parent, page in pages:
+            cloud_catalog.ListSkusResponse.pb(skus[parent]).skus.extend(
+                cloud_catalog.ListSkusResponse.pb(page).skus
+            )
+
+        return cls(
+            all_services,
+            skus,
+            create_time=create_time,
+            currency_code=currency_code,
+            scope=wanted,
+        )
+
+    def dump(self, path: str) -> None:
+        """Write the snapshot to ``path``.
+
+        The file is written to a temporary sibling and then renamed into
+        place, so concurrent readers never observe a partial snapshot.
+        """
+        header = {
+            "create_time": self.create_time.timestamp(),
+            "currency_code": self.currency_code,
+            "scope": None if self.scope is None else sorted(self.scope),
+        }
+        records = itertools.chain(
+            [
+                (_RECORD_HEADER, json.dumps(header).encode("utf-8")),
+                (
+                    _RECORD_SERVICES,
+                    cloud_catalog.ListServicesResponse.serialize(self._services),
+                ),
+            ],
+            (
+                (_RECORD_SKUS, cloud_catalog.ListSkusResponse.serialize(page))
+                for page in self._skus.values()
+            ),
+        )
+        _records.write(path, _MAGIC, records)
+
+    @classmethod
+    def load(cls, path: str) -> "CatalogSnapshot":
+        """Read a snapshot previously written with :meth:`dump`.
+
+        Raises:
+            ValueError: If ``path`` does not contain a catalog snapshot, or
+                the snapshot is truncated or corrupt.
+        """
+        header = None
+        services = cloud_catalog.ListServicesResponse()
+        skus = {}
+        for kind, payload in _records.read(path, _MAGIC, "catalog snapshot"):
+            try:
+                if kind == _RECORD_HEADER:
+                    header = json.loads(payload.decode("utf-8"))
+                elif kind == _RECORD_SERVICES:
+                    services = cloud_catalog.ListServicesResponse.deserialize(payload)
+                elif kind == _RECORD_SKUS:
+                    page = cloud_catalog.ListSkusResponse.deserialize(payload)
+                    if page.skus:
+                        parent = page.skus[0].name.rsplit("/skus/", 1)[0]
+                        skus[parent] = page
+                # Unknown record kinds are skipped for forward compatibility.
+            except (message.DecodeError, ValueError) as exc:
+                raise ValueError("Corrupt catalog snapshot {!r}.".format(path)) from exc
+
+        if header is None:
+            raise ValueError("Catalog snapshot {!r} has no header.".format(path))
+
+        try:
+            return cls(
+                services,
+                skus,
+                create_time=datetime.datetime.fromtimestamp(
+                    header["create_time"], tz=datetime.timezone.utc
+                ),
+                currency_code=header.get("currency_code", ""),
+                scope=header.get("scope"),
+            )
+        except (AttributeError, KeyError, TypeError, ValueError, OverflowError) as exc:
+            raise ValueError(
+                "Corrupt catalog snapshot header in {!r}.".format(path)
+            ) from exc
+
+    @classmethod
+    def load_or_fetch(
+        cls,
+        path: str,
+        client: CloudCatalogClient,
+        *,
+        max_age: datetime.timedelta = DEFAULT_MAX_AGE,
+        currency_code: str = "",
+        services: Optional[Iterable[str]] = None,
+    ) -> "CatalogSnapshot":
+        """Warm-start from ``path``, re-crawling the catalog if needed.
+
+        The snapshot at ``path`` is used when it exists, is fresher than
+        ``max_age``, and was taken in the same currency and for the same
+        services. Otherwise the catalog is fetched with ``client`` and
+        written back to ``path``.
+
+        Args:
+            path (str): The snapshot file.
+            client (~.CloudCatalogClient): The client used to re-crawl.
+            max_age (datetime.timedelta): The maximum acceptable age.
+            currency_code (str): The ISO 4217 currency code to price in.
+            services (Optional[Iterable[str]]): Restrict the snapshot to
+                these service resource names. Defaults to every service.
+
+        Returns:
+            CatalogSnapshot: A fresh snapshot.
+        """
+        try:
+            snapshot = cls.load(path)
+        except (OSError, ValueError):
+            snapshot = None
+
+        scope = None if services is None else frozenset(services)
+        if (
+            snapshot is not None
+            and snapshot.currency_code == currency_code
+            and snapshot.scope == scope
+            and snapshot.is_fresh(max_age)
+        ):
+            return snapshot
+
+        snapshot = cls.fetch(client, currency_code=currency_code, services=scope)
+        snapshot.dump(path)
+        return snapshot
+
+    def __repr__(self) -> str:
+        return "{0}<services={1}, skus={2}, create_time={3}>".format(
+            self.__class__.__name__,
+            len(self.services),
+            sum(len(page.skus) for page in self._skus.values()),
+            self.create_time.isoformat(),
+        )
+
+
+__all__ = ("CatalogSnapshot", "DEFAULT_MAX_AGE")
@@ -0,0 +1,384 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Per-method circuit breakers for the gRPC transports.
+
+When the service degrades, every call waits for its timeout, 60 seconds by
+default, before failing, and the callers pile up behind them. A
+:class:`CircuitBreaker` counts the consecutive failures of each method.
+Past a threshold, it opens the method's circuit: the calls fail at once
+with :class:`CircuitOpenError` instead of being sent. After a cooldown, a
+few probe calls are let through; the circuit closes again if they
+succeed, and stays open for another cooldown if they fail.
+
+:class:`CircuitOpenError` is not a ``ServiceUnavailable``, so the default
+retry settings do not retry it. Calls that time out waiting for a slot of
+a :class:`~.concurrency_limiter.AdaptiveConcurrencyLimiter` never reach the
+service, and do not count.
+
+Example:
+    >>> breaker = CircuitBreaker(failure_threshold=5, cooldown=30)
+    >>> client = CloudBillingClient(
+    ...     transport=CloudBillingGrpcTransport(circuit_breaker=breaker)
+    ... )
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+import grpc  # type: ignore
+from grpc.experimental import aio  # type: ignore
+
+from google.api_core import exceptions  # type: ignore
+from google.cloud.billing_v1.concurrency_limiter import _SlotTimeoutError
+from google.cloud.billing_v1.services import _forwarding_channel
+
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+#: The status codes that count as failures of the service.
+DEFAULT_FAILURE_CODES = frozenset(
+    (
+        grpc.StatusCode.UNAVAILABLE,
+        grpc.StatusCode.DEADLINE_EXCEEDED,
+        grpc.StatusCode.INTERNAL,
+    )
+)
+
+
+class CircuitOpenError(exceptions.GoogleAPICallError):
+    """Raised instead of sending a call while its method's circuit is open.
+
+    Attributes:
+        method (str): The full name of the method.
+        retry_after (float): The seconds until the circuit lets a probe
+            call through.
+    """
+
+    def __init__(self, method: str, retry_after: float):
+        super().__init__(
+            "The circuit of {} is open; retry in {:.1f}s.".format(method, retry_after)
+        )
+        self.method = method
+        self.retry_after = retry_after
+
+
+class _Circuit:
+    __slots__ = ("state", "failures", "opened_at", "probes")
+
+    def __init__(self):
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probes = 0
+
+
+class CircuitBreaker:
+    """Trip a circuit per method after consecutive failures.
+
+    The same instance serves threads and event loops, and may be shared by
+    several transports.
+    """
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: int = 5,
+        cooldown: float = 30.0,
+        half_open_calls: int = 1,
+        failure_codes: Iterable[grpc.StatusCode] = DEFAULT_FAILURE_CODES,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        """Instantiate the breaker.
+
+        Args:
+            failure_threshold (int): The number of consecutive failures
+                that open a circuit.
+            cooldown (float): How long a circuit stays open before letting
+                probe calls through, in seconds.
+            half_open_calls (int): The number of probe calls in flight
+                while a circuit is half open.
+            failure_codes (Iterable[grpc.StatusCode]): The statuses that
+                count as failures. Other errors, such as ``NOT_FOUND``,
+                show that the service is up.
+            timer (Callable[[], float]): The clock, in seconds.
+
+        Raises:
+            ValueError: If an argument is out of range.
+        """
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1.")
+        if cooldown < 0:
+            raise ValueError("cooldown must not be negative.")
+        if half_open_calls < 1:
+            raise ValueError("half_open_calls must be at least 1.")
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.half_open_calls = half_open_calls
+        self.failure_codes = frozenset(failure_codes)
+        self._timer = timer
+        self._circuits = {}  # type: Dict[str, _Circuit]
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def _circuit(self, method: str) -> _Circuit:
+        # Called with the lock held.
+        circuit = self._circuits.get(method)
+        if circuit is None:
+            circuit = self._circuits[method] = _Circuit()
+        return circuit
+
+    def state(self, method: str) -> str:
+        """Return the state of a method's circuit.
+
+        Args:
+            method (str): The full name of the method, e.g.
+                ``"/google.cloud.billing.v1.CloudBilling/GetBillingAccount"``.
+
+        Returns:
+            str: :data:`STATE_CLOSED`, :data:`STATE_OPEN` or
+                :data:`STATE_HALF_OPEN`.
+        """
+        with self._lock:
+            circuit = self._circuits.get(method)
+            if circuit is None:
+                return STATE_CLOSED
+            if (
+                circuit.state == STATE_OPEN
+                and self._timer() - circuit.opened_at >= self.cooldown
+            ):
+                return STATE_HALF_OPEN
+            return circuit.state
+
+    def before_call(self, method: str) -> bool:
+        """Let a call through, or reject it.
+
+        Every call let through must be followed by :meth:`after_call`.
+
+        Args:
+            method (str): The full name of the method.
+
+        Returns:
+            bool: Whether the call is a probe of a half open circuit; pass
+                it on to :meth:`after_call`.
+
+        Raises:
+            CircuitOpenError: If the method's circuit is open, or half open
+                with all its probe calls in flight.
+        """
+        with self._lock:
+            circuit = self._circuit(method)
+            if circuit.state == STATE_CLOSED:
+                return False
+            if circuit.state == STATE_OPEN:
+                elapsed = self._timer() - circuit.opened_at
+                if elapsed < self.cooldown:
+                    self.rejected += 1
+                    raise CircuitOpenError(method, self.cooldown - elapsed)
+                circuit.state = STATE_HALF_OPEN
+            # Probes of an earlier half open spell that are still in flight
+            # count too.
+            if circuit.probes >= self.half_open_calls:
+                self.rejected += 1
+                raise CircuitOpenError(method, 0.0)
+            circuit.probes += 1
+            return True
+
+    def after_call(
+        self, method: str, code: Optional[grpc.StatusCode], probe: bool
+    ) -> None:
+        """Record the outcome of a call let through.
+
+        Args:
+            method (str): The full name of the method.
+            code (Optional[grpc.StatusCode]): The status of the call, or
+                ``None`` if it did not complete, e.g. because it was
+                cancelled or timed out before it was sent.
+            probe (bool): What :meth:`before_call` returned for the call.
+                Calls let through while the circuit was closed may still
+                complete once it is half open; they are not probes.
+        """
+        with self._lock:
+            circuit = self._circuit(method)
+            if probe:
+                circuit.probes -= 1
+            if code is None:
+                return
+            if code in self.failure_codes:
+                circuit.failures += 1
+                if probe or circuit.failures >= self.failure_threshold:
+                    circuit.state = STATE_OPEN
+                    circuit.opened_at = self._timer()
+            elif probe or circuit.state == STATE_CLOSED:
+                # A call sent before the circuit opened does not close it.
+                circuit.state = STATE_CLOSED
+                circuit.failures = 0
+
+    def protect_channel(self, channel):
+        """Wrap a channel so that its unary calls go through the breaker.
+
+        Args:
+            channel (Union[grpc.Channel, aio.Channel]): The channel.
+
+        Returns:
+            Union[grpc.Channel, aio.Channel]: The protected channel.
+        """
+        if isinstance(channel, aio.Channel):
+            return _ProtectedAioChannel(channel, self)
+        return _ProtectedChannel(channel, self)
+
+    def __repr__(self) -> str:
+        with self._lock:
+            opened = sorted(
+                method
+                for method, circuit in self._circuits.items()
+                if circuit.state != STATE_CLOSED
+            )
+        return "{0}<open={1}, rejected={2}>".format(
+            self.__class__.__name__, opened, self.rejected
+        )
+
+
+def _status(call) -> Optional[grpc.StatusCode]:
+    # A call that timed out waiting for a concurrency slot was never sent.
+    if isinstance(call, _SlotTimeoutError):
+        return None
+    return call.code()
+
+
+class _ProtectedChannel(_forwarding_channel.ForwardingChannel):
+    def __init__(self, channel: grpc.Channel, breaker: CircuitBreaker):
+        super().__init__(channel)
+        self._breaker = breaker
+
+    def unary_unary(self, method, *args, **kwargs):
+        return _ProtectedUnaryUnaryMultiCallable(
+            self._breaker, method, self._channel.unary_unary(method, *args, **kwargs)
+        )
+
+
+class _ProtectedUnaryUnaryMultiCallable(grpc.UnaryUnaryMultiCallable):
+    def __init__(self, breaker: CircuitBreaker, method: str, callable_):
+        self._breaker = breaker
+        self._method = method
+        self._callable = callable_
+
+    def _call(self, send):
+        probe = self._breaker.before_call(self._method)
+        code = None
+        try:
+            result = send()
+            code = grpc.StatusCode.OK
+            return result
+        except grpc.RpcError as exc:
+            code = _status(exc)
+            raise
+        finally:
+            self._breaker.after_call(self._method, code, probe)
+
+    def __call__(self, request, *args, **kwargs):
+        return self._call(lambda: self._callable(request, *args, **kwargs))
+
+    def with_call(self, request, *args, **kwargs):
+        return self._call(lambda: self._callable.with_call(request, *args, **kwargs))
+
+    def future(self, request, *args, **kwargs):
+        probe = self._breaker.before_call(self._method)
+        try:
+            future = self._callable.future(request, *args, **kwargs)
+        except Exception:
+            self._breaker.after_call(self._method, None, probe)
+            raise
+        future.add_done_callback(
+            lambda done: self._breaker.after_call(
+                self._method, None if done.cancelled() else _status(done), probe
+            )
+        )
+        return future
+
+
+class _ProtectedAioChannel(_forwarding_channel.ForwardingAioChannel):
+    def __init__(self, channel: aio.Channel, breaker: CircuitBreaker):
+        super().__init__(channel)
+        self._breaker = breaker
+
+    def unary_unary(self, method, *args, **kwargs):
+        return _ProtectedAioUnaryUnaryMultiCallable(
+            self._breaker, method, self._channel.unary_unary(method, *args, **kwargs)
+        )
+
+
+class _ProtectedAioUnaryUnaryMultiCallable(aio.UnaryUnaryMultiCallable):
+    def __init__(self, breaker: CircuitBreaker, method: str, callable_):
+        self._breaker = breaker
+        self._method = method
+        self._callable = callable_
+
+    def __call__(self, request, *args, **kwargs):
+        return _ProtectedAioCall(
+            self._breaker,
+            self._method,
+            lambda: self._callable(request, *args, **kwargs),
+        )
+
+
+class _ProtectedAioCall:
+    """An awaitable unary call that reports its outcome to the breaker.
+
+    The call is only checked against the breaker, and sent, once it is
+    awaited, so that a call that is never awaited does not hold a probe
+    slot of a half open circuit.
+    """
+
+    def __init__(self, breaker: CircuitBreaker, method: str, start: Callable):
+        self._breaker = breaker
+        self._method = method
+        self._start = start
+        self._call = None
+
+    async def _run(self):
+        probe = self._breaker.before_call(self._method)
+        code = None
+        try:
+            self._call = self._start()
+            response = await self._call
+            code = grpc.StatusCode.OK
+            return response
+        except grpc.RpcError as exc:
+            code = _status(exc)
+            raise
+        finally:
+            self._breaker.after_call(self._method, code, probe)
+
+    def __await__(self):
+        return self._run().__await__()
+
+    def cancel(self) -> bool:
+        return self._call is not None and self._call.cancel()
+
+
+__all__ = (
+    "DEFAULT_FAILURE_CODES",
+    "STATE_CLOSED",
+    "STATE_HALF_OPEN",
+    "STATE_OPEN",
+    "CircuitBreaker",
+    "CircuitOpenError",
+)
@@ -0,0 +1,471 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Adaptive limits on the number of RPCs in flight.
+
+A fixed concurrency cap is either too timid, or high enough to set off a
+storm of ``RESOURCE_EXHAUSTED`` and ``UNAVAILABLE`` errors when the quota
+is lower than expected. :class:`AdaptiveConcurrencyLimiter` finds the cap
+instead, with additive increase and multiplicative decrease (AIMD): every
+successful RPC raises the limit by about one per limit's worth of RPCs,
+and throttling errors, deadlines and inflated latencies cut it by a
+constant ratio.
+
+Pass it to a gRPC transport, which then holds a slot for each RPC it
+sends. The retries of the wrapped methods wait for a slot of their own,
+so their backoff does not count against the limit. An RPC waits for its
+slot no longer than its timeout, and fails with ``DEADLINE_EXCEEDED`` if
+none frees up in time; the time spent waiting counts against the timeout.
+
+Example:
+    >>> limiter = AdaptiveConcurrencyLimiter(initial_limit=4)
+    >>> client = CloudCatalogAsyncClient(
+    ...     transport=CloudCatalogGrpcAsyncIOTransport(concurrency_limiter=limiter)
+    ... )
+    >>> crawler = AsyncCatalogCrawler(client, max_concurrency=256)
+    >>> skus = [sku async for sku in crawler.iter_skus()]
+    >>> limiter.limit
+    37
+"""
+
+import asyncio
+import collections
+import threading
+import time
+from typing import Callable, Deque, Optional, Tuple
+
+import grpc  # type: ignore
+from grpc.experimental import aio  # type: ignore
+
+from google.cloud.billing_v1.services import _forwarding_channel
+
+
+DEFAULT_INITIAL_LIMIT = 8
+DEFAULT_MAX_LIMIT = 256
+
+#: The status codes that mean the service is overloaded.
+THROTTLING_CODES = frozenset(
+    (
+        grpc.StatusCode.RESOURCE_EXHAUSTED,
+        grpc.StatusCode.UNAVAILABLE,
+        grpc.StatusCode.DEADLINE_EXCEEDED,
+    )
+)
+
+# How far the latency baseline moves towards a slower sample. The
+# baseline follows faster samples at once.
+_BASELINE_DRIFT = 0.01
+
+# A coroutine waiting for a slot: its loop, and the future that wakes it.
+_Waiter = Tuple[asyncio.AbstractEventLoop, asyncio.Future]
+
+
+class AdaptiveConcurrencyLimiter:
+    """An AIMD limit on the number of RPCs in flight.
+
+    The same instance serves threads and a single event loop, and may be
+    shared by several transports that draw on the same quota.
+    """
+
+    def __init__(
+        self,
+        *,
+        initial_limit: int = DEFAULT_INITIAL_LIMIT,
+        min_limit: int = 1,
+        max_limit: int = DEFAULT_MAX_LIMIT,
+        increase: float = 1.0,
+        backoff_ratio: float = 0.5,
+        latency_tolerance: Optional[float] = 2.0,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        """Instantiate the limiter.
+
+        Args:
+            initial_limit (int): The limit to start from.
+            min_limit (int): The lowest the limit goes.
+            max_limit (int): The highest the limit goes.
+            increase (float): How much the limit grows for each limit's
+                worth of successful RPCs.
+            backoff_ratio (float): What the limit is multiplied by when
+                the service is overloaded.
+            latency_tolerance (Optional[float]): How many times slower
+                than the fastest recent RPCs an RPC may be before its
+                latency counts as overload. ``None`` ignores latencies.
+            timer (Callable[[], float]): The clock, in seconds.
+
+        Raises:
+            ValueError: If the arguments are out of range.
+        """
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError(
+                "The limits must satisfy 1 <= min_limit <= initial_limit <= "
+                "max_limit."
+            )
+        if increase <= 0:
+            raise ValueError("increase must be positive.")
+        if not 0 < backoff_ratio < 1:
+            raise ValueError("backoff_ratio must be between 0 and 1.")
+        if latency_tolerance is not None and latency_tolerance <= 1:
+            raise ValueError("latency_tolerance must be greater than 1.")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self._timer = timer
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._baseline = None  # type: Optional[float]
+        # RPCs started before the last decrease do not cause another one,
+        # so that a burst of errors only counts once.
+        self._decreased_at = float("-inf")
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._waiters = collections.deque()  # type: Deque[_Waiter]
+
+    @property
+    def limit(self) -> int:
+        """int: The current number of RPCs allowed in flight."""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        """int: The number of RPCs in flight."""
+        return self._in_flight
+
+    def _has_room(self) -> bool:
+        # Called with the lock held.
+        return self._in_flight < int(self._limit)
+
+    def _may_acquire(self) -> bool:
+        # Called with the lock held.
+        return not self._waiters and self._has_room()
+
+    def acquire(self, timeout: Optional[float] = None) -> Optional[float]:
+        """Wait for a slot.
+
+        Args:
+            timeout (Optional[float]): How long to wait, in seconds.
+                ``None`` waits for as long as it takes.
+
+        Returns:
+            Optional[float]: The time the slot was taken, to pass to
+                :meth:`release`, or ``None`` if no slot was free in time.
+        """
+        with self._available:
+            if not self._available.wait_for(self._may_acquire, timeout):
+                return None
+            self._in_flight += 1
+            return self._timer()
+
+    async def acquire_async(self, timeout: Optional[float] = None) -> Optional[float]:
+        """Wait for a slot without blocking the event loop.
+
+        Args:
+            timeout (Optional[float]): How long to wait, in seconds.
+                ``None`` waits for as long as it takes.
+
+        Returns:
+            Optional[float]: The time the slot was taken, to pass to
+                :meth:`release`, or ``None`` if no slot was free in time.
+        """
+        with self._lock:
+            if self._may_acquire():
+                self._in_flight += 1
+                return self._timer()
+            loop = asyncio.get_event_loop()
+            future = loop.create_future()
+            self._waiters.append((loop, future))
+        try:
+            await asyncio.wait_for(future, timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError) as exc:
+            with self._lock:
+                if (loop, future) in self._waiters:
+                    self._waiters.remove((loop, future))
+                elif not future.cancelled():
+                    # The slot was handed over already; give it back. A
+                    # cancelled future gives it back in _hand_over.
+                    self._in_flight -= 1
+                    self._wake()
+            if isinstance(exc, asyncio.TimeoutError):
+                return None
+            raise
+        return self._timer()
+
+    def release(self, started: float, code: Optional[grpc.StatusCode]) -> None:
+        """Free a slot and adjust the limit.
+
+        Args:
+            started (float): What :meth:`acquire` returned.
+            code (Optional[grpc.StatusCode]): The status of the RPC, or
+                ``None`` if it did not complete, e.g. because it was
+                cancelled. Only ``OK`` and :data:`THROTTLING_CODES` change
+                the limit.
+        """
+        now = self._timer()
+        with self._lock:
+            in_flight = self._in_flight
+            self._in_flight -= 1
+            if code in THROTTLING_CODES:
+                self._decrease(started, now)
+            elif code == grpc.StatusCode.OK:
+                self._observe(started, now, in_flight)
+            self._wake()
+
+    def _observe(self, started: float, now: float, in_flight: int) -> None:
+        latency = now - started
+        if self._baseline is None or latency < self._baseline:
+            self._baseline = latency
+        else:
+            self._baseline += (latency - self._baseline) * _BASELINE_DRIFT
+
+        if (
+            self.latency_tolerance is not None
+            and latency > self._baseline * self.latency_tolerance
+        ):
+            self._decrease(started, now)
+        elif in_flight * 2 >= self._limit:
+            # Only grow a limit that is in use.
+            self._limit = min(self.max_limit, self._limit + self.increase / self._limit)
+
+    def _decrease(self, started: float, now: float) -> None:
+        if started < self._decreased_at:
+            return
+        self._decreased_at = now
+        self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+
+    def _wake(self) -> None:
+        # Called with the lock held. Hand the free slots to the waiting
+        # coroutines first, then let the threads compete for the rest.
+        while self._waiters and self._has_room():
+            loop, future = self._waiters.popleft()
+            self._in_flight += 1
+            loop.call_soon_threadsafe(self._hand_over, future)
+        self._available.notify_all()
+
+    def _hand_over(self, future: asyncio.Future) -> None:
+        if not future.done():
+            future.set_result(None)
+            return
+        # The waiter was cancelled after the slot was handed to it.
+        with self._lock:
+            self._in_flight -= 1
+            self._wake()
+
+    def limit_channel(self, channel):
+        """Wrap a channel so that its unary calls wait for a slot.
+
+        Args:
+            channel (Union[grpc.Channel, aio.Channel]): The channel.
+
+        Returns:
+            Union[grpc.Channel, aio.Channel]: The limited channel.
+        """
+        if isinstance(channel, aio.Channel):
+            return _LimitedAioChannel(channel, self)
+        return _LimitedChannel(channel, self)
+
+    def __repr__(self) -> str:
+        return "{0}<limit={1}, in_flight={2}>".format(
+            self.__class__.__name__, self.limit, self.in_flight,
+        )
+
+
+class _LimitedChannel(_forwarding_channel.ForwardingChannel):
+    def __init__(self, channel: grpc.Channel, limiter: AdaptiveConcurrencyLimiter):
+        super().__init__(channel)
+        self._limiter = limiter
+
+    def unary_unary(self, method, *args, **kwargs):
+        return _LimitedUnaryUnaryMultiCallable(
+            self._limiter, self._channel.unary_unary(method, *args, **kwargs)
+        )
+
+
+def _remaining(timeout: Optional[float], begun: float) -> Optional[float]:
+    if timeout is None:
+        return None
+    return max(0.0, timeout - (time.monotonic() - begun))
+
+
+class _SlotTimeoutError(grpc.RpcError, grpc.Call, grpc.Future):
+    """A call whose timeout passed while it waited for a slot.
+
+    It is raised by blocking calls, and returned by ``future``, complete.
+    """
+
+    def code(self):
+        return grpc.StatusCode.DEADLINE_EXCEEDED
+
+    def details(self):
+        return "Deadline Exceeded while waiting for a concurrency slot."
+
+    def initial_metadata(self):
+        return None
+
+    def trailing_metadata(self):
+        return None
+
+    def is_active(self):
+        return False
+
+    def time_remaining(self):
+        return None
+
+    def add_callback(self, callback):
+        return False
+
+    def cancel(self):
+        return False
+
+    def cancelled(self):
+        return False
+
+    def running(self):
+        return False
+
+    def done(self):
+        return True
+
+    def result(self, timeout=None):
+        raise self
+
+    def exception(self, timeout=None):
+        return self
+
+    def traceback(self, timeout=None):
+        return None
+
+    def add_done_callback(self, fn):
+        fn(self)
+
+
+class _LimitedUnaryUnaryMultiCallable(grpc.UnaryUnaryMultiCallable):
+    def __init__(self, limiter: AdaptiveConcurrencyLimiter, callable_):
+        self._limiter = limiter
+        self._callable = callable_
+
+    def _call(self, timeout, send):
+        begun = time.monotonic()
+        started = self._limiter.acquire(timeout)
+        if started is None:
+            raise _SlotTimeoutError()
+        code = None
+        try:
+            result = send(_remaining(timeout, begun))
+            code = grpc.StatusCode.OK
+            return result
+        except grpc.RpcError as exc:
+            code = exc.code()
+            raise
+        finally:
+            self._limiter.release(started, code)
+
+    def __call__(self, request, timeout=None, *args, **kwargs):
+        return self._call(
+            timeout, lambda left: self._callable(request, left, *args, **kwargs)
+        )
+
+    def with_call(self, request, timeout=None, *args, **kwargs):
+        return self._call(
+            timeout,
+            lambda left: self._callable.with_call(request, left, *args, **kwargs),
+        )
+
+    def future(self, request, timeout=None, *args, **kwargs):
+        begun = time.monotonic()
+        started = self._limiter.acquire(timeout)
+        if started is None:
+            return _SlotTimeoutError()
+        try:
+            future = self._callable.future(
+                request, _remaining(timeout, begun), *args, **kwargs
+            )
+        except Exception:
+            self._limiter.release(started, None)
+            raise
+        future.add_done_callback(
+            lambda done: self._limiter.release(
+                started, None if done.cancelled() else done.code()
+            )
+        )
+        return future
+
+
+class _LimitedAioChannel(_forwarding_channel.ForwardingAioChannel):
+    def __init__(self, channel: aio.Channel, limiter: AdaptiveConcurrencyLimiter):
+        super().__init__(channel)
+        self._limiter = limiter
+
+    def unary_unary(self, method, *args, **kwargs):
+        return _LimitedAioUnaryUnaryMultiCallable(
+            self._limiter, self._channel.unary_unary(method, *args, **kwargs)
+        )
+
+
+class _LimitedAioUnaryUnaryMultiCallable(aio.UnaryUnaryMultiCallable):
+    def __init__(self, limiter: AdaptiveConcurrencyLimiter, callable_):
+        self._limiter = limiter
+        self._callable = callable_
+
+    def __call__(self, request, *, timeout=None, **kwargs):
+        return _LimitedAioCall(self._limiter, self._callable, request, timeout, kwargs)
+
+
+class _LimitedAioCall:
+    """An awaitable unary call that starts once it has a slot."""
+
+    def __init__(self, limiter, callable_, request, timeout, kwargs):
+        self._limiter = limiter
+        self._callable = callable_
+        self._request = request
+        self._timeout = timeout
+        self._kwargs = kwargs
+        self._call = None
+
+    async def _run(self):
+        begun = time.monotonic()
+        started = await self._limiter.acquire_async(self._timeout)
+        if started is None:
+            raise _SlotTimeoutError()
+        code = None
+        try:
+            self._call = self._callable(
+                self._request, timeout=_remaining(self._timeout, begun), **self._kwargs,
+            )
+            response = await self._call
+            code = grpc.StatusCode.OK
+            return response
+        except grpc.RpcError as exc:
+            code = exc.code()
+            raise
+        finally:
+            self._limiter.release(started, code)
+
+    def __await__(self):
+        return self._run().__await__()
+
+    def cancel(self) -> bool:
+        return self._call is not None and self._call.cancel()
+
+
+__all__ = (
+    "DEFAULT_INITIAL_LIMIT",
+    "DEFAULT_MAX_LIMIT",
+    "THROTTLING_CODES",
+    "AdaptiveConcurrencyLimiter",
+)
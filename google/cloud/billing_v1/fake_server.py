@@ -0,0 +1,492 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""A local fake of the ``CloudBilling`` and ``CloudCatalog`` gRPC services.
+
+:class:`FakeBillingServer` serves a :class:`SyntheticDataset` of billing
+accounts, projects, services and tiered-priced SKUs from an in-process
+``grpc.server``, with configurable latency, error rate and page size. It
+is meant for load tests and benchmarks of the clients, which cannot run
+against the real API at scale.
+
+Example:
+    >>> with FakeBillingServer(SyntheticDataset(skus_per_service=5000)) as server:
+    ...     client = server.create_client(CloudCatalogClient)
+    ...     skus = list(client.list_skus(parent="services/0000-0000-0001"))
+"""
+
+import concurrent.futures
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import grpc  # type: ignore
+
+from google.cloud.billing_v1.types import cloud_billing
+from google.cloud.billing_v1.types import cloud_catalog
+from google.iam.v1 import iam_policy_pb2 as iam_policy  # type: ignore
+from google.iam.v1 import policy_pb2 as policy  # type: ignore
+
+
+_BILLING_SERVICE = "google.cloud.billing.v1.CloudBilling"
+_CATALOG_SERVICE = "google.cloud.billing.v1.CloudCatalog"
+
+#: The largest page a :class:`FakeBillingServer` returns by default.
+DEFAULT_PAGE_SIZE = 5000
+
+_REGIONS = (
+    "us-central1",
+    "us-east1",
+    "europe-west1",
+    "europe-west4",
+    "asia-east1",
+    "asia-northeast1",
+)
+_RESOURCE_GROUPS = ("CPU", "RAM", "GPU", "SSD", "Network")
+_USAGE_TYPES = ("OnDemand", "Preemptible", "Commit1Yr")
+
+
+def _copy(message):
+    copy = type(message)()
+    copy.CopyFrom(message)
+    return copy
+
+
+def _account_name(number: int) -> str:
+    return "billingAccounts/{:06X}-{:06X}-{:06X}".format(number, number, number)
+
+
+class SyntheticDataset:
+    """A deterministic billing catalog of configurable size.
+
+    Messages are kept as raw protobuf objects, which the server serializes
+    directly.
+    """
+
+    def __init__(
+        self,
+        *,
+        accounts: int = 10,
+        projects: int = 100,
+        services: int = 10,
+        skus_per_service: int = 100,
+        tiers: int = 3,
+        seed: int = 0,
+    ):
+        """Generate the dataset.
+
+        Args:
+            accounts (int): The number of open billing accounts.
+            projects (int): The number of projects, linked to the accounts
+                round-robin.
+            services (int): The number of catalog services.
+            skus_per_service (int): The number of SKUs of each service.
+            tiers (int): The number of pricing tiers of each SKU.
+            seed (int): Seeds the random SKU attributes.
+        """
+        rng = random.Random(seed)
+        self.accounts = {}  # type: Dict[str, Any]
+        for number in range(accounts):
+            name = _account_name(number + 1)
+            self.accounts[name] = cloud_billing.BillingAccount.pb()(
+                name=name, open_=True, display_name="Account {}".format(number + 1),
+            )
+
+        account_names = list(self.accounts)
+        self.projects = {}  # type: Dict[str, Any]
+        for number in range(projects):
+            project_id = "project-{}".format(number + 1)
+            account = account_names[number % len(account_names)] if accounts else ""
+            self.projects[project_id] = cloud_billing.ProjectBillingInfo.pb()(
+                name="projects/{}/billingInfo".format(project_id),
+                project_id=project_id,
+                billing_account_name=account,
+                billing_enabled=bool(account),
+            )
+
+        self.services = []  # type: List[Any]
+        self.skus = {}  # type: Dict[str, List[Any]]
+        for number in range(services):
+            service_id = "{:04X}-{:04X}-{:04X}".format(0, 0, number + 1)
+            service = cloud_catalog.Service.pb()(
+                name="services/{}".format(service_id),
+                service_id=service_id,
+                display_name="Service {}".format(number + 1),
+                business_entity_name="businessEntities/GCP",
+            )
+            self.services.append(service)
+            self.skus[service.name] = [
+                self._make_sku(rng, service, sku_number, tiers)
+                for sku_number in range(skus_per_service)
+            ]
+
+    @staticmethod
+    def _make_sku(rng: random.Random, service, number: int, tiers: int):
+        sku_id = "{}-{:06X}".format(service.service_id[-4:], number + 1)
+        sku = cloud_catalog.Sku.pb()(
+            name="{}/skus/{}".format(service.name, sku_id),
+            sku_id=sku_id,
+            description="{} SKU {}".format(service.display_name, number + 1),
+            service_regions=rng.sample(_REGIONS, 2),
+            service_provider_name="Google",
+        )
+        sku.category.service_display_name = service.display_name
+        sku.category.resource_family = "Compute"
+        sku.category.resource_group = rng.choice(_RESOURCE_GROUPS)
+        sku.category.usage_type = rng.choice(_USAGE_TYPES)
+        info = sku.pricing_info.add(summary="Synthetic pricing")
+        info.effective_time.seconds = 1577836800
+        info.currency_conversion_rate = 1.0
+        expression = info.pricing_expression
+        expression.usage_unit = "h"
+        expression.usage_unit_description = "hour"
+        expression.base_unit = "s"
+        expression.base_unit_description = "second"
+        expression.base_unit_conversion_factor = 3600
+        expression.display_quantity = 1
+        price_nanos = rng.randrange(1, 10 ** 9)
+        for tier in range(tiers):
+            rate = expression.tiered_rates.add(start_usage_amount=tier * 1000)
+            rate.unit_price.currency_code = "USD"
+            rate.unit_price.nanos = price_nanos >> tier
+        return sku
+
+
+class FakeBillingServer:
+    """Serve a :class:`SyntheticDataset` over gRPC on a local port.
+
+    Every RPC of both services is implemented. List calls page with
+    ``page_token`` offsets; ``ListBillingAccounts`` ignores ``filter`` and
+    ``ListSkus`` ignores the time range and currency.
+    """
+
+    def __init__(
+        self,
+        dataset: Optional[SyntheticDataset] = None,
+        *,
+        latency: Union[float, Callable[[str], float]] = 0.0,
+        error_rate: float = 0.0,
+        error_code: grpc.StatusCode = grpc.StatusCode.UNAVAILABLE,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        max_workers: int = 16,
+        options: Sequence[Tuple[str, Any]] = (),
+        seed: int = 0,
+    ):
+        """Instantiate the server; call :meth:`start` to serve.
+
+        Args:
+            dataset (Optional[SyntheticDataset]): The data to serve.
+                Defaults to a small generated dataset.
+            latency (Union[float, Callable[[str], float]]): Seconds to wait
+                before answering each call, or a function of the method name
+                (e.g. ``"ListSkus"``) returning them.
+            error_rate (float): The probability of failing a call with
+                ``error_code`` instead of answering it.
+            error_code (grpc.StatusCode): The status of injected errors.
+            page_size (int): The maximum page size of list calls; requests
+                may ask for smaller pages.
+            max_workers (int): The number of server threads.
+            options (Sequence[Tuple[str, Any]]): Channel arguments for the
+                server, e.g. ``("grpc.max_concurrent_streams", 8)``.
+            seed (int): Seeds the injected errors.
+        """
+        self.dataset = dataset if dataset is not None else SyntheticDataset()
+        self._latency = latency
+        self._error_rate = error_rate
+        self._error_code = error_code
+        self._page_size = page_size
+        self._max_workers = max_workers
+        self._options = list(options)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._policies = {}  # type: Dict[str, Any]
+        self._server = None
+        self._port = None
+
+    @property
+    def address(self) -> str:
+        """str: The ``host:port`` the server listens on."""
+        if self._port is None:
+            raise RuntimeError("The server has not been started.")
+        return "localhost:{}".format(self._port)
+
+    def start(self) -> "FakeBillingServer":
+        """Start serving on a free local port.
+
+        Returns:
+            FakeBillingServer: This server.
+        """
+        server = grpc.server(
+            concurrent.futures.ThreadPoolExecutor(max_workers=self._max_workers),
+            options=self._options,
+        )
+        server.add_generic_rpc_handlers(self._handlers())
+        self._port = server.add_insecure_port("localhost:0")
+        server.start()
+        self._server = server
+        return self
+
+    def stop(self, grace: Optional[float] = None) -> None:
+        """Stop serving.
+
+        Args:
+            grace (Optional[float]): Seconds to let calls in flight finish.
+        """
+        if self._server is not None:
+            self._server.stop(grace).wait()
+            self._server = None
+
+    def __enter__(self) -> "FakeBillingServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+        return False
+
+    def create_client(self, client_class: type, **kwargs):
+        """Create a stock client connected to this server.
+
+        A client given only ``client_options.api_endpoint`` opens a TLS
+        channel with application default credentials, which a local
+        server cannot accept; this gives the client's stock gRPC transport
+        a plaintext channel to :attr:`address` instead.
+
+        Args:
+            client_class (type): ``CloudBillingClient``,
+                ``CloudCatalogClient`` or one of their async variants.
+            kwargs: Passed to the transport, e.g. ``client_info``.
+
+        Returns:
+            The client.
+        """
+        is_async = client_class.__name__.endswith("AsyncClient")
+        if is_async:
+            from grpc.experimental import aio  # type: ignore
+
+            transport_class = client_class.get_transport_class("grpc_asyncio")
+            channel = aio.insecure_channel(self.address)
+        else:
+            transport_class = client_class.get_transport_class("grpc")
+            channel = grpc.insecure_channel(self.address)
+        return client_class(transport=transport_class(channel=channel, **kwargs))
+
+    # Call handling.
+
+    def _handlers(self):
+        billing = {
+            "GetBillingAccount": (
+                self._get_billing_account,
+                cloud_billing.GetBillingAccountRequest,
+            ),
+            "ListBillingAccounts": (
+                self._list_billing_accounts,
+                cloud_billing.ListBillingAccountsRequest,
+            ),
+            "UpdateBillingAccount": (
+                self._update_billing_account,
+                cloud_billing.UpdateBillingAccountRequest,
+            ),
+            "CreateBillingAccount": (
+                self._create_billing_account,
+                cloud_billing.CreateBillingAccountRequest,
+            ),
+            "ListProjectBillingInfo": (
+                self._list_project_billing_info,
+                cloud_billing.ListProjectBillingInfoRequest,
+            ),
+            "GetProjectBillingInfo": (
+                self._get_project_billing_info,
+                cloud_billing.GetProjectBillingInfoRequest,
+            ),
+            "UpdateProjectBillingInfo": (
+                self._update_project_billing_info,
+                cloud_billing.UpdateProjectBillingInfoRequest,
+            ),
+            "GetIamPolicy": (self._get_iam_policy, iam_policy.GetIamPolicyRequest),
+            "SetIamPolicy": (self._set_iam_policy, iam_policy.SetIamPolicyRequest),
+            "TestIamPermissions": (
+                self._test_iam_permissions,
+                iam_policy.TestIamPermissionsRequest,
+            ),
+        }
+        catalog = {
+            "ListServices": (self._list_services, cloud_catalog.ListServicesRequest),
+            "ListSkus": (self._list_skus, cloud_catalog.ListSkusRequest),
+        }
+        return (
+            grpc.method_handlers_generic_handler(
+                _BILLING_SERVICE, self._method_handlers(billing)
+            ),
+            grpc.method_handlers_generic_handler(
+                _CATALOG_SERVICE, self._method_handlers(catalog)
+            ),
+        )
+
+    def _method_handlers(self, methods):
+        handlers = {}
+        for name, (behavior, request_type) in methods.items():
+            # The IAM messages are plain protobuf classes already.
+            request_pb = getattr(request_type, "pb", lambda: request_type)()
+            handlers[name] = grpc.unary_unary_rpc_method_handler(
+                self._instrument(name, behavior),
+                request_deserializer=request_pb.FromString,
+                response_serializer=lambda response: response.SerializeToString(),
+            )
+        return handlers
+
+    def _instrument(self, name: str, behavior: Callable):
+        def handle(request, context):
+            latency = self._latency(name) if callable(self._latency) else self._latency
+            if latency:
+                time.sleep(latency)
+            if self._error_rate:
+                with self._lock:
+                    failed = self._rng.random() < self._error_rate
+                if failed:
+                    context.abort(self._error_code, "Injected error.")
+            return behavior(request, context)
+
+        return handle
+
+    def _page(self, items: Sequence, request, context) -> Tuple[Sequence, str]:
+        try:
+            start = int(request.page_token or 0)
+        except ValueError:
+            start = -1
+        if start < 0:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "Invalid page token.")
+        size = self._page_size
+        if 0 < request.page_size < size:
+            size = request.page_size
+        end = start + size
+        return items[start:end], str(end) if end < len(items) else ""
+
+    def _account(self, name: str, context):
+        account = self.dataset.accounts.get(name)
+        if account is None:
+            context.abort(grpc.StatusCode.NOT_FOUND, "No account {}.".format(name))
+        return account
+
+    def _project(self, name: str, context):
+        project = self.dataset.projects.get(name.partition("projects/")[2])
+        if project is None:
+            context.abort(grpc.StatusCode.NOT_FOUND, "No project {}.".format(name))
+        return project
+
+    # Responses are copied under the lock, so that updates cannot race
+    # with their serialization.
+
+    def _get_billing_account(self, request, context):
+        with self._lock:
+            return _copy(self._account(request.name, context))
+
+    def _list_billing_accounts(self, request, context):
+        with self._lock:
+            accounts = [_copy(account) for account in self.dataset.accounts.values()]
+        page, token = self._page(accounts, request, context)
+        response = cloud_billing.ListBillingAccountsResponse.pb()(next_page_token=token)
+        response.billing_accounts.extend(page)
+        return response
+
+    def _update_billing_account(self, request, context):
+        with self._lock:
+            account = self._account(request.name, context)
+            # Only the display name can be changed.
+            account.display_name = request.account.display_name
+            return _copy(account)
+
+    def _create_billing_account(self, request, context):
+        master = request.billing_account.master_billing_account
+        with self._lock:
+            self._account(master, context)
+            name = _account_name(len(self.dataset.accounts) + 1)
+            account = cloud_billing.BillingAccount.pb()()
+            account.CopyFrom(request.billing_account)
+            account.name = name
+            account.open_ = True
+            self.dataset.accounts[name] = account
+            return _copy(account)
+
+    def _list_project_billing_info(self, request, context):
+        with self._lock:
+            self._account(request.name, context)
+            projects = [
+                _copy(project)
+                for project in self.dataset.projects.values()
+                if project.billing_account_name == request.name
+            ]
+        page, token = self._page(projects, request, context)
+        response = cloud_billing.ListProjectBillingInfoResponse.pb()(
+            next_page_token=token
+        )
+        response.project_billing_info.extend(page)
+        return response
+
+    def _get_project_billing_info(self, request, context):
+        with self._lock:
+            return _copy(self._project(request.name, context))
+
+    def _update_project_billing_info(self, request, context):
+        account_name = request.project_billing_info.billing_account_name
+        with self._lock:
+            project = self._project(request.name, context)
+            if account_name:
+                self._account(account_name, context)
+            project.billing_account_name = account_name
+            project.billing_enabled = bool(account_name)
+            return _copy(project)
+
+    def _get_iam_policy(self, request, context):
+        with self._lock:
+            self._account(request.resource, context)
+            return self._policies.get(request.resource, policy.Policy())
+
+    def _set_iam_policy(self, request, context):
+        with self._lock:
+            self._account(request.resource, context)
+            self._policies[request.resource] = request.policy
+            return request.policy
+
+    def _test_iam_permissions(self, request, context):
+        with self._lock:
+            self._account(request.resource, context)
+        return iam_policy.TestIamPermissionsResponse(permissions=request.permissions)
+
+    def _list_services(self, request, context):
+        page, token = self._page(self.dataset.services, request, context)
+        response = cloud_catalog.ListServicesResponse.pb()(next_page_token=token)
+        response.services.extend(page)
+        return response
+
+    def _list_skus(self, request, context):
+        skus = self.dataset.skus.get(request.parent)
+        if skus is None:
+            context.abort(
+                grpc.StatusCode.NOT_FOUND, "No service {}.".format(request.parent)
+            )
+        page, token = self._page(skus, request, context)
+        response = cloud_catalog.ListSkusResponse.pb()(next_page_token=token)
+        response.skus.extend(page)
+        return response
+
+
+__all__ = (
+    "DEFAULT_PAGE_SIZE",
+    "FakeBillingServer",
+    "SyntheticDataset",
+)
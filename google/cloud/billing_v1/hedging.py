@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Hedged requests for idempotent reads.
+
+A read that lands on a slow backend can take many times longer than the
+typical one. Hedging sends a second copy of a request that has not been
+answered after a delay, takes whichever response comes first, and cancels
+the other call. With the delay set at a high percentile of the observed
+latencies, only a few percent of the calls are hedged, and those are the
+ones that make up the tail.
+
+Pass a :class:`HedgingPolicy` to a ``CloudBilling`` gRPC transport. The
+hedges are sent at the channel, below the retries of the wrapped methods,
+and are capped by a :class:`~.RetryBudget`. A hedge gets what is left of
+the call's timeout, so that it ends no later than the call would.
+
+Example:
+    >>> policy = HedgingPolicy(percentile=95)
+    >>> client = CloudBillingClient(
+    ...     transport=CloudBillingGrpcTransport(hedging_policy=policy)
+    ... )
+"""
+
+import asyncio
+import collections
+import queue
+import threading
+import time
+from typing import Callable, Deque, Dict, Iterable, Optional
+
+import grpc  # type: ignore
+from grpc.experimental import aio  # type: ignore
+
+from google.cloud.billing_v1.retry_budget import RetryBudget
+from google.cloud.billing_v1.services import _forwarding_channel
+
+
+#: The idempotent reads of ``CloudBilling``.
+DEFAULT_METHODS = frozenset(
+    (
+        "/google.cloud.billing.v1.CloudBilling/GetBillingAccount",
+        "/google.cloud.billing.v1.CloudBilling/GetProjectBillingInfo",
+        "/google.cloud.billing.v1.CloudBilling/GetIamPolicy",
+        "/google.cloud.billing.v1.CloudBilling/TestIamPermissions",
+    )
+)
+
+DEFAULT_PERCENTILE = 95.0
+DEFAULT_BUDGET_RATIO = 0.05
+
+
+class HedgingPolicy:
+    """When to hedge the calls of some methods, and how many to hedge.
+
+    A call is hedged once, after ``delay`` seconds if given, or else after
+    the ``percentile`` of the latencies of the method's recent calls. No
+    call is hedged before ``min_samples`` latencies have been observed.
+
+    The same instance serves threads and a single event loop, and may be
+    shared by several transports.
+    """
+
+    def __init__(
+        self,
+        *,
+        delay: Optional[float] = None,
+        percentile: float = DEFAULT_PERCENTILE,
+        min_delay: float = 0.0,
+        sample_size: int = 100,
+        min_samples: int = 20,
+        methods: Iterable[str] = DEFAULT_METHODS,
+        budget: Optional[RetryBudget] = None,
+    ):
+        """Instantiate the policy.
+
+        Args:
+            delay (Optional[float]): A fixed delay before hedging, in
+                seconds.
+            percentile (float): The percentile of the recent latencies to
+                wait for before hedging, when ``delay`` is not given.
+            min_delay (float): The shortest delay before hedging.
+            sample_size (int): The number of recent latencies kept per
+                method.
+            min_samples (int): The number of latencies to observe before
+                hedging with a percentile.
+            methods (Iterable[str]): The full names of the methods to
+                hedge, e.g. ``"/google.cloud.billing.v1.CloudBilling/
+                GetBillingAccount"``. Only hedge idempotent methods.
+            budget (Optional[~.RetryBudget]): Caps the hedges. Defaults to
+                5% of the calls plus one hedge a second.
+
+        Raises:
+            ValueError: If an argument is out of range.
+        """
+        if delay is not None and delay < 0:
+            raise ValueError("delay must not be negative.")
+        if not 0 < percentile <= 100:
+            raise ValueError("percentile must be in (0, 100].")
+        if not 1 <= min_samples <= sample_size:
+            raise ValueError("min_samples must be between 1 and sample_size.")
+        self.delay = delay
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.methods = frozenset(methods)
+        self.budget = budget or RetryBudget(ratio=DEFAULT_BUDGET_RATIO)
+        self._sample_size = sample_size
+        self._latencies = {}  # type: Dict[str, Deque[float]]
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.hedged = 0
+        self.hedges_won = 0
+
+    def hedge_delay(self, method: str) -> Optional[float]:
+        """Return how long to wait before hedging a call, if at all.
+
+        Args:
+            method (str): The full name of the method.
+
+        Returns:
+            Optional[float]: The delay in seconds, or ``None`` not to hedge.
+        """
+        if self.delay is not None:
+            return max(self.delay, self.min_delay)
+        with self._lock:
+            latencies = sorted(self._latencies.get(method, ()))
+        if len(latencies) < self.min_samples:
+            return None
+        index = min(len(latencies) - 1, int(len(latencies) * self.percentile / 100))
+        return max(latencies[index], self.min_delay)
+
+    def _begin(self, method: str) -> Optional[float]:
+        with self._lock:
+            self.calls += 1
+        self.budget.deposit()
+        return self.hedge_delay(method)
+
+    def _hedge(self) -> bool:
+        if not self.budget.try_withdraw():
+            return False
+        with self._lock:
+            self.hedged += 1
+        return True
+
+    def _record(self, method: str, latency: float, hedge: bool) -> None:
+        with self._lock:
+            latencies = self._latencies.get(method)
+            if latencies is None:
+                latencies = self._latencies[method] = collections.deque(
+                    maxlen=self._sample_size
+                )
+            latencies.append(latency)
+            if hedge:
+                self.hedges_won += 1
+
+    def call(self, method: str, start: Callable[[], grpc.Future]) -> grpc.Future:
+        """Run a call, hedged if it is slow.
+
+        Args:
+            method (str): The full name of the method.
+            start (Callable[[], grpc.Future]): Starts an attempt.
+
+        Returns:
+            grpc.Future: The attempt that succeeded first, or the last one
+                to fail.
+        """
+        delay = self._begin(method)
+        finished = queue.Queue()  # type: queue.Queue
+        attempts = []
+
+        def launch():
+            started = time.monotonic()
+            future = start()
+            attempts.append(future)
+            hedge = len(attempts) > 1
+            future.add_done_callback(lambda done: finished.put((done, started, hedge)))
+
+        launch()
+        try:
+            try:
+                item = finished.get(timeout=delay)
+            except queue.Empty:
+                if self._hedge():
+                    launch()
+                item = finished.get()
+            pending = len(attempts)
+            while True:
+                future, started, hedge = item
+                pending -= 1
+                if not future.cancelled() and future.exception() is None:
+                    self._record(method, time.monotonic() - started, hedge)
+                    return future
+                if not pending:
+                    return future
+                item = finished.get()
+        finally:
+            for future in attempts:
+                future.cancel()
+
+    async def call_async(self, method: str, start: Callable[[], aio.Call]):
+        """Await a call, hedged if it is slow.
+
+        Args:
+            method (str): The full name of the method.
+            start (Callable[[], aio.Call]): Starts an attempt.
+
+        Returns:
+            The response of the attempt that succeeded first.
+
+        Raises:
+            grpc.RpcError: The error of the last attempt to fail, if they
+                all did.
+        """
+        delay = self._begin(method)
+        calls = {}
+
+        def launch():
+            hedge = bool(calls)
+            started = time.monotonic()
+            call = start()
+            calls[asyncio.ensure_future(_await(call))] = (call, started, hedge)
+
+        launch()
+        pending = set(calls)
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if not done and self._hedge():
+                launch()
+                pending = set(calls)
+            while True:
+                if not done:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                for task in done:
+                    if not task.cancelled() and task.exception() is None:
+                        _, started, hedge = calls[task]
+                        self._record(method, time.monotonic() - started, hedge)
+                        return task.result()
+                if not pending:
+                    return task.result()
+                done = set()
+        finally:
+            for task, (call, _, _) in calls.items():
+                if not task.done():
+                    call.cancel()
+                    task.cancel()
+
+    def hedge_channel(self, channel):
+        """Wrap a channel so that the calls of :attr:`methods` are hedged.
+
+        Args:
+            channel (Union[grpc.Channel, aio.Channel]): The channel.
+
+        Returns:
+            Union[grpc.Channel, aio.Channel]: The hedged channel.
+        """
+        if isinstance(channel, aio.Channel):
+            return _HedgedAioChannel(channel, self)
+        return _HedgedChannel(channel, self)
+
+    def __repr__(self) -> str:
+        return "{0}<calls={1}, hedged={2}, hedges_won={3}>".format(
+            self.__class__.__name__, self.calls, self.hedged, self.hedges_won,
+        )
+
+
+async def _await(call):
+    return await call
+
+
+def _remaining(timeout: Optional[float], begun: float) -> Optional[float]:
+    if timeout is None:
+        return None
+    return max(0.0, timeout - (time.monotonic() - begun))
+
+
+class _HedgedChannel(_forwarding_channel.ForwardingChannel):
+    def __init__(self, channel: grpc.Channel, policy: HedgingPolicy):
+        super().__init__(channel)
+        self._policy = policy
+
+    def unary_unary(self, method, *args, **kwargs):
+        callable_ = self._channel.unary_unary(method, *args, **kwargs)
+        if method not in self._policy.methods:
+            return callable_
+        return _HedgedUnaryUnaryMultiCallable(self._policy, method, callable_)
+
+
+class _HedgedUnaryUnaryMultiCallable(grpc.UnaryUnaryMultiCallable):
+    def __init__(self, policy: HedgingPolicy, method: str, callable_):
+        self._policy = policy
+        self._method = method
+        self._callable = callable_
+
+    def _call(self, request, timeout, args, kwargs) -> grpc.Future:
+        begun = time.monotonic()
+        return self._policy.call(
+            self._method,
+            lambda: self._callable.future(
+                request, _remaining(timeout, begun), *args, **kwargs
+            ),
+        )
+
+    def __call__(self, request, timeout=None, *args, **kwargs):
+        return self._call(request, timeout, args, kwargs).result()
+
+    def with_call(self, request, timeout=None, *args, **kwargs):
+        future = self._call(request, timeout, args, kwargs)
+        return future.result(), future
+
+    def future(self, request, *args, **kwargs):
+        return self._callable.future(request, *args, **kwargs)
+
+
+class _HedgedAioChannel(_forwarding_channel.ForwardingAioChannel):
+    def __init__(self, channel: aio.Channel, policy: HedgingPolicy):
+        super().__init__(channel)
+        self._policy = policy
+
+    def unary_unary(self, method, *args, **kwargs):
+        callable_ = self._channel.unary_unary(method, *args, **kwargs)
+        if method not in self._policy.methods:
+            return callable_
+        return _HedgedAioUnaryUnaryMultiCallable(self._policy, method, callable_)
+
+
+class _HedgedAioUnaryUnaryMultiCallable(aio.UnaryUnaryMultiCallable):
+    def __init__(self, policy: HedgingPolicy, method: str, callable_):
+        self._policy = policy
+        self._method = method
+        self._callable = callable_
+
+    def __call__(self, request, *, timeout=None, **kwargs):
+        begun = time.monotonic()
+        return _HedgedAioCall(
+            self._policy,
+            self._method,
+            lambda: self._callable(
+                request, timeout=_remaining(timeout, begun), **kwargs
+            ),
+        )
+
+
+class _HedgedAioCall:
+    """An awaitable unary call that hedges itself."""
+
+    def __init__(self, policy: HedgingPolicy, method: str, start: Callable):
+        self._task = asyncio.ensure_future(policy.call_async(method, start))
+
+    def __await__(self):
+        return self._task.__await__()
+
+    def cancel(self) -> bool:
+        return self._task.cancel()
+
+
+__all__ = (
+    "DEFAULT_BUDGET_RATIO",
+    "DEFAULT_METHODS",
+    "DEFAULT_PERCENTILE",
+    "HedgingPolicy",
+)
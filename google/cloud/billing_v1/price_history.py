@@ -0,0 +1,400 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Point-in-time lookups over the pricing history of SKUs.
+
+``Sku.pricing_info`` is a timeline: each :class:`~.cloud_catalog.PricingInfo`
+applies from its ``effective_time`` until the next one takes over.
+:class:`PriceTimeline` answers "which entry applied to this SKU at this
+time" for whole batches of usage rows at once, and
+:func:`fetch_price_history` builds those timelines from the API over
+arbitrary time ranges.
+
+:class:`PriceTimeline` requires the ``numpy`` package, which is installed
+with the ``pricing`` extra: ``pip install google-cloud-billing[pricing]``.
+"""
+
+import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from google.cloud.billing_v1 import catalog_crawler
+from google.cloud.billing_v1.services.cloud_catalog import CloudCatalogClient
+from google.cloud.billing_v1.types import cloud_catalog
+
+try:
+    import numpy  # type: ignore
+except ImportError:  # pragma: NO COVER
+    numpy = None
+
+
+_NUMPY_REQUIRED = (
+    "numpy is required to build a price timeline. "
+    "Install it with `pip install google-cloud-billing[pricing]`."
+)
+
+_MICROS_PER_SECOND = 10 ** 6
+
+# ``ListSkus`` time ranges must fall within one calendar month in the
+# America/Los_Angeles time zone. Under the US daylight saving rules in force
+# since 2007, DST starts on the second Sunday of March and ends on the first
+# Sunday of November, both at 2 AM, so midnight on the first of April through
+# November is always PDT and midnight on the first of the other months PST.
+# Earlier month boundaries followed other rules, so ranges must not start
+# before the first daylight saving switch under the current ones.
+_PACIFIC_STANDARD = datetime.timezone(datetime.timedelta(hours=-8))
+_PACIFIC_DAYLIGHT = datetime.timezone(datetime.timedelta(hours=-7))
+_PACIFIC_RULES_START = datetime.datetime(2007, 3, 11, 2, tzinfo=_PACIFIC_STANDARD)
+
+
+def _timestamp_micros(timestamp) -> int:
+    return timestamp.seconds * _MICROS_PER_SECOND + timestamp.nanos // 1000
+
+
+def _to_epoch_micros(timestamps):
+    timestamps = numpy.asarray(timestamps)
+    if timestamps.dtype.kind == "M":
+        return timestamps.astype("datetime64[us]").astype(numpy.int64)
+    return numpy.rint(timestamps.astype(numpy.float64) * _MICROS_PER_SECOND).astype(
+        numpy.int64
+    )
+
+
+def _pacific_month_start(year: int, month: int) -> datetime.datetime:
+    tz = _PACIFIC_DAYLIGHT if 4 <= month <= 11 else _PACIFIC_STANDARD
+    return datetime.datetime(year, month, 1, tzinfo=tz)
+
+
+def _next_month(year: int, month: int) -> Tuple[int, int]:
+    return (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def month_ranges(
+    start_time: datetime.datetime, end_time: datetime.datetime
+) -> List[Tuple[datetime.datetime, datetime.datetime]]:
+    """Split a time range on America/Los_Angeles month boundaries.
+
+    Args:
+        start_time (datetime.datetime): The inclusive, timezone-aware start
+            of the range.
+        end_time (datetime.datetime): The exclusive, timezone-aware end of
+            the range.
+
+    Returns:
+        List[Tuple[datetime.datetime, datetime.datetime]]: Consecutive
+            ``(start, end)`` pairs in UTC that cover the range, each within
+            a single Pacific calendar month, as ``ListSkus`` requires.
+
+    Raises:
+        ValueError: If either time is naive, the range is empty, or it
+            starts before the US daylight saving rules in force since
+            2007-03-11.
+    """
+    if start_time.tzinfo is None or end_time.tzinfo is None:
+        raise ValueError("start_time and end_time must be timezone-aware.")
+    if end_time <= start_time:
+        raise ValueError("end_time must be after start_time.")
+    if start_time < _PACIFIC_RULES_START:
+        raise ValueError(
+            "start_time must not be before {}.".format(_PACIFIC_RULES_START.isoformat())
+        )
+
+    # Midnight PST is 1 AM PDT, so the month in PST is either the right
+    # one or the one before.
+    local = start_time.astimezone(_PACIFIC_STANDARD)
+    year, month = local.year, local.month
+    if _pacific_month_start(*_next_month(year, month)) <= start_time:
+        year, month = _next_month(year, month)
+
+    ranges = []
+    current = start_time.astimezone(datetime.timezone.utc)
+    while current < end_time:
+        year, month = _next_month(year, month)
+        boundary = _pacific_month_start(year, month).astimezone(datetime.timezone.utc)
+        ranges.append((current, min(boundary, end_time)))
+        current = boundary
+    return ranges
+
+
+def _pricing_key(info) -> bytes:
+    # Two versions are the same price if they differ only in when they
+    # were observed.
+    version = type(info)()
+    version.CopyFrom(info)
+    version.ClearField("effective_time")
+    return version.SerializeToString(deterministic=True)
+
+
+def fetch_price_history(
+    client: CloudCatalogClient,
+    start_time: datetime.datetime,
+    end_time: datetime.datetime,
+    *,
+    services: Optional[Iterable[str]] = None,
+    currency_code: str = "",
+    max_concurrency: int = catalog_crawler.DEFAULT_MAX_CONCURRENCY,
+) -> Dict[str, cloud_catalog.Sku]:
+    """Fetch the pricing history of SKUs over an arbitrary time range.
+
+    The range is split with :func:`month_ranges`, and the ``list_skus``
+    crawls of every service and month run concurrently on a
+    :class:`~.catalog_crawler.CatalogCrawler`. Each month reports the
+    prices in effect from its start, so a price that did not change shows
+    up once per month; such repeats are dropped, leaving one entry per
+    actual price change.
+
+    Example:
+        >>> history = fetch_price_history(client, start, end)
+        >>> timeline = PriceTimeline(history.values())
+
+    Args:
+        client (~.CloudCatalogClient): The client used to list SKUs.
+        start_time (datetime.datetime): The inclusive, timezone-aware
+            start of the range.
+        end_time (datetime.datetime): The exclusive, timezone-aware end of
+            the range. It may not be in the future.
+        services (Optional[Iterable[str]]): The resource names of the
+            services to fetch. Defaults to every service.
+        currency_code (str): The ISO 4217 currency to price in. Defaults
+            to USD.
+        max_concurrency (int): The maximum number of ``list_skus`` crawls
+            in flight at the same time.
+
+    Returns:
+        Dict[str, :class:`~.cloud_catalog.Sku`]: One SKU per resource name,
+            sorted by name. Its other fields come from the latest month it
+            was listed in, and its ``pricing_info`` is the merged timeline
+            in chronological order.
+
+    Raises:
+        ValueError: If the time range is invalid.
+        google.api_core.exceptions.GoogleAPICallError: If listing SKUs
+            fails.
+    """
+    ranges = month_ranges(start_time, end_time)
+    if services is None:
+        services = [service.name for service in client.list_services()]
+    services = list(services)
+
+    requests = []
+    month_of = {}
+    for month, (month_start, month_end) in enumerate(ranges):
+        for parent in services:
+            request = cloud_catalog.ListSkusRequest(
+                parent=parent,
+                start_time=month_start,
+                end_time=month_end,
+                currency_code=currency_code,
+            )
+            month_of[id(request)] = month
+            requests.append(request)
+
+    # The raw protobuf SKU from the latest month, and every pricing version
+    # seen, by SKU name.
+    latest = {}  # type: Dict[str, Tuple[int, Any]]
+    versions = {}  # type: Dict[str, List[Any]]
+    crawler = catalog_crawler.CatalogCrawler(client, max_concurrency=max_concurrency)
+    for request, page in crawler.iter_request_pages(requests):
+        month = month_of[id(request)]
+        for sku_pb in cloud_catalog.ListSkusResponse.pb(page).skus:
+            if sku_pb.name not in latest or latest[sku_pb.name][0] < month:
+                latest[sku_pb.name] = (month, sku_pb)
+            versions.setdefault(sku_pb.name, []).extend(sku_pb.pricing_info)
+
+    history = {}
+    for name in sorted(latest):
+        entries = sorted(
+            versions[name], key=lambda info: _timestamp_micros(info.effective_time)
+        )
+        sku = cloud_catalog.Sku(latest[name][1])
+        sku_pb = cloud_catalog.Sku.pb(sku)
+        del sku_pb.pricing_info[:]
+        previous = None
+        for info in entries:
+            key = _pricing_key(info)
+            if key != previous:
+                sku_pb.pricing_info.add().CopyFrom(info)
+                previous = key
+        history[name] = sku
+    return history
+
+
+class PriceTimeline:
+    """The pricing history of many SKUs, compiled for batched lookups.
+
+    The entries of every SKU are sorted by ``effective_time`` and stored
+    back to back, each keyed by the SKU's code (its position among the
+    sorted ``sku_id`` values) and the rank of its effective time among all
+    distinct effective times. Since these keys sort in the same order as
+    the entries, resolving a batch of ``(sku, time)`` pairs takes two
+    vectorized ``searchsorted`` calls, whatever the number of SKUs.
+
+    Example:
+        >>> timeline = PriceTimeline(snapshot.skus())
+        >>> entries = timeline.lookup(usage["sku_id"], usage["usage_start"])
+        >>> timeline.pricing_info(entries[0])
+    """
+
+    def __init__(self, skus: Iterable[cloud_catalog.Sku]):
+        """Compile the pricing history of some SKUs.
+
+        SKUs that share a ``sku_id`` have their ``pricing_info`` merged;
+        of several entries with the same ``effective_time``, the first is
+        kept.
+
+        Args:
+            skus (Iterable[:class:`~.cloud_catalog.Sku`]): The SKUs to
+                index, typically listed with a ``start_time`` and
+                ``end_time`` to include historical prices.
+
+        Raises:
+            ImportError: If ``numpy`` is not installed.
+        """
+        if numpy is None:
+            raise ImportError(_NUMPY_REQUIRED)
+
+        history = {}
+        for sku in skus:
+            sku_pb = cloud_catalog.Sku.pb(sku)
+            entries = history.setdefault(sku_pb.sku_id, {})
+            for info, info_pb in zip(sku.pricing_info, sku_pb.pricing_info):
+                entries.setdefault(_timestamp_micros(info_pb.effective_time), info)
+
+        sku_ids = sorted(history)
+        entry_skus = []
+        entry_times = []
+        self._entries = []  # type: List[cloud_catalog.PricingInfo]
+        for code, sku_id in enumerate(sku_ids):
+            for micros, info in sorted(history[sku_id].items()):
+                entry_skus.append(code)
+                entry_times.append(micros)
+                self._entries.append(info)
+
+        entry_skus = numpy.asarray(entry_skus, dtype=numpy.int64)
+        entry_times = numpy.asarray(entry_times, dtype=numpy.int64)
+        self._sku_ids = numpy.asarray(sku_ids, dtype=numpy.str_)
+        self._times = numpy.unique(entry_times)
+        self._stride = len(self._times) + 1
+        self._entry_skus = entry_skus
+        self._entry_keys = entry_skus * self._stride + numpy.searchsorted(
+            self._times, entry_times, side="right"
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def sku_ids(self) -> List[str]:
+        """List[str]: The indexed SKU ids, in code order."""
+        return self._sku_ids.tolist()
+
+    def codes(self, sku_ids):
+        """Map ``sku_id`` values to the integer codes :meth:`lookup` takes.
+
+        Encoding the SKU column of a large batch once and reusing the codes
+        saves the string comparisons on every lookup.
+
+        Args:
+            sku_ids (numpy.typing.ArrayLike): ``sku_id`` strings.
+
+        Returns:
+            numpy.ndarray: The ``int64`` code of each id, or ``-1`` for ids
+            that are not in the timeline.
+        """
+        sku_ids = numpy.asarray(sku_ids, dtype=numpy.str_)
+        if not len(self._sku_ids):
+            return numpy.full(sku_ids.shape, -1, dtype=numpy.int64)
+        codes = numpy.searchsorted(self._sku_ids, sku_ids)
+        clipped = numpy.minimum(codes, len(self._sku_ids) - 1)
+        return numpy.where(self._sku_ids[clipped] == sku_ids, clipped, -1)
+
+    def lookup(self, skus, timestamps):
+        """Find the pricing entry in effect for each ``(sku, time)`` pair.
+
+        Args:
+            skus (numpy.typing.ArrayLike): ``sku_id`` strings, or the integer
+                codes returned by :meth:`codes`.
+            timestamps (numpy.typing.ArrayLike): The matching times, as
+                ``datetime64`` values or as seconds since the epoch. Must
+                broadcast against ``skus``.
+
+        Returns:
+            numpy.ndarray: For each pair, the ``int64`` index of the entry
+            in effect, to be passed to :meth:`pricing_info`; ``-1`` if the
+            SKU is unknown or the time precedes its first entry.
+        """
+        codes = numpy.asarray(skus)
+        if codes.dtype.kind not in "iu":
+            codes = self.codes(codes)
+        codes = codes.astype(numpy.int64)
+        if not self._entries:
+            return numpy.full(
+                numpy.broadcast(codes, numpy.asarray(timestamps)).shape,
+                -1,
+                dtype=numpy.int64,
+            )
+        ranks = numpy.searchsorted(
+            self._times, _to_epoch_micros(timestamps), side="right"
+        )
+        keys = codes * self._stride + ranks
+        found = numpy.searchsorted(self._entry_keys, keys, side="right") - 1
+        # The entry found belongs to an earlier SKU if this SKU has no
+        # entry at or before the time.
+        valid = (codes >= 0) & (found >= 0)
+        valid &= self._entry_skus[numpy.maximum(found, 0)] == codes
+        return numpy.where(valid, found, -1)
+
+    def pricing_info(self, index: int) -> cloud_catalog.PricingInfo:
+        """Return the entry at an index returned by :meth:`lookup`.
+
+        Raises:
+            IndexError: If ``index`` is ``-1`` or otherwise out of range.
+        """
+        index = int(index)
+        if index < 0:
+            raise IndexError("No pricing entry applies.")
+        return self._entries[index]
+
+    def at(
+        self, sku_id: str, when: Union[datetime.datetime, float]
+    ) -> Optional[cloud_catalog.PricingInfo]:
+        """Return the entry in effect for one SKU at one time.
+
+        Args:
+            sku_id (str): The SKU's ``sku_id``.
+            when (Union[datetime.datetime, float]): A timezone-aware
+                datetime, or seconds since the epoch.
+
+        Returns:
+            Optional[:class:`~.cloud_catalog.PricingInfo`]: The entry, or
+            ``None`` if none applies.
+        """
+        if isinstance(when, datetime.datetime):
+            when = when.timestamp()
+        index = self.lookup([sku_id], [when])[0]
+        return None if index < 0 else self.pricing_info(index)
+
+    def __repr__(self) -> str:
+        return "{0}<skus={1}, entries={2}>".format(
+            self.__class__.__name__, len(self._sku_ids), len(self._entries),
+        )
+
+
+__all__ = (
+    "PriceTimeline",
+    "fetch_price_history",
+    "month_ranges",
+)
@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Batched evaluation of tiered :class:`~.cloud_catalog.PricingExpression` s.
+
+This module requires the ``numpy`` package, which is installed with the
+``pricing`` extra: ``pip install google-cloud-billing[pricing]``.
+"""
+
+from typing import Sequence, Union
+
+from google.cloud.billing_v1.types import cloud_catalog
+from google.type import money_pb2 as money  # type: ignore
+
+try:
+    import numpy  # type: ignore
+except ImportError:  # pragma: NO COVER
+    numpy = None
+
+
+_NUMPY_REQUIRED = (
+    "numpy is required to evaluate pricing expressions. "
+    "Install it with `pip install google-cloud-billing[pricing]`."
+)
+
+NANOS_PER_UNIT = 10 ** 9
+
+
+def money_to_nanos(amount: money.Money) -> int:
+    """Return ``amount`` as an exact integer number of nanos.
+
+    Args:
+        amount (google.type.money_pb2.Money): The amount to convert.
+
+    Returns:
+        int: ``units * 10**9 + nanos``.
+    """
+    return amount.units * NANOS_PER_UNIT + amount.nanos
+
+
+def nanos_to_money(nanos: int, currency_code: str = "") -> money.Money:
+    """Return an integer number of nanos as a normalized ``Money``.
+
+    ``units`` and ``nanos`` always carry the same sign, as required by
+    ``google.type.Money``.
+    """
+    nanos = int(nanos)
+    units = abs(nanos) // NANOS_PER_UNIT
+    remainder = abs(nanos) - units * NANOS_PER_UNIT
+    sign = -1 if nanos < 0 else 1
+    return money.Money(
+        currency_code=currency_code, units=sign * units, nanos=sign * remainder,
+    )
+
+
+_OVERFLOW = "The cost does not fit in 64-bit nanos."
+
+
+def _band_cost_nanos(width, price_nanos):
+    # Multiply whole units of usage in exact integer arithmetic, so that
+    # large prices and totals do not lose nanos to float64 rounding; only
+    # the fractional remainder of each amount goes through floating point.
+    whole = numpy.floor(width)
+    fraction = width - whole
+    # int64 arithmetic wraps around silently. One more whole unit bounds
+    # the rounded fraction, so the sum fits too.
+    limit = numpy.iinfo(numpy.int64).max // numpy.maximum(numpy.abs(price_nanos), 1)
+    if numpy.any(whole + 1 > limit):
+        raise OverflowError(_OVERFLOW)
+    return whole.astype(numpy.int64) * price_nanos + numpy.rint(
+        fraction * price_nanos
+    ).astype(numpy.int64)
+
+
+def _add_nanos(a, b):
+    with numpy.errstate(over="ignore"):
+        total = a + b
+    # The sum of two int64 of the same sign wraps around to the other sign.
+    if numpy.any(((a < 0) == (b < 0)) & ((total < 0) != (a < 0))):
+        raise OverflowError(_OVERFLOW)
+    return total
+
+
+class TieredPricing:
+    """A :class:`~.cloud_catalog.PricingExpression` compiled to arrays.
+
+    The tiers are held as three parallel arrays: the usage amount at which
+    each tier starts, its exact unit price in nanos, and the cost of all
+    usage below the tier start. Pricing a batch of quantities is then a
+    single ``searchsorted`` followed by one multiply-add, independent of
+    the number of tiers.
+
+    As documented on ``PricingExpression``, usage below the first tier's
+    ``start_usage_amount`` is free, and usage in each band between two tier
+    starts is charged at the lower tier's ``unit_price``.
+    """
+
+    def __init__(
+        self,
+        start_usage_amounts: Sequence[float],
+        unit_prices_nanos: Sequence[int],
+        *,
+        currency_code: str = "",
+        base_unit_conversion_factor: float = 0.0,
+    ):
+        """Instantiate the compiled pricing.
+
+        Most callers should use :meth:`from_expression` instead.
+
+        Args:
+            start_usage_amounts (Sequence[float]): Ascending tier starts, in
+                ``usage_unit``.
+            unit_prices_nanos (Sequence[int]): The price per ``usage_unit``
+                of each tier, in nanos of ``currency_code``.
+            currency_code (str): The ISO 4217 currency of the prices.
+            base_unit_conversion_factor (float): The number of base units in
+                one usage unit; ``0`` if unknown.
+
+        Raises:
+            ImportError: If ``numpy`` is not installed.
+            ValueError: If the tiers are empty, of mismatched length, or not
+                sorted by start amount.
+            OverflowError: If the cost of the tiers does not fit in 64-bit
+                nanos.
+        """
+        if numpy is None:
+            raise ImportError(_NUMPY_REQUIRED)
+
+        starts = numpy.asarray(start_usage_amounts, dtype=numpy.float64)
+        prices = numpy.asarray(unit_prices_nanos, dtype=numpy.int64)
+        if starts.ndim != 1 or starts.shape != prices.shape or not len(starts):
+            raise ValueError("A pricing expression needs at least one tier.")
+        if not numpy.all(numpy.isfinite(starts)):
+            raise ValueError("Tier starts must be finite.")
+        if numpy.any(numpy.diff(starts) < 0):
+            raise ValueError("Tiers must be sorted by start_usage_amount.")
+
+        # The cost accrued before each tier starts: every earlier band is
+        # fully used at its own price.
+        bands = _band_cost_nanos(numpy.diff(starts), prices[:-1])
+        accrued = numpy.zeros(len(starts), dtype=numpy.int64)
+        for i, band in enumerate(bands):
+            accrued[i + 1] = _add_nanos(accrued[i], band)
+
+        self.start_usage_amounts = starts
+        self.unit_prices_nanos = prices
+        self.currency_code = currency_code
+        self.base_unit_conversion_factor = base_unit_conversion_factor
+        self._accrued_nanos = accrued
+
+    @classmethod
+    def from_expression(
+        cls, expression: cloud_catalog.PricingExpression
+    ) -> "TieredPricing":
+        """Compile a pricing expression.
+
+        Args:
+            expression (:class:`~.cloud_catalog.PricingExpression`): The
+                expression to compile, typically
+                ``sku.pricing_info[i].pricing_expression``.
+
+        Returns:
+            TieredPricing: The compiled expression.
+
+        Raises:
+            ValueError: If the expression has no tiers, or its tiers are
+                priced in more than one currency.
+        """
+        expression_pb = cloud_catalog.PricingExpression.pb(expression)
+        starts = []
+        prices = []
+        currencies = set()
+        for rate in expression_pb.tiered_rates:
+            starts.append(rate.start_usage_amount)
+            prices.append(money_to_nanos(rate.unit_price))
+            if rate.unit_price.currency_code:
+                currencies.add(rate.unit_price.currency_code)
+        if len(currencies) > 1:
+            raise ValueError(
+                "Tiers are priced in several currencies: {}.".format(
+                    ", ".join(sorted(currencies))
+                )
+            )
+        return cls(
+            starts,
+            prices,
+            currency_code=currencies.pop() if currencies else "",
+            base_unit_conversion_factor=expression_pb.base_unit_conversion_factor,
+        )
+
+    def _to_usage_units(self, usage, base_units: bool):
+        usage = numpy.asarray(usage, dtype=numpy.float64)
+        if not base_units:
+            return usage
+        if not self.base_unit_conversion_factor:
+            raise ValueError(
+                "The pricing expression has no base_unit_conversion_factor."
+            )
+        return usage / self.base_unit_conversion_factor
+
+    def cost_nanos(self, usage, *, base_units: bool = False):
+        """Price a batch of usage amounts.
+
+        Args:
+            usage (numpy.typing.ArrayLike): Usage amounts of any shape, in
+                ``usage_unit`` (or in ``base_unit`` if ``base_units`` is set).
+            base_units (bool): Whether ``usage`` is expressed in the
+                expression's ``base_unit``, e.g. bytes rather than GiB.
+
+        Returns:
+            numpy.ndarray: The ``int64`` cost of each amount in nanos of
+            :attr:`currency_code`. Whole units of usage are priced exactly;
+            fractional usage is rounded to the nearest nano.
+
+        Raises:
+            ValueError: If an amount is negative, infinite or NaN.
+            OverflowError: If a cost does not fit in 64-bit nanos.
+        """
+        quantity = self._to_usage_units(usage, base_units)
+        if not numpy.all(numpy.isfinite(quantity)):
+            raise ValueError("Usage amounts must be finite.")
+        if numpy.any(quantity < 0):
+            raise ValueError("Usage amounts must not be negative.")
+        starts = self.start_usage_amounts
+        tier = numpy.searchsorted(starts, quantity, side="right") - 1
+        billable = tier >= 0
+        tier = numpy.maximum(tier, 0)
+        cost = _add_nanos(
+            self._accrued_nanos[tier],
+            _band_cost_nanos(quantity - starts[tier], self.unit_prices_nanos[tier]),
+        )
+        return numpy.where(billable, cost, 0)
+
+    def cost(self, usage, *, base_units: bool = False):
+        """Price a batch of usage amounts in whole currency units.
+
+        This is :meth:`cost_nanos` divided by ``10**9``, as ``float64``.
+        """
+        return self.cost_nanos(usage, base_units=base_units) / NANOS_PER_UNIT
+
+    def cost_money(
+        self, usage: Union[float, int], *, base_units: bool = False
+    ) -> money.Money:
+        """Price a single usage amount as ``google.type.Money``."""
+        nanos = self.cost_nanos(numpy.asarray([usage]), base_units=base_units)[0]
+        return nanos_to_money(nanos, self.currency_code)
+
+    def __repr__(self) -> str:
+        return "{0}<tiers={1}, currency_code={2!r}>".format(
+            self.__class__.__name__, len(self.start_usage_amounts), self.currency_code,
+        )
+
+
+__all__ = (
+    "TieredPricing",
+    "money_to_nanos",
+    "nanos_to_money",
+)
@@ -0,0 +1,662 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Look up and update the billing information of many projects at once.
+
+``GetProjectBillingInfo`` answers for one project per RPC, while one page
+of ``ListProjectBillingInfo`` returns up to a hundred projects of a
+billing account. When the accounts the projects are likely linked to are
+known, sweeping those accounts is usually far cheaper than one ``get``
+per project; :func:`batch_get_project_billing_info` picks between the
+two, and falls back to ``get`` for the projects a sweep did not find.
+
+:func:`bulk_update_project_billing_info` moves many projects between
+billing accounts with bounded concurrency, an optional rate limit, and a
+shared backoff when the quota is exhausted.
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from google.api_core import exceptions  # type: ignore
+from google.cloud.billing_v1.types import cloud_billing
+
+
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_INITIAL_BACKOFF = 1.0
+DEFAULT_MAX_BACKOFF = 32.0
+
+#: Sweep the hinted accounts when there are fewer of them than projects,
+#: and give up on the sweep once it has cost as many RPCs as the ``get``
+#: calls it would save.
+STRATEGY_AUTO = "auto"
+#: Sweep every hinted account to the end.
+STRATEGY_LIST = "list"
+#: Only send ``get_project_billing_info`` calls.
+STRATEGY_GET = "get"
+
+_STRATEGIES = (STRATEGY_AUTO, STRATEGY_LIST, STRATEGY_GET)
+
+
+def _project_ids(project_ids: Iterable[str]) -> List[str]:
+    # Accept both "my-project" and "projects/my-project"; drop duplicates
+    # but keep the order.
+    ids = {}  # type: Dict[str, None]
+    for project_id in project_ids:
+        if project_id.startswith("projects/"):
+            project_id = project_id[len("projects/") :]
+        ids[project_id] = None
+    return list(ids)
+
+
+def _plan(
+    strategy: str, hint_accounts: List[str], project_ids: List[str]
+) -> Optional[int]:
+    """Return ``None`` to skip the sweep, or else its RPC budget.
+
+    A budget of ``0`` is unlimited.
+    """
+    if strategy not in _STRATEGIES:
+        raise ValueError("Unknown strategy: {!r}.".format(strategy))
+    if strategy == STRATEGY_GET or not hint_accounts or not project_ids:
+        return None
+    if strategy == STRATEGY_LIST:
+        return 0
+    if len(hint_accounts) >= len(project_ids):
+        return None
+    return len(project_ids)
+
+
+class _Sweep:
+    """The state shared by the workers sweeping the hinted accounts."""
+
+    def __init__(self, wanted: Set[str], budget: int):
+        self.wanted = wanted
+        self.found = {}  # type: Dict[str, cloud_billing.ProjectBillingInfo]
+        self.rpcs = 0
+        self._budget = budget
+        self._done = False
+        self._lock = threading.Lock()
+
+    def take_rpc(self) -> bool:
+        """Whether a worker may fetch another page."""
+        with self._lock:
+            if self._done or (self._budget and self.rpcs >= self._budget):
+                self._done = True
+                return False
+            self.rpcs += 1
+            return True
+
+    def add(self, page) -> None:
+        with self._lock:
+            for info in page.project_billing_info:
+                if info.project_id in self.wanted:
+                    self.found.setdefault(info.project_id, info)
+            if len(self.found) == len(self.wanted):
+                self._done = True
+
+
+def _sweep_account(client, account: str, sweep: _Sweep) -> None:
+    if not sweep.take_rpc():
+        return
+    try:
+        pager = client.list_project_billing_info(name=account)
+        for page in pager.pages:
+            sweep.add(page)
+            if page.next_page_token and not sweep.take_rpc():
+                break
+    except exceptions.GoogleAPICallError:
+        # The account may be closed or not visible to the caller; its
+        # projects are fetched one by one instead.
+        return
+
+
+async def _sweep_account_async(
+    client, account: str, sweep: _Sweep, semaphore: asyncio.Semaphore
+) -> None:
+    async with semaphore:
+        if not sweep.take_rpc():
+            return
+        try:
+            pager = await client.list_project_billing_info(name=account)
+            async for page in pager.pages:
+                sweep.add(page)
+                if page.next_page_token and not sweep.take_rpc():
+                    break
+        except exceptions.GoogleAPICallError:
+            return
+
+
+def batch_get_project_billing_info(
+    client,
+    project_ids: Iterable[str],
+    *,
+    hint_accounts: Iterable[str] = (),
+    strategy: str = STRATEGY_AUTO,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> Dict[str, cloud_billing.ProjectBillingInfo]:
+    """Get the billing information of many projects.
+
+    With the ``"auto"`` strategy, the hinted accounts are swept with
+    ``list_project_billing_info`` if there are fewer of them than projects.
+    The sweep stops as soon as every project is found, or once it has sent
+    as many RPCs as there are projects, so it never costs more than about
+    twice the ``get`` calls it replaces. Projects it did not find are then
+    fetched with ``get_project_billing_info``. Accounts that cannot be
+    listed are skipped.
+
+    Example:
+        >>> infos = batch_get_project_billing_info(
+        ...     client, project_ids, hint_accounts=["billingAccounts/0X0X0X"]
+        ... )
+        >>> unbilled = [p for p, info in infos.items() if not info.billing_enabled]
+
+    Args:
+        client (~.CloudBillingClient): The client to send the RPCs with.
+        project_ids (Iterable[str]): The projects, as ids or as
+            ``projects/{project_id}`` resource names.
+        hint_accounts (Iterable[str]): The resource names of the billing
+            accounts the projects are likely linked to.
+        strategy (str): ``"auto"``, ``"list"`` to sweep every hinted
+            account to the end whatever the cost, or ``"get"`` to ignore
+            the hints.
+        max_concurrency (int): The maximum number of RPCs in flight.
+
+    Returns:
+        Dict[str, :class:`~.cloud_billing.ProjectBillingInfo`]: The
+            billing information by project id, in the order of
+            ``project_ids``.
+
+    Raises:
+        ValueError: If ``strategy`` or ``max_concurrency`` is invalid.
+        google.api_core.exceptions.GoogleAPICallError: If getting the
+            billing information of a project fails.
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1.")
+    project_ids = _project_ids(project_ids)
+    hint_accounts = list(dict.fromkeys(hint_accounts))
+    budget = _plan(strategy, hint_accounts, project_ids)
+
+    found = {}  # type: Dict[str, cloud_billing.ProjectBillingInfo]
+    with concurrent.futures.ThreadPoolExecutor(max_concurrency) as executor:
+        if budget is not None:
+            sweep = _Sweep(set(project_ids), budget)
+            list(
+                executor.map(
+                    lambda account: _sweep_account(client, account, sweep),
+                    hint_accounts,
+                )
+            )
+            found.update(sweep.found)
+
+        missing = [project_id for project_id in project_ids if project_id not in found]
+        infos = executor.map(
+            lambda project_id: client.get_project_billing_info(
+                name="projects/" + project_id
+            ),
+            missing,
+        )
+        found.update(zip(missing, infos))
+
+    return {project_id: found[project_id] for project_id in project_ids}
+
+
+async def batch_get_project_billing_info_async(
+    client,
+    project_ids: Iterable[str],
+    *,
+    hint_accounts: Iterable[str] = (),
+    strategy: str = STRATEGY_AUTO,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> Dict[str, cloud_billing.ProjectBillingInfo]:
+    """Get the billing information of many projects, with asyncio.
+
+    This is :func:`batch_get_project_billing_info` for a
+    ``CloudBillingAsyncClient``; it takes the same arguments.
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1.")
+    project_ids = _project_ids(project_ids)
+    hint_accounts = list(dict.fromkeys(hint_accounts))
+    budget = _plan(strategy, hint_accounts, project_ids)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    found = {}  # type: Dict[str, cloud_billing.ProjectBillingInfo]
+    if budget is not None:
+        sweep = _Sweep(set(project_ids), budget)
+        await asyncio.gather(
+            *[
+                _sweep_account_async(client, account, sweep, semaphore)
+                for account in hint_accounts
+            ]
+        )
+        found.update(sweep.found)
+
+    async def get(project_id):
+        async with semaphore:
+            return await client.get_project_billing_info(name="projects/" + project_id)
+
+    missing = [project_id for project_id in project_ids if project_id not in found]
+    infos = await asyncio.gather(*[get(project_id) for project_id in missing])
+    found.update(zip(missing, infos))
+
+    return {project_id: found[project_id] for project_id in project_ids}
+
+
+class TokenBucket:
+    """A thread-safe token bucket rate limiter.
+
+    Tokens accrue at ``rate`` per second, up to ``burst`` of them. A caller
+    reserves a token and waits for the returned delay before using it; the
+    reservations made while the bucket is empty queue up behind each other.
+
+    Example:
+        >>> bucket = TokenBucket(rate=10)
+        >>> time.sleep(bucket.reserve())
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        *,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        """Instantiate the bucket, full.
+
+        Args:
+            rate (float): The number of tokens added per second.
+            burst (int): The maximum number of tokens in the bucket.
+            timer (Callable[[], float]): The clock, in seconds.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive.")
+        if burst < 1:
+            raise ValueError("burst must be at least 1.")
+        self.rate = rate
+        self.burst = burst
+        self._timer = timer
+        self._tokens = float(burst)
+        self._updated = timer()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token.
+
+        Returns:
+            float: The number of seconds to wait before using the token.
+        """
+        with self._lock:
+            now = self._timer()
+            elapsed = now - self._updated
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def __repr__(self) -> str:
+        return "{0}<rate={1}, burst={2}>".format(
+            self.__class__.__name__, self.rate, self.burst,
+        )
+
+
+class UpdateResult:
+    """The outcome of one of the updates of a bulk update.
+
+    Attributes:
+        project_id (str): The project.
+        billing_account_name (str): The billing account the project was
+            to be linked to.
+        info (Optional[~.cloud_billing.ProjectBillingInfo]): The updated
+            billing information, if the update succeeded.
+        error (Optional[google.api_core.exceptions.GoogleAPIError]):
+            Why the update failed, otherwise.
+        attempts (int): The number of RPCs sent for the update.
+    """
+
+    __slots__ = ("project_id", "billing_account_name", "info", "error", "attempts")
+
+    def __init__(self, project_id: str, billing_account_name: str):
+        self.project_id = project_id
+        self.billing_account_name = billing_account_name
+        self.info = None  # type: Optional[cloud_billing.ProjectBillingInfo]
+        self.error = None  # type: Optional[exceptions.GoogleAPIError]
+        self.attempts = 0
+
+    @property
+    def ok(self) -> bool:
+        """bool: Whether the update succeeded."""
+        return self.info is not None
+
+    def __repr__(self) -> str:
+        return "{0}<project_id={1!r}, billing_account_name={2!r}, {3}>".format(
+            self.__class__.__name__,
+            self.project_id,
+            self.billing_account_name,
+            "ok" if self.ok else "error={!r}".format(self.error),
+        )
+
+
+class _Throttle:
+    """The pacing shared by the workers of a bulk update."""
+
+    def __init__(
+        self,
+        bucket: Optional[TokenBucket],
+        deadline: Optional[float],
+        initial_backoff: float,
+        max_backoff: float,
+    ):
+        self._bucket = bucket
+        self._deadline_at = None if deadline is None else time.monotonic() + deadline
+        self._initial_backoff = initial_backoff
+        self._max_backoff = max_backoff
+        self._backoff = initial_backoff
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+
+    def delay(self) -> Optional[float]:
+        """Return how long to wait before the next RPC.
+
+        ``None`` means that the RPC could not be sent before the deadline.
+        """
+        now = time.monotonic()
+        with self._lock:
+            delay = max(0.0, self._resume_at - now)
+        if self._bucket is not None:
+            delay = max(delay, self._bucket.reserve())
+        if self._deadline_at is not None and now + delay >= self._deadline_at:
+            return None
+        return delay
+
+    def timeout(self) -> Optional[float]:
+        if self._deadline_at is None:
+            return None
+        return max(0.0, self._deadline_at - time.monotonic())
+
+    def exhausted(self) -> None:
+        """Pause every worker after a transient error."""
+        with self._lock:
+            now = time.monotonic()
+            # The RPCs sent before the pause started may fail too; they
+            # should not lengthen it.
+            if now < self._resume_at:
+                return
+            self._resume_at = now + self._backoff
+            self._backoff = min(self._backoff * 2, self._max_backoff)
+
+    def recovered(self) -> None:
+        with self._lock:
+            self._backoff = self._initial_backoff
+
+
+def _updates(
+    updates: Union[Mapping[str, str], Iterable[Tuple[str, str]]]
+) -> List[UpdateResult]:
+    if isinstance(updates, Mapping):
+        updates = updates.items()
+    results = []
+    for project_id, billing_account_name in updates:
+        if project_id.startswith("projects/"):
+            project_id = project_id[len("projects/") :]
+        results.append(UpdateResult(project_id, billing_account_name))
+    return results
+
+
+def _make_throttle(
+    max_concurrency, rate, burst, deadline, max_attempts, initial_backoff, max_backoff
+) -> _Throttle:
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1.")
+    if max_attempts < 1:
+        raise ValueError("max_attempts must be at least 1.")
+    bucket = None if rate is None else TokenBucket(rate, burst)
+    return _Throttle(bucket, deadline, initial_backoff, max_backoff)
+
+
+# The errors after which an update is tried again. The RPCs are sent
+# without the client's retry, which would not stop at the deadline of the
+# bulk update.
+_TRANSIENT_ERRORS = (
+    exceptions.DeadlineExceeded,
+    exceptions.ResourceExhausted,
+    exceptions.ServiceUnavailable,
+)
+
+
+def _deadline_error(result: UpdateResult) -> exceptions.DeadlineExceeded:
+    return exceptions.DeadlineExceeded(
+        "The deadline of the bulk update passed before project {!r} "
+        "could be updated.".format(result.project_id)
+    )
+
+
+def _update(
+    client, result: UpdateResult, throttle: _Throttle, max_attempts: int
+) -> UpdateResult:
+    while result.attempts < max_attempts:
+        delay = throttle.delay()
+        if delay is None:
+            result.error = _deadline_error(result)
+            return result
+        time.sleep(delay)
+        result.attempts += 1
+        try:
+            result.info = client.update_project_billing_info(
+                name="projects/" + result.project_id,
+                project_billing_info={
+                    "billing_account_name": result.billing_account_name
+                },
+                retry=None,
+                timeout=throttle.timeout(),
+            )
+        except _TRANSIENT_ERRORS as exc:
+            result.error = exc
+            throttle.exhausted()
+        except exceptions.GoogleAPIError as exc:
+            result.error = exc
+            return result
+        else:
+            result.error = None
+            throttle.recovered()
+            return result
+    return result
+
+
+async def _update_async(
+    client,
+    result: UpdateResult,
+    throttle: _Throttle,
+    max_attempts: int,
+    semaphore: asyncio.Semaphore,
+) -> UpdateResult:
+    async with semaphore:
+        while result.attempts < max_attempts:
+            delay = throttle.delay()
+            if delay is None:
+                result.error = _deadline_error(result)
+                return result
+            await asyncio.sleep(delay)
+            result.attempts += 1
+            try:
+                result.info = await client.update_project_billing_info(
+                    name="projects/" + result.project_id,
+                    project_billing_info={
+                        "billing_account_name": result.billing_account_name
+                    },
+                    retry=None,
+                    timeout=throttle.timeout(),
+                )
+            except _TRANSIENT_ERRORS as exc:
+                result.error = exc
+                throttle.exhausted()
+            except exceptions.GoogleAPIError as exc:
+                result.error = exc
+                return result
+            else:
+                result.error = None
+                throttle.recovered()
+                return result
+        return result
+
+
+def bulk_update_project_billing_info(
+    client,
+    updates: Union[Mapping[str, str], Iterable[Tuple[str, str]]],
+    *,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    rate: Optional[float] = None,
+    burst: int = 1,
+    deadline: Optional[float] = None,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    initial_backoff: float = DEFAULT_INITIAL_BACKOFF,
+    max_backoff: float = DEFAULT_MAX_BACKOFF,
+) -> List[UpdateResult]:
+    """Link many projects to billing accounts.
+
+    The updates run concurrently, paced by a :class:`TokenBucket` when
+    ``rate`` is set. A ``ResourceExhausted``, ``ServiceUnavailable`` or
+    ``DeadlineExceeded`` error pauses every worker for ``initial_backoff``
+    seconds, doubling up to ``max_backoff`` while the errors continue, and
+    the update is tried again, up to ``max_attempts`` times and until the
+    ``deadline``. Other errors are reported at once; the retry configured
+    for ``update_project_billing_info`` is not used.
+
+    A failed update does not stop the others: the outcome of each update
+    is reported in its :class:`UpdateResult`.
+
+    Example:
+        >>> results = bulk_update_project_billing_info(
+        ...     client,
+        ...     {project_id: "billingAccounts/0X0X0X" for project_id in ids},
+        ...     rate=5,
+        ...     deadline=600,
+        ... )
+        >>> failed = [result for result in results if not result.ok]
+
+    Args:
+        client (~.CloudBillingClient): The client to send the RPCs with.
+        updates (Union[Mapping[str, str], Iterable[Tuple[str, str]]]):
+            The billing account resource name to link each project to,
+            by project id or ``projects/{project_id}`` resource name. An
+            empty account name disables billing on the project.
+        max_concurrency (int): The maximum number of RPCs in flight.
+        rate (Optional[float]): The maximum number of RPCs sent per
+            second. Unlimited by default.
+        burst (int): The number of RPCs that may be sent at once after
+            an idle period, when ``rate`` is set.
+        deadline (Optional[float]): The number of seconds the whole bulk
+            update may take. The updates not sent by then fail with
+            ``DeadlineExceeded``.
+        max_attempts (int): The maximum number of RPCs sent per update.
+        initial_backoff (float): The first pause after a transient
+            error, in seconds.
+        max_backoff (float): The longest pause, in seconds.
+
+    Returns:
+        List[UpdateResult]: The outcome of each update, in the order of
+            ``updates``.
+
+    Raises:
+        ValueError: If ``max_concurrency`` or ``max_attempts`` is less
+            than 1, or ``rate`` or ``burst`` is invalid.
+    """
+    throttle = _make_throttle(
+        max_concurrency,
+        rate,
+        burst,
+        deadline,
+        max_attempts,
+        initial_backoff,
+        max_backoff,
+    )
+    results = _updates(updates)
+    with concurrent.futures.ThreadPoolExecutor(max_concurrency) as executor:
+        return list(
+            executor.map(
+                lambda result: _update(client, result, throttle, max_attempts), results,
+            )
+        )
+
+
+async def bulk_update_project_billing_info_async(
+    client,
+    updates: Union[Mapping[str, str], Iterable[Tuple[str, str]]],
+    *,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    rate: Optional[float] = None,
+    burst: int = 1,
+    deadline: Optional[float] = None,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    initial_backoff: float = DEFAULT_INITIAL_BACKOFF,
+    max_backoff: float = DEFAULT_MAX_BACKOFF,
+) -> List[UpdateResult]:
+    """Link many projects to billing accounts, with asyncio.
+
+    This is :func:`bulk_update_project_billing_info` for a
+    ``CloudBillingAsyncClient``; it takes the same arguments.
+    """
+    throttle = _make_throttle(
+        max_concurrency,
+        rate,
+        burst,
+        deadline,
+        max_attempts,
+        initial_backoff,
+        max_backoff,
+    )
+    semaphore = asyncio.Semaphore(max_concurrency)
+    return list(
+        await asyncio.gather(
+            *[
+                _update_async(client, result, throttle, max_attempts, semaphore)
+                for result in _updates(updates)
+            ]
+        )
+    )
+
+
+__all__ = (
+    "DEFAULT_INITIAL_BACKOFF",
+    "DEFAULT_MAX_ATTEMPTS",
+    "DEFAULT_MAX_BACKOFF",
+    "DEFAULT_MAX_CONCURRENCY",
+    "STRATEGY_AUTO",
+    "STRATEGY_GET",
+    "STRATEGY_LIST",
+    "TokenBucket",
+    "UpdateResult",
+    "batch_get_project_billing_info",
+    "batch_get_project_billing_info_async",
+    "bulk_update_project_billing_info",
+    "bulk_update_project_billing_info_async",
+)
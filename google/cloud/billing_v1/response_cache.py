@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""A client-side cache of rarely changing billing resources.
+
+Passing a :class:`ResponseCache` to ``CloudBillingClient`` or
+``CloudBillingAsyncClient`` makes ``get_billing_account`` and
+``get_project_billing_info`` read through it. The cached entry of a
+resource is dropped when the client updates that resource with
+``update_billing_account`` or ``update_project_billing_info``; changes
+made elsewhere show up once the entry expires.
+
+A cache may be shared by several clients to bound their memory together,
+but each client only reads the entries it stored itself, as the clients
+may call as different principals.
+
+Example:
+    >>> cache = ResponseCache(ttl=300, max_size=10000)
+    >>> client = CloudBillingClient(response_cache=cache)
+    >>> client.get_project_billing_info(name="projects/tokyo-rain-123")
+"""
+
+import collections
+import threading
+import time
+from typing import Callable, Hashable, Optional
+
+import proto  # type: ignore
+
+
+#: The number of seconds entries are kept by default.
+DEFAULT_TTL = 60.0
+
+#: The number of entries kept by default.
+DEFAULT_MAX_SIZE = 1024
+
+
+class ResponseCache:
+    """A thread-safe cache of response messages with TTL and LRU eviction.
+
+    Entries expire ``ttl`` seconds after they were stored; once the cache
+    holds ``max_size`` entries, storing another evicts the least recently
+    used one. Messages are copied on the way in and out, so callers may
+    modify the responses they get.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl: float = DEFAULT_TTL,
+        max_size: int = DEFAULT_MAX_SIZE,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        """Instantiate the cache.
+
+        Args:
+            ttl (float): The number of seconds an entry stays valid.
+            max_size (int): The maximum number of entries.
+            timer (Callable[[], float]): The clock entries expire by.
+
+        Raises:
+            ValueError: If ``ttl`` is negative or ``max_size`` is less
+                than 1.
+        """
+        if ttl < 0:
+            raise ValueError("ttl must not be negative.")
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1.")
+        self._ttl = ttl
+        self._max_size = max_size
+        self._timer = timer
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def generation(self) -> int:
+        """int: A counter bumped by every invalidation.
+
+        Read it before sending a request and pass it to :meth:`put` with
+        the response, so that a response which raced with an update is
+        not cached.
+        """
+        return self._generation
+
+    def get(self, key: Hashable) -> Optional[proto.Message]:
+        """Return a copy of the live entry for ``key``, or ``None``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, message = entry
+                if self._timer() < expires:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return type(message)(message)
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(
+        self, key: Hashable, message: proto.Message, generation: Optional[int] = None
+    ) -> bool:
+        """Store a copy of ``message`` under ``key``.
+
+        Args:
+            key (Hashable): The cache key.
+            message (proto.Message): The response to cache.
+            generation (Optional[int]): The :attr:`generation` read before
+                the request was sent. If the cache was invalidated since,
+                ``message`` may be stale and is not stored.
+
+        Returns:
+            bool: Whether the message was stored.
+        """
+        copy = type(message)(message)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return False
+            self._entries[key] = (self._timer() + self._ttl, copy)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop the entry for ``key``, if any."""
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def __repr__(self) -> str:
+        return "{0}<entries={1}, hits={2}, misses={3}>".format(
+            self.__class__.__name__, len(self), self.hits, self.misses,
+        )
+
+
+__all__ = (
+    "DEFAULT_MAX_SIZE",
+    "DEFAULT_TTL",
+    "ResponseCache",
+)
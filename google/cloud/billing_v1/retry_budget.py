@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""A budget on the retries of a transport's wrapped methods.
+
+The idempotent ``CloudBilling`` methods retry ``DeadlineExceeded`` and
+``ServiceUnavailable`` with exponential backoff for up to a minute. That
+is right when a few calls fail, but when the service browns out, every
+call retries and the load on it multiplies just when it can least take
+it.
+
+:class:`RetryBudget` allows retries up to a fraction of the recent calls,
+plus a small floor for clients that send few of them. Once the budget is
+spent, a retryable error is raised at once instead of being retried.
+
+Example:
+    >>> budget = RetryBudget(ratio=0.1)
+    >>> client = CloudBillingClient(
+    ...     transport=CloudBillingGrpcTransport(retry_budget=budget)
+    ... )
+"""
+
+import functools
+import math
+import threading
+import time
+from typing import Callable, List
+
+DEFAULT_RATIO = 0.1
+DEFAULT_MIN_RETRIES_PER_SECOND = 1.0
+DEFAULT_WINDOW = 10.0
+
+# The window is tracked in this many slices; counts expire a slice at a
+# time.
+_SLICES = 10
+
+
+class _WindowedCounter:
+    """Counts the events of the last ``window`` seconds."""
+
+    def __init__(self, window: float, timer: Callable[[], float]):
+        self._width = window / _SLICES
+        self._timer = timer
+        self._counts = [0] * _SLICES  # type: List[int]
+        self._slice = self._current()
+
+    def _current(self) -> int:
+        return math.floor(self._timer() / self._width)
+
+    def _advance(self) -> None:
+        current = self._current()
+        for expired in range(self._slice + 1, min(current, self._slice + _SLICES) + 1):
+            self._counts[expired % _SLICES] = 0
+        self._slice = max(self._slice, current)
+
+    def add(self) -> None:
+        self._advance()
+        self._counts[self._slice % _SLICES] += 1
+
+    def total(self) -> int:
+        self._advance()
+        return sum(self._counts)
+
+
+class RetryBudget:
+    """Allow retries up to a fraction of the recent calls.
+
+    Over the last ``window`` seconds, at most ``ratio`` retries are allowed
+    per call, plus ``min_retries_per_second``. The same instance may be
+    shared by several transports, to budget all of a process's retries
+    together.
+    """
+
+    def __init__(
+        self,
+        *,
+        ratio: float = DEFAULT_RATIO,
+        min_retries_per_second: float = DEFAULT_MIN_RETRIES_PER_SECOND,
+        window: float = DEFAULT_WINDOW,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        """Instantiate the budget.
+
+        Args:
+            ratio (float): The number of retries allowed per call.
+            min_retries_per_second (float): The retries allowed however few
+                calls are sent.
+            window (float): How long calls and retries count for, in
+                seconds.
+            timer (Callable[[], float]): The clock, in seconds.
+
+        Raises:
+            ValueError: If an argument is negative, or ``window`` is not
+                positive.
+        """
+        if ratio < 0:
+            raise ValueError("ratio must not be negative.")
+        if min_retries_per_second < 0:
+            raise ValueError("min_retries_per_second must not be negative.")
+        if window <= 0:
+            raise ValueError("window must be positive.")
+        self.ratio = ratio
+        self.min_retries_per_second = min_retries_per_second
+        self.window = window
+        self._calls = _WindowedCounter(window, timer)
+        self._retries = _WindowedCounter(window, timer)
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def deposit(self) -> None:
+        """Record a call."""
+        with self._lock:
+            self._calls.add()
+
+    def try_withdraw(self) -> bool:
+        """Take a retry from the budget.
+
+        Returns:
+            bool: Whether the retry is allowed.
+        """
+        with self._lock:
+            allowed = (
+                self.min_retries_per_second * self.window
+                + self.ratio * self._calls.total()
+            )
+            if self._retries.total() + 1 > allowed:
+                self.rejected += 1
+                return False
+            self._retries.add()
+            return True
+
+    def limit_predicate(self, predicate: Callable[[Exception], bool]) -> Callable:
+        """Limit a retry predicate to the budget.
+
+        Args:
+            predicate (Callable[[Exception], bool]): Whether an error is
+                retryable, as passed to ``google.api_core.retry.Retry``.
+
+        Returns:
+            Callable[[Exception], bool]: The predicate, which now also
+                withdraws from the budget, and turns retryable errors
+                down once it is spent.
+        """
+
+        @functools.wraps(predicate)
+        def limited(exception):
+            return predicate(exception) and self.try_withdraw()
+
+        return limited
+
+    def wrap(self, func: Callable) -> Callable:
+        """Record a call each time ``func`` is called.
+
+        Args:
+            func (Callable): A wrapped method of a transport.
+
+        Returns:
+            Callable: ``func``, which now deposits into the budget.
+        """
+
+        @functools.wraps(func)
+        def call(*args, **kwargs):
+            self.deposit()
+            return func(*args, **kwargs)
+
+        return call
+
+    def __repr__(self) -> str:
+        return "{0}<ratio={1}, min_retries_per_second={2}, rejected={3}>".format(
+            self.__class__.__name__,
+            self.ratio,
+            self.min_retries_per_second,
+            self.rejected,
+        )
+
+
+__all__ = (
+    "DEFAULT_MIN_RETRIES_PER_SECOND",
+    "DEFAULT_RATIO",
+    "DEFAULT_WINDOW",
+    "RetryBudget",
+)
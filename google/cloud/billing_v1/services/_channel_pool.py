@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""A pool of gRPC channels that looks like a single channel.
+
+A ``grpc.Channel`` multiplexes every call over one HTTP/2 connection, which
+caps the number of concurrent calls at the server's stream limit and lets
+large responses hold up small ones. :class:`ChannelPool` opens several
+connections and sends each unary call over the one with the fewest calls
+in flight, so the transports can use it in place of a channel unchanged.
+"""
+
+import threading
+from typing import Callable, List, Sequence
+
+import grpc  # type: ignore
+
+
+# Without a local subchannel pool, channels created with identical
+# arguments share their connections, which would defeat the pool.
+_LOCAL_SUBCHANNEL_POOL = ("grpc.use_local_subchannel_pool", 1)
+
+
+class ChannelPool(grpc.Channel):
+    """Spread unary calls over several channels, least-in-flight first.
+
+    Ties are broken round-robin. Streaming methods are not pooled and use
+    the first channel; the billing services only have unary methods.
+    """
+
+    def __init__(self, channels: Sequence[grpc.Channel]):
+        """Instantiate the pool.
+
+        Args:
+            channels (Sequence[grpc.Channel]): The channels to pool. They
+                should not share connections; see :func:`create_channel_pool`.
+
+        Raises:
+            ValueError: If ``channels`` is empty.
+        """
+        if not channels:
+            raise ValueError("A channel pool needs at least one channel.")
+        self._channels = list(channels)
+        self._in_flight = [0] * len(self._channels)
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @property
+    def channels(self) -> List[grpc.Channel]:
+        """List[grpc.Channel]: The pooled channels."""
+        return list(self._channels)
+
+    @property
+    def in_flight(self) -> List[int]:
+        """List[int]: The number of calls in flight on each channel."""
+        with self._lock:
+            return list(self._in_flight)
+
+    def _acquire(self) -> int:
+        with self._lock:
+            size = len(self._channels)
+            start = self._next
+            self._next = (start + 1) % size
+            index = min(
+                (position % size for position in range(start, start + size)),
+                key=self._in_flight.__getitem__,
+            )
+            self._in_flight[index] += 1
+            return index
+
+    def _release(self, index: int) -> None:
+        with self._lock:
+            self._in_flight[index] -= 1
+
+    def unary_unary(self, method, *args, **kwargs):
+        callables = [
+            channel.unary_unary(method, *args, **kwargs) for channel in self._channels
+        ]
+        return _PooledUnaryUnaryMultiCallable(self, callables)
+
+    def unary_stream(self, method, *args, **kwargs):
+        return self._channels[0].unary_stream(method, *args, **kwargs)
+
+    def stream_unary(self, method, *args, **kwargs):
+        return self._channels[0].stream_unary(method, *args, **kwargs)
+
+    def stream_stream(self, method, *args, **kwargs):
+        return self._channels[0].stream_stream(method, *args, **kwargs)
+
+    def subscribe(self, callback, try_to_connect=False):
+        self._channels[0].subscribe(callback, try_to_connect=try_to_connect)
+
+    def unsubscribe(self, callback):
+        self._channels[0].unsubscribe(callback)
+
+    def close(self):
+        for channel in self._channels:
+            channel.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+
+class _PooledUnaryUnaryMultiCallable(grpc.UnaryUnaryMultiCallable):
+    def __init__(self, pool: ChannelPool, callables: List[Callable]):
+        self._pool = pool
+        self._callables = callables
+
+    def __call__(self, request, *args, **kwargs):
+        index = self._pool._acquire()
+        try:
+            return self._callables[index](request, *args, **kwargs)
+        finally:
+            self._pool._release(index)
+
+    def with_call(self, request, *args, **kwargs):
+        index = self._pool._acquire()
+        try:
+            return self._callables[index].with_call(request, *args, **kwargs)
+        finally:
+            self._pool._release(index)
+
+    def future(self, request, *args, **kwargs):
+        index = self._pool._acquire()
+        try:
+            future = self._callables[index].future(request, *args, **kwargs)
+        except Exception:
+            self._pool._release(index)
+            raise
+        future.add_done_callback(lambda _: self._pool._release(index))
+        return future
+
+
+def create_channel_pool(
+    create_channel: Callable[..., grpc.Channel], size: int, *args, **kwargs
+) -> grpc.Channel:
+    """Create a channel, or a pool of ``size`` independent channels.
+
+    Args:
+        create_channel (Callable[..., grpc.Channel]): Creates one channel,
+            e.g. a transport's ``create_channel``. It must accept an
+            ``options`` keyword argument.
+        size (int): The number of channels. ``1`` returns a plain channel.
+        args: Passed to ``create_channel``.
+        kwargs: Passed to ``create_channel``.
+
+    Returns:
+        grpc.Channel: The channel or :class:`ChannelPool`.
+
+    Raises:
+        ValueError: If ``size`` is less than 1.
+    """
+    if size < 1:
+        raise ValueError("channel_pool_size must be at least 1.")
+    if size == 1:
+        return create_channel(*args, **kwargs)
+    options = list(kwargs.pop("options", ())) + [_LOCAL_SUBCHANNEL_POOL]
+    return ChannelPool(
+        [create_channel(*args, options=options, **kwargs) for _ in range(size)]
+    )
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Replacements for the slow imports of the generated modules.
+
+``pkg_resources``, which the clients used for their version, and
+``distutils``, which they used to parse an environment variable and which
+pulls in ``setuptools`` and ``pkg_resources``, take longer to import than
+the rest of the library.
+"""
+
+import functools
+from typing import Optional
+
+_DISTRIBUTION = "google-cloud-billing"
+
+_TRUE = ("y", "yes", "t", "true", "on", "1")
+_FALSE = ("n", "no", "f", "false", "off", "0")
+
+
+@functools.lru_cache(maxsize=None)
+def gapic_version() -> Optional[str]:
+    """Return the installed version of the library.
+
+    Returns:
+        Optional[str]: The version, or ``None`` if the library is not
+            installed as a distribution.
+    """
+    try:
+        from importlib import metadata
+    except ImportError:  # Python < 3.8
+        import pkg_resources
+
+        try:
+            return pkg_resources.get_distribution(_DISTRIBUTION).version
+        except pkg_resources.DistributionNotFound:
+            return None
+    try:
+        return metadata.version(_DISTRIBUTION)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def strtobool(value: str) -> bool:
+    """Parse a boolean as ``distutils.util.strtobool`` does.
+
+    Args:
+        value (str): One of ``y``, ``yes``, ``t``, ``true``, ``on`` and
+            ``1``, or ``n``, ``no``, ``f``, ``false``, ``off`` and ``0``,
+            in any case.
+
+    Returns:
+        bool: The value.
+
+    Raises:
+        ValueError: If ``value`` is not one of these.
+    """
+    value = value.lower()
+    if value in _TRUE:
+        return True
+    if value in _FALSE:
+        return False
+    raise ValueError("invalid truth value {!r}".format(value))
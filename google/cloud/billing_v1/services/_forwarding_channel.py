@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Channels that pass everything through to another channel.
+
+The concurrency limiter, hedging, circuit breaker and cassette wrap the
+channel of a transport to intercept its unary calls. They subclass
+:class:`ForwardingChannel` or :class:`ForwardingAioChannel` and override
+``unary_unary``; every other method goes to the wrapped channel.
+"""
+
+import grpc  # type: ignore
+from grpc.experimental import aio  # type: ignore
+
+
+class ForwardingChannel(grpc.Channel):
+    """A ``grpc.Channel`` that forwards every method to ``channel``."""
+
+    def __init__(self, channel: grpc.Channel):
+        self._channel = channel
+
+    def unary_unary(self, method, *args, **kwargs):
+        return self._channel.unary_unary(method, *args, **kwargs)
+
+    def unary_stream(self, method, *args, **kwargs):
+        return self._channel.unary_stream(method, *args, **kwargs)
+
+    def stream_unary(self, method, *args, **kwargs):
+        return self._channel.stream_unary(method, *args, **kwargs)
+
+    def stream_stream(self, method, *args, **kwargs):
+        return self._channel.stream_stream(method, *args, **kwargs)
+
+    def subscribe(self, callback, try_to_connect=False):
+        self._channel.subscribe(callback, try_to_connect=try_to_connect)
+
+    def unsubscribe(self, callback):
+        self._channel.unsubscribe(callback)
+
+    def close(self):
+        self._channel.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+
+class ForwardingAioChannel(aio.Channel):
+    """An ``aio.Channel`` that forwards every method to ``channel``."""
+
+    def __init__(self, channel: aio.Channel):
+        self._channel = channel
+
+    def unary_unary(self, method, *args, **kwargs):
+        return self._channel.unary_unary(method, *args, **kwargs)
+
+    def unary_stream(self, method, *args, **kwargs):
+        return self._channel.unary_stream(method, *args, **kwargs)
+
+    def stream_unary(self, method, *args, **kwargs):
+        return self._channel.stream_unary(method, *args, **kwargs)
+
+    def stream_stream(self, method, *args, **kwargs):
+        return self._channel.stream_stream(method, *args, **kwargs)
+
+    def get_state(self, try_to_connect=False):
+        return self._channel.get_state(try_to_connect)
+
+    async def wait_for_state_change(self, last_observed_state):
+        return await self._channel.wait_for_state_change(last_observed_state)
+
+    async def channel_ready(self):
+        return await self._channel.channel_ready()
+
+    async def close(self, grace=None):
+        return await self._channel.close(grace)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
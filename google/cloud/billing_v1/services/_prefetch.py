@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Read-ahead of paged list responses, shared by the service pagers.
+
+The next page is requested in the background while the caller is still
+processing the current one. At most ``depth`` fetched pages are buffered,
+plus the one being fetched, so memory use stays bounded.
+"""
+
+import asyncio
+import queue
+import threading
+from typing import AsyncIterator, Awaitable, Callable, Iterator, TypeVar
+
+
+ResponseT = TypeVar("ResponseT")
+
+# How long the background thread blocks on a full buffer before checking
+# whether the consumer has stopped iterating.
+_PUT_POLL_INTERVAL = 0.1
+
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+def prefetch_pages(
+    page_token: str, fetch: Callable[[str], ResponseT], depth: int
+) -> Iterator[ResponseT]:
+    """Yield the pages following ``page_token``, fetched on a thread.
+
+    Args:
+        page_token (str): The ``next_page_token`` of the last page already
+            seen. Nothing is fetched if it is empty.
+        fetch (Callable[[str], ResponseT]): Fetches the page for a token.
+        depth (int): The maximum number of pages fetched ahead.
+
+    Returns:
+        Iterator[ResponseT]: The following pages, in order.
+    """
+    if not page_token:
+        return
+
+    buffer = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=_PUT_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def fetch_ahead() -> None:
+        token = page_token
+        try:
+            while token:
+                page = fetch(token)
+                if not put(page):
+                    return
+                token = page.next_page_token
+        except Exception as exc:
+            put(_Failure(exc))
+        finally:
+            put(_DONE)
+
+    thread = threading.Thread(target=fetch_ahead, name="PagePrefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.exc
+            yield item
+    finally:
+        stop.set()
+
+
+async def prefetch_pages_async(
+    page_token: str, fetch: Callable[[str], Awaitable[ResponseT]], depth: int
+) -> AsyncIterator[ResponseT]:
+    """Yield the pages following ``page_token``, fetched by a task.
+
+    See :func:`prefetch_pages`; ``fetch`` is a coroutine function here.
+    """
+    if not page_token:
+        return
+
+    buffer = asyncio.Queue(maxsize=depth)
+
+    async def fetch_ahead() -> None:
+        token = page_token
+        try:
+            while token:
+                page = await fetch(token)
+                await buffer.put(page)
+                token = page.next_page_token
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            await buffer.put(_Failure(exc))
+        await buffer.put(_DONE)
+
+    task = asyncio.ensure_future(fetch_ahead())
+    try:
+        while True:
+            item = await buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.exc
+            yield item
+    finally:
+        task.cancel()
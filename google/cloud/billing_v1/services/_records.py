@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Record files, shared by catalog snapshots and cassettes.
+
+A file starts with a magic string naming its format, followed by records:
+a one-byte kind, the big-endian 32-bit length of the payload, and the
+payload itself. Readers skip the kinds they do not know, so that formats
+can grow new records.
+"""
+
+import io
+import os
+import struct
+import tempfile
+from typing import Iterable, Iterator, Tuple
+
+
+_LENGTH = struct.Struct(">I")
+
+
+def write(path: str, magic: bytes, records: Iterable[Tuple[int, bytes]]) -> None:
+    """Write the records to ``path``.
+
+    The file is written to a temporary sibling and then renamed into
+    place, so that readers never see a partial file.
+
+    Args:
+        path (str): The file to write.
+        magic (bytes): The string the file starts with.
+        records (Iterable[Tuple[int, bytes]]): The kind and payload of each
+            record, in order.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with io.open(fd, "wb") as stream:
+            stream.write(magic)
+            for kind, payload in records:
+                stream.write(bytes((kind,)))
+                stream.write(_LENGTH.pack(len(payload)))
+                stream.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read(path: str, magic: bytes, description: str) -> Iterator[Tuple[int, bytes]]:
+    """Read the records of a file written with :func:`write`.
+
+    Args:
+        path (str): The file to read.
+        magic (bytes): The string the file must start with.
+        description (str): What the file holds, for error messages, e.g.
+            ``"cassette"``.
+
+    Returns:
+        Iterator[Tuple[int, bytes]]: The kind and payload of each record.
+
+    Raises:
+        ValueError: If the file does not start with ``magic``, or, as the
+            records are iterated, if it is truncated.
+    """
+    with io.open(path, "rb") as stream:
+        data = stream.read()
+
+    if not data.startswith(magic):
+        raise ValueError("{!r} is not a {}.".format(path, description))
+    return _records(data, len(magic), path, description)
+
+
+def _records(
+    data: bytes, offset: int, path: str, description: str
+) -> Iterator[Tuple[int, bytes]]:
+    view = memoryview(data)
+    while offset < len(data):
+        if offset + 1 + _LENGTH.size > len(data):
+            raise ValueError("Truncated {} {!r}.".format(description, path))
+        kind = data[offset]
+        (length,) = _LENGTH.unpack_from(data, offset + 1)
+        offset += 1 + _LENGTH.size
+        if offset + length > len(data):
+            raise ValueError("Truncated {} {!r}.".format(description, path))
+        yield kind, bytes(view[offset : offset + length])
+        offset += length
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Connect a transport's channels before its first call.
+
+A new channel connects lazily: the first call pays for name resolution, the
+TCP and TLS handshakes and the HTTP/2 setup, and the credentials fetch
+their first token as it is sent. The transports use these helpers to do
+that work ahead of time, either in the background as they are constructed
+(``eager_connect=True``) or on demand with ``warmup()``.
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+from typing import List, Optional
+
+import grpc  # type: ignore
+from grpc.experimental import aio  # type: ignore
+
+from google.api_core import exceptions  # type: ignore
+from google.auth import credentials as ga_credentials  # type: ignore
+
+from google.cloud.billing_v1.services import _channel_pool
+
+
+def channels_of(channel) -> List:
+    """Return the channels that make up a transport's channel.
+
+    Args:
+        channel (Union[grpc.Channel, aio.Channel]): A channel or
+            :class:`~.ChannelPool`, before the transport wraps it.
+
+    Returns:
+        List[Union[grpc.Channel, aio.Channel]]: The channels to connect.
+    """
+    if isinstance(channel, _channel_pool.ChannelPool):
+        return channel.channels
+    return [channel]
+
+
+def refresh_credentials(credentials) -> None:
+    """Fetch a token for credentials that do not hold a valid one.
+
+    Args:
+        credentials (Optional[google.auth.credentials.Credentials]): The
+            transport's credentials, or ``None`` if it was given a channel.
+
+    Raises:
+        google.auth.exceptions.RefreshError: If the token cannot be fetched.
+    """
+    if not credentials or isinstance(credentials, ga_credentials.AnonymousCredentials):
+        return
+    if credentials.valid:
+        return
+    # Imported here, as only the token refresh needs ``requests``.
+    from google.auth.transport import requests
+
+    credentials.refresh(requests.Request())
+
+
+def _refresh_quietly(credentials) -> None:
+    try:
+        refresh_credentials(credentials)
+    except Exception:
+        # The first call will fetch the token again, and report the error.
+        pass
+
+
+def start(channels, credentials) -> None:
+    """Start connecting the channels and refreshing the credentials.
+
+    Returns at once; the work goes on in the background.
+
+    Args:
+        channels (Sequence[Union[grpc.Channel, aio.Channel]]): The channels,
+            as returned by :func:`channels_of`.
+        credentials (Optional[google.auth.credentials.Credentials]): The
+            transport's credentials.
+    """
+    for channel in channels:
+        if isinstance(channel, aio.Channel):
+            channel.get_state(try_to_connect=True)
+        else:
+            # The future unsubscribes itself once the channel is ready.
+            grpc.channel_ready_future(channel)
+    if credentials:
+        threading.Thread(
+            target=_refresh_quietly,
+            args=(credentials,),
+            name="billing-credentials-warmup",
+            daemon=True,
+        ).start()
+
+
+def _timed_out(timeout: Optional[float]) -> exceptions.DeadlineExceeded:
+    return exceptions.DeadlineExceeded(
+        "The transport did not warm up within {}s.".format(timeout)
+    )
+
+
+def _refresh_in_background(credentials) -> concurrent.futures.Future:
+    refreshed = concurrent.futures.Future()  # type: concurrent.futures.Future
+
+    def refresh():
+        try:
+            refresh_credentials(credentials)
+        except Exception as exc:
+            refreshed.set_exception(exc)
+        else:
+            refreshed.set_result(None)
+
+    # A daemon thread, so that a token fetch that hangs does not keep the
+    # process alive once the wait for it has timed out.
+    threading.Thread(
+        target=refresh, name="billing-credentials-warmup", daemon=True
+    ).start()
+    return refreshed
+
+
+def warm_up(channels, credentials, timeout: Optional[float] = None) -> None:
+    """Connect the channels and refresh the credentials, and wait for both.
+
+    The token is fetched on a background thread, so that the wait for it
+    is bounded by ``timeout`` too.
+
+    Args:
+        channels (Sequence[grpc.Channel]): The channels.
+        credentials (Optional[google.auth.credentials.Credentials]): The
+            transport's credentials.
+        timeout (Optional[float]): How long to wait, in seconds. ``None``
+            waits until the channels connect.
+
+    Raises:
+        google.api_core.exceptions.DeadlineExceeded: If a channel is not
+            ready, or the token is not fetched, within ``timeout``.
+        google.auth.exceptions.RefreshError: If the token cannot be fetched.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    refreshed = _refresh_in_background(credentials)
+    futures = [grpc.channel_ready_future(channel) for channel in channels]
+    try:
+        for future in futures + [refreshed]:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            future.result(timeout=remaining)
+    except (grpc.FutureTimeoutError, concurrent.futures.TimeoutError):
+        raise _timed_out(timeout) from None
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+async def warm_up_async(channels, credentials, timeout: Optional[float] = None):
+    """Connect the channels and refresh the credentials, and wait for both.
+
+    The token is fetched in the loop's default executor.
+
+    Args:
+        channels (Sequence[aio.Channel]): The channels.
+        credentials (Optional[google.auth.credentials.Credentials]): The
+            transport's credentials.
+        timeout (Optional[float]): How long to wait, in seconds. ``None``
+            waits until the channels connect.
+
+    Raises:
+        google.api_core.exceptions.DeadlineExceeded: If a channel is not
+            ready, or the token is not fetched, within ``timeout``.
+        google.auth.exceptions.RefreshError: If the token cannot be fetched.
+    """
+    loop = asyncio.get_event_loop()
+    refresh = loop.run_in_executor(None, refresh_credentials, credentials)
+    ready = [channel.channel_ready() for channel in channels]
+    try:
+        await asyncio.wait_for(asyncio.gather(refresh, *ready), timeout)
+    except asyncio.TimeoutError:
+        raise _timed_out(timeout) from None
@@ -15,8 +15,12 @@
 # limitations under the License.
 #
 
-from .client import CloudBillingClient
-from .async_client import CloudBillingAsyncClient
+from google.cloud.billing_v1 import _lazy
+
+__getattr__, __dir__ = _lazy.attach(
+    __name__,
+    {"CloudBillingClient": ".client", "CloudBillingAsyncClient": ".async_client"},
+)
 
 __all__ = (
     "CloudBillingClient",
@@ -18,8 +18,17 @@
 from collections import OrderedDict
 import functools
 import re
-from typing import Dict, Sequence, Tuple, Type, Union
-import pkg_resources
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
 
 import google.api_core.client_options as ClientOptions  # type: ignore
 from google.api_core import exceptions  # type: ignore
@@ -28,6 +37,10 @@ from google.api_core import retry as retries  # type: ignore
 from google.auth import credentials  # type: ignore
 from google.oauth2 import service_account  # type: ignore
 
+from google.cloud.billing_v1 import project_billing
+from google.cloud.billing_v1 import response_cache as response_cache_lib
+from google.cloud.billing_v1 import singleflight as singleflight_lib
+from google.cloud.billing_v1.services import _compat
 from google.cloud.billing_v1.services.cloud_billing import pagers
 from google.cloud.billing_v1.types import cloud_billing
 from google.iam.v1 import iam_policy_pb2 as iam_policy  # type: ignore
@@ -96,6 +109,9 @@ class CloudBillingAsyncClient:
         transport: Union[str, CloudBillingTransport] = "grpc_asyncio",
         client_options: ClientOptions = None,
         client_info: gapic_v1.client_info.ClientInfo = DEFAULT_CLIENT_INFO,
+        response_cache: Optional[response_cache_lib.ResponseCache] = None,
+        singleflight: Optional[singleflight_lib.Singleflight] = None,
+        eager_connect: bool = False,
     ) -> None:
         """Instantiate the cloud billing client.
 
@@ -124,6 +140,18 @@ class CloudBillingAsyncClient:
                 not provided, the default SSL client certificate will be used if
                 present. If GOOGLE_API_USE_CLIENT_CERTIFICATE is "false" or not
                 set, no client certificate will be used.
+            response_cache (Optional[~.ResponseCache]): A cache for
+                ``get_billing_account`` and ``get_project_billing_info``
+                to read through. The client drops the entries of the
+                resources it updates. If ``None``, nothing is cached.
+            singleflight (Optional[~.Singleflight]): Shares one RPC among
+                identical concurrent ``get_billing_account``,
+                ``get_project_billing_info``, ``get_iam_policy`` and
+                ``test_iam_permissions`` calls. If ``None``, every call
+                sends its own request.
+            eager_connect (bool): Start connecting to the service and
+                fetching a token in the background, so that the first
+                call does not wait for them. See :meth:`warmup`.
 
         Raises:
             google.auth.exceptions.MutualTlsChannelError: If mutual TLS transport
@@ -135,8 +163,30 @@ class CloudBillingAsyncClient:
             transport=transport,
             client_options=client_options,
             client_info=client_info,
+            eager_connect=eager_connect,
+            response_cache=response_cache,
+            singleflight=singleflight,
         )
 
+    async def warmup(self, timeout: float = None) -> None:
+        """Connect to the service and fetch a token ahead of the first call.
+
+        In a cold-started process, call this during initialization, or pass
+        ``eager_connect=True`` to start the same work in the background.
+
+        Args:
+            timeout (float): How long to wait, in seconds. If ``None``,
+                wait until the channel connects.
+
+        Raises:
+            google.api_core.exceptions.DeadlineExceeded: If the channel
+                does not connect, or the token is not fetched, within
+                ``timeout``.
+            google.auth.exceptions.RefreshError: If the credentials cannot
+                be refreshed.
+        """
+        await self._client._transport.warmup(timeout)
+
     async def get_billing_account(
         self,
         request: cloud_billing.GetBillingAccountRequest = None,
@@ -195,19 +245,24 @@ class CloudBillingAsyncClient:
 
         # Wrap the RPC method; this adds retry and timeout information,
         # and friendly error handling.
-        rpc = gapic_v1.method_async.wrap_method(
-            self._client._transport.get_billing_account,
-            default_retry=retries.Retry(
-                initial=0.1,
-                maximum=60.0,
-                multiplier=1.3,
-                predicate=retries.if_exception_type(
-                    exceptions.DeadlineExceeded, exceptions.ServiceUnavailable,
-                ),
-            ),
-            default_timeout=60.0,
-            client_info=DEFAULT_CLIENT_INFO,
-        )
+        rpc = self._client._transport._wrapped_methods[
+            self._client._transport.get_billing_account
+        ]
+
+        # Share the RPC with identical calls in flight, if enabled.
+        if self._client._singleflight is not None:
+            rpc = self._client._singleflight.wrap_async(
+                rpc, "GetBillingAccount", scope=self._client._scope
+            )
+
+        # Serve the response from the cache, if there is one.
+        cache = self._client._response_cache
+        if cache is not None:
+            cache_key = (self._client._scope, "GetBillingAccount", request.name)
+            response = cache.get(cache_key)
+            if response is not None:
+                return response
+            generation = cache.generation
 
         # Certain fields should be provided within the metadata header;
         # add these here.
@@ -218,6 +273,9 @@ class CloudBillingAsyncClient:
         # Send the request.
         response = await rpc(request, retry=retry, timeout=timeout, metadata=metadata,)
 
+        if cache is not None:
+            cache.put(cache_key, response, generation)
+
         # Done; return the response.
         return response
 
@@ -228,6 +286,7 @@ class CloudBillingAsyncClient:
         retry: retries.Retry = gapic_v1.method.DEFAULT,
         timeout: float = None,
         metadata: Sequence[Tuple[str, str]] = (),
+        prefetch: int = 0,
     ) -> pagers.ListBillingAccountsAsyncPager:
         r"""Lists the billing accounts that the current authenticated user
         has permission to
@@ -243,6 +302,9 @@ class CloudBillingAsyncClient:
             timeout (float): The timeout for this request.
             metadata (Sequence[Tuple[str, str]]): Strings which should be
                 sent along with the request as metadata.
+            prefetch (int): The number of pages to fetch ahead in the
+                background while the current one is processed. ``0`` (the
+                default) fetches each page only once it is needed.
 
         Returns:
             ~.pagers.ListBillingAccountsAsyncPager:
@@ -258,19 +320,9 @@ class CloudBillingAsyncClient:
 
         # Wrap the RPC method; this adds retry and timeout information,
         # and friendly error handling.
-        rpc = gapic_v1.method_async.wrap_method(
-            self._client._transport.list_billing_accounts,
-            default_retry=retries.Retry(
-                initial=0.1,
-                maximum=60.0,
-                multiplier=1.3,
-                predicate=retries.if_exception_type(
-                    exceptions.DeadlineExceeded, exceptions.ServiceUnavailable,
-                ),
-            ),
-            default_timeout=60.0,
-            client_info=DEFAULT_CLIENT_INFO,
-        )
+        rpc = self._client._transport._wrapped_methods[
+            self._client._transport.list_billing_accounts
+        ]
 
         # Send the request.
         response = await rpc(request, retry=retry, timeout=timeout, metadata=metadata,)
@@ -278,7 +330,11 @@ class CloudBillingAsyncClient:
         # This method is paged; wrap the response in a pager, which provides
         # an `__aiter__` convenience method.
         response = pagers.ListBillingAccountsAsyncPager(
-            method=rpc, request=request, response=response, metadata=metadata,
+            method=rpc,
+            request=request,
+            response=response,
+            metadata=metadata,
+            prefetch=prefetch,
         )
 
         # Done; return the response.
@@ -354,19 +410,9 @@ class CloudBillingAsyncClient:
 
         # Wrap the RPC method; this adds retry and timeout information,
         # and friendly error handling.
-        rpc = gapic_v1.method_async.wrap_method(
-            self._client._transport.update_billing_account,
-            default_retry=retries.Retry(
-                initial=0.1,
-                maximum=60.0,
-                multiplier=1.3,
-                predicate=retries.if_exception_type(
-                    exceptions.DeadlineExceeded, exceptions.ServiceUnavailable,
-                ),
-            ),
-            default_timeout=60.0,
-            client_info=DEFAULT_CLIENT_INFO,
-        )
+        rpc = self._client._transport._wrapped_methods[
+            self._client._transport.update_billing_account
+        ]
 
         # Certain fields should be provided within the metadata header;
         # add these here.
@@ -375,7 +421,17 @@ class CloudBillingAsyncClient:
         )
 
         # Send the request.
-        response = await rpc(request, retry=retry, timeout=timeout, metadata=metadata,)
+        cache = self._client._response_cache
+        try:
+            response = await rpc(
+                request, retry=retry, timeout=timeout, metadata=metadata,
+            )
+        finally:
+            # Even a failed update may have been applied.
+            if cache is not None:
+                cache.invalidate(
+                    (self._client._scope, "GetBillingAccount", request.name)
+                )
 
         # Done; return the response.
         return response
@@ -448,11 +504,9 @@ class CloudBillingAsyncClient:
 
         # Wrap the RPC method; this adds retry and timeout information,
         # and friendly error handling.
-        rpc = gapic_v1.method_async.wrap_method(
-            self._client._transport.create_billing_account,
-            default_timeout=60.0,
-            client_info=DEFAULT_CLIENT_INFO,
-        )
+        rpc = self._client._transport._wrapped_methods[
+            self._client._transport.create_billing_account
+        ]
 
         # Send the request.
         response = await rpc(request, retry=retry, timeout=timeout, metadata=metadata,)
@@ -468,6 +522,7 @@ class CloudBillingAsyncClient:
         retry: retries.Retry = gapic_v1.method.DEFAULT,
         timeout: float = None,
         metadata: Sequence[Tuple[str, str]] = (),
+        prefetch: int = 0,
     ) -> pagers.ListProjectBillingInfoAsyncPager:
         r"""Lists the projects associated with a billing account. The
         current authenticated user must have the
@@ -492,6 +547,9 @@ class CloudBillingAsyncClient:
             timeout (float): The timeout for this request.
             metadata (Sequence[Tuple[str, str]]): Strings which should be
                 sent along with the request as metadata.
+            prefetch (int): The number of pages to fetch ahead in the
+                background while the current one is processed. ``0`` (the
+                default) fetches each page only once it is needed.
 
         Returns:
             ~.pagers.ListProjectBillingInfoAsyncPager:
@@ -521,19 +579,9 @@ class CloudBillingAsyncClient:
 
         # Wrap the RPC method; this adds retry and timeout information,
         # and friendly error handling.
-        rpc = gapic_v1.method_async.wrap_method(
-            self._client._transport.list_project_billing_info,
-            default_retry=retries.Retry(
-                initial=0.1,
-                maximum=60.0,
-                multiplier=1.3,
-                predicate=retries.if_exception_type(
-                    exceptions.DeadlineExceeded, exceptions.ServiceUnavailable,
-                ),
-            ),
-            default_timeout=60.0,
-            client_info=DEFAULT_CLIENT_INFO,
-        )
+        rpc = self._client._transport._wrapped_methods[
+            self._client._transport.list_project_billing_info
+        ]
 
         # Certain fields should be provided within the metadata header;
         # add these here.
@@ -547,7 +595,11 @@ class CloudBillingAsyncClient:
         # This method is paged; wrap the response in a pager, which provides
         # an `__aiter__` convenience method.
         response = pagers.ListProjectBillingInfoAsyncPager(
-            method=rpc, request=request, response=response, metadata=metadata,
+            method=rpc,
+            request=request,
+            response=response,
+            metadata=metadata,
+            prefetch=prefetch,
         )
 
         # Done; return the response.
@@ -613,19 +665,24 @@ class CloudBillingAsyncClient:
 
         # Wrap the RPC method; this adds retry and timeout information,
         # and friendly error handling.
-        rpc = gapic_v1.method_async.wrap_method(
-            self._client._transport.get_project_billing_info,
-            default_retry=retries.Retry(
-                initial=0.1,
-                maximum=60.0,
-                multiplier=1.3,
-                predicate=retries.if_exception_type(
-                    exceptions.DeadlineExceeded, exceptions.ServiceUnavailable,
-                ),
-            ),
-            default_timeout=60.0,
-            client_info=DEFAULT_CLIENT_INFO,
-        )
+        rpc = self._client._transport._wrapped_methods[
+            self._client._transport.get_project_billing_info
+        ]
+
+        # Share the RPC with identical calls in flight, if enabled.
+        if self._client._singleflight is not None:
+            rpc = self._client._singleflight.wrap_async(
+                rpc, "GetProjectBillingInfo", scope=self._client._scope
+            )
+
+        # Serve the response from the cache, if there is one.
+        cache = self._client._response_cache
+        if cache is not None:
+            cache_key = (self._client._scope, "GetProjectBillingInfo", request.name)
+            response = cache.get(cache_key)
+            if response is not None:
+                return response
+            generation = cache.generation
 
         # Certain fields should be provided within the metadata header;
         # add these here.
@@ -636,9 +693,53 @@ class CloudBillingAsyncClient:
         # Send the request.
         response = await rpc(request, retry=retry, timeout=timeout, metadata=metadata,)
 
+        if cache is not None:
+            cache.put(cache_key, response, generation)
+
         # Done; return the response.
         return response
 
+    async def batch_get_project_billing_info(
+        self,
+        project_ids: Iterable[str],
+        *,
+        hint_accounts: Iterable[str] = (),
+        strategy: str = project_billing.STRATEGY_AUTO,
+        max_concurrency: int = project_billing.DEFAULT_MAX_CONCURRENCY,
+    ) -> Dict[str, cloud_billing.ProjectBillingInfo]:
+        r"""Gets the billing information of many projects.
+
+        When the billing accounts the projects are likely linked to are
+        known, sweeping them with ``list_project_billing_info`` usually
+        takes far fewer RPCs than one ``get_project_billing_info`` per
+        project. This picks the cheaper strategy, runs the RPCs
+        concurrently, and gets the projects a sweep did not find one by
+        one. See
+        :func:`~google.cloud.billing_v1.project_billing.batch_get_project_billing_info`.
+
+        Args:
+            project_ids (Iterable[str]): The projects, as ids or as
+                ``projects/{project_id}`` resource names.
+            hint_accounts (Iterable[str]): The resource names of the
+                billing accounts the projects are likely linked to.
+            strategy (str): ``"auto"``, ``"list"`` to sweep every hinted
+                account to the end, or ``"get"`` to ignore the hints.
+            max_concurrency (int): The maximum number of RPCs in flight.
+
+        Returns:
+            Dict[str, ~.cloud_billing.ProjectBillingInfo]:
+                The billing information by project id, in the order of
+                ``project_ids``.
+
+        """
+        return await project_billing.batch_get_project_billing_info_async(
+            self,
+            project_ids,
+            hint_accounts=hint_accounts,
+            strategy=strategy,
+            max_concurrency=max_concurrency,
+        )
+
     async def update_project_billing_info(
         self,
         request: cloud_billing.UpdateProjectBillingInfoRequest = None,
@@ -742,19 +843,9 @@ class CloudBillingAsyncClient:
 
         # Wrap the RPC method; this adds retry and timeout information,
         # and friendly error handling.
-        rpc = gapic_v1.method_async.wrap_method(
-            self._client._transport.update_project_billing_info,
-            default_retry=retries.Retry(
-                initial=0.1,
-                maximum=60.0,
-                multiplier=1.3,
-                predicate=retries.if_exception_type(
-                    exceptions.DeadlineExceeded, exceptions.ServiceUnavailable,
-                ),
-            ),
-            default_timeout=60.0,
-            client_info=DEFAULT_CLIENT_INFO,
-        )
+        rpc = self._client._transport._wrapped_methods[
+            self._client._transport.update_project_billing_info
+        ]
 
         # Certain fields should be provided within the metadata header;
         # add these here.
@@ -763,11 +854,77 @@ class CloudBillingAsyncClient:
         )
 
         # Send the request.
-        response = await rpc(request, retry=retry, timeout=timeout, metadata=metadata,)
+        cache = self._client._response_cache
+        try:
+            response = await rpc(
+                request, retry=retry, timeout=timeout, metadata=metadata,
+            )
+        finally:
+            # Even a failed update may have been applied.
+            if cache is not None:
+                cache.invalidate(
+                    (self._client._scope, "GetProjectBillingInfo", request.name)
+                )
 
         # Done; return the response.
         return response
 
+    async def bulk_update_project_billing_info(
+        self,
+        updates: Union[Mapping[str, str], Iterable[Tuple[str, str]]],
+        *,
+        max_concurrency: int = project_billing.DEFAULT_MAX_CONCURRENCY,
+        rate: Optional[float] = None,
+        burst: int = 1,
+        deadline: Optional[float] = None,
+        max_attempts: int = project_billing.DEFAULT_MAX_ATTEMPTS,
+        initial_backoff: float = project_billing.DEFAULT_INITIAL_BACKOFF,
+        max_backoff: float = project_billing.DEFAULT_MAX_BACKOFF,
+    ) -> List[project_billing.UpdateResult]:
+        r"""Links many projects to billing accounts.
+
+        The updates run concurrently, paced to ``rate`` RPCs per second
+        when it is set. Transient errors pause every update with an
+        exponential backoff before the failed update is tried again, until
+        the ``deadline``. Each update reports its own outcome, so that one failure
+        does not stop the others. See
+        :func:`~google.cloud.billing_v1.project_billing.bulk_update_project_billing_info`.
+
+        Args:
+            updates (Union[Mapping[str, str], Iterable[Tuple[str, str]]]):
+                The billing account resource name to link each project
+                to, by project id or ``projects/{project_id}`` resource
+                name. An empty account name disables billing.
+            max_concurrency (int): The maximum number of RPCs in flight.
+            rate (Optional[float]): The maximum number of RPCs sent per
+                second. Unlimited by default.
+            burst (int): The number of RPCs that may be sent at once
+                after an idle period, when ``rate`` is set.
+            deadline (Optional[float]): The number of seconds the whole
+                bulk update may take.
+            max_attempts (int): The maximum number of RPCs sent per
+                update.
+            initial_backoff (float): The first pause after a
+                transient error, in seconds.
+            max_backoff (float): The longest pause, in seconds.
+
+        Returns:
+            List[~.project_billing.UpdateResult]:
+                The outcome of each update, in the order of ``updates``.
+
+        """
+        return await project_billing.bulk_update_project_billing_info_async(
+            self,
+            updates,
+            max_concurrency=max_concurrency,
+            rate=rate,
+            burst=burst,
+            deadline=deadline,
+            max_attempts=max_attempts,
+            initial_backoff=initial_backoff,
+            max_backoff=max_backoff,
+        )
+
     async def get_iam_policy(
         self,
         request: iam_policy.GetIamPolicyRequest = None,
@@ -890,19 +1047,15 @@ class CloudBillingAsyncClient:
 
         # Wrap the RPC method; this adds retry and timeout information,
         # and friendly error handling.
-        rpc = gapic_v1.method_async.wrap_method(
-            self._client._transport.get_iam_policy,
-            default_retry=retries.Retry(
-                initial=0.1,
-                maximum=60.0,
-                multiplier=1.3,
-                predicate=retries.if_exception_type(
-                    exceptions.DeadlineExceeded, exceptions.ServiceUnavailable,
-                ),
-            ),
-            default_timeout=60.0,
-            client_info=DEFAULT_CLIENT_INFO,
-        )
+        rpc = self._client._transport._wrapped_methods[
+            self._client._transport.get_iam_policy
+        ]
+
+        # Share the RPC with identical calls in flight, if enabled.
+        if self._client._singleflight is not None:
+            rpc = self._client._singleflight.wrap_async(
+                rpc, "GetIamPolicy", scope=self._client._scope
+            )
 
         # Certain fields should be provided within the metadata header;
         # add these here.
@@ -1039,19 +1192,9 @@ class CloudBillingAsyncClient:
 
         # Wrap the RPC method; this adds retry and timeout information,
         # and friendly error handling.
-        rpc = gapic_v1.method_async.wrap_method(
-            self._client._transport.set_iam_policy,
-            default_retry=retries.Retry(
-                initial=0.1,
-                maximum=60.0,
-                multiplier=1.3,
-                predicate=retries.if_exception_type(
-                    exceptions.DeadlineExceeded, exceptions.ServiceUnavailable,
-                ),
-            ),
-            default_timeout=60.0,
-            client_info=DEFAULT_CLIENT_INFO,
-        )
+        rpc = self._client._transport._wrapped_methods[
+            self._client._transport.set_iam_policy
+        ]
 
         # Certain fields should be provided within the metadata header;
         # add these here.
@@ -1134,19 +1277,15 @@ class CloudBillingAsyncClient:
 
         # Wrap the RPC method; this adds retry and timeout information,
         # and friendly error handling.
-        rpc = gapic_v1.method_async.wrap_method(
-            self._client._transport.test_iam_permissions,
-            default_retry=retries.Retry(
-                initial=0.1,
-                maximum=60.0,
-                multiplier=1.3,
-                predicate=retries.if_exception_type(
-                    exceptions.DeadlineExceeded, exceptions.ServiceUnavailable,
-                ),
-            ),
-            default_timeout=60.0,
-            client_info=DEFAULT_CLIENT_INFO,
-        )
+        rpc = self._client._transport._wrapped_methods[
+            self._client._transport.test_iam_permissions
+        ]
+
+        # Share the RPC with identical calls in flight, if enabled.
+        if self._client._singleflight is not None:
+            rpc = self._client._singleflight.wrap_async(
+                rpc, "TestIamPermissions", scope=self._client._scope
+            )
 
         # Certain fields should be provided within the metadata header;
         # add these here.
@@ -1161,12 +1300,9 @@ class CloudBillingAsyncClient:
         return response
 
 
-try:
-    DEFAULT_CLIENT_INFO = gapic_v1.client_info.ClientInfo(
-        gapic_version=pkg_resources.get_distribution("google-cloud-billing",).version,
-    )
-except pkg_resources.DistributionNotFound:
-    DEFAULT_CLIENT_INFO = gapic_v1.client_info.ClientInfo()
+DEFAULT_CLIENT_INFO = gapic_v1.client_info.ClientInfo(
+    gapic_version=_compat.gapic_version(),
+)
 
 
 __all__ = ("CloudBillingAsyncClient",)
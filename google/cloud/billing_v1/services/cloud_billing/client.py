@@ -16,11 +16,20 @@
 #
 
 from collections import OrderedDict
-from distutils import util
 import os
 import re
-from typing import Callable, Dict, Optional, Sequence, Tuple, Type, Union
-import pkg_resources
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
 
 from google.api_core import client_options as client_options_lib  # type: ignore
 from google.api_core import exceptions  # type: ignore
@@ -32,6 +41,10 @@ from google.auth.transport.grpc import SslCredentials  # type: ignore
 from google.auth.exceptions import MutualTLSChannelError  # type: ignore
 from google.oauth2 import service_account  # type: ignore
 
+from google.cloud.billing_v1 import project_billing
+from google.cloud.billing_v1 import response_cache as response_cache_lib
+from google.cloud.billing_v1 import singleflight as singleflight_lib
+from google.cloud.billing_v1.services import _compat
 from google.cloud.billing_v1.services.cloud_billing import pagers
 from google.cloud.billing_v1.types import cloud_billing
 from google.iam.v1 import iam_policy_pb2 as iam_policy  # type: ignore
@@ -207,6 +220,9 @@ class CloudBillingClient(metaclass=CloudBillingClientMeta):
         transport: Union[str, CloudBillingTransport, None] = None,
         client_options: Optional[client_options_lib.ClientOptions] = None,
         client_info: gapic_v1.client_info.ClientInfo = DEFAULT_CLIENT_INFO,
+        response_cache: Optional[response_cache_lib.ResponseCache] = None,
+        singleflight: Optional[singleflight_lib.Singleflight] = None,
+        eager_connect: bool = False,
     ) -> None:
         """Instantiate the cloud billing client.
 
@@ -240,11 +256,29 @@ class CloudBillingClient(metaclass=CloudBillingClientMeta):
                 API requests. If ``None``, then default info will be used.
                 Generally, you only need to set this if you're developing
                 your own client library.
+            response_cache (Optional[~.ResponseCache]): A cache for
+                ``get_billing_account`` and ``get_project_billing_info``
+                to read through. The client drops the entries of the
+                resources it updates. If ``None``, nothing is cached.
+            singleflight (Optional[~.Singleflight]): Shares one RPC among
+                identical concurrent ``get_billing_account``,
+                ``get_project_billing_info``, ``get_iam_policy`` and
+                ``test_iam_permissions`` calls. If ``None``, every call
+                sends its own request.
+            eager_connect (bool): Start connecting to the service and
+                fetching a token in the background, so that the first
+                call does not wait for them. See :meth:`warmup`.
 
         Raises:
             google.auth.exceptions.MutualTLSChannelError: If mutual TLS transport
                 creation failed for any reason.
         """
+        self._response_cache = response_cache
+        self._singleflight = singleflight
+        # Scopes this client's entries in a response cache or singleflight
+        # shared with other clients, which may call as other principals.
+        self._scope = object()
+
         if isinstance(client_options, dict):
             client_options = client_options_lib.from_dict(client_options)
         if client_options is None:
@@ -252,7 +286,7 @@ class CloudBillingClient(metaclass=CloudBillingClientMeta):
 
         # Create SSL credentials for mutual TLS if needed.
         use_client_cert = bool(
-            util.strtobool(os.getenv("GOOGLE_API_USE_CLIENT_CERTIFICATE", "false"))
+            _compat.strtobool(os.getenv("GOOGLE_API_USE_CLIENT_CERTIFICATE", "false"))
         )
 
         ssl_credentials = None
@@ -317,6 +351,28 @@ class CloudBillingClient(metaclass=CloudBillingClientMeta):
                 client_info=client_info,
             )
 
+        if eager_connect:
+            self._transport.connect()
+
+    def warmup(self, timeout: float = None) -> None:
+        """Connect to the service and fetch a token ahead of the first call.
+
+        In a cold-started process, call this during initialization, or pass
+        ``eager_connect=True`` to start the same work in the background.
+
+        Args:
+            timeout (float): How long to wait, in seconds. If ``None``,
+                wait until the channel connects.
+
+        Raises:
+            google.api_core.exceptions.DeadlineExceeded: If the channel
+                does not connect, or the token is not fetched, within
+                ``timeout``.
+            google.auth.exceptions.RefreshError: If the credentials cannot
+                be refreshed.
+        """
+        self._transport.warmup(timeout)
+
     def get_billing_account(
         self,
         request: cloud_billing.GetBillingAccountRequest = None,
@@ -382,6 +438,19 @@ class CloudBillingClient(metaclass=CloudBillingClientMeta):
         # and friendly error handling.
         rpc = self._transport._wrapped_methods[self._transport.get_billing_account]
 
+        # Share the RPC with identical calls in flight, if enabled.
+        if self._singleflight is not None:
+            rpc = self._singleflight.wrap(rpc, "GetBillingAccount", scope=self._scope)
+
+        # Serve the response from the cache, if there is one.
+        cache = self._response_cache
+        if cache is not None:
+            cache_key = (self._scope, "GetBillingAccount", request.name)
+            response = cache.get(cache_key)
+            if response is not None:
+                return response
+            generation = cache.generation
+
         # Certain fields should be provided within the metadata header;
         # add these here.
         metadata = tuple(metadata) + (
@@ -391,6 +460,9 @@ class CloudBillingClient(metaclass=CloudBillingClientMeta):
         # Send the request.
         response = rpc(request, retry=retry, timeout=timeout, metadata=metadata,)
 
+        if cache is not None:
+            cache.put(cache_key, response, generation)
+
         # Done; return the response.
         return response
 
@@ -401,6 +473,7 @@ class CloudBillingClient(metaclass=CloudBillingClientMeta):
         retry: retries.Retry = gapic_v1.method.DEFAULT,
         timeout: float = None,
         metadata: Sequence[Tuple[str, str]] = (),
+        prefetch: int = 0,
     ) -> pagers.ListBillingAccountsPager:
         r"""Lists the billing accounts that the current authenticated user
         has permission to
@@ -416,6 +489,9 @@ class CloudBillingClient(metaclass=CloudBillingClientMeta):
             timeout (float): The timeout for this request.
             metadata (Sequence[Tuple[str, str]]): Strings which should be
                 sent along with the request as metadata.
+            prefetch (int): The number of pages to fetch ahead in the
+                background while the current one is processed. ``0`` (the
+                default) fetches each page only once it is needed.
 
         Returns:
             ~.pagers.ListBillingAccountsPager:
@@ -444,7 +520,11 @@ class CloudBillingClient(metaclass=CloudBillingClientMeta):
         # This method is paged; wrap the response in a pager, which provides
         # an `__iter__` convenience method.
         response = pagers.ListBillingAccountsPager(
-            method=rpc, request=request, response=response, metadata=metadata,
+            method=rpc,
+            request=request,
+            response=response,
+            metadata=metadata,
+            prefetch=prefetch,
         )
 
         # Done; return the response.
@@ -534,7 +614,13 @@ class CloudBillingClient(metaclass=CloudBillingClientMeta):
         )
 
         # Send the request.
-        response = rpc(request, retry=retry, timeout=timeout, metadata=metadata,)
+        cache = self._response_cache
+        try:
+            response = rpc(request, retry=retry, timeout=timeout, metadata=metadata,)
+        finally:
+            # Even a failed update may have been applied.
+            if cache is not None:
+                cache.invalidate((self._scope, "GetBillingAccount", request.name))
 
         # Done; return the response.
         return response
@@ -628,6 +714,7 @@ class CloudBillingClient(metaclass=CloudBillingClientMeta):
         retry: retries.Retry = gapic_v1.method.DEFAULT,
         timeout: float = None,
         metadata: Sequence[Tuple[str, str]] = (),
+        prefetch: int = 0,
     ) -> pagers.ListProjectBillingInfoPager:
         r"""Lists the projects associated with a billing account. The
         current authenticated user must have the
@@ -652,6 +739,9 @@ class CloudBillingClient(metaclass=CloudBillingClientMeta):
             timeout (float): The timeout for this request.
             metadata (Sequence[Tuple[str, str]]): Strings which should be
                 sent along with the request as metadata.
+            prefetch (int): The number of pages to fetch ahead in the
+                background while the current one is processed. ``0`` (the
+                default) fetches each page only once it is needed.
 
         Returns:
             ~.pagers.ListProjectBillingInfoPager:
@@ -702,7 +792,11 @@ class CloudBillingClient(metaclass=CloudBillingClientMeta):
         # This method is paged; wrap the response in a pager, which provides
         # an `__iter__` convenience method.
         response = pagers.ListProjectBillingInfoPager(
-            method=rpc, request=request, response=response, metadata=metadata,
+            method=rpc,
+            request=request,
+            response=response,
+            metadata=metadata,
+            prefetch=prefetch,
         )
 
         # Done; return the response.
@@ -775,6 +869,21 @@ class CloudBillingClient(metaclass=CloudBillingClientMeta):
         # and friendly error handling.
         rpc = self._transport._wrapped_methods[self._transport.get_project_billing_info]
 
+        # Share the RPC with identical calls in flight, if enabled.
+        if self._singleflight is not None:
+            rpc = self._singleflight.wrap(
+                rpc, "GetProjectBillingInfo", scope=self._scope
+            )
+
+        # Serve the response from the cache, if there is one.
+        cache = self._response_cache
+        if cache is not None:
+            cache_key = (self._scope, "GetProjectBillingInfo", request.name)
+            response = cache.get(cache_key)
+            if response is not None:
+                return response
+            generation = cache.generation
+
         # Certain fields should be provided within the metadata header;
         # add these here.
         metadata = tuple(metadata) + (
@@ -784,9 +893,53 @@ class CloudBillingClient(metaclass=CloudBillingClientMeta):
         # Send the request.
         response = rpc(request, retry=retry, timeout=timeout, metadata=metadata,)
 
+        if cache is not None:
+            cache.put(cache_key, response, generation)
+
         # Done; return the response.
         return response
 
+    def batch_get_project_billing_info(
+        self,
+        project_ids: Iterable[str],
+        *,
+        hint_accounts: Iterable[str] = (),
+        strategy: str = project_billing.STRATEGY_AUTO,
+        max_concurrency: int = project_billing.DEFAULT_MAX_CONCURRENCY,
+    ) -> Dict[str, cloud_billing.ProjectBillingInfo]:
+        r"""Gets the billing information of many projects.
+
+        When the billing accounts the projects are likely linked to are
+        known, sweeping them with ``list_project_billing_info`` usually
+        takes far fewer RPCs than one ``get_project_billing_info`` per
+        project. This picks the cheaper strategy, runs the RPCs
+        concurrently, and gets the projects a sweep did not find one by
+        one. See
+        :func:`~google.cloud.billing_v1.project_billing.batch_get_project_billing_info`.
+
+        Args:
+            project_ids (Iterable[str]): The projects, as ids or as
+                ``projects/{project_id}`` resource names.
+            hint_accounts (Iterable[str]): The resource names of the
+                billing accounts the projects are likely linked to.
+            strategy (str): ``"auto"``, ``"list"`` to sweep every hinted
+                account to the end, or ``"get"`` to ignore the hints.
+            max_concurrency (int): The maximum number of RPCs in flight.
+
+        Returns:
+            Dict[str, ~.cloud_billing.ProjectBillingInfo]:
+                The billing information by project id, in the order of
+                ``project_ids``.
+
+        """
+        return project_billing.batch_get_project_billing_info(
+            self,
+            project_ids,
+            hint_accounts=hint_accounts,
+            strategy=strategy,
+            max_concurrency=max_concurrency,
+        )
+
     def update_project_billing_info(
         self,
         request: cloud_billing.UpdateProjectBillingInfoRequest = None,
@@ -906,11 +1059,73 @@ class CloudBillingClient(metaclass=CloudBillingClientMeta):
         )
 
         # Send the request.
-        response = rpc(request, retry=retry, timeout=timeout, metadata=metadata,)
+        cache = self._response_cache
+        try:
+            response = rpc(request, retry=retry, timeout=timeout, metadata=metadata,)
+        finally:
+            # Even a failed update may have been applied.
+            if cache is not None:
+                cache.invalidate((self._scope, "GetProjectBillingInfo", request.name))
 
         # Done; return the response.
         return response
 
+    def bulk_update_project_billing_info(
+        self,
+        updates: Union[Mapping[str, str], Iterable[Tuple[str, str]]],
+        *,
+        max_concurrency: int = project_billing.DEFAULT_MAX_CONCURRENCY,
+        rate: Optional[float] = None,
+        burst: int = 1,
+        deadline: Optional[float] = None,
+        max_attempts: int = project_billing.DEFAULT_MAX_ATTEMPTS,
+        initial_backoff: float = project_billing.DEFAULT_INITIAL_BACKOFF,
+        max_backoff: float = project_billing.DEFAULT_MAX_BACKOFF,
+    ) -> List[project_billing.UpdateResult]:
+        r"""Links many projects to billing accounts.
+
+        The updates run concurrently, paced to ``rate`` RPCs per second
+        when it is set. Transient errors pause every update with an
+        exponential backoff before the failed update is tried again, until
+        the ``deadline``. Each update reports its own outcome, so that one failure
+        does not stop the others. See
+        :func:`~google.cloud.billing_v1.project_billing.bulk_update_project_billing_info`.
+
+        Args:
+            updates (Union[Mapping[str, str], Iterable[Tuple[str, str]]]):
+                The billing account resource name to link each project
+                to, by project id or ``projects/{project_id}`` resource
+                name. An empty account name disables billing.
+            max_concurrency (int): The maximum number of RPCs in flight.
+            rate (Optional[float]): The maximum number of RPCs sent per
+                second. Unlimited by default.
+            burst (int): The number of RPCs that may be sent at once
+                after an idle period, when ``rate`` is set.
+            deadline (Optional[float]): The number of seconds the whole
+                bulk update may take.
+            max_attempts (int): The maximum number of RPCs sent per
+                update.
+            initial_backoff (float): The first pause after a
+                transient error, in seconds.
+            max_backoff (float): The longest pause, in seconds.
+
+        Returns:
+            List[~.project_billing.UpdateResult]:
+                The outcome of each update, in the order of ``updates``.
+
+        """
+        return project_billing.bulk_update_project_billing_info(
+            self,
+            updates,
+            max_concurrency=max_concurrency,
+            rate=rate,
+            burst=burst,
+            deadline=deadline,
+            max_attempts=max_attempts,
+            initial_backoff=initial_backoff,
+            max_backoff=max_backoff,
+        )
+
     def get_iam_policy(
         self,
         request: iam_policy.GetIamPolicyRequest = None,
@@ -1035,6 +1250,10 @@ class CloudBillingClient(metaclass=CloudBillingClientMeta):
         # and friendly error handling.
         rpc = self._transport._wrapped_methods[self._transport.get_iam_policy]
 
+        # Share the RPC with identical calls in flight, if enabled.
+        if self._singleflight is not None:
+            rpc = self._singleflight.wrap(rpc, "GetIamPolicy", scope=self._scope)
+
         # Certain fields should be provided within the metadata header;
         # add these here.
         metadata = tuple(metadata) + (
@@ -1255,6 +1474,10 @@ class CloudBillingClient(metaclass=CloudBillingClientMeta):
         # and friendly error handling.
         rpc = self._transport._wrapped_methods[self._transport.test_iam_permissions]
 
+        # Share the RPC with identical calls in flight, if enabled.
+        if self._singleflight is not None:
+            rpc = self._singleflight.wrap(rpc, "TestIamPermissions", scope=self._scope)
+
         # Certain fields should be provided within the metadata header;
         # add these here.
         metadata = tuple(metadata) + (
@@ -1268,12 +1491,9 @@ class CloudBillingClient(metaclass=CloudBillingClientMeta):
         return response
 
 
-try:
-    DEFAULT_CLIENT_INFO = gapic_v1.client_info.ClientInfo(
-        gapic_version=pkg_resources.get_distribution("google-cloud-billing",).version,
-    )
-except pkg_resources.DistributionNotFound:
-    DEFAULT_CLIENT_INFO = gapic_v1.client_info.ClientInfo()
+DEFAULT_CLIENT_INFO = gapic_v1.client_info.ClientInfo(
+    gapic_version=_compat.gapic_version(),
+)
 
 
 __all__ = ("CloudBillingClient",)
@@ -15,8 +15,18 @@
 # limitations under the License.
 #
 
-from typing import Any, AsyncIterable, Awaitable, Callable, Iterable, Sequence, Tuple
-
+from typing import (
+    Any,
+    AsyncIterable,
+    Awaitable,
+    Callable,
+    Iterable,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from google.cloud.billing_v1.services import _prefetch
 from google.cloud.billing_v1.types import cloud_billing
 
 
@@ -44,7 +54,8 @@ class ListBillingAccountsPager:
         request: cloud_billing.ListBillingAccountsRequest,
         response: cloud_billing.ListBillingAccountsResponse,
         *,
-        metadata: Sequence[Tuple[str, str]] = ()
+        metadata: Sequence[Tuple[str, str]] = (),
+        prefetch: int = 0
     ):
         """Instantiate the pager.
 
@@ -57,18 +68,61 @@ class ListBillingAccountsPager:
                 The initial response object.
             metadata (Sequence[Tuple[str, str]]): Strings which should be
                 sent along with the request as metadata.
+            prefetch (int): The number of pages to fetch ahead in the
+                background while the current one is processed. ``0`` (the
+                default) fetches each page only once it is needed.
         """
         self._method = method
         self._request = cloud_billing.ListBillingAccountsRequest(request)
         self._response = response
         self._metadata = metadata
+        self._prefetch = prefetch
 
     def __getattr__(self, name: str) -> Any:
         return getattr(self._response, name)
 
+    def checkpoint(
+        self, *, next_page: bool = False
+    ) -> Optional[cloud_billing.ListBillingAccountsRequest]:
+        """Return a request that resumes the listing from this point.
+
+        Pass the returned request as ``request`` to ``list_billing_accounts``
+        to continue where this pager left off, for example after a restart.
+        It can be stored with ``ListBillingAccountsRequest.serialize``.
+
+        Args:
+            next_page (bool): Whether the current page has been fully
+                processed. By default the checkpoint starts at the current
+                page, so that items not yet consumed are listed again.
+
+        Returns:
+            Optional[:class:`~.cloud_billing.ListBillingAccountsRequest`]:
+                The request for the page to resume at, or ``None`` if
+                ``next_page`` is set and the current page is the last one.
+        """
+        request = cloud_billing.ListBillingAccountsRequest(self._request)
+        if next_page:
+            if not self._response.next_page_token:
+                return None
+            request.page_token = self._response.next_page_token
+        return request
+
+    def _fetch_page(self, page_token: str) -> cloud_billing.ListBillingAccountsResponse:
+        request = cloud_billing.ListBillingAccountsRequest(self._request)
+        request.page_token = page_token
+        return self._method(request, metadata=self._metadata)
+
     @property
     def pages(self) -> Iterable[cloud_billing.ListBillingAccountsResponse]:
         yield self._response
+        if self._prefetch:
+            for page in _prefetch.prefetch_pages(
+                self._response.next_page_token, self._fetch_page, self._prefetch
+            ):
+                self._request.page_token = self._response.next_page_token
+                self._response = page
+                yield page
+            return
         while self._response.next_page_token:
             self._request.page_token = self._response.next_page_token
             self._response = self._method(self._request, metadata=self._metadata)
@@ -106,7 +160,8 @@ class ListBillingAccountsAsyncPager:
         request: cloud_billing.ListBillingAccountsRequest,
         response: cloud_billing.ListBillingAccountsResponse,
         *,
-        metadata: Sequence[Tuple[str, str]] = ()
+        metadata: Sequence[Tuple[str, str]] = (),
+        prefetch: int = 0
     ):
         """Instantiate the pager.
 
@@ -119,18 +174,63 @@ class ListBillingAccountsAsyncPager:
                 The initial response object.
             metadata (Sequence[Tuple[str, str]]): Strings which should be
                 sent along with the request as metadata.
+            prefetch (int): The number of pages to fetch ahead in the
+                background while the current one is processed. ``0`` (the
+                default) fetches each page only once it is needed.
         """
         self._method = method
         self._request = cloud_billing.ListBillingAccountsRequest(request)
         self._response = response
         self._metadata = metadata
+        self._prefetch = prefetch
 
     def __getattr__(self, name: str) -> Any:
         return getattr(self._response, name)
 
+    def checkpoint(
+        self, *, next_page: bool = False
+    ) -> Optional[cloud_billing.ListBillingAccountsRequest]:
+        """Return a request that resumes the listing from this point.
+
+        Pass the returned request as ``request`` to ``list_billing_accounts``
+        to continue where this pager left off, for example after a restart.
+        It can be stored with ``ListBillingAccountsRequest.serialize``.
+
+        Args:
+            next_page (bool): Whether the current page has been fully
+                processed. By default the checkpoint starts at the current
+                page, so that items not yet consumed are listed again.
+
+        Returns:
+            Optional[:class:`~.cloud_billing.ListBillingAccountsRequest`]:
+                The request for the page to resume at, or ``None`` if
+                ``next_page`` is set and the current page is the last one.
+        """
+        request = cloud_billing.ListBillingAccountsRequest(self._request)
+        if next_page:
+            if not self._response.next_page_token:
+                return None
+            request.page_token = self._response.next_page_token
+        return request
+
+    async def _fetch_page(
+        self, page_token: str
+    ) -> cloud_billing.ListBillingAccountsResponse:
+        request = cloud_billing.ListBillingAccountsRequest(self._request)
+        request.page_token = page_token
+        return await self._method(request, metadata=self._metadata)
+
     @property
     async def pages(self) -> AsyncIterable[cloud_billing.ListBillingAccountsResponse]:
         yield self._response
+        if self._prefetch:
+            async for page in _prefetch.prefetch_pages_async(
+                self._response.next_page_token, self._fetch_page, self._prefetch
+            ):
+                self._request.page_token = self._response.next_page_token
+                self._response = page
+                yield page
+            return
         while self._response.next_page_token:
             self._request.page_token = self._response.next_page_token
             self._response = await self._method(self._request, metadata=self._metadata)
@@ -172,7 +272,8 @@ class ListProjectBillingInfoPager:
         request: cloud_billing.ListProjectBillingInfoRequest,
         response: cloud_billing.ListProjectBillingInfoResponse,
         *,
-        metadata: Sequence[Tuple[str, str]] = ()
+        metadata: Sequence[Tuple[str, str]] = (),
+        prefetch: int = 0
     ):
         """Instantiate the pager.
 
@@ -185,18 +286,63 @@ class ListProjectBillingInfoPager:
                 The initial response object.
             metadata (Sequence[Tuple[str, str]]): Strings which should be
                 sent along with the request as metadata.
+            prefetch (int): The number of pages to fetch ahead in the
+                background while the current one is processed. ``0`` (the
+                default) fetches each page only once it is needed.
         """
         self._method = method
         self._request = cloud_billing.ListProjectBillingInfoRequest(request)
         self._response = response
         self._metadata = metadata
+        self._prefetch = prefetch
 
     def __getattr__(self, name: str) -> Any:
         return getattr(self._response, name)
 
+    def checkpoint(
+        self, *, next_page: bool = False
+    ) -> Optional[cloud_billing.ListProjectBillingInfoRequest]:
+        """Return a request that resumes the listing from this point.
+
+        Pass the returned request as ``request`` to ``list_project_billing_info``
+        to continue where this pager left off, for example after a restart.
+        It can be stored with ``ListProjectBillingInfoRequest.serialize``.
+
+        Args:
+            next_page (bool): Whether the current page has been fully
+                processed. By default the checkpoint starts at the current
+                page, so that items not yet consumed are listed again.
+
+        Returns:
+            Optional[:class:`~.cloud_billing.ListProjectBillingInfoRequest`]:
+                The request for the page to resume at, or ``None`` if
+                ``next_page`` is set and the current page is the last one.
+        """
+        request = cloud_billing.ListProjectBillingInfoRequest(self._request)
+        if next_page:
+            if not self._response.next_page_token:
+                return None
+            request.page_token = self._response.next_page_token
+        return request
+
+    def _fetch_page(
+        self, page_token: str
+    ) -> cloud_billing.ListProjectBillingInfoResponse:
+        request = cloud_billing.ListProjectBillingInfoRequest(self._request)
+        request.page_token = page_token
+        return self._method(request, metadata=self._metadata)
+
     @property
     def pages(self) -> Iterable[cloud_billing.ListProjectBillingInfoResponse]:
         yield self._response
+        if self._prefetch:
+            for page in _prefetch.prefetch_pages(
+                self._response.next_page_token, self._fetch_page, self._prefetch
+            ):
+                self._request.page_token = self._response.next_page_token
+                self._response = page
+                yield page
+            return
         while self._response.next_page_token:
             self._request.page_token = self._response.next_page_token
             self._response = self._method(self._request, metadata=self._metadata)
@@ -234,7 +380,8 @@ class ListProjectBillingInfoAsyncPager:
         request: cloud_billing.ListProjectBillingInfoRequest,
         response: cloud_billing.ListProjectBillingInfoResponse,
         *,
-        metadata: Sequence[Tuple[str, str]] = ()
+        metadata: Sequence[Tuple[str, str]] = (),
+        prefetch: int = 0
     ):
         """Instantiate the pager.
 
@@ -247,20 +394,65 @@ class ListProjectBillingInfoAsyncPager:
                 The initial response object.
             metadata (Sequence[Tuple[str, str]]): Strings which should be
                 sent along with the request as metadata.
+            prefetch (int): The number of pages to fetch ahead in the
+                background while the current one is processed. ``0`` (the
+                default) fetches each page only once it is needed.
         """
         self._method = method
         self._request = cloud_billing.ListProjectBillingInfoRequest(request)
         self._response = response
         self._metadata = metadata
+        self._prefetch = prefetch
 
     def __getattr__(self, name: str) -> Any:
         return getattr(self._response, name)
 
+    def checkpoint(
+        self, *, next_page: bool = False
+    ) -> Optional[cloud_billing.ListProjectBillingInfoRequest]:
+        """Return a request that resumes the listing from this point.
+
+        Pass the returned request as ``request`` to ``list_project_billing_info``
+        to continue where this pager left off, for example after a restart.
+        It can be stored with ``ListProjectBillingInfoRequest.serialize``.
+
+        Args:
+            next_page (bool): Whether the current page has been fully
+                processed. By default the checkpoint starts at the current
+                page, so that items not yet consumed are listed again.
+
+        Returns:
+            Optional[:class:`~.cloud_billing.ListProjectBillingInfoRequest`]:
+                The request for the page to resume at, or ``None`` if
+                ``next_page`` is set and the current page is the last one.
+        """
+        request = cloud_billing.ListProjectBillingInfoRequest(self._request)
+        if next_page:
+            if not self._response.next_page_token:
+                return None
+            request.page_token = self._response.next_page_token
+        return request
+
+    async def _fetch_page(
+        self, page_token: str
+    ) -> cloud_billing.ListProjectBillingInfoResponse:
+        request = cloud_billing.ListProjectBillingInfoRequest(self._request)
+        request.page_token = page_token
+        return await self._method(request, metadata=self._metadata)
+
     @property
     async def pages(
         self,
     ) -> AsyncIterable[cloud_billing.ListProjectBillingInfoResponse]:
         yield self._response
+        if self._prefetch:
+            async for page in _prefetch.prefetch_pages_async(
+                self._response.next_page_token, self._fetch_page, self._prefetch
+            ):
+                self._request.page_token = self._response.next_page_token
+                self._response = page
+                yield page
+            return
         while self._response.next_page_token:
             self._request.page_token = self._response.next_page_token
             self._response = await self._method(self._request, metadata=self._metadata)
@@ -17,7 +17,6 @@
 
 import abc
 import typing
-import pkg_resources
 
 from google import auth  # type: ignore
 from google.api_core import exceptions  # type: ignore
@@ -25,17 +24,16 @@ from google.api_core import gapic_v1  # type: ignore
 from google.api_core import retry as retries  # type: ignore
 from google.auth import credentials  # type: ignore
 
+from google.cloud.billing_v1.retry_budget import RetryBudget
+from google.cloud.billing_v1.services import _compat
 from google.cloud.billing_v1.types import cloud_billing
 from google.iam.v1 import iam_policy_pb2 as iam_policy  # type: ignore
 from google.iam.v1 import policy_pb2 as policy  # type: ignore
 
 
-try:
-    DEFAULT_CLIENT_INFO = gapic_v1.client_info.ClientInfo(
-        gapic_version=pkg_resources.get_distribution("google-cloud-billing",).version,
-    )
-except pkg_resources.DistributionNotFound:
-    DEFAULT_CLIENT_INFO = gapic_v1.client_info.ClientInfo()
+DEFAULT_CLIENT_INFO = gapic_v1.client_info.ClientInfo(
+    gapic_version=_compat.gapic_version(),
+)
 
 
 class CloudBillingTransport(abc.ABC):
@@ -52,6 +50,7 @@ class CloudBillingTransport(abc.ABC):
         scopes: typing.Optional[typing.Sequence[str]] = AUTH_SCOPES,
         quota_project_id: typing.Optional[str] = None,
         client_info: gapic_v1.client_info.ClientInfo = DEFAULT_CLIENT_INFO,
+        retry_budget: typing.Optional[RetryBudget] = None,
         **kwargs,
     ) -> None:
         """Instantiate the transport.
@@ -74,6 +73,8 @@ class CloudBillingTransport(abc.ABC):
                 API requests. If ``None``, then default info will be used.	
                 Generally, you only need to set this if you're developing	
                 your own client library.
+            retry_budget (Optional[~.RetryBudget]): Limits the retries of
+                the methods' default retry settings to a share of the calls.
         """
         # Save the hostname. Default to port 443 (HTTPS) if none is specified.
         if ":" not in host:
@@ -100,8 +101,21 @@ class CloudBillingTransport(abc.ABC):
         # Save the credentials.
         self._credentials = credentials
 
+        self._retry_budget = retry_budget
+
         # Lifted into its own function so it can be stubbed out during tests.
         self._prep_wrapped_messages(client_info)
+        if retry_budget is not None:
+            self._wrapped_methods = {
+                method: retry_budget.wrap(wrapped)
+                for method, wrapped in self._wrapped_methods.items()
+            }
+
+    def _retry_predicate(self, *exception_types):
+        predicate = retries.if_exception_type(*exception_types)
+        if self._retry_budget is None:
+            return predicate
+        return self._retry_budget.limit_predicate(predicate)
 
     def _prep_wrapped_messages(self, client_info):
         # Precompute the wrapped methods.
@@ -112,7 +126,7 @@ class CloudBillingTransport(abc.ABC):
                     initial=0.1,
                     maximum=60.0,
                     multiplier=1.3,
-                    predicate=retries.if_exception_type(
+                    predicate=self._retry_predicate(
                         exceptions.DeadlineExceeded, exceptions.ServiceUnavailable,
                     ),
                 ),
@@ -125,7 +139,7 @@ class CloudBillingTransport(abc.ABC):
                     initial=0.1,
                     maximum=60.0,
                     multiplier=1.3,
-                    predicate=retries.if_exception_type(
+                    predicate=self._retry_predicate(
                         exceptions.DeadlineExceeded, exceptions.ServiceUnavailable,
                     ),
                 ),
@@ -138,7 +152,7 @@ class CloudBillingTransport(abc.ABC):
                     initial=0.1,
                     maximum=60.0,
                     multiplier=1.3,
-                    predicate=retries.if_exception_type(
+                    predicate=self._retry_predicate(
                         exceptions.DeadlineExceeded, exceptions.ServiceUnavailable,
                     ),
                 ),
@@ -156,7 +170,7 @@ class CloudBillingTransport(abc.ABC):
                     initial=0.1,
                     maximum=60.0,
                     multiplier=1.3,
-                    predicate=retries.if_exception_type(
+                    predicate=self._retry_predicate(
                         exceptions.DeadlineExceeded, exceptions.ServiceUnavailable,
                     ),
                 ),
@@ -169,7 +183,7 @@ class CloudBillingTransport(abc.ABC):
                     initial=0.1,
                     maximum=60.0,
                     multiplier=1.3,
-                    predicate=retries.if_exception_type(
+                    predicate=self._retry_predicate(
                         exceptions.DeadlineExceeded, exceptions.ServiceUnavailable,
                     ),
                 ),
@@ -182,7 +196,7 @@ class CloudBillingTransport(abc.ABC):
                     initial=0.1,
                     maximum=60.0,
                     multiplier=1.3,
-                    predicate=retries.if_exception_type(
+                    predicate=self._retry_predicate(
                         exceptions.DeadlineExceeded, exceptions.ServiceUnavailable,
                     ),
                 ),
@@ -195,7 +209,7 @@ class CloudBillingTransport(abc.ABC):
                     initial=0.1,
                     maximum=60.0,
                     multiplier=1.3,
-                    predicate=retries.if_exception_type(
+                    predicate=self._retry_predicate(
                         exceptions.DeadlineExceeded, exceptions.ServiceUnavailable,
                     ),
                 ),
@@ -208,7 +222,7 @@ class CloudBillingTransport(abc.ABC):
                     initial=0.1,
                     maximum=60.0,
                     multiplier=1.3,
-                    predicate=retries.if_exception_type(
+                    predicate=self._retry_predicate(
                         exceptions.DeadlineExceeded, exceptions.ServiceUnavailable,
                     ),
                 ),
@@ -221,7 +235,7 @@ class CloudBillingTransport(abc.ABC):
                     initial=0.1,
                     maximum=60.0,
                     multiplier=1.3,
-                    predicate=retries.if_exception_type(
+                    predicate=self._retry_predicate(
                         exceptions.DeadlineExceeded, exceptions.ServiceUnavailable,
                     ),
                 ),
@@ -341,5 +355,13 @@ class CloudBillingTransport(abc.ABC):
     ]:
         raise NotImplementedError()
 
+    def connect(self) -> None:
+        raise NotImplementedError()
+
+    def warmup(
+        self, timeout: typing.Optional[float] = None
+    ) -> typing.Union[None, typing.Awaitable[None]]:
+        raise NotImplementedError()
+
 
 __all__ = ("CloudBillingTransport",)
@@ -26,6 +26,12 @@ from google.auth.transport.grpc import SslCredentials  # type: ignore
 
 import grpc  # type: ignore
 
+from google.cloud.billing_v1.circuit_breaker import CircuitBreaker
+from google.cloud.billing_v1.concurrency_limiter import AdaptiveConcurrencyLimiter
+from google.cloud.billing_v1.hedging import HedgingPolicy
+from google.cloud.billing_v1.retry_budget import RetryBudget
+from google.cloud.billing_v1.services import _channel_pool
+from google.cloud.billing_v1.services import _warmup
 from google.cloud.billing_v1.types import cloud_billing
 from google.iam.v1 import iam_policy_pb2 as iam_policy  # type: ignore
 from google.iam.v1 import policy_pb2 as policy  # type: ignore
@@ -62,6 +68,12 @@ class CloudBillingGrpcTransport(CloudBillingTransport):
         ssl_channel_credentials: grpc.ChannelCredentials = None,
         quota_project_id: Optional[str] = None,
         client_info: gapic_v1.client_info.ClientInfo = DEFAULT_CLIENT_INFO,
+        channel_pool_size: int = 1,
+        concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        retry_budget: Optional[RetryBudget] = None,
+        hedging_policy: Optional[HedgingPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        eager_connect: bool = False,
     ) -> None:
         """Instantiate the transport.
 
@@ -97,6 +109,22 @@ class CloudBillingGrpcTransport(CloudBillingTransport):
                 API requests. If ``None``, then default info will be used.
                 Generally, you only need to set this if you're developing
                 your own client library.
+            channel_pool_size (int): The number of channels, each with its
+                own connection, to spread calls over. Calls go to the
+                channel with the fewest calls in flight. This argument is
+                ignored if ``channel`` is provided.
+            concurrency_limiter (Optional[~.AdaptiveConcurrencyLimiter]): Limits
+                the number of unary calls in flight on the channel, adapting
+                the limit to the load the service accepts.
+            retry_budget (Optional[~.RetryBudget]): Limits the retries of
+                the methods' default retry settings to a share of the calls.
+            hedging_policy (Optional[~.HedgingPolicy]): Hedges the slow calls
+                of the idempotent read methods.
+            circuit_breaker (Optional[~.CircuitBreaker]): Fails the calls
+                of a method at once while it keeps failing.
+            eager_connect (bool): Start connecting the channel and
+                fetching a token in the background, so that the first
+                call does not wait for them. See :meth:`warmup`.
 
         Raises:
           google.auth.exceptions.MutualTLSChannelError: If mutual TLS transport
@@ -142,7 +170,9 @@ class CloudBillingGrpcTransport(CloudBillingTransport):
                 ssl_credentials = SslCredentials().ssl_credentials
 
             # create a new channel. The provided one is ignored.
-            self._grpc_channel = type(self).create_channel(
+            self._grpc_channel = _channel_pool.create_channel_pool(
+                type(self).create_channel,
+                channel_pool_size,
                 host,
                 credentials=credentials,
                 credentials_file=credentials_file,
@@ -164,7 +194,9 @@ class CloudBillingGrpcTransport(CloudBillingTransport):
                 )
 
             # create a new channel. The provided one is ignored.
-            self._grpc_channel = type(self).create_channel(
+            self._grpc_channel = _channel_pool.create_channel_pool(
+                type(self).create_channel,
+                channel_pool_size,
                 host,
                 credentials=credentials,
                 credentials_file=credentials_file,
@@ -177,6 +209,14 @@ class CloudBillingGrpcTransport(CloudBillingTransport):
                 ],
             )
 
+        self._warmup_channels = _warmup.channels_of(self._grpc_channel)
+        if concurrency_limiter is not None:
+            self._grpc_channel = concurrency_limiter.limit_channel(self._grpc_channel)
+        if hedging_policy is not None:
+            self._grpc_channel = hedging_policy.hedge_channel(self._grpc_channel)
+        if circuit_breaker is not None:
+            self._grpc_channel = circuit_breaker.protect_channel(self._grpc_channel)
+
         self._stubs = {}  # type: Dict[str, Callable]
 
         # Run the base constructor.
@@ -187,8 +227,12 @@ class CloudBillingGrpcTransport(CloudBillingTransport):
             scopes=scopes or self.AUTH_SCOPES,
             quota_project_id=quota_project_id,
             client_info=client_info,
+            retry_budget=retry_budget,
         )
 
+        if eager_connect:
+            self.connect()
+
     @classmethod
     def create_channel(
         cls,
@@ -240,6 +284,30 @@ class CloudBillingGrpcTransport(CloudBillingTransport):
         """
         return self._grpc_channel
 
+    def connect(self) -> None:
+        """Start connecting the channel and refreshing the credentials.
+
+        Returns at once; the work goes on in the background. See
+        :meth:`warmup` to wait for it.
+        """
+        _warmup.start(self._warmup_channels, self._credentials)
+
+    def warmup(self, timeout: Optional[float] = None) -> None:
+        """Connect the channel and refresh the credentials ahead of the first call.
+
+        Args:
+            timeout (Optional[float]): How long to wait, in seconds. ``None``
+                waits until the channel connects.
+
+        Raises:
+            google.api_core.exceptions.DeadlineExceeded: If the channel does
+                not connect, or the token is not fetched, within
+                ``timeout``.
+            google.auth.exceptions.RefreshError: If the credentials cannot
+                be refreshed.
+        """
+        _warmup.warm_up(self._warmup_channels, self._credentials, timeout)
+
     @property
     def get_billing_account(
         self,
@@ -18,7 +18,9 @@
 import warnings
 from typing import Awaitable, Callable, Dict, Optional, Sequence, Tuple
 
+from google.api_core import exceptions  # type: ignore
 from google.api_core import gapic_v1  # type: ignore
+from google.api_core import retry as retries  # type: ignore
 from google.api_core import grpc_helpers_async  # type: ignore
 from google import auth  # type: ignore
 from google.auth import credentials  # type: ignore
@@ -27,6 +29,11 @@ from google.auth.transport.grpc import SslCredentials  # type: ignore
 import grpc  # type: ignore
 from grpc.experimental import aio  # type: ignore
 
+from google.cloud.billing_v1.circuit_breaker import CircuitBreaker
+from google.cloud.billing_v1.concurrency_limiter import AdaptiveConcurrencyLimiter
+from google.cloud.billing_v1.hedging import HedgingPolicy
+from google.cloud.billing_v1.retry_budget import RetryBudget
+from google.cloud.billing_v1.services import _warmup
 from google.cloud.billing_v1.types import cloud_billing
 from google.iam.v1 import iam_policy_pb2 as iam_policy  # type: ignore
 from google.iam.v1 import policy_pb2 as policy  # type: ignore
@@ -50,7 +57,7 @@ class CloudBillingGrpcAsyncIOTransport(CloudBillingTransport):
     """
 
     _grpc_channel: aio.Channel
-    _stubs: Dict[str, Callable] = {}
+    _stubs: Dict[str, Callable]
 
     @classmethod
     def create_channel(
@@ -106,6 +113,11 @@ class CloudBillingGrpcAsyncIOTransport(CloudBillingTransport):
         ssl_channel_credentials: grpc.ChannelCredentials = None,
         quota_project_id=None,
         client_info: gapic_v1.client_info.ClientInfo = DEFAULT_CLIENT_INFO,
+        concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        retry_budget: Optional[RetryBudget] = None,
+        hedging_policy: Optional[HedgingPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        eager_connect: bool = False,
     ) -> None:
         """Instantiate the transport.
 
@@ -142,6 +154,18 @@ class CloudBillingGrpcAsyncIOTransport(CloudBillingTransport):
                 API requests. If ``None``, then default info will be used.	
                 Generally, you only need to set this if you're developing	
                 your own client library.
+            concurrency_limiter (Optional[~.AdaptiveConcurrencyLimiter]): Limits
+                the number of unary calls in flight on the channel, adapting
+                the limit to the load the service accepts.
+            retry_budget (Optional[~.RetryBudget]): Limits the retries of
+                the methods' default retry settings to a share of the calls.
+            hedging_policy (Optional[~.HedgingPolicy]): Hedges the slow calls
+                of the idempotent read methods.
+            circuit_breaker (Optional[~.CircuitBreaker]): Fails the calls
+                of a method at once while it keeps failing.
+            eager_connect (bool): Start connecting the channel and
+                fetching a token in the background, so that the first
+                call does not wait for them. See :meth:`warmup`.
 
         Raises:
             google.auth.exceptions.MutualTlsChannelError: If mutual TLS transport
@@ -222,6 +246,16 @@ class CloudBillingGrpcAsyncIOTransport(CloudBillingTransport):
                 ],
             )
 
+        self._warmup_channels = _warmup.channels_of(self._grpc_channel)
+        if concurrency_limiter is not None:
+            self._grpc_channel = concurrency_limiter.limit_channel(self._grpc_channel)
+        if hedging_policy is not None:
+            self._grpc_channel = hedging_policy.hedge_channel(self._grpc_channel)
+        if circuit_breaker is not None:
+            self._grpc_channel = circuit_breaker.protect_channel(self._grpc_channel)
+
+        self._stubs = {}  # type: Dict[str, Callable]
+
         # Run the base constructor.
         super().__init__(
             host=host,
@@ -230,9 +264,139 @@ class CloudBillingGrpcAsyncIOTransport(CloudBillingTransport):
             scopes=scopes or self.AUTH_SCOPES,
             quota_project_id=quota_project_id,
             client_info=client_info,
+            retry_budget=retry_budget,
         )
 
-        self._stubs = {}
+        if eager_connect:
+            self.connect()
+
+    def _prep_wrapped_messages(self, client_info):
+        # Precompute the wrapped methods, using the asyncio-aware wrapper so
+        # that retries and error mapping work with awaitable stubs.
+        self._wrapped_methods = {
+            self.get_billing_account: gapic_v1.method_async.wrap_method(
+                self.get_billing_account,
+                default_retry=retries.Retry(
+                    initial=0.1,
+                    maximum=60.0,
+                    multiplier=1.3,
+                    predicate=self._retry_predicate(
+                        exceptions.DeadlineExceeded, exceptions.ServiceUnavailable,
+                    ),
+                ),
+                default_timeout=60.0,
+                client_info=client_info,
+            ),
+            self.list_billing_accounts: gapic_v1.method_async.wrap_method(
+                self.list_billing_accounts,
+                default_retry=retries.Retry(
+                    initial=0.1,
+                    maximum=60.0,
+                    multiplier=1.3,
+                    predicate=self._retry_predicate(
+                        exceptions.DeadlineExceeded, exceptions.ServiceUnavailable,
+                    ),
+                ),
+                default_timeout=60.0,
+                client_info=client_info,
+            ),
+            self.update_billing_account: gapic_v1.method_async.wrap_method(
+                self.update_billing_account,
+                default_retry=retries.Retry(
+                    initial=0.1,
+                    maximum=60.0,
+                    multiplier=1.3,
+                    predicate=self._retry_predicate(
+                        exceptions.DeadlineExceeded, exceptions.ServiceUnavailable,
+                    ),
+                ),
+                default_timeout=60.0,
+                client_info=client_info,
+            ),
+            self.create_billing_account: gapic_v1.method_async.wrap_method(
+                self.create_billing_account,
+                default_timeout=60.0,
+                client_info=client_info,
+            ),
+            self.list_project_billing_info: gapic_v1.method_async.wrap_method(
+                self.list_project_billing_info,
+                default_retry=retries.Retry(
+                    initial=0.1,
+                    maximum=60.0,
+                    multiplier=1.3,
+                    predicate=self._retry_predicate(
+                        exceptions.DeadlineExceeded, exceptions.ServiceUnavailable,
+                    ),
+                ),
+                default_timeout=60.0,
+                client_info=client_info,
+            ),
+            self.get_project_billing_info: gapic_v1.method_async.wrap_method(
+                self.get_project_billing_info,
+                default_retry=retries.Retry(
+                    initial=0.1,
+                    maximum=60.0,
+                    multiplier=1.3,
+                    predicate=self._retry_predicate(
+                        exceptions.DeadlineExceeded, exceptions.ServiceUnavailable,
+                    ),
+                ),
+                default_timeout=60.0,
+                client_info=client_info,
+            ),
+            self.update_project_billing_info: gapic_v1.method_async.wrap_method(
+                self.update_project_billing_info,
+                default_retry=retries.Retry(
+                    initial=0.1,
+                    maximum=60.0,
+                    multiplier=1.3,
+                    predicate=self._retry_predicate(
+                        exceptions.DeadlineExceeded, exceptions.ServiceUnavailable,
+                    ),
+                ),
+                default_timeout=60.0,
+                client_info=client_info,
+            ),
+            self.get_iam_policy: gapic_v1.method_async.wrap_method(
+                self.get_iam_policy,
+                default_retry=retries.Retry(
+                    initial=0.1,
+                    maximum=60.0,
+                    multiplier=1.3,
+                    predicate=self._retry_predicate(
+                        exceptions.DeadlineExceeded, exceptions.ServiceUnavailable,
+                    ),
+                ),
+                default_timeout=60.0,
+                client_info=client_info,
+            ),
+            self.set_iam_policy: gapic_v1.method_async.wrap_method(
+                self.set_iam_policy,
+                default_retry=retries.Retry(
+                    initial=0.1,
+                    maximum=60.0,
+                    multiplier=1.3,
+                    predicate=self._retry_predicate(
+                        exceptions.DeadlineExceeded, exceptions.ServiceUnavailable,
+                    ),
+                ),
+                default_timeout=60.0,
+                client_info=client_info,
+            ),
+            self.test_iam_permissions: gapic_v1.method_async.wrap_method(
+                self.test_iam_permissions,
+                default_retry=retries.Retry(
+                    initial=0.1,
+                    maximum=60.0,
+                    multiplier=1.3,
+                    predicate=self._retry_predicate(
+                        exceptions.DeadlineExceeded, exceptions.ServiceUnavailable,
+                    ),
+                ),
+                default_timeout=60.0,
+                client_info=client_info,
+            ),
+        }
 
     @property
     def grpc_channel(self) -> aio.Channel:
@@ -244,6 +408,30 @@ class CloudBillingGrpcAsyncIOTransport(CloudBillingTransport):
         # Return the channel from cache.
         return self._grpc_channel
 
+    def connect(self) -> None:
+        """Start connecting the channel and refreshing the credentials.
+
+        Returns at once; the work goes on in the background. See
+        :meth:`warmup` to wait for it.
+        """
+        _warmup.start(self._warmup_channels, self._credentials)
+
+    async def warmup(self, timeout: Optional[float] = None) -> None:
+        """Connect the channel and refresh the credentials ahead of the first call.
+
+        Args:
+            timeout (Optional[float]): How long to wait, in seconds. ``None``
+                waits until the channel connects.
+
+        Raises:
+            google.api_core.exceptions.DeadlineExceeded: If the channel does
+                not connect, or the token is not fetched, within
+                ``timeout``.
+            google.auth.exceptions.RefreshError: If the credentials cannot
+                be refreshed.
+        """
+        await _warmup.warm_up_async(self._warmup_channels, self._credentials, timeout)
+
     @property
     def get_billing_account(
         self,
@@ -15,8 +15,12 @@
 # limitations under the License.
 #
 
-from .client import CloudCatalogClient
-from .async_client import CloudCatalogAsyncClient
+from google.cloud.billing_v1 import _lazy
+
+__getattr__, __dir__ = _lazy.attach(
+    __name__,
+    {"CloudCatalogClient": ".client", "CloudCatalogAsyncClient": ".async_client"},
+)
 
 __all__ = (
     "CloudCatalogClient",
@@ -19,7 +19,6 @@ from collections import OrderedDict
 import functools
 import re
 from typing import Dict, Sequence, Tuple, Type, Union
-import pkg_resources
 
 import google.api_core.client_options as ClientOptions  # type: ignore
 from google.api_core import exceptions  # type: ignore
@@ -28,6 +27,7 @@ from google.api_core import retry as retries  # type: ignore
 from google.auth import credentials  # type: ignore
 from google.oauth2 import service_account  # type: ignore
 
+from google.cloud.billing_v1.services import _compat
 from google.cloud.billing_v1.services.cloud_catalog import pagers
 from google.cloud.billing_v1.types import cloud_catalog
 
@@ -100,6 +100,7 @@ class CloudCatalogAsyncClient:
         transport: Union[str, CloudCatalogTransport] = "grpc_asyncio",
         client_options: ClientOptions = None,
         client_info: gapic_v1.client_info.ClientInfo = DEFAULT_CLIENT_INFO,
+        eager_connect: bool = False,
     ) -> None:
         """Instantiate the cloud catalog client.
 
@@ -128,6 +129,9 @@ class CloudCatalogAsyncClient:
                 not provided, the default SSL client certificate will be used if
                 present. If GOOGLE_API_USE_CLIENT_CERTIFICATE is "false" or not
                 set, no client certificate will be used.
+            eager_connect (bool): Start connecting to the service and
+                fetching a token in the background, so that the first
+                call does not wait for them. See :meth:`warmup`.
 
         Raises:
             google.auth.exceptions.MutualTlsChannelError: If mutual TLS transport
@@ -139,8 +143,28 @@ class CloudCatalogAsyncClient:
             transport=transport,
             client_options=client_options,
             client_info=client_info,
+            eager_connect=eager_connect,
         )
 
+    async def warmup(self, timeout: float = None) -> None:
+        """Connect to the service and fetch a token ahead of the first call.
+
+        In a cold-started process, call this during initialization, or pass
+        ``eager_connect=True`` to start the same work in the background.
+
+        Args:
+            timeout (float): How long to wait, in seconds. If ``None``,
+                wait until the channel connects.
+
+        Raises:
+            google.api_core.exceptions.DeadlineExceeded: If the channel
+                does not connect, or the token is not fetched, within
+                ``timeout``.
+            google.auth.exceptions.RefreshError: If the credentials cannot
+                be refreshed.
+        """
+        await self._client._transport.warmup(timeout)
+
     async def list_services(
         self,
         request: cloud_catalog.ListServicesRequest = None,
@@ -148,6 +172,7 @@ class CloudCatalogAsyncClient:
         retry: retries.Retry = gapic_v1.method.DEFAULT,
         timeout: float = None,
         metadata: Sequence[Tuple[str, str]] = (),
+        prefetch: int = 0,
     ) -> pagers.ListServicesAsyncPager:
         r"""Lists all public cloud services.
 
@@ -160,6 +185,9 @@ class CloudCatalogAsyncClient:
             timeout (float): The timeout for this request.
             metadata (Sequence[Tuple[str, str]]): Strings which should be
                 sent along with the request as metadata.
+            prefetch (int): The number of pages to fetch ahead in the
+                background while the current one is processed. ``0`` (the
+                default) fetches each page only once it is needed.
 
         Returns:
             ~.pagers.ListServicesAsyncPager:
@@ -175,11 +203,9 @@ class CloudCatalogAsyncClient:
 
         # Wrap the RPC method; this adds retry and timeout information,
         # and friendly error handling.
-        rpc = gapic_v1.method_async.wrap_method(
-            self._client._transport.list_services,
-            default_timeout=60.0,
-            client_info=DEFAULT_CLIENT_INFO,
-        )
+        rpc = self._client._transport._wrapped_methods[
+            self._client._transport.list_services
+        ]
 
         # Send the request.
         response = await rpc(request, retry=retry, timeout=timeout, metadata=metadata,)
@@ -187,7 +213,11 @@ class CloudCatalogAsyncClient:
         # This method is paged; wrap the response in a pager, which provides
         # an `__aiter__` convenience method.
         response = pagers.ListServicesAsyncPager(
-            method=rpc, request=request, response=response, metadata=metadata,
+            method=rpc,
+            request=request,
+            response=response,
+            metadata=metadata,
+            prefetch=prefetch,
         )
 
         # Done; return the response.
@@ -201,6 +231,7 @@ class CloudCatalogAsyncClient:
         retry: retries.Retry = gapic_v1.method.DEFAULT,
         timeout: float = None,
         metadata: Sequence[Tuple[str, str]] = (),
+        prefetch: int = 0,
     ) -> pagers.ListSkusAsyncPager:
         r"""Lists all publicly available SKUs for a given cloud
         service.
@@ -220,6 +251,9 @@ class CloudCatalogAsyncClient:
             timeout (float): The timeout for this request.
             metadata (Sequence[Tuple[str, str]]): Strings which should be
                 sent along with the request as metadata.
+            prefetch (int): The number of pages to fetch ahead in the
+                background while the current one is processed. ``0`` (the
+                default) fetches each page only once it is needed.
 
         Returns:
             ~.pagers.ListSkusAsyncPager:
@@ -249,11 +283,9 @@ class CloudCatalogAsyncClient:
 
         # Wrap the RPC method; this adds retry and timeout information,
         # and friendly error handling.
-        rpc = gapic_v1.method_async.wrap_method(
-            self._client._transport.list_skus,
-            default_timeout=60.0,
-            client_info=DEFAULT_CLIENT_INFO,
-        )
+        rpc = self._client._transport._wrapped_methods[
+            self._client._transport.list_skus
+        ]
 
         # Certain fields should be provided within the metadata header;
         # add these here.
@@ -267,19 +299,113 @@ class CloudCatalogAsyncClient:
         # This method is paged; wrap the response in a pager, which provides
         # an `__aiter__` convenience method.
         response = pagers.ListSkusAsyncPager(
-            method=rpc, request=request, response=response, metadata=metadata,
+            method=rpc,
+            request=request,
+            response=response,
+            metadata=metadata,
+            prefetch=prefetch,
         )
 
         # Done; return the response.
         return response
 
+    async def list_skus_raw(
+        self,
+        request: cloud_catalog.ListSkusRequest = None,
+        *,
+        parent: str = None,
+        retry: retries.Retry = gapic_v1.method.DEFAULT,
+        timeout: float = None,
+        metadata: Sequence[Tuple[str, str]] = (),
+        prefetch: int = 0,
+    ) -> pagers.ListSkusRawAsyncPager:
+        r"""Lists all publicly available SKUs for a given cloud
+        service, as raw protobuf messages.
+
+        This is :meth:`list_skus` without the proto-plus wrappers: pages
+        are parsed straight into the protobuf ``ListSkusResponse`` class
+        (``cloud_catalog.ListSkusResponse.pb()``), so iterating yields
+        protobuf ``Sku`` messages whose fields are read without
+        marshalling. Use it for bulk reads of the catalog.
 
-try:
-    DEFAULT_CLIENT_INFO = gapic_v1.client_info.ClientInfo(
-        gapic_version=pkg_resources.get_distribution("google-cloud-billing",).version,
-    )
-except pkg_resources.DistributionNotFound:
-    DEFAULT_CLIENT_INFO = gapic_v1.client_info.ClientInfo()
+        Args:
+            request (:class:`~.cloud_catalog.ListSkusRequest`):
+                The request object. Request message for `ListSkus`.
+            parent (:class:`str`):
+                Required. The name of the service.
+                Example: "services/DA34-426B-A397".
+                This corresponds to the ``parent`` field
+                on the ``request`` instance; if ``request`` is provided, this
+                should not be set.
+
+            retry (google.api_core.retry.Retry): Designation of what errors, if any,
+                should be retried.
+            timeout (float): The timeout for this request.
+            metadata (Sequence[Tuple[str, str]]): Strings which should be
+                sent along with the request as metadata.
+            prefetch (int): The number of pages to fetch ahead in the
+                background while the current one is processed. ``0`` (the
+                default) fetches each page only once it is needed.
+
+        Returns:
+            ~.pagers.ListSkusRawAsyncPager:
+                Response message for ``ListSkus``, whose pages are raw
+                protobuf ``ListSkusResponse`` messages.
+
+                Iterating over this object will yield protobuf ``Sku``
+                messages and resolve additional pages automatically.
+
+        """
+        # Create or coerce a protobuf request object.
+        # Sanity check: If we got a request object, we should *not* have
+        # gotten any keyword arguments that map to the request.
+        has_flattened_params = any([parent])
+        if request is not None and has_flattened_params:
+            raise ValueError(
+                "If the `request` argument is set, then none of "
+                "the individual field arguments should be set."
+            )
+
+        request = cloud_catalog.ListSkusRequest(request)
+
+        # If we have keyword arguments corresponding to fields on the
+        # request, apply these.
+
+        if parent is not None:
+            request.parent = parent
+
+        # Wrap the RPC method; this adds retry and timeout information,
+        # and friendly error handling.
+        rpc = self._client._transport._wrapped_methods[
+            self._client._transport.list_skus_raw
+        ]
+
+        # Certain fields should be provided within the metadata header;
+        # add these here.
+        metadata = tuple(metadata) + (
+            gapic_v1.routing_header.to_grpc_metadata((("parent", request.parent),)),
+        )
+
+        # Send the request.
+        response = await rpc(request, retry=retry, timeout=timeout, metadata=metadata,)
+
+        # This method is paged; wrap the response in a pager, which provides
+        # an `__aiter__` convenience method.
+        response = pagers.ListSkusRawAsyncPager(
+            method=rpc,
+            request=request,
+            response=response,
+            metadata=metadata,
+            prefetch=prefetch,
+        )
+
+        # Done; return the response.
+        return response
+
+
+DEFAULT_CLIENT_INFO = gapic_v1.client_info.ClientInfo(
+    gapic_version=_compat.gapic_version(),
+)
 
 
 __all__ = ("CloudCatalogAsyncClient",)
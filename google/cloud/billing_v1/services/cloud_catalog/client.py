@@ -16,11 +16,9 @@
 #
 
 from collections import OrderedDict
-from distutils import util
 import os
 import re
 from typing import Callable, Dict, Optional, Sequence, Tuple, Type, Union
-import pkg_resources
 
 from google.api_core import client_options as client_options_lib  # type: ignore
 from google.api_core import exceptions  # type: ignore
@@ -32,6 +30,7 @@ from google.auth.transport.grpc import SslCredentials  # type: ignore
 from google.auth.exceptions import MutualTLSChannelError  # type: ignore
 from google.oauth2 import service_account  # type: ignore
 
+from google.cloud.billing_v1.services import _compat
 from google.cloud.billing_v1.services.cloud_catalog import pagers
 from google.cloud.billing_v1.types import cloud_catalog
 
@@ -228,6 +227,7 @@ class CloudCatalogClient(metaclass=CloudCatalogClientMeta):
         transport: Union[str, CloudCatalogTransport, None] = None,
         client_options: Optional[client_options_lib.ClientOptions] = None,
         client_info: gapic_v1.client_info.ClientInfo = DEFAULT_CLIENT_INFO,
+        eager_connect: bool = False,
     ) -> None:
         """Instantiate the cloud catalog client.
 
@@ -261,6 +261,9 @@ class CloudCatalogClient(metaclass=CloudCatalogClientMeta):
                 API requests. If ``None``, then default info will be used.
                 Generally, you only need to set this if you're developing
                 your own client library.
+            eager_connect (bool): Start connecting to the service and
+                fetching a token in the background, so that the first
+                call does not wait for them. See :meth:`warmup`.
 
         Raises:
             google.auth.exceptions.MutualTLSChannelError: If mutual TLS transport
@@ -273,7 +276,7 @@ class CloudCatalogClient(metaclass=CloudCatalogClientMeta):
 
         # Create SSL credentials for mutual TLS if needed.
         use_client_cert = bool(
-            util.strtobool(os.getenv("GOOGLE_API_USE_CLIENT_CERTIFICATE", "false"))
+            _compat.strtobool(os.getenv("GOOGLE_API_USE_CLIENT_CERTIFICATE", "false"))
         )
 
         ssl_credentials = None
@@ -338,6 +341,28 @@ class CloudCatalogClient(metaclass=CloudCatalogClientMeta):
                 client_info=client_info,
             )
 
+        if eager_connect:
+            self._transport.connect()
+
+    def warmup(self, timeout: float = None) -> None:
+        """Connect to the service and fetch a token ahead of the first call.
+
+        In a cold-started process, call this during initialization, or pass
+        ``eager_connect=True`` to start the same work in the background.
+
+        Args:
+            timeout (float): How long to wait, in seconds. If ``None``,
+                wait until the channel connects.
+
+        Raises:
+            google.api_core.exceptions.DeadlineExceeded: If the channel
+                does not connect, or the token is not fetched, within
+                ``timeout``.
+            google.auth.exceptions.RefreshError: If the credentials cannot
+                be refreshed.
+        """
+        self._transport.warmup(timeout)
+
     def list_services(
         self,
         request: cloud_catalog.ListServicesRequest = None,
@@ -345,6 +370,7 @@ class CloudCatalogClient(metaclass=CloudCatalogClientMeta):
         retry: retries.Retry = gapic_v1.method.DEFAULT,
         timeout: float = None,
         metadata: Sequence[Tuple[str, str]] = (),
+        prefetch: int = 0,
     ) -> pagers.ListServicesPager:
         r"""Lists all public cloud services.
 
@@ -357,6 +383,9 @@ class CloudCatalogClient(metaclass=CloudCatalogClientMeta):
             timeout (float): The timeout for this request.
             metadata (Sequence[Tuple[str, str]]): Strings which should be
                 sent along with the request as metadata.
+            prefetch (int): The number of pages to fetch ahead in the
+                background while the current one is processed. ``0`` (the
+                default) fetches each page only once it is needed.
 
         Returns:
             ~.pagers.ListServicesPager:
@@ -385,7 +414,11 @@ class CloudCatalogClient(metaclass=CloudCatalogClientMeta):
         # This method is paged; wrap the response in a pager, which provides
         # an `__iter__` convenience method.
         response = pagers.ListServicesPager(
-            method=rpc, request=request, response=response, metadata=metadata,
+            method=rpc,
+            request=request,
+            response=response,
+            metadata=metadata,
+            prefetch=prefetch,
         )
 
         # Done; return the response.
@@ -399,6 +432,7 @@ class CloudCatalogClient(metaclass=CloudCatalogClientMeta):
         retry: retries.Retry = gapic_v1.method.DEFAULT,
         timeout: float = None,
         metadata: Sequence[Tuple[str, str]] = (),
+        prefetch: int = 0,
     ) -> pagers.ListSkusPager:
         r"""Lists all publicly available SKUs for a given cloud
         service.
@@ -418,6 +452,9 @@ class CloudCatalogClient(metaclass=CloudCatalogClientMeta):
             timeout (float): The timeout for this request.
             metadata (Sequence[Tuple[str, str]]): Strings which should be
                 sent along with the request as metadata.
+            prefetch (int): The number of pages to fetch ahead in the
+                background while the current one is processed. ``0`` (the
+                default) fetches each page only once it is needed.
 
         Returns:
             ~.pagers.ListSkusPager:
@@ -466,19 +503,116 @@ class CloudCatalogClient(metaclass=CloudCatalogClientMeta):
         # This method is paged; wrap the response in a pager, which provides
         # an `__iter__` convenience method.
         response = pagers.ListSkusPager(
-            method=rpc, request=request, response=response, metadata=metadata,
+            method=rpc,
+            request=request,
+            response=response,
+            metadata=metadata,
+            prefetch=prefetch,
         )
 
         # Done; return the response.
         return response
 
+    def list_skus_raw(
+        self,
+        request: cloud_catalog.ListSkusRequest = None,
+        *,
+        parent: str = None,
+        retry: retries.Retry = gapic_v1.method.DEFAULT,
+        timeout: float = None,
+        metadata: Sequence[Tuple[str, str]] = (),
+        prefetch: int = 0,
+    ) -> pagers.ListSkusRawPager:
+        r"""Lists all publicly available SKUs for a given cloud
+        service, as raw protobuf messages.
 
-try:
-    DEFAULT_CLIENT_INFO = gapic_v1.client_info.ClientInfo(
-        gapic_version=pkg_resources.get_distribution("google-cloud-billing",).version,
-    )
-except pkg_resources.DistributionNotFound:
-    DEFAULT_CLIENT_INFO = gapic_v1.client_info.ClientInfo()
+        This is :meth:`list_skus` without the proto-plus wrappers: pages
+        are parsed straight into the protobuf ``ListSkusResponse`` class
+        (``cloud_catalog.ListSkusResponse.pb()``), so iterating yields
+        protobuf ``Sku`` messages whose fields are read without
+        marshalling. Use it for bulk reads of the catalog.
+
+        Args:
+            request (:class:`~.cloud_catalog.ListSkusRequest`):
+                The request object. Request message for `ListSkus`.
+            parent (:class:`str`):
+                Required. The name of the service.
+                Example: "services/DA34-426B-A397".
+                This corresponds to the ``parent`` field
+                on the ``request`` instance; if ``request`` is provided, this
+                should not be set.
+
+            retry (google.api_core.retry.Retry): Designation of what errors, if any,
+                should be retried.
+            timeout (float): The timeout for this request.
+            metadata (Sequence[Tuple[str, str]]): Strings which should be
+                sent along with the request as metadata.
+            prefetch (int): The number of pages to fetch ahead in the
+                background while the current one is processed. ``0`` (the
+                default) fetches each page only once it is needed.
+
+        Returns:
+            ~.pagers.ListSkusRawPager:
+                Response message for ``ListSkus``, whose pages are raw
+                protobuf ``ListSkusResponse`` messages.
+
+                Iterating over this object will yield protobuf ``Sku``
+                messages and resolve additional pages automatically.
+
+        """
+        # Create or coerce a protobuf request object.
+        # Sanity check: If we got a request object, we should *not* have
+        # gotten any keyword arguments that map to the request.
+        has_flattened_params = any([parent])
+        if request is not None and has_flattened_params:
+            raise ValueError(
+                "If the `request` argument is set, then none of "
+                "the individual field arguments should be set."
+            )
+
+        # Minor optimization to avoid making a copy if the user passes
+        # in a cloud_catalog.ListSkusRequest.
+        # There's no risk of modifying the input as we've already verified
+        # there are no flattened fields.
+        if not isinstance(request, cloud_catalog.ListSkusRequest):
+            request = cloud_catalog.ListSkusRequest(request)
+
+            # If we have keyword arguments corresponding to fields on the
+            # request, apply these.
+
+            if parent is not None:
+                request.parent = parent
+
+        # Wrap the RPC method; this adds retry and timeout information,
+        # and friendly error handling.
+        rpc = self._transport._wrapped_methods[self._transport.list_skus_raw]
+
+        # Certain fields should be provided within the metadata header;
+        # add these here.
+        metadata = tuple(metadata) + (
+            gapic_v1.routing_header.to_grpc_metadata((("parent", request.parent),)),
+        )
+
+        # Send the request.
+        response = rpc(request, retry=retry, timeout=timeout, metadata=metadata,)
+
+        # This method is paged; wrap the response in a pager, which provides
+        # an `__iter__` convenience method.
+        response = pagers.ListSkusRawPager(
+            method=rpc,
+            request=request,
+            response=response,
+            metadata=metadata,
+            prefetch=prefetch,
+        )
+
+        # Done; return the response.
+        return response
+
+
+DEFAULT_CLIENT_INFO = gapic_v1.client_info.ClientInfo(
+    gapic_version=_compat.gapic_version(),
+)
 
 
 __all__ = ("CloudCatalogClient",)
@@ -15,9 +15,20 @@
 # limitations under the License.
 #
 
-from typing import Any, AsyncIterable, Awaitable, Callable, Iterable, Sequence, Tuple
-
+from typing import (
+    Any,
+    AsyncIterable,
+    Awaitable,
+    Callable,
+    Iterable,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from google.cloud.billing_v1.services import _prefetch
 from google.cloud.billing_v1.types import cloud_catalog
+from google.protobuf import message  # type: ignore
 
 
 class ListServicesPager:
@@ -44,7 +55,8 @@ class ListServicesPager:
         request: cloud_catalog.ListServicesRequest,
         response: cloud_catalog.ListServicesResponse,
         *,
-        metadata: Sequence[Tuple[str, str]] = ()
+        metadata: Sequence[Tuple[str, str]] = (),
+        prefetch: int = 0
     ):
         """Instantiate the pager.
 
@@ -57,18 +69,61 @@ class ListServicesPager:
                 The initial response object.
             metadata (Sequence[Tuple[str, str]]): Strings which should be
                 sent along with the request as metadata.
+            prefetch (int): The number of pages to fetch ahead in the
+                background while the current one is processed. ``0`` (the
+                default) fetches each page only once it is needed.
         """
         self._method = method
         self._request = cloud_catalog.ListServicesRequest(request)
         self._response = response
         self._metadata = metadata
+        self._prefetch = prefetch
 
     def __getattr__(self, name: str) -> Any:
         return getattr(self._response, name)
 
+    def checkpoint(
+        self, *, next_page: bool = False
+    ) -> Optional[cloud_catalog.ListServicesRequest]:
+        """Return a request that resumes the listing from this point.
+
+        Pass the returned request as ``request`` to ``list_services``
+        to continue where this pager left off, for example after a restart.
+        It can be stored with ``ListServicesRequest.serialize``.
+
+        Args:
+            next_page (bool): Whether the current page has been fully
+                processed. By default the checkpoint starts at the current
+                page, so that items not yet consumed are listed again.
+
+        Returns:
+            Optional[:class:`~.cloud_catalog.ListServicesRequest`]:
+                The request for the page to resume at, or ``None`` if
+                ``next_page`` is set and the current page is the last one.
+        """
+        request = cloud_catalog.ListServicesRequest(self._request)
+        if next_page:
+            if not self._response.next_page_token:
+                return None
+            request.page_token = self._response.next_page_token
+        return request
+
+    def _fetch_page(self, page_token: str) -> cloud_catalog.ListServicesResponse:
+        request = cloud_catalog.ListServicesRequest(self._request)
+        request.page_token = page_token
+        return self._method(request, metadata=self._metadata)
+
     @property
     def pages(self) -> Iterable[cloud_catalog.ListServicesResponse]:
         yield self._response
+        if self._prefetch:
+            for page in _prefetch.prefetch_pages(
+                self._response.next_page_token, self._fetch_page, self._prefetch
+            ):
+                self._request.page_token = self._response.next_page_token
+                self._response = page
+                yield page
+            return
         while self._response.next_page_token:
             self._request.page_token = self._response.next_page_token
             self._response = self._method(self._request, metadata=self._metadata)
@@ -106,7 +161,8 @@ class ListServicesAsyncPager:
         request: cloud_catalog.ListServicesRequest,
         response: cloud_catalog.ListServicesResponse,
         *,
-        metadata: Sequence[Tuple[str, str]] = ()
+        metadata: Sequence[Tuple[str, str]] = (),
+        prefetch: int = 0
     ):
         """Instantiate the pager.
 
@@ -119,18 +175,61 @@ class ListServicesAsyncPager:
                 The initial response object.
             metadata (Sequence[Tuple[str, str]]): Strings which should be
                 sent along with the request as metadata.
+            prefetch (int): The number of pages to fetch ahead in the
+                background while the current one is processed. ``0`` (the
+                default) fetches each page only once it is needed.
         """
         self._method = method
         self._request = cloud_catalog.ListServicesRequest(request)
         self._response = response
         self._metadata = metadata
+        self._prefetch = prefetch
 
     def __getattr__(self, name: str) -> Any:
         return getattr(self._response, name)
 
+    def checkpoint(
+        self, *, next_page: bool = False
+    ) -> Optional[cloud_catalog.ListServicesRequest]:
+        """Return a request that resumes the listing from this point.
+
+        Pass the returned request as ``request`` to ``list_services``
+        to continue where this pager left off, for example after a restart.
+        It can be stored with ``ListServicesRequest.serialize``.
+
+        Args:
+            next_page (bool): Whether the current page has been fully
+                processed. By default the checkpoint starts at the current
+                page, so that items not yet consumed are listed again.
+
+        Returns:
+            Optional[:class:`~.cloud_catalog.ListServicesRequest`]:
+                The request for the page to resume at, or ``None`` if
+                ``next_page`` is set and the current page is the last one.
+        """
+        request = cloud_catalog.ListServicesRequest(self._request)
+        if next_page:
+            if not self._response.next_page_token:
+                return None
+            request.page_token = self._response.next_page_token
+        return request
+
+    async def _fetch_page(self, page_token: str) -> cloud_catalog.ListServicesResponse:
+        request = cloud_catalog.ListServicesRequest(self._request)
+        request.page_token = page_token
+        return await self._method(request, metadata=self._metadata)
+
     @property
     async def pages(self) -> AsyncIterable[cloud_catalog.ListServicesResponse]:
         yield self._response
+        if self._prefetch:
+            async for page in _prefetch.prefetch_pages_async(
+                self._response.next_page_token, self._fetch_page, self._prefetch
+            ):
+                self._request.page_token = self._response.next_page_token
+                self._response = page
+                yield page
+            return
         while self._response.next_page_token:
             self._request.page_token = self._response.next_page_token
             self._response = await self._method(self._request, metadata=self._metadata)
@@ -172,7 +271,8 @@ class ListSkusPager:
         request: cloud_catalog.ListSkusRequest,
         response: cloud_catalog.ListSkusResponse,
         *,
-        metadata: Sequence[Tuple[str, str]] = ()
+        metadata: Sequence[Tuple[str, str]] = (),
+        prefetch: int = 0
     ):
         """Instantiate the pager.
 
@@ -185,18 +285,61 @@ class ListSkusPager:
                 The initial response object.
             metadata (Sequence[Tuple[str, str]]): Strings which should be
                 sent along with the request as metadata.
+            prefetch (int): The number of pages to fetch ahead in the
+                background while the current one is processed. ``0`` (the
+                default) fetches each page only once it is needed.
         """
         self._method = method
         self._request = cloud_catalog.ListSkusRequest(request)
         self._response = response
         self._metadata = metadata
+        self._prefetch = prefetch
 
     def __getattr__(self, name: str) -> Any:
         return getattr(self._response, name)
 
+    def checkpoint(
+        self, *, next_page: bool = False
+    ) -> Optional[cloud_catalog.ListSkusRequest]:
+        """Return a request that resumes the listing from this point.
+
+        Pass the returned request as ``request`` to ``list_skus``
+        to continue where this pager left off, for example after a restart.
+        It can be stored with ``ListSkusRequest.serialize``.
+
+        Args:
+            next_page (bool): Whether the current page has been fully
+                processed. By default the checkpoint starts at the current
+                page, so that items not yet consumed are listed again.
+
+        Returns:
+            Optional[:class:`~.cloud_catalog.ListSkusRequest`]:
+                The request for the page to resume at, or ``None`` if
+                ``next_page`` is set and the current page is the last one.
+        """
+        request = cloud_catalog.ListSkusRequest(self._request)
+        if next_page:
+            if not self._response.next_page_token:
+                return None
+            request.page_token = self._response.next_page_token
+        return request
+
+    def _fetch_page(self, page_token: str) -> cloud_catalog.ListSkusResponse:
+        request = cloud_catalog.ListSkusRequest(self._request)
+        request.page_token = page_token
+        return self._method(request, metadata=self._metadata)
+
     @property
     def pages(self) -> Iterable[cloud_catalog.ListSkusResponse]:
         yield self._response
+        if self._prefetch:
+            for page in _prefetch.prefetch_pages(
+                self._response.next_page_token, self._fetch_page, self._prefetch
+            ):
+                self._request.page_token = self._response.next_page_token
+                self._response = page
+                yield page
+            return
         while self._response.next_page_token:
             self._request.page_token = self._response.next_page_token
             self._response = self._method(self._request, metadata=self._metadata)
@@ -210,6 +353,50 @@ class ListSkusPager:
         return "{0}<{1!r}>".format(self.__class__.__name__, self._response)
 
 
+class ListSkusRawPager(ListSkusPager):
+    """A pager for iterating through ``list_skus_raw`` requests.
+
+    This is :class:`ListSkusPager` over raw protobuf responses: its pages
+    are ``cloud_catalog.ListSkusResponse.pb()`` messages, and iterating
+    yields protobuf ``Sku`` messages. Requests, including those returned
+    by :meth:`checkpoint`, are still :class:`~.cloud_catalog.ListSkusRequest`.
+    """
+
+    def __init__(
+        self,
+        method: Callable[..., message.Message],
+        request: cloud_catalog.ListSkusRequest,
+        response: message.Message,
+        *,
+        metadata: Sequence[Tuple[str, str]] = (),
+        prefetch: int = 0
+    ):
+        """Instantiate the pager.
+
+        Args:
+            method (Callable): The method that was originally called, and
+                which instantiated this pager.
+            request (:class:`~.cloud_catalog.ListSkusRequest`):
+                The initial request object.
+            response (google.protobuf.message.Message): The initial raw
+                ``ListSkusResponse``.
+            metadata (Sequence[Tuple[str, str]]): Strings which should be
+                sent along with the request as metadata.
+            prefetch (int): The number of pages to fetch ahead in the
+                background while the current one is processed.
+        """
+        super().__init__(
+            method, request, response, metadata=metadata, prefetch=prefetch
+        )
+
+    @property
+    def pages(self) -> Iterable[message.Message]:
+        return super().pages
+
+    def __iter__(self) -> Iterable[message.Message]:
+        return super().__iter__()
+
+
 class ListSkusAsyncPager:
     """A pager for iterating through ``list_skus`` requests.
 
@@ -234,7 +421,8 @@ class ListSkusAsyncPager:
         request: cloud_catalog.ListSkusRequest,
         response: cloud_catalog.ListSkusResponse,
         *,
-        metadata: Sequence[Tuple[str, str]] = ()
+        metadata: Sequence[Tuple[str, str]] = (),
+        prefetch: int = 0
     ):
         """Instantiate the pager.
 
@@ -247,18 +435,61 @@ class ListSkusAsyncPager:
                 The initial response object.
             metadata (Sequence[Tuple[str, str]]): Strings which should be
                 sent along with the request as metadata.
+            prefetch (int): The number of pages to fetch ahead in the
+                background while the current one is processed. ``0`` (the
+                default) fetches each page only once it is needed.
         """
         self._method = method
         self._request = cloud_catalog.ListSkusRequest(request)
         self._response = response
         self._metadata = metadata
+        self._prefetch = prefetch
 
     def __getattr__(self, name: str) -> Any:
         return getattr(self._response, name)
 
+    def checkpoint(
+        self, *, next_page: bool = False
+    ) -> Optional[cloud_catalog.ListSkusRequest]:
+        """Return a request that resumes the listing from this point.
+
+        Pass the returned request as ``request`` to ``list_skus``
+        to continue where this pager left off, for example after a restart.
+        It can be stored with ``ListSkusRequest.serialize``.
+
+        Args:
+            next_page (bool): Whether the current page has been fully
+                processed. By default the checkpoint starts at the current
+                page, so that items not yet consumed are listed again.
+
+        Returns:
+            Optional[:class:`~.cloud_catalog.ListSkusRequest`]:
+                The request for the page to resume at, or ``None`` if
+                ``next_page`` is set and the current page is the last one.
+        """
+        request = cloud_catalog.ListSkusRequest(self._request)
+        if next_page:
+            if not self._response.next_page_token:
+                return None
+            request.page_token = self._response.next_page_token
+        return request
+
+    async def _fetch_page(self, page_token: str) -> cloud_catalog.ListSkusResponse:
+        request = cloud_catalog.ListSkusRequest(self._request)
+        request.page_token = page_token
+        return await self._method(request, metadata=self._metadata)
+
     @property
     async def pages(self) -> AsyncIterable[cloud_catalog.ListSkusResponse]:
         yield self._response
+        if self._prefetch:
+            async for page in _prefetch.prefetch_pages_async(
+                self._response.next_page_token, self._fetch_page, self._prefetch
+            ):
+                self._request.page_token = self._response.next_page_token
+                self._response = page
+                yield page
+            return
         while self._response.next_page_token:
             self._request.page_token = self._response.next_page_token
             self._response = await self._method(self._request, metadata=self._metadata)
@@ -274,3 +505,48 @@ class ListSkusAsyncPager:
 
     def __repr__(self) -> str:
         return "{0}<{1!r}>".format(self.__class__.__name__, self._response)
+
+
+class ListSkusRawAsyncPager(ListSkusAsyncPager):
+    """A pager for iterating through ``list_skus_raw`` requests.
+
+    This is :class:`ListSkusAsyncPager` over raw protobuf responses: its
+    pages are ``cloud_catalog.ListSkusResponse.pb()`` messages, and
+    iterating yields protobuf ``Sku`` messages. Requests, including those
+    returned by :meth:`checkpoint`, are still
+    :class:`~.cloud_catalog.ListSkusRequest`.
+    """
+
+    def __init__(
+        self,
+        method: Callable[..., Awaitable[message.Message]],
+        request: cloud_catalog.ListSkusRequest,
+        response: message.Message,
+        *,
+        metadata: Sequence[Tuple[str, str]] = (),
+        prefetch: int = 0
+    ):
+        """Instantiate the pager.
+
+        Args:
+            method (Callable): The method that was originally called, and
+                which instantiated this pager.
+            request (:class:`~.cloud_catalog.ListSkusRequest`):
+                The initial request object.
+            response (google.protobuf.message.Message): The initial raw
+                ``ListSkusResponse``.
+            metadata (Sequence[Tuple[str, str]]): Strings which should be
+                sent along with the request as metadata.
+            prefetch (int): The number of pages to fetch ahead in the
+                background while the current one is processed.
+        """
+        super().__init__(
+            method, request, response, metadata=metadata, prefetch=prefetch
+        )
+
+    @property
+    def pages(self) -> AsyncIterable[message.Message]:
+        return super().pages
+
+    def __aiter__(self) -> AsyncIterable[message.Message]:
+        return super().__aiter__()
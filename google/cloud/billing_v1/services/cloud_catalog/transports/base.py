@@ -17,23 +17,21 @@
 
 import abc
 import typing
-import pkg_resources
 
 from google import auth  # type: ignore
 from google.api_core import exceptions  # type: ignore
 from google.api_core import gapic_v1  # type: ignore
 from google.api_core import retry as retries  # type: ignore
 from google.auth import credentials  # type: ignore
+from google.protobuf import message  # type: ignore
 
+from google.cloud.billing_v1.services import _compat
 from google.cloud.billing_v1.types import cloud_catalog
 
 
-try:
-    DEFAULT_CLIENT_INFO = gapic_v1.client_info.ClientInfo(
-        gapic_version=pkg_resources.get_distribution("google-cloud-billing",).version,
-    )
-except pkg_resources.DistributionNotFound:
-    DEFAULT_CLIENT_INFO = gapic_v1.client_info.ClientInfo()
+DEFAULT_CLIENT_INFO = gapic_v1.client_info.ClientInfo(
+    gapic_version=_compat.gapic_version(),
+)
 
 
 class CloudCatalogTransport(abc.ABC):
@@ -110,6 +108,9 @@ class CloudCatalogTransport(abc.ABC):
             self.list_skus: gapic_v1.method.wrap_method(
                 self.list_skus, default_timeout=60.0, client_info=client_info,
             ),
+            self.list_skus_raw: gapic_v1.method.wrap_method(
+                self.list_skus_raw, default_timeout=60.0, client_info=client_info,
+            ),
         }
 
     @property
@@ -136,5 +137,22 @@ class CloudCatalogTransport(abc.ABC):
     ]:
         raise NotImplementedError()
 
+    @property
+    def list_skus_raw(
+        self,
+    ) -> typing.Callable[
+        [cloud_catalog.ListSkusRequest],
+        typing.Union[message.Message, typing.Awaitable[message.Message]],
+    ]:
+        raise NotImplementedError()
+
+    def connect(self) -> None:
+        raise NotImplementedError()
+
+    def warmup(
+        self, timeout: typing.Optional[float] = None
+    ) -> typing.Union[None, typing.Awaitable[None]]:
+        raise NotImplementedError()
+
 
 __all__ = ("CloudCatalogTransport",)
@@ -23,9 +23,14 @@ from google.api_core import gapic_v1  # type: ignore
 from google import auth  # type: ignore
 from google.auth import credentials  # type: ignore
 from google.auth.transport.grpc import SslCredentials  # type: ignore
+from google.protobuf import message  # type: ignore
 
 import grpc  # type: ignore
 
+from google.cloud.billing_v1.circuit_breaker import CircuitBreaker
+from google.cloud.billing_v1.concurrency_limiter import AdaptiveConcurrencyLimiter
+from google.cloud.billing_v1.services import _channel_pool
+from google.cloud.billing_v1.services import _warmup
 from google.cloud.billing_v1.types import cloud_catalog
 
 from .base import CloudCatalogTransport, DEFAULT_CLIENT_INFO
@@ -61,6 +66,10 @@ class CloudCatalogGrpcTransport(CloudCatalogTransport):
         ssl_channel_credentials: grpc.ChannelCredentials = None,
         quota_project_id: Optional[str] = None,
         client_info: gapic_v1.client_info.ClientInfo = DEFAULT_CLIENT_INFO,
+        channel_pool_size: int = 1,
+        concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        eager_connect: bool = False,
     ) -> None:
         """Instantiate the transport.
 
@@ -96,6 +105,18 @@ class CloudCatalogGrpcTransport(CloudCatalogTransport):
                 API requests. If ``None``, then default info will be used.
                 Generally, you only need to set this if you're developing
                 your own client library.
+            channel_pool_size (int): The number of channels, each with its
+                own connection, to spread calls over. Calls go to the
+                channel with the fewest calls in flight. This argument is
+                ignored if ``channel`` is provided.
+            concurrency_limiter (Optional[~.AdaptiveConcurrencyLimiter]): Limits
+                the number of unary calls in flight on the channel, adapting
+                the limit to the load the service accepts.
+            circuit_breaker (Optional[~.CircuitBreaker]): Fails the calls
+                of a method at once while it keeps failing.
+            eager_connect (bool): Start connecting the channel and
+                fetching a token in the background, so that the first
+                call does not wait for them. See :meth:`warmup`.
 
         Raises:
           google.auth.exceptions.MutualTLSChannelError: If mutual TLS transport
@@ -141,7 +162,9 @@ class CloudCatalogGrpcTransport(CloudCatalogTransport):
                 ssl_credentials = SslCredentials().ssl_credentials
 
             # create a new channel. The provided one is ignored.
-            self._grpc_channel = type(self).create_channel(
+            self._grpc_channel = _channel_pool.create_channel_pool(
+                type(self).create_channel,
+                channel_pool_size,
                 host,
                 credentials=credentials,
                 credentials_file=credentials_file,
@@ -163,7 +186,9 @@ class CloudCatalogGrpcTransport(CloudCatalogTransport):
                 )
 
             # create a new channel. The provided one is ignored.
-            self._grpc_channel = type(self).create_channel(
+            self._grpc_channel = _channel_pool.create_channel_pool(
+                type(self).create_channel,
+                channel_pool_size,
                 host,
                 credentials=credentials,
                 credentials_file=credentials_file,
@@ -176,6 +201,12 @@ class CloudCatalogGrpcTransport(CloudCatalogTransport):
                 ],
             )
 
+        self._warmup_channels = _warmup.channels_of(self._grpc_channel)
+        if concurrency_limiter is not None:
+            self._grpc_channel = concurrency_limiter.limit_channel(self._grpc_channel)
+        if circuit_breaker is not None:
+            self._grpc_channel = circuit_breaker.protect_channel(self._grpc_channel)
+
         self._stubs = {}  # type: Dict[str, Callable]
 
         # Run the base constructor.
@@ -188,6 +219,9 @@ class CloudCatalogGrpcTransport(CloudCatalogTransport):
             client_info=client_info,
         )
 
+        if eager_connect:
+            self.connect()
+
     @classmethod
     def create_channel(
         cls,
@@ -239,6 +273,30 @@ class CloudCatalogGrpcTransport(CloudCatalogTransport):
         """
         return self._grpc_channel
 
+    def connect(self) -> None:
+        """Start connecting the channel and refreshing the credentials.
+
+        Returns at once; the work goes on in the background. See
+        :meth:`warmup` to wait for it.
+        """
+        _warmup.start(self._warmup_channels, self._credentials)
+
+    def warmup(self, timeout: Optional[float] = None) -> None:
+        """Connect the channel and refresh the credentials ahead of the first call.
+
+        Args:
+            timeout (Optional[float]): How long to wait, in seconds. ``None``
+                waits until the channel connects.
+
+        Raises:
+            google.api_core.exceptions.DeadlineExceeded: If the channel does
+                not connect, or the token is not fetched, within
+                ``timeout``.
+            google.auth.exceptions.RefreshError: If the credentials cannot
+                be refreshed.
+        """
+        _warmup.warm_up(self._warmup_channels, self._credentials, timeout)
+
     @property
     def list_services(
         self,
@@ -294,5 +352,29 @@ class CloudCatalogGrpcTransport(CloudCatalogTransport):
             )
         return self._stubs["list_skus"]
 
+    @property
+    def list_skus_raw(
+        self,
+    ) -> Callable[[cloud_catalog.ListSkusRequest], message.Message]:
+        r"""Return a callable for the list skus method, without proto-plus.
+
+        The same RPC as :attr:`list_skus`, but the response is parsed into
+        the raw protobuf ``ListSkusResponse`` rather than its proto-plus
+        wrapper, which spares bulk readers the per-field marshalling.
+
+        Returns:
+            Callable[[~.ListSkusRequest],
+                    ~.ListSkusResponse]:
+                A function that, when called, will call the underlying RPC
+                on the server.
+        """
+        if "list_skus_raw" not in self._stubs:
+            self._stubs["list_skus_raw"] = self.grpc_channel.unary_unary(
+                "/google.cloud.billing.v1.CloudCatalog/ListSkus",
+                request_serializer=cloud_catalog.ListSkusRequest.serialize,
+                response_deserializer=cloud_catalog.ListSkusResponse.pb().FromString,
+            )
+        return self._stubs["list_skus_raw"]
+
 
 __all__ = ("CloudCatalogGrpcTransport",)
@@ -23,10 +23,14 @@ from google.api_core import grpc_helpers_async  # type: ignore
 from google import auth  # type: ignore
 from google.auth import credentials  # type: ignore
 from google.auth.transport.grpc import SslCredentials  # type: ignore
+from google.protobuf import message  # type: ignore
 
 import grpc  # type: ignore
 from grpc.experimental import aio  # type: ignore
 
+from google.cloud.billing_v1.circuit_breaker import CircuitBreaker
+from google.cloud.billing_v1.concurrency_limiter import AdaptiveConcurrencyLimiter
+from google.cloud.billing_v1.services import _warmup
 from google.cloud.billing_v1.types import cloud_catalog
 
 from .base import CloudCatalogTransport, DEFAULT_CLIENT_INFO
@@ -49,7 +53,7 @@ class CloudCatalogGrpcAsyncIOTransport(CloudCatalogTransport):
     """
 
     _grpc_channel: aio.Channel
-    _stubs: Dict[str, Callable] = {}
+    _stubs: Dict[str, Callable]
 
     @classmethod
     def create_channel(
@@ -105,6 +109,9 @@ class CloudCatalogGrpcAsyncIOTransport(CloudCatalogTransport):
         ssl_channel_credentials: grpc.ChannelCredentials = None,
         quota_project_id=None,
         client_info: gapic_v1.client_info.ClientInfo = DEFAULT_CLIENT_INFO,
+        concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        eager_connect: bool = False,
     ) -> None:
         """Instantiate the transport.
 
@@ -141,6 +148,14 @@ class CloudCatalogGrpcAsyncIOTransport(CloudCatalogTransport):
                 API requests. If ``None``, then default info will be used.	
                 Generally, you only need to set this if you're developing	
                 your own client library.
+            concurrency_limiter (Optional[~.AdaptiveConcurrencyLimiter]): Limits
+                the number of unary calls in flight on the channel, adapting
+                the limit to the load the service accepts.
+            circuit_breaker (Optional[~.CircuitBreaker]): Fails the calls
+                of a method at once while it keeps failing.
+            eager_connect (bool): Start connecting the channel and
+                fetching a token in the background, so that the first
+                call does not wait for them. See :meth:`warmup`.
 
         Raises:
             google.auth.exceptions.MutualTlsChannelError: If mutual TLS transport
@@ -221,6 +236,14 @@ class CloudCatalogGrpcAsyncIOTransport(CloudCatalogTransport):
                 ],
             )
 
+        self._warmup_channels = _warmup.channels_of(self._grpc_channel)
+        if concurrency_limiter is not None:
+            self._grpc_channel = concurrency_limiter.limit_channel(self._grpc_channel)
+        if circuit_breaker is not None:
+            self._grpc_channel = circuit_breaker.protect_channel(self._grpc_channel)
+
+        self._stubs = {}  # type: Dict[str, Callable]
+
         # Run the base constructor.
         super().__init__(
             host=host,
@@ -231,7 +254,23 @@ class CloudCatalogGrpcAsyncIOTransport(CloudCatalogTransport):
             client_info=client_info,
         )
 
-        self._stubs = {}
+        if eager_connect:
+            self.connect()
+
+    def _prep_wrapped_messages(self, client_info):
+        # Precompute the wrapped methods, using the asyncio-aware wrapper so
+        # that retries and error mapping work with awaitable stubs.
+        self._wrapped_methods = {
+            self.list_services: gapic_v1.method_async.wrap_method(
+                self.list_services, default_timeout=60.0, client_info=client_info,
+            ),
+            self.list_skus: gapic_v1.method_async.wrap_method(
+                self.list_skus, default_timeout=60.0, client_info=client_info,
+            ),
+            self.list_skus_raw: gapic_v1.method_async.wrap_method(
+                self.list_skus_raw, default_timeout=60.0, client_info=client_info,
+            ),
+        }
 
     @property
     def grpc_channel(self) -> aio.Channel:
@@ -243,6 +282,30 @@ class CloudCatalogGrpcAsyncIOTransport(CloudCatalogTransport):
         # Return the channel from cache.
         return self._grpc_channel
 
+    def connect(self) -> None:
+        """Start connecting the channel and refreshing the credentials.
+
+        Returns at once; the work goes on in the background. See
+        :meth:`warmup` to wait for it.
+        """
+        _warmup.start(self._warmup_channels, self._credentials)
+
+    async def warmup(self, timeout: Optional[float] = None) -> None:
+        """Connect the channel and refresh the credentials ahead of the first call.
+
+        Args:
+            timeout (Optional[float]): How long to wait, in seconds. ``None``
+                waits until the channel connects.
+
+        Raises:
+            google.api_core.exceptions.DeadlineExceeded: If the channel does
+                not connect, or the token is not fetched, within
+                ``timeout``.
+            google.auth.exceptions.RefreshError: If the credentials cannot
+                be refreshed.
+        """
+        await _warmup.warm_up_async(self._warmup_channels, self._credentials, timeout)
+
     @property
     def list_services(
         self,
@@ -301,5 +364,29 @@ class CloudCatalogGrpcAsyncIOTransport(CloudCatalogTransport):
             )
         return self._stubs["list_skus"]
 
+    @property
+    def list_skus_raw(
+        self,
+    ) -> Callable[[cloud_catalog.ListSkusRequest], Awaitable[message.Message]]:
+        r"""Return a callable for the list skus method, without proto-plus.
+
+        The same RPC as :attr:`list_skus`, but the response is parsed into
+        the raw protobuf ``ListSkusResponse`` rather than its proto-plus
+        wrapper, which spares bulk readers the per-field marshalling.
+
+        Returns:
+            Callable[[~.ListSkusRequest],
+                    Awaitable[~.ListSkusResponse]]:
+                A function that, when called, will call the underlying RPC
+                on the server.
+        """
+        if "list_skus_raw" not in self._stubs:
+            self._stubs["list_skus_raw"] = self.grpc_channel.unary_unary(
+                "/google.cloud.billing.v1.CloudCatalog/ListSkus",
+                request_serializer=cloud_catalog.ListSkusRequest.serialize,
+                response_deserializer=cloud_catalog.ListSkusResponse.pb().FromString,
+            )
+        return self._stubs["list_skus_raw"]
+
 
 __all__ = ("CloudCatalogGrpcAsyncIOTransport",)
@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""One channel and one set of credentials for both billing services.
+
+``CloudBilling`` and ``CloudCatalog`` are served by the same host, with the
+same scopes, but each client opens its own channel and resolves its own
+credentials: a process that uses both keeps two connections and refreshes
+two tokens. :class:`SharedChannel` resolves the credentials once, opens one
+channel, or a :class:`~.ChannelPool`, and builds the clients of both
+services on it. :class:`SharedAsyncChannel` does the same for the asyncio
+clients.
+
+Example:
+    >>> shared = SharedChannel()
+    >>> billing = shared.billing_client()
+    >>> catalog = shared.catalog_client()
+    >>> shared.warmup()
+"""
+
+from typing import Optional, Sequence, Tuple
+
+from google import auth  # type: ignore
+from google.api_core import exceptions  # type: ignore
+from google.auth import credentials as ga_credentials  # type: ignore
+import grpc  # type: ignore
+
+from google.cloud.billing_v1.response_cache import ResponseCache
+from google.cloud.billing_v1.services import _channel_pool
+from google.cloud.billing_v1.services import _warmup
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingAsyncClient
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingClient
+from google.cloud.billing_v1.services.cloud_billing import transports as billing
+from google.cloud.billing_v1.services.cloud_catalog import CloudCatalogAsyncClient
+from google.cloud.billing_v1.services.cloud_catalog import CloudCatalogClient
+from google.cloud.billing_v1.services.cloud_catalog import transports as catalog
+from google.cloud.billing_v1.singleflight import Singleflight
+
+
+DEFAULT_HOST = "cloudbilling.googleapis.com"
+
+_OPTIONS = [
+    ("grpc.max_send_message_length", -1),
+    ("grpc.max_receive_message_length", -1),
+]
+
+
+class SharedChannel:
+    """A channel shared by a ``CloudBillingClient`` and a ``CloudCatalogClient``.
+
+    The clients' transports are given the channel, so their
+    ``client_options`` do not apply: the host, credentials and TLS settings
+    are the channel's. Each client still takes its own transport arguments,
+    such as a concurrency limiter or a circuit breaker.
+    """
+
+    _billing_client_class = CloudBillingClient
+    _billing_transport_class = billing.CloudBillingGrpcTransport
+    _catalog_client_class = CloudCatalogClient
+    _catalog_transport_class = catalog.CloudCatalogGrpcTransport
+
+    def __init__(
+        self,
+        *,
+        host: str = DEFAULT_HOST,
+        credentials: ga_credentials.Credentials = None,
+        credentials_file: str = None,
+        scopes: Optional[Sequence[str]] = None,
+        quota_project_id: Optional[str] = None,
+        ssl_credentials: grpc.ChannelCredentials = None,
+        channel_pool_size: int = 1,
+    ):
+        """Resolve the credentials and create the channel.
+
+        Args:
+            host (str): The host of both services.
+            credentials (Optional[google.auth.credentials.Credentials]): The
+                credentials. If none are given, they are loaded from
+                ``credentials_file``, or else from the environment.
+            credentials_file (Optional[str]): A file with credentials that
+                can be loaded with :func:`google.auth.load_credentials_from_file`.
+            scopes (Optional[Sequence[str]]): The scopes of the credentials.
+                Defaults to those of the services.
+            quota_project_id (Optional[str]): A project to use for quota
+                and billing.
+            ssl_credentials (Optional[grpc.ChannelCredentials]): The TLS
+                credentials of the channel, e.g. for mutual TLS.
+            channel_pool_size (int): The number of channels, each with its
+                own connection, to spread calls over.
+
+        Raises:
+            google.api_core.exceptions.DuplicateCredentialArgs: If both
+                ``credentials`` and ``credentials_file`` are given.
+            ValueError: If ``channel_pool_size`` is out of range.
+        """
+        if credentials and credentials_file:
+            raise exceptions.DuplicateCredentialArgs(
+                "'credentials_file' and 'credentials' are mutually exclusive"
+            )
+        scopes = scopes or billing.CloudBillingTransport.AUTH_SCOPES
+        if credentials_file is not None:
+            credentials, _ = auth.load_credentials_from_file(
+                credentials_file, scopes=scopes, quota_project_id=quota_project_id
+            )
+        elif credentials is None:
+            credentials, _ = auth.default(
+                scopes=scopes, quota_project_id=quota_project_id
+            )
+        # Scope the credentials and set their quota project here, rather
+        # than have create_channel do it on a copy, so that the channel uses
+        # this very object, and the token it refreshes is the one
+        # :meth:`warmup` gets.
+        credentials = ga_credentials.with_scopes_if_required(credentials, scopes)
+        if quota_project_id and isinstance(
+            credentials, ga_credentials.CredentialsWithQuotaProject
+        ):
+            credentials = credentials.with_quota_project(quota_project_id)
+        self._credentials = credentials
+        self._host = host if ":" in host else host + ":443"
+        self._channel = self._create_channel(
+            self._host,
+            credentials=self._credentials,
+            ssl_credentials=ssl_credentials,
+            channel_pool_size=channel_pool_size,
+        )
+
+    def _create_channel(self, host: str, channel_pool_size: int, **kwargs):
+        return _channel_pool.create_channel_pool(
+            self._billing_transport_class.create_channel,
+            channel_pool_size,
+            host,
+            options=_OPTIONS,
+            **kwargs,
+        )
+
+    @property
+    def channel(self) -> grpc.Channel:
+        """grpc.Channel: The shared channel."""
+        return self._channel
+
+    @property
+    def credentials(self) -> ga_credentials.Credentials:
+        """google.auth.credentials.Credentials: The shared credentials."""
+        return self._credentials
+
+    def billing_client(
+        self,
+        *,
+        response_cache: Optional[ResponseCache] = None,
+        singleflight: Optional[Singleflight] = None,
+        **kwargs,
+    ) -> CloudBillingClient:
+        """Create a billing client on the shared channel.
+
+        Args:
+            response_cache (Optional[~.ResponseCache]): Passed to the client.
+            singleflight (Optional[~.Singleflight]): Passed to the client.
+            kwargs: Passed to the transport, e.g. ``retry_budget``.
+
+        Returns:
+            ~.CloudBillingClient: The client.
+        """
+        transport = self._billing_transport_class(channel=self._channel, **kwargs)
+        return self._billing_client_class(
+            transport=transport,
+            response_cache=response_cache,
+            singleflight=singleflight,
+        )
+
+    def catalog_client(self, **kwargs) -> CloudCatalogClient:
+        """Create a catalog client on the shared channel.
+
+        Args:
+            kwargs: Passed to the transport, e.g. ``circuit_breaker``.
+
+        Returns:
+            ~.CloudCatalogClient: The client.
+        """
+        transport = self._catalog_transport_class(channel=self._channel, **kwargs)
+        return self._catalog_client_class(transport=transport)
+
+    def clients(self) -> Tuple[CloudBillingClient, CloudCatalogClient]:
+        """Create a client of each service on the shared channel.
+
+        Returns:
+            Tuple[~.CloudBillingClient, ~.CloudCatalogClient]: The clients.
+        """
+        return self.billing_client(), self.catalog_client()
+
+    def connect(self) -> None:
+        """Start connecting the channel and refreshing the credentials.
+
+        Returns at once; the work goes on in the background.
+        """
+        _warmup.start(_warmup.channels_of(self._channel), self._credentials)
+
+    def warmup(self, timeout: Optional[float] = None) -> None:
+        """Connect the channel and refresh the credentials.
+
+        Args:
+            timeout (Optional[float]): How long to wait, in seconds. ``None``
+                waits until the channel connects.
+
+        Raises:
+            google.api_core.exceptions.DeadlineExceeded: If the channel does
+                not connect, or the token is not fetched, within
+                ``timeout``.
+            google.auth.exceptions.RefreshError: If the credentials cannot
+                be refreshed.
+        """
+        _warmup.warm_up(_warmup.channels_of(self._channel), self._credentials, timeout)
+
+    def close(self) -> None:
+        """Close the channel, and so the clients built on it."""
+        self._channel.close()
+
+    def __enter__(self) -> "SharedChannel":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def __repr__(self) -> str:
+        return "{0}<host={1!r}>".format(self.__class__.__name__, self._host)
+
+
+class SharedAsyncChannel(SharedChannel):
+    """A channel shared by the asyncio clients of both services.
+
+    Create it in the event loop the clients run in. The channel is not
+    pooled, so ``channel_pool_size`` must be 1.
+    """
+
+    _billing_client_class = CloudBillingAsyncClient
+    _billing_transport_class = billing.CloudBillingGrpcAsyncIOTransport
+    _catalog_client_class = CloudCatalogAsyncClient
+    _catalog_transport_class = catalog.CloudCatalogGrpcAsyncIOTransport
+
+    def _create_channel(self, host: str, channel_pool_size: int, **kwargs):
+        if channel_pool_size != 1:
+            raise ValueError("An asyncio channel cannot be pooled.")
+        return self._billing_transport_class.create_channel(
+            host, options=_OPTIONS, **kwargs
+        )
+
+    async def warmup(self, timeout: Optional[float] = None) -> None:
+        """Connect the channel and refresh the credentials.
+
+        Args:
+            timeout (Optional[float]): How long to wait, in seconds. ``None``
+                waits until the channel connects.
+
+        Raises:
+            google.api_core.exceptions.DeadlineExceeded: If the channel does
+                not connect, or the token is not fetched, within
+                ``timeout``.
+            google.auth.exceptions.RefreshError: If the credentials cannot
+                be refreshed.
+        """
+        await _warmup.warm_up_async([self._channel], self._credentials, timeout)
+
+    async def close(self) -> None:
+        """Close the channel, and so the clients built on it."""
+        await self._channel.close()
+
+    def __enter__(self):
+        raise TypeError("Use 'async with' with {}.".format(self.__class__.__name__))
+
+    async def __aenter__(self) -> "SharedAsyncChannel":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+__all__ = (
+    "DEFAULT_HOST",
+    "SharedAsyncChannel",
+    "SharedChannel",
+)
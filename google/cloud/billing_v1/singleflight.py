@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Coalescing of identical concurrent read requests.
+
+Passing a :class:`Singleflight` to ``CloudBillingClient`` or
+``CloudBillingAsyncClient`` makes ``get_billing_account``,
+``get_project_billing_info``, ``get_iam_policy`` and
+``test_iam_permissions`` share their RPCs: a call made while an identical
+one (same client, same method, same serialized request) is in flight
+waits for that call's result instead of sending its own request. Calls
+of different clients are never shared, as the clients may call as
+different principals.
+
+The ``retry``, ``timeout`` and ``metadata`` of the call that sends the
+request apply to every call sharing it.
+
+Example:
+    >>> client = CloudBillingAsyncClient(singleflight=Singleflight())
+    >>> accounts = await asyncio.gather(
+    ...     *[client.get_billing_account(name=name) for _ in range(100)]
+    ... )
+"""
+
+import asyncio
+import functools
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+import proto  # type: ignore
+from google.protobuf import message  # type: ignore
+
+
+def _request_key(scope: Hashable, method: str, request) -> Tuple[Hashable, str, bytes]:
+    if isinstance(request, proto.Message):
+        request = type(request).pb(request)
+    return scope, method, request.SerializeToString(deterministic=True)
+
+
+def _copy(response):
+    # Every caller gets its own response, so that none of them sees
+    # another's changes.
+    if isinstance(response, proto.Message):
+        return type(response)(response)
+    if isinstance(response, message.Message):
+        copy = type(response)()
+        copy.CopyFrom(response)
+        return copy
+    return response
+
+
+class _Call:
+    __slots__ = ("done", "response", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class Singleflight:
+    """Share one RPC among identical calls in flight at the same time.
+
+    The same instance serves threads (:meth:`call`) and a single event
+    loop (:meth:`call_async`), and may be shared by several clients; the
+    calls of each client are only shared among themselves.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}  # type: Dict[Hashable, _Call]
+        self._tasks = {}  # type: Dict[Hashable, asyncio.Future]
+        self.calls = 0
+        self.coalesced = 0
+
+    @property
+    def sent(self) -> int:
+        """int: The number of calls that sent their request."""
+        return self.calls - self.coalesced
+
+    def _count(self, coalesced: bool) -> None:
+        # Called with the lock held.
+        self.calls += 1
+        if coalesced:
+            self.coalesced += 1
+
+    def call(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """Call ``func``, unless a call with the same key is in flight.
+
+        Args:
+            key (Hashable): Identifies identical calls.
+            func (Callable[[], Any]): Sends the request and returns the
+                response message.
+
+        Returns:
+            A copy of the response of the call in flight, or of the
+            response of ``func``.
+
+        Raises:
+            Exception: Whatever the shared call raised.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            self._count(not leader)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return _copy(call.response)
+
+        try:
+            call.response = func()
+            # The shared response is only ever read: the leader may change
+            # what it gets while the others still copy it.
+            return _copy(call.response)
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def call_async(self, key: Hashable, func: Callable[[], Awaitable]) -> Any:
+        """Await ``func()``, unless a call with the same key is in flight.
+
+        The shared request runs in its own task, so cancelling one of the
+        calls sharing it does not cancel the others.
+
+        Args:
+            key (Hashable): Identifies identical calls.
+            func (Callable[[], Awaitable]): Sends the request and returns
+                the response message.
+
+        Returns:
+            A copy of the response of the call in flight, or of the
+            response of ``func``.
+
+        Raises:
+            Exception: Whatever the shared call raised.
+        """
+
+        async def send():
+            return await func()
+
+        with self._lock:
+            task = self._tasks.get(key)
+            leader = task is None
+            if leader:
+                task = self._tasks[key] = asyncio.ensure_future(send())
+                task.add_done_callback(functools.partial(self._forget, key))
+            self._count(not leader)
+
+        return _copy(await asyncio.shield(task))
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        with self._lock:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+        if not task.cancelled():
+            # Mark the exception retrieved, in case no caller awaits it.
+            task.exception()
+
+    def wrap(self, rpc: Callable, method: str, scope: Hashable = None) -> Callable:
+        """Coalesce the calls of a wrapped RPC by request.
+
+        Args:
+            rpc (Callable): A transport's wrapped method.
+            method (str): The RPC name, e.g. ``"GetBillingAccount"``.
+            scope (Hashable): Identifies the caller, typically the client.
+                Calls of different scopes are never coalesced.
+
+        Returns:
+            Callable: ``rpc`` with calls coalesced.
+        """
+
+        def call(request, **kwargs):
+            key = _request_key(scope, method, request)
+            return self.call(key, functools.partial(rpc, request, **kwargs))
+
+        return call
+
+    def wrap_async(
+        self, rpc: Callable, method: str, scope: Hashable = None
+    ) -> Callable:
+        """Coalesce the calls of a wrapped asyncio RPC by request.
+
+        Args:
+            rpc (Callable): A transport's wrapped asyncio method.
+            method (str): The RPC name, e.g. ``"GetBillingAccount"``.
+            scope (Hashable): Identifies the caller, typically the client.
+                Calls of different scopes are never coalesced.
+
+        Returns:
+            Callable: ``rpc`` with calls coalesced.
+        """
+
+        async def call(request, **kwargs):
+            key = _request_key(scope, method, request)
+            send = functools.partial(rpc, request, **kwargs)
+            return await self.call_async(key, send)
+
+        return call
+
+    def __repr__(self) -> str:
+        return "{0}<calls={1}, coalesced={2}>".format(
+            self.__class__.__name__, self.calls, self.coalesced,
+        )
+
+
+__all__ = ("Singleflight",)
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""An in-memory index of SKUs by region and category.
+
+Every SKU added to a :class:`SkuIndex` gets a dense integer id, and every
+value of every indexed dimension keeps a posting list of the ids that
+carry it. Queries turn the posting lists into bitsets, held as Python
+integers, and intersect them with ``&``; the cost of a query therefore
+depends on the size of the catalog in machine words, not on the number of
+SKUs scanned.
+"""
+
+import array
+import itertools
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from google.cloud.billing_v1.types import cloud_catalog
+
+
+#: The dimensions a :class:`SkuIndex` can be queried by.
+DIMENSIONS = (
+    "service",
+    "service_region",
+    "resource_family",
+    "resource_group",
+    "usage_type",
+)
+
+
+def _popcount(bits: int) -> int:
+    try:
+        return bits.bit_count()
+    except AttributeError:  # pragma: NO COVER
+        # int.bit_count() is new in Python 3.10.
+        return bin(bits).count("1")
+
+
+def _service_name(sku_name: str) -> str:
+    # "services/{service_id}/skus/{sku_id}" -> "services/{service_id}"
+    return sku_name.rpartition("/skus/")[0]
+
+
+class _Postings:
+    """The ids carrying one dimension value, with a cached bitset."""
+
+    __slots__ = ("ids", "_bits", "_bits_len")
+
+    def __init__(self):
+        self.ids = array.array("L")
+        self._bits = 0
+        self._bits_len = 0
+
+    def bits(self) -> int:
+        if self._bits_len < len(self.ids):
+            # Ids only ever grow, so only the ids added since the bitset
+            # was last built need to be folded in.
+            new_ids = self.ids[self._bits_len :]
+            offset = new_ids[0] // 8
+            buffer = bytearray(new_ids[-1] // 8 - offset + 1)
+            for sku_id in new_ids:
+                buffer[sku_id // 8 - offset] |= 1 << (sku_id % 8)
+            self._bits |= int.from_bytes(buffer, "little") << (offset * 8)
+            self._bits_len = len(self.ids)
+        return self._bits
+
+
+class SkuIndex:
+    """Look SKUs up by region and category without scanning the catalog.
+
+    The index can be filled incrementally, for example straight from a
+    crawl, and queried at any time in between. It is not thread-safe.
+
+    Example:
+        >>> index = SkuIndex()
+        >>> CatalogCrawler(CloudCatalogClient()).crawl(index.add)
+        >>> gpus = index.query(
+        ...     service_region="europe-west4",
+        ...     resource_group="GPU",
+        ...     usage_type="Preemptible",
+        ... )
+    """
+
+    def __init__(self, skus: Optional[Iterable[cloud_catalog.Sku]] = None):
+        """Instantiate the index.
+
+        Args:
+            skus (Optional[Iterable[:class:`~.cloud_catalog.Sku`]]): SKUs to
+                add straight away.
+        """
+        self._skus = []  # type: List[cloud_catalog.Sku]
+        self._ids_by_name = {}  # type: Dict[str, int]
+        self._postings = {
+            dimension: {} for dimension in DIMENSIONS
+        }  # type: Dict[str, Dict[str, _Postings]]
+        if skus is not None:
+            self.extend(skus)
+
+    def __len__(self) -> int:
+        return len(self._skus)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._ids_by_name
+
+    def _post(self, dimension: str, value: str, sku_id: int) -> None:
+        postings = self._postings[dimension].get(value)
+        if postings is None:
+            postings = self._postings[dimension][value] = _Postings()
+        postings.ids.append(sku_id)
+
+    def add(self, sku: cloud_catalog.Sku) -> bool:
+        """Add a SKU to the index.
+
+        Args:
+            sku (:class:`~.cloud_catalog.Sku`): The SKU to add.
+
+        Returns:
+            bool: ``False`` if a SKU with the same name was already indexed;
+            the index keeps the first one.
+        """
+        sku_pb = cloud_catalog.Sku.pb(sku)
+        if sku_pb.name in self._ids_by_name:
+            return False
+        sku_id = len(self._skus)
+        self._skus.append(sku)
+        self._ids_by_name[sku_pb.name] = sku_id
+
+        category = sku_pb.category
+        self._post("service", _service_name(sku_pb.name), sku_id)
+        for region in set(sku_pb.service_regions):
+            self._post("service_region", region, sku_id)
+        self._post("resource_family", category.resource_family, sku_id)
+        self._post("resource_group", category.resource_group, sku_id)
+        self._post("usage_type", category.usage_type, sku_id)
+        return True
+
+    def extend(self, skus: Iterable[cloud_catalog.Sku]) -> int:
+        """Add several SKUs to the index.
+
+        Returns:
+            int: The number of SKUs that were not already indexed.
+        """
+        return sum(self.add(sku) for sku in skus)
+
+    def values(self, dimension: str) -> List[str]:
+        """Return the distinct values of a dimension, sorted.
+
+        Raises:
+            ValueError: If ``dimension`` is not one of :data:`DIMENSIONS`.
+        """
+        if dimension not in self._postings:
+            raise ValueError("Unknown dimension: {!r}.".format(dimension))
+        return sorted(self._postings[dimension])
+
+    def _match(self, filters: Dict[str, Union[str, Iterable[str]]]) -> int:
+        match = (1 << len(self._skus)) - 1
+        for dimension, wanted in filters.items():
+            if dimension not in self._postings:
+                raise ValueError("Unknown dimension: {!r}.".format(dimension))
+            postings = self._postings[dimension]
+            if isinstance(wanted, str):
+                wanted = (wanted,)
+            bits = 0
+            for value in wanted:
+                if value in postings:
+                    bits |= postings[value].bits()
+            match &= bits
+        return match
+
+    def _ids(self, match: int) -> Iterator[int]:
+        data = match.to_bytes((match.bit_length() + 63) // 64 * 8, "little")
+        words = array.array("Q", data)
+        if sys.byteorder == "big":  # pragma: NO COVER
+            words.byteswap()
+        # ``compress`` skips the empty words of a sparse result in C, rather
+        # than stepping through every one of them in Python.
+        for position in itertools.compress(range(len(words)), words):
+            word = words[position]
+            base = position * 64
+            while word:
+                low = word & -word
+                yield base + low.bit_length() - 1
+                word ^= low
+
+    def query(self, **filters: Union[str, Iterable[str]]) -> List[cloud_catalog.Sku]:
+        """Return the SKUs matching every filter, in insertion order.
+
+        Each keyword names one of :data:`DIMENSIONS`. A string value must
+        match exactly; an iterable of strings matches any of them. With no
+        filters, every SKU is returned.
+
+        Args:
+            filters (Union[str, Iterable[str]]): The values to match, by
+                dimension. The empty string matches SKUs that leave the
+                field unset.
+
+        Returns:
+            List[:class:`~.cloud_catalog.Sku`]: The matching SKUs.
+
+        Raises:
+            ValueError: If a keyword is not one of :data:`DIMENSIONS`.
+        """
+        skus = self._skus
+        return [skus[sku_id] for sku_id in self._ids(self._match(filters))]
+
+    def count(self, **filters: Union[str, Iterable[str]]) -> int:
+        """Return the number of SKUs :meth:`query` would return."""
+        return _popcount(self._match(filters))
+
+    def __repr__(self) -> str:
+        return "{0}<skus={1}>".format(self.__class__.__name__, len(self._skus))
+
+
+__all__ = (
+    "DIMENSIONS",
+    "SkuIndex",
+)
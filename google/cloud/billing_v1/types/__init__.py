@@ -15,30 +15,62 @@
 # limitations under the License.
 #
 
-from .cloud_billing import (
-    BillingAccount,
-    ProjectBillingInfo,
-    GetBillingAccountRequest,
-    ListBillingAccountsRequest,
-    ListBillingAccountsResponse,
-    CreateBillingAccountRequest,
-    UpdateBillingAccountRequest,
-    ListProjectBillingInfoRequest,
-    ListProjectBillingInfoResponse,
-    GetProjectBillingInfoRequest,
-    UpdateProjectBillingInfoRequest,
-)
-from .cloud_catalog import (
-    Service,
-    Sku,
-    Category,
-    PricingInfo,
-    PricingExpression,
-    AggregationInfo,
-    ListServicesRequest,
-    ListServicesResponse,
-    ListSkusRequest,
-    ListSkusResponse,
+import typing
+
+from google.cloud.billing_v1 import _lazy
+
+if typing.TYPE_CHECKING:  # pragma: NO COVER
+    from .cloud_billing import (
+        BillingAccount,
+        ProjectBillingInfo,
+        GetBillingAccountRequest,
+        ListBillingAccountsRequest,
+        ListBillingAccountsResponse,
+        CreateBillingAccountRequest,
+        UpdateBillingAccountRequest,
+        ListProjectBillingInfoRequest,
+        ListProjectBillingInfoResponse,
+        GetProjectBillingInfoRequest,
+        UpdateProjectBillingInfoRequest,
+    )
+    from .cloud_catalog import (
+        Service,
+        Sku,
+        Category,
+        PricingInfo,
+        PricingExpression,
+        AggregationInfo,
+        ListServicesRequest,
+        ListServicesResponse,
+        ListSkusRequest,
+        ListSkusResponse,
+    )
+
+__getattr__, __dir__ = _lazy.attach(
+    __name__,
+    {
+        "BillingAccount": ".cloud_billing",
+        "ProjectBillingInfo": ".cloud_billing",
+        "GetBillingAccountRequest": ".cloud_billing",
+        "ListBillingAccountsRequest": ".cloud_billing",
+        "ListBillingAccountsResponse": ".cloud_billing",
+        "CreateBillingAccountRequest": ".cloud_billing",
+        "UpdateBillingAccountRequest": ".cloud_billing",
+        "ListProjectBillingInfoRequest": ".cloud_billing",
+        "ListProjectBillingInfoResponse": ".cloud_billing",
+        "GetProjectBillingInfoRequest": ".cloud_billing",
+        "UpdateProjectBillingInfoRequest": ".cloud_billing",
+        "Service": ".cloud_catalog",
+        "Sku": ".cloud_catalog",
+        "Category": ".cloud_catalog",
+        "PricingInfo": ".cloud_catalog",
+        "PricingExpression": ".cloud_catalog",
+        "AggregationInfo": ".cloud_catalog",
+        "ListServicesRequest": ".cloud_catalog",
+        "ListServicesResponse": ".cloud_catalog",
+        "ListSkusRequest": ".cloud_catalog",
+        "ListSkusResponse": ".cloud_catalog",
+    },
 )
 
 __all__ = (
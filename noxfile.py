@@ -24,7 +24,7 @@ import nox
 
 
 BLACK_VERSION = "black==19.10b0"
-BLACK_PATHS = ["docs", "google", "tests", "noxfile.py", "setup.py"]
+BLACK_PATHS = ["benchmarks", "docs", "google", "tests", "noxfile.py", "setup.py"]
 
 DEFAULT_PYTHON_VERSION = "3.8"
 SYSTEM_TEST_PYTHON_VERSIONS = ["3.8"]
@@ -75,7 +75,7 @@ def default(session):
     session.install(
         "mock", "pytest", "pytest-cov",
     )
-    session.install("-e", ".")
+    session.install("-e", ".[pricing]")
 
     # Run py.test against the unit tests.
     session.run(
@@ -98,6 +98,18 @@ def unit(session):
     default(session)
 
 
+@nox.session(python=DEFAULT_PYTHON_VERSION)
+def benchmark(session):
+    """Run the benchmark suite.
+
+    Prints the results as JSON. Arguments select benchmarks by name and
+    are passed on to the runner, e.g.
+    ``nox -s benchmark -- client --output results.json --compare base.json``.
+    """
+    session.install("-e", ".[pricing]")
+    session.run("python", os.path.join("benchmarks", "run.py"), *session.posargs)
+
+
 @nox.session(python=SYSTEM_TEST_PYTHON_VERSIONS)
 def system(session):
     """Run the system test suite."""
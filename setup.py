@@ -44,6 +44,7 @@ setuptools.setup(
         "grpc-google-iam-v1",
         "proto-plus >= 1.10.0",
     ),
+    extras_require={"pricing": ["numpy >= 1.14.0"]},
     python_requires=">=3.6",
     setup_requires=["libcst >= 0.2.5"],
     scripts=["scripts/fixup_keywords.py"],
@@ -31,16 +31,77 @@ library = gapic.py_library(
     bazel_target="//google/cloud/billing/v1:billing-v1-py",
 )
 
-excludes = ["setup.py", "docs/index.rst", "scripts/fixup_biling_v1_keywords.py"] 
+excludes = [
+    "setup.py",
+    "docs/index.rst",
+    "scripts/fixup_biling_v1_keywords.py",
+    # The package namespaces load their public names lazily instead of
+    # importing every client and type up front.
+    "google/cloud/billing/__init__.py",
+    "google/cloud/billing_v1/__init__.py",
+    "google/cloud/billing_v1/services/cloud_billing/__init__.py",
+    "google/cloud/billing_v1/services/cloud_catalog/__init__.py",
+    "google/cloud/billing_v1/types/__init__.py",
+    # The clients take the cache, coalescing, prefetch, bulk and warm-up
+    # options, and CloudCatalog has the raw list_skus method.
+    "google/cloud/billing_v1/services/cloud_billing/async_client.py",
+    "google/cloud/billing_v1/services/cloud_billing/client.py",
+    "google/cloud/billing_v1/services/cloud_catalog/async_client.py",
+    "google/cloud/billing_v1/services/cloud_catalog/client.py",
+    # The pagers prefetch pages and can be checkpointed and resumed.
+    "google/cloud/billing_v1/services/cloud_billing/pagers.py",
+    "google/cloud/billing_v1/services/cloud_catalog/pagers.py",
+    # The transports precompute the async wrapped methods and install the
+    # channel pool, concurrency limiter, retry budget, hedging and circuit
+    # breaker.
+    "google/cloud/billing_v1/services/cloud_billing/transports/base.py",
+    "google/cloud/billing_v1/services/cloud_billing/transports/grpc.py",
+    "google/cloud/billing_v1/services/cloud_billing/transports/grpc_asyncio.py",
+    "google/cloud/billing_v1/services/cloud_catalog/transports/base.py",
+    "google/cloud/billing_v1/services/cloud_catalog/transports/grpc.py",
+    "google/cloud/billing_v1/services/cloud_catalog/transports/grpc_asyncio.py",
+]
 s.move(library, excludes=excludes)
 
 # ----------------------------------------------------------------------------
 # Add templated files
 # ----------------------------------------------------------------------------
 templated_files = common.py_library(cov_level=99, microgenerator=True)
-s.move(templated_files, excludes=[".coveragerc"])  # the microgenerator has a good coveragerc file
+s.move(
+    templated_files,
+    excludes=[
+        ".coveragerc",  # the microgenerator has a good coveragerc file
+    ],
+)
 s.replace(".gitignore", "bigquery/docs/generated", "htmlcov")  # temporary hack to ignore htmlcov
 
+# The unit tests cover the optional numpy evaluator of the pricing helpers.
+s.replace(
+    "noxfile.py",
+    r"""("pytest-cov",\n    \)\n    session\.install\("-e", )"\."\)""",
+    r"""\g<1>".[pricing]")""",
+)
+
+# Blacken and run the benchmark suite.
+s.replace("noxfile.py", r"""BLACK_PATHS = \[""", r"""BLACK_PATHS = ["benchmarks", """)
+s.replace(
+    "noxfile.py",
+    r"""(\n\n@nox\.session\(python=SYSTEM_TEST_PYTHON_VERSIONS\)\ndef system)""",
+    r'''
+
+@nox.session(python=DEFAULT_PYTHON_VERSION)
+def benchmark(session):
+    """Run the benchmark suite.
+
+    Prints the results as JSON. Arguments select benchmarks by name and
+    are passed on to the runner, e.g.
+    ``nox -s benchmark -- client --output results.json --compare base.json``.
+    """
+    session.install("-e", ".[pricing]")
+    session.run("python", os.path.join("benchmarks", "run.py"), *session.posargs)
+\g<1>''',
+)
+
 
 
 s.shell.run(["nox", "-s", "blacken"], hide_output=False)
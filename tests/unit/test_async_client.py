@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import mock
+import pytest
+
+from google.api_core import gapic_v1
+from google.api_core import grpc_helpers_async
+from google.auth import credentials
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingAsyncClient
+from google.cloud.billing_v1.services.cloud_catalog import CloudCatalogAsyncClient
+from google.cloud.billing_v1.types import cloud_billing
+from google.cloud.billing_v1.types import cloud_catalog
+
+
+@pytest.mark.asyncio
+async def test_cloud_billing_async_client_reuses_wrapped_methods():
+    client = CloudBillingAsyncClient(credentials=credentials.AnonymousCredentials(),)
+    transport = client.transport
+    assert transport.get_project_billing_info in transport._wrapped_methods
+
+    # Calls should be dispatched through the precomputed table rather than
+    # wrapping the stub again on every invocation.
+    with mock.patch.object(
+        gapic_v1.method_async, "wrap_method"
+    ) as wrap, mock.patch.object(
+        type(transport.get_project_billing_info), "__call__"
+    ) as call:
+        call.return_value = grpc_helpers_async.FakeUnaryUnaryCall(
+            cloud_billing.ProjectBillingInfo()
+        )
+        await client.get_project_billing_info(name="name_value")
+        await client.get_project_billing_info(name="name_value")
+
+    wrap.assert_not_called()
+    assert call.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_cloud_catalog_async_client_reuses_wrapped_methods():
+    client = CloudCatalogAsyncClient(credentials=credentials.AnonymousCredentials(),)
+    transport = client.transport
+    assert transport.list_skus in transport._wrapped_methods
+
+    # Calls should be dispatched through the precomputed table rather than
+    # wrapping the stub again on every invocation.
+    with mock.patch.object(
+        gapic_v1.method_async, "wrap_method"
+    ) as wrap, mock.patch.object(type(transport.list_skus), "__call__") as call:
+        call.return_value = grpc_helpers_async.FakeUnaryUnaryCall(
+            cloud_catalog.ListSkusResponse()
+        )
+        await client.list_skus(parent="parent_value")
+        await client.list_skus(parent="parent_value")
+
+    wrap.assert_not_called()
+    assert call.call_count == 2
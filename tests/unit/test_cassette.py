@@ -0,0 +1,486 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import asyncio
+import time
+from unittest import mock
+
+import grpc
+from grpc.experimental import aio
+import pytest
+
+from google.api_core import exceptions
+from google.cloud.billing_v1.cassette import Cassette
+from google.cloud.billing_v1.cassette import Interaction
+from google.cloud.billing_v1.cassette import UnrecordedCallError
+from google.cloud.billing_v1.fake_server import FakeBillingServer
+from google.cloud.billing_v1.fake_server import SyntheticDataset
+from google.cloud.billing_v1.hedging import HedgingPolicy
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingAsyncClient
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingClient
+from google.cloud.billing_v1.services.cloud_billing import transports
+from google.cloud.billing_v1.services.cloud_catalog import CloudCatalogClient
+from google.cloud.billing_v1.types import cloud_billing
+from google.iam.v1 import policy_pb2
+from google.protobuf import message
+
+
+DATASET = SyntheticDataset(accounts=3, services=2, skus_per_service=30)
+METHOD = "/google.cloud.billing.v1.CloudBilling/GetBillingAccount"
+NAME = "billingAccounts/000001-000001-000001"
+
+
+def _recording_client(cassette, server, client_class):
+    transport_class = client_class.get_transport_class("grpc")
+    channel = cassette.record(grpc.insecure_channel(server.address))
+    return client_class(transport=transport_class(channel=channel))
+
+
+def _get_interaction(duration=0.0, **kwargs):
+    request = cloud_billing.GetBillingAccountRequest(name=NAME)
+    response = cloud_billing.BillingAccount(name=NAME, open_=True)
+    return Interaction(
+        METHOD,
+        cloud_billing.GetBillingAccountRequest.serialize(request),
+        cloud_billing.BillingAccount.serialize(response),
+        duration=duration,
+        **kwargs
+    )
+
+
+def _workload(billing, catalog):
+    accounts = list(billing.list_billing_accounts())
+    account = billing.get_billing_account(name=accounts[0].name)
+    skus = [
+        sku.sku_id
+        for service in catalog.list_services()
+        for sku in catalog.list_skus(parent=service.name)
+    ]
+    with pytest.raises(exceptions.NotFound):
+        billing.get_billing_account(name="billingAccounts/missing")
+    return accounts, account, skus
+
+
+def test_record_dump_and_replay(tmp_path):
+    path = str(tmp_path / "workload.cassette")
+    cassette = Cassette()
+    with FakeBillingServer(DATASET, page_size=10) as server:
+        expected = _workload(
+            _recording_client(cassette, server, CloudBillingClient),
+            _recording_client(cassette, server, CloudCatalogClient),
+        )
+    cassette.dump(path)
+
+    loaded = Cassette.load(path)
+    assert len(loaded) == len(cassette) == 10
+    for recorded, read in zip(cassette.interactions, loaded.interactions):
+        assert read.method == recorded.method
+        assert read.request == recorded.request
+        assert read.response == recorded.response
+        assert read.code == recorded.code
+        assert read.duration == recorded.duration
+    assert loaded.interactions[-1].code == grpc.StatusCode.NOT_FOUND
+    assert loaded.interactions[0].start == 0.0
+
+    replayed = _workload(
+        loaded.replay_client(CloudBillingClient),
+        loaded.replay_client(CloudCatalogClient),
+    )
+    assert replayed == expected
+
+
+def test_unrecorded_call():
+    client = Cassette([_get_interaction()]).replay_client(CloudBillingClient)
+
+    assert client.get_billing_account(name=NAME).open_
+    with pytest.raises(UnrecordedCallError):
+        client.get_billing_account(name=NAME)
+    with pytest.raises(UnrecordedCallError):
+        client.get_billing_account(name="billingAccounts/other")
+
+
+def test_repeat():
+    client = Cassette([_get_interaction()]).replay_client(
+        CloudBillingClient, repeat=True
+    )
+
+    for _ in range(3):
+        assert client.get_billing_account(name=NAME).name == NAME
+
+
+@pytest.mark.parametrize("speed,minimum,maximum", [(1, 0.2, 1.0), (10, 0.02, 0.15)])
+def test_speed(speed, minimum, maximum):
+    client = Cassette([_get_interaction(duration=0.2)]).replay_client(
+        CloudBillingClient, speed=speed
+    )
+
+    start = time.perf_counter()
+    client.get_billing_account(name=NAME)
+    assert minimum <= time.perf_counter() - start < maximum
+
+
+def test_invalid_speed():
+    with pytest.raises(ValueError):
+        Cassette().replay(speed=0)
+
+
+def test_replayed_deadline():
+    client = Cassette([_get_interaction(duration=5.0)]).replay_client(
+        CloudBillingClient, speed=1
+    )
+
+    start = time.perf_counter()
+    with pytest.raises(exceptions.DeadlineExceeded):
+        client.get_billing_account(name=NAME, retry=None, timeout=0.05)
+    assert time.perf_counter() - start < 1.0
+
+
+def test_replayed_error():
+    cassette = Cassette(
+        [
+            _get_interaction(code=grpc.StatusCode.UNAVAILABLE, details="Try again."),
+            _get_interaction(),
+        ]
+    )
+    client = cassette.replay_client(CloudBillingClient)
+
+    # The first answer is retried by the default retry settings.
+    assert client.get_billing_account(name=NAME).open_
+    with pytest.raises(exceptions.ServiceUnavailable, match="Try again."):
+        cassette.replay_client(CloudBillingClient).get_billing_account(
+            name=NAME, retry=None
+        )
+
+
+def test_replay_with_hedging():
+    # Hedging starts its attempts as futures.
+    policy = HedgingPolicy(delay=0.05, methods=[METHOD])
+    client = Cassette([_get_interaction(duration=0.01)]).replay_client(
+        CloudBillingClient, speed=1, hedging_policy=policy
+    )
+
+    assert client.get_billing_account(name=NAME).open_
+    assert policy.hedges_won == 0
+
+
+def test_replay_warmup():
+    client = Cassette().replay_client(CloudBillingClient)
+
+    client.warmup(timeout=1)
+
+
+def test_load_invalid(tmp_path):
+    path = tmp_path / "not.cassette"
+    path.write_bytes(b"not a cassette")
+
+    with pytest.raises(ValueError):
+        Cassette.load(str(path))
+
+    path.write_bytes(b"GCBCASv1\x01\x00\x00\x01")
+    with pytest.raises(ValueError):
+        Cassette.load(str(path))
+
+
+@pytest.mark.asyncio
+async def test_async_record_and_replay():
+    cassette = Cassette()
+    with FakeBillingServer(DATASET) as server:
+        transport = transports.CloudBillingGrpcAsyncIOTransport(
+            channel=cassette.record(aio.insecure_channel(server.address))
+        )
+        client = CloudBillingAsyncClient(transport=transport)
+        expected = await client.get_billing_account(name=NAME)
+        with pytest.raises(exceptions.NotFound):
+            await client.get_billing_account(name="billingAccounts/missing")
+
+    assert [interaction.code for interaction in cassette.interactions] == [
+        grpc.StatusCode.OK,
+        grpc.StatusCode.NOT_FOUND,
+    ]
+
+    client = cassette.replay_client(CloudBillingAsyncClient, speed=1)
+    assert await client.get_billing_account(name=NAME) == expected
+    with pytest.raises(exceptions.NotFound):
+        await client.get_billing_account(name="billingAccounts/missing")
+    with pytest.raises(UnrecordedCallError):
+        await client.get_billing_account(name=NAME)
+
+
+def test_replayed_response_that_does_not_parse():
+    interaction = _get_interaction()
+    interaction.response = b"\xff\xff"
+    client = Cassette([interaction]).replay_client(CloudBillingClient, speed=1)
+
+    # The call fails instead of never completing.
+    with pytest.raises(message.DecodeError):
+        client.get_billing_account(name=NAME, retry=None, timeout=5)
+
+
+def test_replay_future():
+    channel = Cassette(
+        [_get_interaction(), _get_interaction(code=grpc.StatusCode.NOT_FOUND)]
+    ).replay()
+    get = channel.unary_unary(METHOD)
+    request = cloud_billing.GetBillingAccountRequest.serialize(
+        cloud_billing.GetBillingAccountRequest(name=NAME)
+    )
+
+    response, call = get.with_call(request)
+    assert cloud_billing.BillingAccount.deserialize(response).open_
+    assert call.code() == grpc.StatusCode.OK
+    assert call.details() is None
+    assert call.traceback() is None
+    assert call.initial_metadata() == call.trailing_metadata() == ()
+    assert not call.is_active()
+    assert call.time_remaining() is None
+    called = []
+    assert call.add_callback(lambda: called.append(True))
+    assert called == [True]
+    assert not call.cancel()
+
+    failed = get.future(request)
+    assert failed.code() == grpc.StatusCode.NOT_FOUND
+    assert failed.details() == ""
+    assert failed.traceback() is not None
+    error = failed.exception()
+    assert error.initial_metadata() == error.trailing_metadata() == ()
+    assert not error.is_active()
+    assert error.time_remaining() is None
+    assert not error.cancel()
+    assert not error.add_callback(lambda: None)
+
+
+def test_replay_future_cancel():
+    channel = Cassette([_get_interaction(duration=5.0)]).replay(speed=1)
+    request = cloud_billing.GetBillingAccountRequest.serialize(
+        cloud_billing.GetBillingAccountRequest(name=NAME)
+    )
+
+    future = channel.unary_unary(METHOD).future(request)
+    assert future.is_active()
+    assert future.cancel()
+    assert future.code() == grpc.StatusCode.CANCELLED
+    assert future.details() == "Cancelled"
+    # The cancelled timer does not complete the call.
+    future._complete()
+    assert future.cancelled()
+
+
+def test_replay_channel():
+    with Cassette().replay() as channel:
+        states = []
+        channel.subscribe(states.append, try_to_connect=True)
+        channel.unsubscribe(states.append)
+        assert states == [grpc.ChannelConnectivity.READY]
+        for method in (
+            channel.unary_stream,
+            channel.stream_unary,
+            channel.stream_stream,
+        ):
+            with pytest.raises(NotImplementedError):
+                method(METHOD)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("speed", [None, 1])
+async def test_replay_aio_channel(speed):
+    request = cloud_billing.GetBillingAccountRequest.serialize(
+        cloud_billing.GetBillingAccountRequest(name=NAME)
+    )
+    async with Cassette([_get_interaction(duration=0.01)]).replay_async(
+        speed=speed
+    ) as channel:
+        assert channel.get_state() == grpc.ChannelConnectivity.READY
+        await channel.channel_ready()
+        for method in (
+            channel.unary_stream,
+            channel.stream_unary,
+            channel.stream_stream,
+        ):
+            with pytest.raises(NotImplementedError):
+                method(METHOD)
+
+        call = channel.unary_unary(METHOD)(request)
+        assert not call.cancel()
+        assert await call
+
+        waiting = asyncio.ensure_future(
+            channel.wait_for_state_change(grpc.ChannelConnectivity.READY)
+        )
+        await asyncio.sleep(0)
+        assert not waiting.done()
+        waiting.cancel()
+
+    # The replay forwards to a channel that is never connected.
+    async with channel._channel as offline:
+        assert offline.get_state() == grpc.ChannelConnectivity.READY
+
+
+@pytest.mark.asyncio
+async def test_replayed_deadline_async():
+    client = Cassette([_get_interaction(duration=5.0)]).replay_client(
+        CloudBillingAsyncClient, speed=1
+    )
+
+    with pytest.raises(exceptions.DeadlineExceeded):
+        await client.get_billing_account(name=NAME, retry=None, timeout=0.05)
+
+
+class _Future:
+    """A completed call, as returned by ``future`` on a channel."""
+
+    def __init__(self, response=None, error=None, cancelled=False):
+        self._response = response
+        self._error = error
+        self._cancelled = cancelled
+
+    def add_done_callback(self, callback):
+        callback(self)
+
+    def cancelled(self):
+        return self._cancelled
+
+    def exception(self):
+        return self._error
+
+    def result(self):
+        return self._response
+
+
+class _Error(grpc.RpcError):
+    def code(self):
+        return grpc.StatusCode.UNAVAILABLE
+
+    def details(self):
+        return None
+
+
+def test_record_channel():
+    channel = mock.Mock(spec=grpc.Channel)
+    callable_ = channel.unary_unary.return_value
+    callable_.with_call.side_effect = [(b"response", "call"), _Error()]
+    callable_.future.side_effect = [
+        _Future(b"response"),
+        _Future(error=_Error()),
+        _Future(cancelled=True),
+    ]
+    cassette = Cassette()
+
+    with cassette.record(channel) as recording:
+        get = recording.unary_unary(METHOD)
+        assert get.with_call(b"request") == (b"response", "call")
+        with pytest.raises(_Error):
+            get.with_call(b"request")
+        for _ in range(3):
+            get.future(b"request")
+
+        recording.unary_stream(METHOD)
+        recording.stream_unary(METHOD)
+        recording.stream_stream(METHOD)
+        recording.subscribe(print, try_to_connect=True)
+        recording.unsubscribe(print)
+
+    channel.subscribe.assert_called_once_with(print, try_to_connect=True)
+    channel.unsubscribe.assert_called_once_with(print)
+    channel.unary_stream.assert_called_once_with(METHOD)
+    channel.stream_unary.assert_called_once_with(METHOD)
+    channel.stream_stream.assert_called_once_with(METHOD)
+    channel.close.assert_called_once_with()
+    # The cancelled attempt is not recorded.
+    assert [interaction.code for interaction in cassette.interactions] == [
+        grpc.StatusCode.OK,
+        grpc.StatusCode.UNAVAILABLE,
+        grpc.StatusCode.OK,
+        grpc.StatusCode.UNAVAILABLE,
+    ]
+    assert cassette.interactions[1].details == ""
+
+
+@pytest.mark.asyncio
+async def test_record_aio_channel():
+    channel = mock.Mock(spec=aio.Channel)
+    channel.get_state.return_value = grpc.ChannelConnectivity.IDLE
+    channel.wait_for_state_change = mock.AsyncMock(return_value=None)
+    channel.channel_ready = mock.AsyncMock(return_value=None)
+    channel.close = mock.AsyncMock(return_value=None)
+    cassette = Cassette()
+
+    async with cassette.record(channel) as recording:
+        assert recording.get_state(True) == grpc.ChannelConnectivity.IDLE
+        await recording.wait_for_state_change(grpc.ChannelConnectivity.IDLE)
+        await recording.channel_ready()
+        recording.unary_stream(METHOD)
+        recording.stream_unary(METHOD)
+        recording.stream_stream(METHOD)
+        call = recording.unary_unary(METHOD)(b"request")
+        assert call.cancel() is channel.unary_unary.return_value.return_value.cancel()
+
+    channel.get_state.assert_called_once_with(True)
+    channel.channel_ready.assert_awaited_once_with()
+    channel.close.assert_awaited_once_with(None)
+    channel.unary_stream.assert_called_once_with(METHOD)
+    channel.stream_unary.assert_called_once_with(METHOD)
+    channel.stream_stream.assert_called_once_with(METHOD)
+
+
+def test_serialize():
+    policy = policy_pb2.Policy(version=3)
+    cassette = Cassette()
+    for response in (
+        cloud_billing.BillingAccount(name=NAME),
+        b"raw",
+        policy,
+    ):
+        cassette._add(METHOD, b"", cassette._start(), response)
+
+    assert [interaction.response for interaction in cassette.interactions] == [
+        cloud_billing.BillingAccount.serialize(cloud_billing.BillingAccount(name=NAME)),
+        b"raw",
+        policy.SerializeToString(),
+    ]
+    assert repr(cassette) == "Cassette<interactions=3>"
+    assert "GetBillingAccount" in repr(cassette.interactions[0])
+
+
+def test_dump_failure(tmp_path):
+    target = tmp_path / "directory"
+    target.mkdir()
+    (target / "occupied").write_bytes(b"")
+
+    with pytest.raises(OSError):
+        Cassette([_get_interaction()]).dump(str(target))
+    # The temporary file is removed.
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["directory"]
+
+
+def test_load_malformed(tmp_path):
+    path = tmp_path / "malformed.cassette"
+
+    # A record longer than the file.
+    path.write_bytes(b"GCBCASv1\x01\x00\x00\x00\x10{}")
+    with pytest.raises(ValueError, match="Truncated"):
+        Cassette.load(str(path))
+
+    # A request before any call.
+    path.write_bytes(b"GCBCASv1\x02\x00\x00\x00\x00")
+    with pytest.raises(ValueError, match="Malformed"):
+        Cassette.load(str(path))
+
+    # Records of unknown kinds are skipped.
+    Cassette([_get_interaction()]).dump(str(path))
+    path.write_bytes(path.read_bytes() + b"\x09\x00\x00\x00\x01x")
+    assert len(Cassette.load(str(path))) == 1
@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import asyncio
+import threading
+import time
+
+import mock
+import pytest
+
+from google.api_core import exceptions
+from google.api_core import grpc_helpers_async
+from google.auth import credentials
+from google.cloud.billing_v1 import catalog_crawler
+from google.cloud.billing_v1.services.cloud_catalog import CloudCatalogAsyncClient
+from google.cloud.billing_v1.services.cloud_catalog import CloudCatalogClient
+from google.cloud.billing_v1.types import cloud_catalog
+
+
+SERVICES = ["services/{}".format(i) for i in range(6)]
+
+
+def _respond(request):
+    if isinstance(request, cloud_catalog.ListServicesRequest):
+        return cloud_catalog.ListServicesResponse(
+            services=[cloud_catalog.Service(name=name) for name in SERVICES]
+        )
+    if request.parent == "services/broken":
+        raise exceptions.ServiceUnavailable("unavailable")
+    page = int(request.page_token or 0)
+    return cloud_catalog.ListSkusResponse(
+        skus=[
+            cloud_catalog.Sku(
+                name="{}/skus/{}".format(request.parent, page),
+                description=request.currency_code,
+            )
+        ],
+        next_page_token=str(page + 1) if page < 2 else "",
+    )
+
+
+class _Concurrency:
+    """Record how many calls are in flight at once."""
+
+    def __init__(self, delay=0.01):
+        self._lock = threading.Lock()
+        self._delay = delay
+        self.current = 0
+        self.peak = 0
+
+    def __call__(self, request, **kwargs):
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+        try:
+            time.sleep(self._delay)
+            return _respond(request)
+        finally:
+            with self._lock:
+                self.current -= 1
+
+
+def _make_client():
+    return CloudCatalogClient(credentials=credentials.AnonymousCredentials(),)
+
+
+def test_iter_skus_all_services():
+    client = _make_client()
+    crawler = catalog_crawler.CatalogCrawler(client, max_concurrency=3)
+    tracker = _Concurrency()
+
+    with mock.patch.object(
+        type(client.transport.list_skus), "__call__", side_effect=tracker
+    ):
+        names = [sku.name for sku in crawler.iter_skus()]
+
+    assert sorted(names) == sorted(
+        "{}/skus/{}".format(service, page) for service in SERVICES for page in range(3)
+    )
+    assert 1 < tracker.peak <= 3
+
+
+def test_iter_pages_preserves_per_service_order():
+    client = _make_client()
+    crawler = catalog_crawler.CatalogCrawler(client, max_concurrency=4)
+
+    with mock.patch.object(
+        type(client.transport.list_skus), "__call__", side_effect=_Concurrency()
+    ):
+        pages = list(crawler.iter_pages(SERVICES[:2]))
+
+    for service in SERVICES[:2]:
+        assert [p.skus[0].name for parent, p in pages if parent == service] == [
+            "{}/skus/{}".format(service, page) for page in range(3)
+        ]
+
+
+def test_request_template():
+    client = _make_client()
+    crawler = catalog_crawler.CatalogCrawler(client)
+    template = cloud_catalog.ListSkusRequest(
+        parent="ignored", currency_code="JPY", page_token="ignored"
+    )
+
+    with mock.patch.object(
+        type(client.transport.list_skus), "__call__", side_effect=_Concurrency(0)
+    ):
+        skus = list(crawler.iter_skus(["services/0"], request=template))
+
+    assert len(skus) == 3
+    assert {sku.description for sku in skus} == {"JPY"}
+    assert template.parent == "ignored"
+
+
+def test_iter_request_pages():
+    client = _make_client()
+    crawler = catalog_crawler.CatalogCrawler(client)
+    requests = [
+        cloud_catalog.ListSkusRequest(parent="services/0", currency_code=currency)
+        for currency in ("USD", "JPY")
+    ]
+
+    with mock.patch.object(
+        type(client.transport.list_skus), "__call__", side_effect=_Concurrency(0)
+    ):
+        pages = list(crawler.iter_request_pages(requests))
+
+    assert len(pages) == 6
+    for request, page in pages:
+        assert request in requests
+        assert page.skus[0].description == request.currency_code
+
+
+def test_crawl_callback():
+    client = _make_client()
+    crawler = catalog_crawler.CatalogCrawler(client)
+    seen = []
+
+    with mock.patch.object(
+        type(client.transport.list_skus), "__call__", side_effect=_Concurrency(0)
+    ):
+        count = crawler.crawl(seen.append, SERVICES[:2])
+
+    assert count == len(seen) == 6
+
+
+def test_no_services():
+    crawler = catalog_crawler.CatalogCrawler(_make_client())
+
+    assert list(crawler.iter_skus([])) == []
+
+
+def test_error_is_raised():
+    client = _make_client()
+    crawler = catalog_crawler.CatalogCrawler(client)
+
+    with mock.patch.object(
+        type(client.transport.list_skus), "__call__", side_effect=_Concurrency(0)
+    ):
+        with pytest.raises(exceptions.ServiceUnavailable):
+            list(crawler.iter_skus(["services/0", "services/broken"]))
+
+
+def test_early_exit_releases_workers():
+    client = _make_client()
+    crawler = catalog_crawler.CatalogCrawler(
+        client, max_concurrency=2, max_buffered_pages=1
+    )
+    tracker = _Concurrency(0)
+
+    with mock.patch.object(
+        type(client.transport.list_skus), "__call__", side_effect=tracker
+    ):
+        iterator = crawler.iter_skus()
+        next(iterator)
+        iterator.close()
+
+        # Workers blocked on the full buffer notice the consumer has gone.
+        deadline = time.time() + 5
+        while threading.active_count() > 1 and time.time() < deadline:
+            time.sleep(0.01)
+
+    assert tracker.current == 0
+
+
+def _fail_second_page(request, **kwargs):
+    if isinstance(request, cloud_catalog.ListSkusRequest) and request.page_token:
+        raise exceptions.InvalidArgument("bad page token")
+    return _respond(request)
+
+
+def test_error_mid_crawl():
+    client = _make_client()
+    crawler = catalog_crawler.CatalogCrawler(client, max_concurrency=1)
+    pages = []
+
+    with mock.patch.object(
+        type(client.transport.list_skus), "__call__", side_effect=_fail_second_page
+    ):
+        with pytest.raises(exceptions.InvalidArgument):
+            for page in crawler.iter_pages(SERVICES[:1]):
+                pages.append(page)
+
+    assert len(pages) == 1
+
+
+def test_workers_wait_for_a_slow_consumer():
+    client = _make_client()
+    crawler = catalog_crawler.CatalogCrawler(
+        client, max_concurrency=2, max_buffered_pages=1
+    )
+    names = []
+
+    with mock.patch.object(catalog_crawler, "_PUT_POLL_INTERVAL", 0.001):
+        with mock.patch.object(
+            type(client.transport.list_skus), "__call__", side_effect=_Concurrency(0)
+        ):
+            for sku in crawler.iter_skus(SERVICES[:2]):
+                # Keep the buffer full for several poll intervals.
+                time.sleep(0.02)
+                names.append(sku.name)
+
+    assert len(names) == 6
+
+
+def test_invalid_concurrency():
+    with pytest.raises(ValueError):
+        catalog_crawler.CatalogCrawler(_make_client(), max_concurrency=0)
+    with pytest.raises(ValueError):
+        catalog_crawler.AsyncCatalogCrawler(mock.Mock(), max_concurrency=0)
+
+
+def _async_respond(request, **kwargs):
+    return grpc_helpers_async.FakeUnaryUnaryCall(_respond(request))
+
+
+@pytest.mark.asyncio
+async def test_async_iter_skus_all_services():
+    client = CloudCatalogAsyncClient(credentials=credentials.AnonymousCredentials(),)
+    crawler = catalog_crawler.AsyncCatalogCrawler(client, max_concurrency=2)
+
+    with mock.patch.object(
+        type(client.transport.list_skus), "__call__", side_effect=_async_respond
+    ):
+        names = [sku.name async for sku in crawler.iter_skus()]
+
+    assert sorted(names) == sorted(
+        "{}/skus/{}".format(service, page) for service in SERVICES for page in range(3)
+    )
+
+
+@pytest.mark.asyncio
+async def test_async_crawl_callback():
+    client = CloudCatalogAsyncClient(credentials=credentials.AnonymousCredentials(),)
+    crawler = catalog_crawler.AsyncCatalogCrawler(client)
+    seen = []
+
+    async def callback(sku):
+        seen.append(sku)
+
+    with mock.patch.object(
+        type(client.transport.list_skus), "__call__", side_effect=_async_respond
+    ):
+        count = await crawler.crawl(callback, SERVICES[:2])
+        count += await crawler.crawl(seen.append, SERVICES[2:3])
+
+    assert count == len(seen) == 9
+
+
+@pytest.mark.asyncio
+async def test_async_no_services():
+    crawler = catalog_crawler.AsyncCatalogCrawler(mock.Mock())
+
+    assert [sku async for sku in crawler.iter_skus([])] == []
+
+
+@pytest.mark.asyncio
+async def test_async_error_is_raised():
+    client = CloudCatalogAsyncClient(credentials=credentials.AnonymousCredentials(),)
+    crawler = catalog_crawler.AsyncCatalogCrawler(client)
+
+    with mock.patch.object(
+        type(client.transport.list_skus), "__call__", side_effect=_async_respond
+    ):
+        with pytest.raises(exceptions.ServiceUnavailable):
+            async for _ in crawler.iter_skus(["services/0", "services/broken"]):
+                pass
+
+
+@pytest.mark.asyncio
+async def test_async_error_mid_crawl():
+    client = CloudCatalogAsyncClient(credentials=credentials.AnonymousCredentials(),)
+    crawler = catalog_crawler.AsyncCatalogCrawler(client, max_concurrency=1)
+    pages = []
+
+    def respond(request, **kwargs):
+        return grpc_helpers_async.FakeUnaryUnaryCall(_fail_second_page(request))
+
+    with mock.patch.object(
+        type(client.transport.list_skus), "__call__", side_effect=respond
+    ):
+        with pytest.raises(exceptions.InvalidArgument):
+            async for page in crawler.iter_pages(SERVICES[:1]):
+                pages.append(page)
+
+    assert len(pages) == 1
+
+
+@pytest.mark.asyncio
+async def test_async_early_exit_cancels_tasks():
+    client = CloudCatalogAsyncClient(credentials=credentials.AnonymousCredentials(),)
+    crawler = catalog_crawler.AsyncCatalogCrawler(
+        client, max_concurrency=2, max_buffered_pages=1
+    )
+
+    with mock.patch.object(
+        type(client.transport.list_skus), "__call__", side_effect=_async_respond
+    ):
+        iterator = crawler.iter_skus(SERVICES)
+        await iterator.__anext__()
+        # Let the tasks block on the full buffer before stopping.
+        await asyncio.sleep(0.01)
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        await iterator.aclose()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert all(task.cancelled() for task in tasks)
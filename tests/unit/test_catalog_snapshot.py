@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import datetime
+import os
+
+import mock
+import pytest
+
+from google.auth import credentials
+from google.cloud.billing_v1 import catalog_snapshot
+from google.cloud.billing_v1.services.cloud_catalog import CloudCatalogClient
+from google.cloud.billing_v1.types import cloud_catalog
+
+
+def _make_client():
+    return CloudCatalogClient(credentials=credentials.AnonymousCredentials(),)
+
+
+def _sku(service, sku_id):
+    return cloud_catalog.Sku(
+        name="{}/skus/{}".format(service, sku_id),
+        sku_id=sku_id,
+        category=cloud_catalog.Category(resource_family="Compute"),
+    )
+
+
+SERVICES = cloud_catalog.ListServicesResponse(
+    services=[
+        cloud_catalog.Service(name="services/one", service_id="one"),
+        cloud_catalog.Service(name="services/two", service_id="two"),
+    ],
+)
+
+
+def _call(request, **kwargs):
+    if isinstance(request, cloud_catalog.ListServicesRequest):
+        return SERVICES
+    # Two pages per service so that paging is exercised.
+    if not request.page_token:
+        return cloud_catalog.ListSkusResponse(
+            skus=[_sku(request.parent, "A"), _sku(request.parent, "B")],
+            next_page_token="next",
+        )
+    return cloud_catalog.ListSkusResponse(skus=[_sku(request.parent, "C")])
+
+
+def _fetch(client, **kwargs):
+    # Both RPCs share a stub class, so one patch serves them both.
+    with mock.patch.object(type(client.transport.list_skus), "__call__") as call:
+        call.side_effect = _call
+        snapshot = catalog_snapshot.CatalogSnapshot.fetch(client, **kwargs)
+    return snapshot, call
+
+
+def test_fetch():
+    snapshot, call = _fetch(_make_client(), currency_code="JPY")
+
+    assert [s.name for s in snapshot.services] == ["services/one", "services/two"]
+    assert [s.sku_id for s in snapshot.skus("services/one")] == ["A", "B", "C"]
+    assert len(list(snapshot.skus())) == 6
+    assert list(snapshot.skus("services/missing")) == []
+    assert call.call_count == 5
+    _, args, _ = call.mock_calls[1]
+    assert args[0].currency_code == "JPY"
+
+
+def test_fetch_restricted_services():
+    snapshot, call = _fetch(_make_client(), services=["services/two"])
+
+    assert [s.name for s in snapshot.services] == ["services/two"]
+    assert call.call_count == 3
+
+
+def test_restricted_snapshot_keeps_its_scope(tmpdir):
+    snapshot, _ = _fetch(_make_client(), services=["services/two", "services/x"])
+    path = str(tmpdir.join("catalog.bin"))
+
+    snapshot.dump(path)
+    loaded = catalog_snapshot.CatalogSnapshot.load(path)
+
+    assert loaded.scope == snapshot.scope == {"services/two", "services/x"}
+    assert _fetch(_make_client())[0].scope is None
+
+
+@pytest.mark.parametrize(
+    "saved,requested",
+    [
+        (["services/two"], None),
+        (None, ["services/two"]),
+        (["services/two"], ["services/one"]),
+    ],
+)
+def test_load_or_fetch_refetches_another_scope(tmpdir, saved, requested):
+    client = _make_client()
+    snapshot, _ = _fetch(client, services=saved)
+    path = str(tmpdir.join("catalog.bin"))
+    snapshot.dump(path)
+
+    with mock.patch.object(type(client.transport.list_skus), "__call__") as call:
+        call.side_effect = _call
+        loaded = catalog_snapshot.CatalogSnapshot.load_or_fetch(
+            path, client, services=requested
+        )
+
+    assert call.called
+    assert loaded.scope == (None if requested is None else set(requested))
+    assert catalog_snapshot.CatalogSnapshot.load(path).scope == loaded.scope
+
+
+def test_load_or_fetch_uses_snapshot_of_the_same_scope(tmpdir):
+    client = _make_client()
+    snapshot, _ = _fetch(client, services=["services/two", "services/one"])
+    path = str(tmpdir.join("catalog.bin"))
+    snapshot.dump(path)
+
+    with mock.patch.object(catalog_snapshot.CatalogSnapshot, "fetch") as fetch:
+        loaded = catalog_snapshot.CatalogSnapshot.load_or_fetch(
+            path, client, services=("services/one", "services/two")
+        )
+
+    fetch.assert_not_called()
+    assert len(list(loaded.skus())) == 6
+
+
+def test_dump_and_load_round_trip(tmpdir):
+    snapshot, _ = _fetch(_make_client(), currency_code="EUR")
+    path = str(tmpdir.join("catalog.bin"))
+
+    snapshot.dump(path)
+    loaded = catalog_snapshot.CatalogSnapshot.load(path)
+
+    assert loaded.currency_code == "EUR"
+    assert loaded.create_time == snapshot.create_time
+    assert list(loaded.services) == list(snapshot.services)
+    assert list(loaded.skus("services/two")) == list(snapshot.skus("services/two"))
+    assert os.listdir(str(tmpdir)) == ["catalog.bin"]
+
+
+def test_load_rejects_foreign_file(tmpdir):
+    path = tmpdir.join("catalog.bin")
+    path.write_binary(b"not a snapshot")
+
+    with pytest.raises(ValueError):
+        catalog_snapshot.CatalogSnapshot.load(str(path))
+
+
+def test_load_rejects_truncated_file(tmpdir):
+    snapshot, _ = _fetch(_make_client())
+    path = tmpdir.join("catalog.bin")
+    snapshot.dump(str(path))
+    path.write_binary(path.read_binary()[:-3])
+
+    with pytest.raises(ValueError):
+        catalog_snapshot.CatalogSnapshot.load(str(path))
+
+
+def test_load_malformed_records(tmpdir):
+    path = tmpdir.join("catalog.bin")
+
+    # A record cut off in its kind and length.
+    path.write_binary(b"GCBCATv1\x00\x00")
+    with pytest.raises(ValueError, match="Truncated"):
+        catalog_snapshot.CatalogSnapshot.load(str(path))
+
+    # No header.
+    path.write_binary(b"GCBCATv1\x01\x00\x00\x00\x00")
+    with pytest.raises(ValueError, match="no header"):
+        catalog_snapshot.CatalogSnapshot.load(str(path))
+
+
+def test_load_corrupt_payload(tmpdir):
+    snapshot, _ = _fetch(_make_client())
+    path = tmpdir.join("catalog.bin")
+    snapshot.dump(str(path))
+    data = bytearray(path.read_binary())
+    # Skip the magic and the header record, then flip the first payload
+    # byte of the services record that follows into an invalid tag.
+    offset = len(b"GCBCATv1")
+    offset += 5 + int.from_bytes(data[offset + 1 : offset + 5], "big")
+    assert data[offset] == 1
+    data[offset + 5] ^= 0xFF
+    path.write_binary(bytes(data))
+
+    with pytest.raises(ValueError, match="Corrupt"):
+        catalog_snapshot.CatalogSnapshot.load(str(path))
+
+
+@pytest.mark.parametrize(
+    "header", [b"{}", b"[]", b'{"create_time": "now"}', b"{", b"\xff"]
+)
+def test_load_corrupt_header(tmpdir, header):
+    path = tmpdir.join("catalog.bin")
+    path.write_binary(b"GCBCATv1\x00" + len(header).to_bytes(4, "big") + header)
+
+    with pytest.raises(ValueError, match="Corrupt"):
+        catalog_snapshot.CatalogSnapshot.load(str(path))
+
+
+def test_load_or_fetch_corrupt_file(tmpdir):
+    client = _make_client()
+    path = tmpdir.join("catalog.bin")
+    path.write_binary(b"GCBCATv1\x00\x00\x00\x00\x02{}")
+    refreshed = catalog_snapshot.CatalogSnapshot(
+        cloud_catalog.ListServicesResponse(), {}
+    )
+
+    with mock.patch.object(
+        catalog_snapshot.CatalogSnapshot, "fetch", return_value=refreshed
+    ) as fetch:
+        loaded = catalog_snapshot.CatalogSnapshot.load_or_fetch(str(path), client)
+
+    fetch.assert_called_once_with(client, currency_code="", services=None)
+    assert loaded is refreshed
+    catalog_snapshot.CatalogSnapshot.load(str(path))
+
+
+def test_load_skips_empty_pages_and_unknown_records(tmpdir):
+    snapshot = catalog_snapshot.CatalogSnapshot(
+        SERVICES, {"services/one": cloud_catalog.ListSkusResponse()}
+    )
+    path = tmpdir.join("catalog.bin")
+    snapshot.dump(str(path))
+    path.write_binary(path.read_binary() + b"\x09\x00\x00\x00\x01x")
+
+    loaded = catalog_snapshot.CatalogSnapshot.load(str(path))
+
+    assert len(loaded.services) == 2
+    assert list(loaded.skus()) == []
+
+
+def test_dump_failure_leaves_no_file(tmpdir):
+    snapshot, _ = _fetch(_make_client())
+    target = tmpdir.mkdir("directory")
+    target.join("occupied").write_binary(b"")
+
+    with pytest.raises(OSError):
+        snapshot.dump(str(target))
+    assert os.listdir(str(tmpdir)) == ["directory"]
+
+
+def test_is_fresh():
+    now = datetime.datetime(2020, 11, 1, 12, tzinfo=datetime.timezone.utc)
+    snapshot = catalog_snapshot.CatalogSnapshot(
+        cloud_catalog.ListServicesResponse(),
+        {},
+        create_time=now - datetime.timedelta(hours=11),
+    )
+
+    assert snapshot.is_fresh(now=now)
+    assert not snapshot.is_fresh(now=now + datetime.timedelta(hours=2))
+    assert snapshot.is_fresh(
+        max_age=datetime.timedelta(days=1), now=now + datetime.timedelta(hours=2)
+    )
+
+
+def test_load_or_fetch_uses_fresh_snapshot(tmpdir):
+    client = _make_client()
+    snapshot, _ = _fetch(client)
+    path = str(tmpdir.join("catalog.bin"))
+    snapshot.dump(path)
+
+    with mock.patch.object(catalog_snapshot.CatalogSnapshot, "fetch") as fetch:
+        loaded = catalog_snapshot.CatalogSnapshot.load_or_fetch(path, client)
+
+    fetch.assert_not_called()
+    assert len(list(loaded.skus())) == 6
+
+
+@pytest.mark.parametrize(
+    "age,currency_code",
+    [(datetime.timedelta(hours=13), ""), (datetime.timedelta(0), "JPY")],
+)
+def test_load_or_fetch_refreshes(tmpdir, age, currency_code):
+    client = _make_client()
+    snapshot, _ = _fetch(client)
+    snapshot.create_time -= age
+    path = str(tmpdir.join("catalog.bin"))
+    snapshot.dump(path)
+
+    refreshed = catalog_snapshot.CatalogSnapshot(
+        cloud_catalog.ListServicesResponse(), {}, currency_code=currency_code,
+    )
+    with mock.patch.object(
+        catalog_snapshot.CatalogSnapshot, "fetch", return_value=refreshed
+    ) as fetch:
+        loaded = catalog_snapshot.CatalogSnapshot.load_or_fetch(
+            path, client, currency_code=currency_code
+        )
+
+    fetch.assert_called_once_with(client, currency_code=currency_code, services=None)
+    assert loaded is refreshed
+    assert catalog_snapshot.CatalogSnapshot.load(path).currency_code == currency_code
+
+
+def test_load_or_fetch_missing_file(tmpdir):
+    client = _make_client()
+    path = str(tmpdir.join("catalog.bin"))
+    refreshed = catalog_snapshot.CatalogSnapshot(
+        cloud_catalog.ListServicesResponse(), {}
+    )
+
+    with mock.patch.object(
+        catalog_snapshot.CatalogSnapshot, "fetch", return_value=refreshed
+    ):
+        loaded = catalog_snapshot.CatalogSnapshot.load_or_fetch(path, client)
+
+    assert loaded is refreshed
+    assert os.path.exists(path)
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import concurrent.futures
+import threading
+
+import grpc
+import mock
+import pytest
+
+from google.auth import credentials
+from google.cloud.billing_v1.services import _channel_pool
+from google.cloud.billing_v1.services.cloud_billing import transports
+
+
+def _channels(count):
+    return [mock.Mock(spec=grpc.Channel) for _ in range(count)]
+
+
+def test_round_robin_when_idle():
+    channels = _channels(3)
+    pool = _channel_pool.ChannelPool(channels)
+    stub = pool.unary_unary("/Service/Method")
+
+    for _ in range(6):
+        stub("request", timeout=1)
+
+    for channel in channels:
+        callable_ = channel.unary_unary.return_value
+        assert callable_.call_count == 2
+        callable_.assert_called_with("request", timeout=1)
+    assert pool.in_flight == [0, 0, 0]
+
+
+def test_least_in_flight():
+    channels = _channels(2)
+    pool = _channel_pool.ChannelPool(channels)
+    stub = pool.unary_unary("/Service/Method")
+    started = threading.Event()
+    release = threading.Event()
+
+    def block(request, **kwargs):
+        started.set()
+        release.wait(5)
+
+    channels[0].unary_unary.return_value.side_effect = block
+    worker = threading.Thread(target=stub, args=("slow",))
+    worker.start()
+    assert started.wait(5)
+    assert pool.in_flight == [1, 0]
+
+    # Channel 0 is busy, so every call goes to channel 1 meanwhile.
+    for _ in range(3):
+        stub("fast")
+    release.set()
+    worker.join()
+
+    assert channels[1].unary_unary.return_value.call_count == 3
+    assert pool.in_flight == [0, 0]
+
+
+def test_release_on_error():
+    channels = _channels(1)
+    channels[0].unary_unary.return_value.side_effect = RuntimeError
+    pool = _channel_pool.ChannelPool(channels)
+
+    with pytest.raises(RuntimeError):
+        pool.unary_unary("/Service/Method")("request")
+
+    assert pool.in_flight == [0]
+
+
+def test_future_released_when_done():
+    channels = _channels(2)
+    pool = _channel_pool.ChannelPool(channels)
+    future = channels[0].unary_unary.return_value.future.return_value
+
+    assert pool.unary_unary("/Service/Method").future("request") is future
+    assert pool.in_flight == [1, 0]
+
+    (callback,), _ = future.add_done_callback.call_args
+    callback(future)
+    assert pool.in_flight == [0, 0]
+
+
+def test_with_call():
+    channels = _channels(2)
+    pool = _channel_pool.ChannelPool(channels)
+    stub = pool.unary_unary("/Service/Method")
+    channels[0].unary_unary.return_value.with_call.return_value = ("response", "call")
+    channels[1].unary_unary.return_value.with_call.side_effect = RuntimeError
+
+    assert stub.with_call("request", timeout=1) == ("response", "call")
+    with pytest.raises(RuntimeError):
+        stub.with_call("request")
+
+    assert pool.in_flight == [0, 0]
+
+
+def test_future_released_when_it_cannot_start():
+    channels = _channels(1)
+    channels[0].unary_unary.return_value.future.side_effect = RuntimeError
+    pool = _channel_pool.ChannelPool(channels)
+
+    with pytest.raises(RuntimeError):
+        pool.unary_unary("/Service/Method").future("request")
+
+    assert pool.in_flight == [0]
+
+
+def test_cancelled_future_released():
+    channels = _channels(1)
+    channels[
+        0
+    ].unary_unary.return_value.future.return_value = concurrent.futures.Future()
+    pool = _channel_pool.ChannelPool(channels)
+
+    future = pool.unary_unary("/Service/Method").future("request")
+    assert pool.in_flight == [1]
+    assert future.cancel()
+
+    assert pool.in_flight == [0]
+
+
+def test_streams_and_connectivity_use_the_first_channel():
+    channels = _channels(2)
+    pool = _channel_pool.ChannelPool(channels)
+
+    pool.unary_stream("/Service/Method")
+    pool.stream_unary("/Service/Method")
+    pool.stream_stream("/Service/Method")
+    pool.subscribe(print, try_to_connect=True)
+    pool.unsubscribe(print)
+
+    channels[0].unary_stream.assert_called_once_with("/Service/Method")
+    channels[0].stream_unary.assert_called_once_with("/Service/Method")
+    channels[0].stream_stream.assert_called_once_with("/Service/Method")
+    channels[0].subscribe.assert_called_once_with(print, try_to_connect=True)
+    channels[0].unsubscribe.assert_called_once_with(print)
+    assert not channels[1].method_calls
+    assert pool.channels == channels
+
+
+def test_close():
+    channels = _channels(2)
+
+    with _channel_pool.ChannelPool(channels):
+        pass
+
+    for channel in channels:
+        channel.close.assert_called_once_with()
+
+
+def test_create_channel_pool():
+    create_channel = mock.Mock()
+
+    single = _channel_pool.create_channel_pool(create_channel, 1, "host", options=[])
+    assert single is create_channel.return_value
+    create_channel.assert_called_once_with("host", options=[])
+
+    create_channel.reset_mock()
+    pool = _channel_pool.create_channel_pool(
+        create_channel, 3, "host", options=[("a", 1)]
+    )
+    assert len(pool.channels) == 3
+    create_channel.assert_called_with(
+        "host", options=[("a", 1), ("grpc.use_local_subchannel_pool", 1)]
+    )
+
+    with pytest.raises(ValueError):
+        _channel_pool.create_channel_pool(create_channel, 0, "host")
+    with pytest.raises(ValueError):
+        _channel_pool.ChannelPool([])
+
+
+def test_transport_channel_pool_size():
+    cred = credentials.AnonymousCredentials()
+    with mock.patch.object(
+        transports.CloudBillingGrpcTransport, "create_channel"
+    ) as create_channel:
+        transport = transports.CloudBillingGrpcTransport(
+            credentials=cred, channel_pool_size=4
+        )
+
+    assert isinstance(transport.grpc_channel, _channel_pool.ChannelPool)
+    assert create_channel.call_count == 4
+    _, kwargs = create_channel.call_args
+    assert ("grpc.use_local_subchannel_pool", 1) in kwargs["options"]
+    assert kwargs["credentials"] is cred
@@ -0,0 +1,450 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import grpc
+from grpc.experimental import aio
+import mock
+import pytest
+
+from google.api_core import exceptions
+from google.cloud.billing_v1.circuit_breaker import CircuitBreaker
+from google.cloud.billing_v1.circuit_breaker import CircuitOpenError
+from google.cloud.billing_v1.circuit_breaker import STATE_CLOSED
+from google.cloud.billing_v1.circuit_breaker import STATE_HALF_OPEN
+from google.cloud.billing_v1.circuit_breaker import STATE_OPEN
+from google.cloud.billing_v1.concurrency_limiter import AdaptiveConcurrencyLimiter
+from google.cloud.billing_v1.fake_server import FakeBillingServer
+from google.cloud.billing_v1.fake_server import SyntheticDataset
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingAsyncClient
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingClient
+from google.cloud.billing_v1.services.cloud_catalog import CloudCatalogAsyncClient
+from google.cloud.billing_v1.services.cloud_catalog import CloudCatalogClient
+
+
+METHOD = "/google.cloud.billing.v1.CloudBilling/GetBillingAccount"
+LIST_SERVICES = "/google.cloud.billing.v1.CloudCatalog/ListServices"
+LIST_BILLING_ACCOUNTS = "/google.cloud.billing.v1.CloudBilling/ListBillingAccounts"
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _fail(breaker, times, code=grpc.StatusCode.UNAVAILABLE):
+    for _ in range(times):
+        breaker.after_call(METHOD, code, breaker.before_call(METHOD))
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, timer=_Clock())
+
+    _fail(breaker, 2)
+    assert not breaker.before_call(METHOD)
+    breaker.after_call(METHOD, grpc.StatusCode.OK, False)
+    _fail(breaker, 2)
+    assert breaker.state(METHOD) == STATE_CLOSED
+
+    _fail(breaker, 1)
+    assert breaker.state(METHOD) == STATE_OPEN
+    with pytest.raises(CircuitOpenError) as exc_info:
+        breaker.before_call(METHOD)
+    assert exc_info.value.method == METHOD
+    assert exc_info.value.retry_after == 30
+    assert breaker.rejected == 1
+
+
+def test_other_errors_and_methods_do_not_count():
+    breaker = CircuitBreaker(failure_threshold=1, timer=_Clock())
+
+    _fail(breaker, 3, grpc.StatusCode.NOT_FOUND)
+    assert breaker.state(METHOD) == STATE_CLOSED
+
+    _fail(breaker, 1)
+    assert breaker.state(METHOD) == STATE_OPEN
+    assert breaker.state(LIST_SERVICES) == STATE_CLOSED
+    breaker.before_call(LIST_SERVICES)
+
+
+def test_half_open_probe_closes_circuit():
+    clock = _Clock()
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=10, timer=clock)
+    _fail(breaker, 1)
+
+    clock.now = 10
+    assert breaker.state(METHOD) == STATE_HALF_OPEN
+    assert breaker.before_call(METHOD)
+    # Only one probe is let through at a time.
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call(METHOD)
+
+    breaker.after_call(METHOD, grpc.StatusCode.OK, True)
+    assert breaker.state(METHOD) == STATE_CLOSED
+    assert not breaker.before_call(METHOD)
+
+
+def test_failed_probe_reopens_circuit():
+    clock = _Clock()
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=10, timer=clock)
+    _fail(breaker, 1)
+
+    clock.now = 15
+    _fail(breaker, 1)
+    assert breaker.state(METHOD) == STATE_OPEN
+    clock.now = 20
+    with pytest.raises(CircuitOpenError) as exc_info:
+        breaker.before_call(METHOD)
+    assert exc_info.value.retry_after == 5
+
+
+def test_cancelled_probe_frees_its_slot():
+    clock = _Clock()
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=10, timer=clock)
+    _fail(breaker, 1)
+
+    clock.now = 10
+    breaker.after_call(METHOD, None, breaker.before_call(METHOD))
+    assert breaker.state(METHOD) == STATE_HALF_OPEN
+    assert breaker.before_call(METHOD)
+
+
+@pytest.mark.parametrize("code", [grpc.StatusCode.OK, grpc.StatusCode.NOT_FOUND, None])
+def test_calls_sent_while_closed_are_not_probes(code):
+    clock = _Clock()
+    breaker = CircuitBreaker(
+        failure_threshold=1, cooldown=10, half_open_calls=2, timer=clock
+    )
+    in_flight = [breaker.before_call(METHOD) for _ in range(3)]
+    assert in_flight == [False] * 3
+    _fail(breaker, 1)
+
+    clock.now = 10
+    probes = [breaker.before_call(METHOD) for _ in range(2)]
+    assert probes == [True, True]
+    # The calls sent before the circuit opened neither free a probe slot
+    # nor close the circuit.
+    for probe in in_flight:
+        breaker.after_call(METHOD, code, probe)
+    assert breaker.state(METHOD) == STATE_HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call(METHOD)
+
+    breaker.after_call(METHOD, None, True)
+    assert breaker.before_call(METHOD)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call(METHOD)
+
+
+def test_probes_of_an_earlier_spell_count():
+    clock = _Clock()
+    breaker = CircuitBreaker(
+        failure_threshold=1, cooldown=10, half_open_calls=2, timer=clock
+    )
+    _fail(breaker, 1)
+
+    clock.now = 10
+    slow, failed = breaker.before_call(METHOD), breaker.before_call(METHOD)
+    breaker.after_call(METHOD, grpc.StatusCode.UNAVAILABLE, failed)
+    assert breaker.state(METHOD) == STATE_OPEN
+
+    clock.now = 20
+    assert breaker.before_call(METHOD)
+    # The slow probe still holds its slot.
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call(METHOD)
+    breaker.after_call(METHOD, None, slow)
+    assert breaker.before_call(METHOD)
+
+
+def test_open_error_is_not_retryable():
+    error = CircuitOpenError(METHOD, 1.0)
+
+    assert isinstance(error, exceptions.GoogleAPICallError)
+    assert not isinstance(error, exceptions.ServiceUnavailable)
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{"failure_threshold": 0}, {"cooldown": -1}, {"half_open_calls": 0}]
+)
+def test_invalid_arguments(kwargs):
+    with pytest.raises(ValueError):
+        CircuitBreaker(**kwargs)
+
+
+def test_transport():
+    clock = _Clock()
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=10, timer=clock)
+    dataset = SyntheticDataset(services=1)
+
+    with FakeBillingServer(dataset, error_rate=1.0) as server:
+        client = server.create_client(CloudCatalogClient, circuit_breaker=breaker)
+        for _ in range(2):
+            with pytest.raises(exceptions.ServiceUnavailable):
+                client.list_services()
+        with pytest.raises(CircuitOpenError):
+            client.list_services()
+    assert breaker.state(LIST_SERVICES) == STATE_OPEN
+
+    # The breaker may be shared: a client of a healthy server probes it.
+    clock.now = 10
+    with FakeBillingServer(dataset) as server:
+        client = server.create_client(CloudCatalogClient, circuit_breaker=breaker)
+        assert len(list(client.list_services())) == 1
+    assert breaker.state(LIST_SERVICES) == STATE_CLOSED
+
+
+@pytest.mark.asyncio
+async def test_async_transport():
+    breaker = CircuitBreaker(failure_threshold=1, timer=_Clock())
+
+    with FakeBillingServer(SyntheticDataset(services=1), error_rate=1.0) as server:
+        client = server.create_client(CloudCatalogAsyncClient, circuit_breaker=breaker)
+        with pytest.raises(exceptions.ServiceUnavailable):
+            await client.list_services()
+        with pytest.raises(CircuitOpenError):
+            await client.list_services()
+
+    assert breaker.rejected == 1
+
+
+def test_billing_transport_stops_retries():
+    breaker = CircuitBreaker(failure_threshold=1, timer=_Clock())
+
+    with FakeBillingServer(SyntheticDataset(accounts=1), error_rate=1.0) as server:
+        client = server.create_client(CloudBillingClient, circuit_breaker=breaker)
+        # The retry of the first failure finds the circuit open.
+        with pytest.raises(CircuitOpenError):
+            client.list_billing_accounts()
+
+    assert breaker.state(LIST_BILLING_ACCOUNTS) == STATE_OPEN
+    assert breaker.rejected == 1
+
+
+@pytest.mark.asyncio
+async def test_async_billing_transport():
+    breaker = CircuitBreaker(failure_threshold=1, timer=_Clock())
+
+    with FakeBillingServer(SyntheticDataset(accounts=1), error_rate=1.0) as server:
+        client = server.create_client(CloudBillingAsyncClient, circuit_breaker=breaker)
+        with pytest.raises(exceptions.ServiceUnavailable):
+            await client.list_billing_accounts()
+        with pytest.raises(CircuitOpenError):
+            await client.list_billing_accounts()
+
+    assert breaker.state(LIST_BILLING_ACCOUNTS) == STATE_OPEN
+    assert breaker.rejected == 1
+
+
+class _Error(grpc.RpcError):
+    def code(self):
+        return grpc.StatusCode.UNAVAILABLE
+
+
+def test_protected_channel():
+    breaker = CircuitBreaker(failure_threshold=2, timer=_Clock())
+    channel = mock.Mock(spec=grpc.Channel)
+    callable_ = channel.unary_unary.return_value
+    callable_.with_call.side_effect = [("response", "call"), _Error()]
+
+    with breaker.protect_channel(channel) as protected:
+        get = protected.unary_unary(METHOD)
+        assert get.with_call("request") == ("response", "call")
+        with pytest.raises(_Error):
+            get.with_call("request")
+        assert breaker.state(METHOD) == STATE_CLOSED
+
+        protected.unary_stream(METHOD)
+        protected.stream_unary(METHOD)
+        protected.stream_stream(METHOD)
+        protected.subscribe(print, try_to_connect=True)
+        protected.unsubscribe(print)
+
+    channel.unary_stream.assert_called_once_with(METHOD)
+    channel.stream_unary.assert_called_once_with(METHOD)
+    channel.stream_stream.assert_called_once_with(METHOD)
+    channel.subscribe.assert_called_once_with(print, try_to_connect=True)
+    channel.unsubscribe.assert_called_once_with(print)
+    channel.close.assert_called_once_with()
+
+
+def test_protected_future():
+    clock = _Clock()
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=10, timer=clock)
+    callable_ = mock.Mock()
+    get = breaker.protect_channel(mock.Mock(spec=grpc.Channel)).unary_unary(METHOD)
+    get._callable = callable_
+
+    failed = mock.Mock()
+    failed.cancelled.return_value = False
+    failed.code.return_value = grpc.StatusCode.UNAVAILABLE
+    failed.add_done_callback.side_effect = lambda callback: callback(failed)
+    callable_.future.return_value = failed
+    assert get.future("request") is failed
+    assert breaker.state(METHOD) == STATE_OPEN
+
+    # A probe that cannot be started frees its slot.
+    clock.now = 10
+    callable_.future.side_effect = ValueError()
+    with pytest.raises(ValueError):
+        get.future("request")
+
+    cancelled = mock.Mock()
+    cancelled.cancelled.return_value = True
+    cancelled.add_done_callback.side_effect = lambda callback: callback(cancelled)
+    callable_.future.side_effect = None
+    callable_.future.return_value = cancelled
+    get.future("request")
+    assert breaker.state(METHOD) == STATE_HALF_OPEN
+    assert breaker.before_call(METHOD)
+
+
+@pytest.mark.asyncio
+async def test_protected_aio_channel():
+    breaker = CircuitBreaker(failure_threshold=1, timer=_Clock())
+    channel = mock.Mock(spec=aio.Channel)
+    channel.get_state.return_value = grpc.ChannelConnectivity.READY
+    channel.wait_for_state_change = mock.AsyncMock(return_value=None)
+    channel.channel_ready = mock.AsyncMock(return_value=None)
+    channel.close = mock.AsyncMock(return_value=None)
+    channel.unary_unary.return_value.side_effect = ValueError()
+
+    async with breaker.protect_channel(channel) as protected:
+        assert protected.get_state(True) == grpc.ChannelConnectivity.READY
+        await protected.wait_for_state_change(grpc.ChannelConnectivity.IDLE)
+        await protected.channel_ready()
+        protected.unary_stream(METHOD)
+        protected.stream_unary(METHOD)
+        protected.stream_stream(METHOD)
+        with pytest.raises(ValueError):
+            await protected.unary_unary(METHOD)("request")
+
+        channel.unary_unary.return_value = mock.AsyncMock(return_value="response")
+        call = protected.unary_unary(METHOD)("request")
+        # The call is not sent until it is awaited.
+        assert not call.cancel()
+        assert await call == "response"
+        call._call = mock.Mock()
+        assert call.cancel() is call._call.cancel.return_value
+
+    channel.get_state.assert_called_once_with(True)
+    channel.wait_for_state_change.assert_awaited_once_with(
+        grpc.ChannelConnectivity.IDLE
+    )
+    channel.close.assert_awaited_once_with(None)
+    channel.unary_stream.assert_called_once_with(METHOD)
+    channel.stream_unary.assert_called_once_with(METHOD)
+    channel.stream_stream.assert_called_once_with(METHOD)
+    assert breaker.state(METHOD) == STATE_CLOSED
+
+
+def test_repr():
+    breaker = CircuitBreaker(failure_threshold=1, timer=_Clock())
+    _fail(breaker, 1)
+
+    assert repr(breaker) == "CircuitBreaker<open=['{}'], rejected=0>".format(METHOD)
+
+
+@pytest.mark.asyncio
+async def test_protected_aio_call():
+    breaker = CircuitBreaker(failure_threshold=2, timer=_Clock())
+    channel = mock.Mock(spec=aio.Channel)
+    channel.unary_unary.return_value = mock.AsyncMock(
+        side_effect=[_Error(), "response", _Error()]
+    )
+    get = breaker.protect_channel(channel).unary_unary(METHOD)
+
+    with pytest.raises(_Error):
+        await get("request")
+    # A success resets the count of consecutive failures.
+    assert await get("request") == "response"
+    with pytest.raises(_Error):
+        await get("request")
+
+    assert breaker.state(METHOD) == STATE_CLOSED
+
+
+@pytest.mark.asyncio
+async def test_never_awaited_aio_call_takes_no_probe_slot():
+    clock = _Clock()
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=10, timer=clock)
+    channel = mock.Mock(spec=aio.Channel)
+    channel.unary_unary.return_value = mock.AsyncMock(return_value="response")
+    get = breaker.protect_channel(channel).unary_unary(METHOD)
+    _fail(breaker, 1)
+
+    # Calls are rejected when awaited, and never sent.
+    clock.now = 5
+    get("request")
+    with pytest.raises(CircuitOpenError):
+        await get("request")
+    clock.now = 10
+    get("request")
+    channel.unary_unary.return_value.assert_not_called()
+
+    # The half open circuit still has its probe slot.
+    assert await get("request") == "response"
+    assert breaker.state(METHOD) == STATE_CLOSED
+
+
+class _DeadlineError(grpc.RpcError):
+    def code(self):
+        return grpc.StatusCode.DEADLINE_EXCEEDED
+
+
+def test_slot_timeouts_do_not_count():
+    breaker = CircuitBreaker(failure_threshold=1, timer=_Clock())
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+    channel = mock.Mock(spec=grpc.Channel)
+    get = breaker.protect_channel(limiter.limit_channel(channel)).unary_unary(METHOD)
+    started = limiter.acquire()
+
+    # Every slot is taken, so the calls time out before they are sent.
+    for call in (get, get.with_call):
+        with pytest.raises(grpc.RpcError) as exc_info:
+            call("request", timeout=0.01)
+        assert exc_info.value.code() == grpc.StatusCode.DEADLINE_EXCEEDED
+    assert get.future("request", timeout=0.01).code() == (
+        grpc.StatusCode.DEADLINE_EXCEEDED
+    )
+    assert breaker.state(METHOD) == STATE_CLOSED
+
+    # A deadline exceeded by the service still counts.
+    limiter.release(started, None)
+    channel.unary_unary.return_value.side_effect = _DeadlineError()
+    with pytest.raises(_DeadlineError):
+        get("request", timeout=0.01)
+    assert breaker.state(METHOD) == STATE_OPEN
+
+
+@pytest.mark.asyncio
+async def test_slot_timeouts_do_not_count_async():
+    breaker = CircuitBreaker(failure_threshold=1, timer=_Clock())
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+    channel = mock.Mock(spec=aio.Channel)
+    get = breaker.protect_channel(limiter.limit_channel(channel)).unary_unary(METHOD)
+    await limiter.acquire_async()
+
+    for _ in range(3):
+        with pytest.raises(grpc.RpcError) as exc_info:
+            await get("request", timeout=0.01)
+        assert exc_info.value.code() == grpc.StatusCode.DEADLINE_EXCEEDED
+
+    assert breaker.state(METHOD) == STATE_CLOSED
+    channel.unary_unary.return_value.assert_not_called()
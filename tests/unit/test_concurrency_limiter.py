@@ -0,0 +1,464 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+import grpc
+from grpc.experimental import aio
+import mock
+import pytest
+
+from google.api_core import exceptions
+from google.cloud.billing_v1.concurrency_limiter import AdaptiveConcurrencyLimiter
+from google.cloud.billing_v1.fake_server import FakeBillingServer
+from google.cloud.billing_v1.fake_server import SyntheticDataset
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingAsyncClient
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingClient
+from google.cloud.billing_v1.services.cloud_catalog import CloudCatalogAsyncClient
+
+
+OK = grpc.StatusCode.OK
+METHOD = "/google.cloud.billing.v1.CloudBilling/GetBillingAccount"
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class _Error(grpc.RpcError):
+    def code(self):
+        return grpc.StatusCode.INTERNAL
+
+
+class _AioCall:
+    def __init__(self, response=None, error=None):
+        self._response = response
+        self._error = error
+
+    def __await__(self):
+        if self._error:
+            raise self._error
+        return self._response
+        yield
+
+    def cancel(self):
+        return True
+
+
+def _fill(limiter, clock, latency=1.0, code=OK):
+    """Run a limit's worth of RPCs at once."""
+    slots = [limiter.acquire() for _ in range(limiter.limit)]
+    clock.now += latency
+    for started in slots:
+        limiter.release(started, code)
+
+
+def test_additive_increase():
+    clock = _Clock()
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, timer=clock)
+
+    _fill(limiter, clock)
+    assert limiter.limit == 4
+    _fill(limiter, clock)
+    _fill(limiter, clock)
+    assert limiter.limit == 5
+
+
+def test_no_increase_when_underused():
+    clock = _Clock()
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, timer=clock)
+
+    for _ in range(100):
+        started = limiter.acquire()
+        clock.now += 1
+        limiter.release(started, OK)
+
+    assert limiter.limit == 4
+
+
+def test_multiplicative_decrease_once_per_burst():
+    clock = _Clock()
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=16, timer=clock)
+
+    _fill(limiter, clock, code=grpc.StatusCode.RESOURCE_EXHAUSTED)
+    assert limiter.limit == 8
+    _fill(limiter, clock, code=grpc.StatusCode.UNAVAILABLE)
+    assert limiter.limit == 4
+
+
+def test_limit_bounds():
+    clock = _Clock()
+    limiter = AdaptiveConcurrencyLimiter(
+        initial_limit=2, min_limit=2, max_limit=3, timer=clock
+    )
+
+    for _ in range(10):
+        _fill(limiter, clock)
+    assert limiter.limit == 3
+    for _ in range(10):
+        _fill(limiter, clock, code=grpc.StatusCode.DEADLINE_EXCEEDED)
+    assert limiter.limit == 2
+
+
+def test_other_errors_are_ignored():
+    clock = _Clock()
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, timer=clock)
+
+    for _ in range(10):
+        _fill(limiter, clock, code=grpc.StatusCode.NOT_FOUND)
+        _fill(limiter, clock, code=None)
+
+    assert limiter.limit == 4
+    assert limiter.in_flight == 0
+
+
+def test_latency_inflation_decreases():
+    clock = _Clock()
+    limiter = AdaptiveConcurrencyLimiter(
+        initial_limit=8, latency_tolerance=2.0, timer=clock
+    )
+
+    _fill(limiter, clock, latency=1.0)
+    _fill(limiter, clock, latency=1.5)
+    assert limiter.limit == 8
+    _fill(limiter, clock, latency=3.0)
+    assert limiter.limit == 4
+
+    limiter = AdaptiveConcurrencyLimiter(
+        initial_limit=8, latency_tolerance=None, timer=clock
+    )
+    _fill(limiter, clock, latency=1.0)
+    _fill(limiter, clock, latency=3.0)
+    assert limiter.limit == 8
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"initial_limit": 0},
+        {"min_limit": 4, "initial_limit": 2},
+        {"max_limit": 4, "initial_limit": 8},
+        {"increase": 0},
+        {"backoff_ratio": 1},
+        {"latency_tolerance": 1},
+    ],
+)
+def test_invalid_arguments(kwargs):
+    with pytest.raises(ValueError):
+        AdaptiveConcurrencyLimiter(**kwargs)
+
+
+def test_acquire_blocks_at_the_limit():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+    started = limiter.acquire()
+    acquired = threading.Event()
+
+    with concurrent.futures.ThreadPoolExecutor(1) as executor:
+        future = executor.submit(lambda: limiter.acquire() and acquired.set())
+        assert not acquired.wait(0.05)
+        limiter.release(started, None)
+        future.result(5)
+
+    assert acquired.is_set()
+    assert limiter.in_flight == 1
+
+
+@pytest.mark.asyncio
+async def test_acquire_async():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+    started = await limiter.acquire_async()
+    cancelled = asyncio.ensure_future(limiter.acquire_async())
+    waiting = asyncio.ensure_future(limiter.acquire_async())
+    await asyncio.sleep(0)
+    assert not waiting.done()
+
+    cancelled.cancel()
+    limiter.release(started, None)
+    await asyncio.wait_for(waiting, 5)
+
+    assert limiter.in_flight == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_after_hand_over():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+    started = await limiter.acquire_async()
+    waiting = asyncio.ensure_future(limiter.acquire_async())
+    await asyncio.sleep(0)
+
+    limiter.release(started, None)
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    await asyncio.sleep(0)
+
+    assert limiter.in_flight == 0
+
+
+def test_transport_backs_off_when_throttled():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=16, latency_tolerance=None)
+
+    with FakeBillingServer(
+        SyntheticDataset(accounts=2, projects=4),
+        error_rate=0.5,
+        error_code=grpc.StatusCode.RESOURCE_EXHAUSTED,
+    ) as server:
+        client = server.create_client(CloudBillingClient, concurrency_limiter=limiter)
+        with concurrent.futures.ThreadPoolExecutor(16) as executor:
+            futures = [
+                executor.submit(
+                    client.get_project_billing_info,
+                    name="projects/project-{}".format(number % 4),
+                )
+                for number in range(64)
+            ]
+            errors = [future.exception() for future in futures]
+
+    assert any(isinstance(error, exceptions.ResourceExhausted) for error in errors)
+    assert limiter.limit < 16
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "client_class,method,field",
+    [
+        (CloudBillingAsyncClient, "list_billing_accounts", "billing_accounts"),
+        (CloudCatalogAsyncClient, "list_services", "services"),
+    ],
+)
+async def test_async_transport(client_class, method, field):
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, latency_tolerance=None)
+    dataset = SyntheticDataset(accounts=8, services=8, skus_per_service=1)
+
+    with FakeBillingServer(dataset) as server:
+        client = server.create_client(client_class, concurrency_limiter=limiter)
+        pagers = await asyncio.gather(*[getattr(client, method)() for _ in range(32)])
+
+    assert all(len(getattr(pager, field)) == 8 for pager in pagers)
+    assert limiter.limit > 2
+    assert limiter.in_flight == 0
+
+
+def test_acquire_timeout():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+    limiter.acquire()
+
+    assert limiter.acquire(timeout=0.01) is None
+    assert limiter.in_flight == 1
+
+
+@pytest.mark.asyncio
+async def test_acquire_async_timeout():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+    started = await limiter.acquire_async()
+
+    assert await limiter.acquire_async(timeout=0.01) is None
+    assert limiter.in_flight == 1
+    # The timed out waiter does not take the next free slot.
+    limiter.release(started, None)
+    assert await limiter.acquire_async(timeout=0) is not None
+
+
+def _full_channel(limiter):
+    """A limited channel over a mock, with every slot taken."""
+    channel = mock.Mock(spec=grpc.Channel)
+    for _ in range(limiter.limit):
+        limiter.acquire()
+    return channel, limiter.limit_channel(channel).unary_unary(METHOD)
+
+
+def test_queued_call_times_out():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+    channel, get = _full_channel(limiter)
+
+    with pytest.raises(grpc.RpcError) as exc_info:
+        get("request", timeout=0.01)
+    assert exc_info.value.code() == grpc.StatusCode.DEADLINE_EXCEEDED
+    with pytest.raises(grpc.RpcError):
+        get.with_call("request", timeout=0.01)
+
+    future = get.future("request", timeout=0.01)
+    assert future.done() and not future.running()
+    assert not future.cancelled() and not future.cancel()
+    assert future.exception() is future
+    assert future.traceback() is None
+    with pytest.raises(grpc.RpcError):
+        future.result()
+    assert future.initial_metadata() is future.trailing_metadata() is None
+    assert not future.is_active()
+    assert future.time_remaining() is None
+    assert not future.add_callback(print)
+    done = []
+    future.add_done_callback(done.append)
+    assert done == [future]
+
+    assert not channel.unary_unary.return_value.called
+    assert limiter.in_flight == 1
+
+
+def test_client_call_times_out_while_queued():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+
+    with FakeBillingServer(SyntheticDataset(accounts=1)) as server:
+        client = server.create_client(CloudBillingClient, concurrency_limiter=limiter)
+        limiter.acquire()
+        start = time.monotonic()
+        with pytest.raises(exceptions.DeadlineExceeded):
+            client.get_billing_account(
+                name="billingAccounts/000001-000001-000001", retry=None, timeout=0.1
+            )
+    assert time.monotonic() - start < 2
+
+
+def test_waiting_counts_against_the_timeout():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+    channel = mock.Mock(spec=grpc.Channel)
+    callable_ = channel.unary_unary.return_value
+    get = limiter.limit_channel(channel).unary_unary(METHOD)
+    started = limiter.acquire()
+
+    timer = threading.Timer(0.2, limiter.release, (started, None))
+    timer.start()
+    get("request", timeout=5, metadata=())
+    timer.join()
+
+    (_, timeout), kwargs = callable_.call_args
+    assert 4 < timeout <= 4.85
+    assert kwargs == {"metadata": ()}
+
+    get.with_call("request")
+    assert callable_.with_call.call_args == mock.call("request", None)
+
+
+def test_limited_future():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, latency_tolerance=None)
+    channel = mock.Mock(spec=grpc.Channel)
+    callable_ = channel.unary_unary.return_value
+    get = limiter.limit_channel(channel).unary_unary(METHOD)
+
+    callbacks = []
+    callable_.future.return_value.add_done_callback.side_effect = callbacks.append
+    get.future("request", timeout=5)
+    get.future("request")
+    assert limiter.in_flight == 2
+
+    done = mock.Mock()
+    done.cancelled.return_value = True
+    callbacks[0](done)
+    done.cancelled.return_value = False
+    done.code.return_value = grpc.StatusCode.RESOURCE_EXHAUSTED
+    callbacks[1](done)
+    assert limiter.in_flight == 0
+    assert limiter.limit == 1
+
+    callable_.future.side_effect = ValueError()
+    with pytest.raises(ValueError):
+        get.future("request")
+    assert limiter.in_flight == 0
+
+
+def test_limited_channel():
+    limiter = AdaptiveConcurrencyLimiter()
+    channel = mock.Mock(spec=grpc.Channel)
+    channel.unary_unary.return_value.side_effect = _Error()
+
+    with limiter.limit_channel(channel) as limited:
+        with pytest.raises(_Error):
+            limited.unary_unary(METHOD)("request")
+        limited.unary_stream(METHOD)
+        limited.stream_unary(METHOD)
+        limited.stream_stream(METHOD)
+        limited.subscribe(print, try_to_connect=True)
+        limited.unsubscribe(print)
+
+    assert limiter.in_flight == 0
+    channel.unary_stream.assert_called_once_with(METHOD)
+    channel.stream_unary.assert_called_once_with(METHOD)
+    channel.stream_stream.assert_called_once_with(METHOD)
+    channel.subscribe.assert_called_once_with(print, try_to_connect=True)
+    channel.unsubscribe.assert_called_once_with(print)
+    channel.close.assert_called_once_with()
+
+
+@pytest.mark.asyncio
+async def test_limited_aio_channel():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+    channel = mock.Mock(spec=aio.Channel)
+    channel.get_state.return_value = grpc.ChannelConnectivity.READY
+    channel.wait_for_state_change = mock.AsyncMock(return_value=None)
+    channel.channel_ready = mock.AsyncMock(return_value=None)
+    channel.close = mock.AsyncMock(return_value=None)
+    callable_ = channel.unary_unary.return_value
+    callable_.side_effect = [_AioCall(error=_Error()), _AioCall("response")]
+
+    async with limiter.limit_channel(channel) as limited:
+        assert limited.get_state(True) == grpc.ChannelConnectivity.READY
+        await limited.wait_for_state_change(grpc.ChannelConnectivity.IDLE)
+        await limited.channel_ready()
+        limited.unary_stream(METHOD)
+        limited.stream_unary(METHOD)
+        limited.stream_stream(METHOD)
+
+        get = limited.unary_unary(METHOD)
+        with pytest.raises(_Error):
+            await get("request")
+        call = get("request", timeout=5, metadata=())
+        # Nothing is sent, so there is nothing to cancel yet.
+        assert not call.cancel()
+        assert await call == "response"
+        assert 4 < callable_.call_args[1]["timeout"] <= 5
+        assert call.cancel()
+
+        # A call that waits past its timeout is not sent.
+        started = await limiter.acquire_async()
+        with pytest.raises(grpc.RpcError) as exc_info:
+            await get("request", timeout=0.01)
+        assert exc_info.value.code() == grpc.StatusCode.DEADLINE_EXCEEDED
+        limiter.release(started, None)
+
+    assert callable_.call_count == 2
+    assert limiter.in_flight == 0
+    channel.get_state.assert_called_once_with(True)
+    channel.close.assert_awaited_once_with(None)
+    channel.unary_stream.assert_called_once_with(METHOD)
+    channel.stream_unary.assert_called_once_with(METHOD)
+    channel.stream_stream.assert_called_once_with(METHOD)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_after_wake_up():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+    started = await limiter.acquire_async()
+    waiting = asyncio.ensure_future(limiter.acquire_async())
+    await asyncio.sleep(0)
+
+    limiter.release(started, None)
+    # Let the slot reach the waiter, but not the waiter run.
+    await asyncio.sleep(0)
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+
+    assert limiter.in_flight == 0
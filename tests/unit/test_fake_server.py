@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import asyncio
+import time
+
+import grpc
+import pytest
+
+from google.api_core import exceptions
+from google.cloud.billing_v1.fake_server import FakeBillingServer
+from google.cloud.billing_v1.fake_server import SyntheticDataset
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingClient
+from google.cloud.billing_v1.services.cloud_catalog import CloudCatalogAsyncClient
+from google.cloud.billing_v1.services.cloud_catalog import CloudCatalogClient
+from google.iam.v1 import policy_pb2 as policy  # type: ignore
+
+
+@pytest.fixture
+def server():
+    dataset = SyntheticDataset(accounts=3, projects=7, services=2, skus_per_service=25)
+    with FakeBillingServer(dataset, page_size=10) as server:
+        yield server
+
+
+def test_synthetic_dataset():
+    dataset = SyntheticDataset(
+        accounts=2, projects=5, services=3, skus_per_service=4, tiers=2
+    )
+    assert len(dataset.accounts) == 2
+    assert len(dataset.projects) == 5
+    assert [service.name for service in dataset.services] == [
+        "services/0000-0000-0001",
+        "services/0000-0000-0002",
+        "services/0000-0000-0003",
+    ]
+    skus = dataset.skus["services/0000-0000-0002"]
+    assert len(skus) == 4
+    assert skus[0].name == "services/0000-0000-0002/skus/0002-000001"
+    rates = skus[0].pricing_info[0].pricing_expression.tiered_rates
+    assert [rate.start_usage_amount for rate in rates] == [0, 1000]
+    assert rates[0].unit_price.nanos > rates[1].unit_price.nanos
+
+    linked = [project.billing_account_name for project in dataset.projects.values()]
+    assert linked == [name for name in dataset.accounts] * 2 + [
+        next(iter(dataset.accounts))
+    ]
+
+    again = SyntheticDataset(
+        accounts=2, projects=5, services=3, skus_per_service=4, tiers=2
+    )
+    assert again.skus == dataset.skus
+
+
+def test_address_requires_start():
+    with pytest.raises(RuntimeError):
+        FakeBillingServer().address
+
+
+def test_stop_is_idempotent():
+    server = FakeBillingServer()
+    server.stop()
+
+    server.start()
+    server.stop()
+    server.stop()
+
+
+def test_list_skus_pages(server):
+    client = server.create_client(CloudCatalogClient)
+
+    services = list(client.list_services())
+    assert [service.name for service in services] == [
+        service.name for service in server.dataset.services
+    ]
+
+    pager = client.list_skus(parent=services[1].name)
+    pages = list(pager.pages)
+    assert [len(page.skus) for page in pages] == [10, 10, 5]
+    assert [sku.name for page in pages for sku in page.skus] == [
+        sku.name for sku in server.dataset.skus[services[1].name]
+    ]
+
+    pager = client.list_skus(request={"parent": services[1].name, "page_size": 4})
+    assert [len(page.skus) for page in pager.pages] == [4] * 6 + [1]
+
+
+def test_list_skus_errors(server):
+    client = server.create_client(CloudCatalogClient)
+
+    with pytest.raises(exceptions.NotFound):
+        client.list_skus(parent="services/unknown")
+    with pytest.raises(exceptions.InvalidArgument):
+        client.list_skus(
+            request={"parent": "services/0000-0000-0001", "page_token": "next"}
+        )
+
+
+def test_billing_accounts(server):
+    client = server.create_client(CloudBillingClient)
+    names = list(server.dataset.accounts)
+
+    accounts = list(client.list_billing_accounts())
+    assert [account.name for account in accounts] == names
+    assert all(account.open_ for account in accounts)
+
+    account = client.get_billing_account(name=names[0])
+    assert account.display_name == "Account 1"
+
+    updated = client.update_billing_account(
+        name=names[0], account={"display_name": "Renamed"}
+    )
+    assert updated.display_name == "Renamed"
+    assert client.get_billing_account(name=names[0]).display_name == "Renamed"
+
+    created = client.create_billing_account(
+        billing_account={"display_name": "Sub", "master_billing_account": names[0]}
+    )
+    assert created.name not in names
+    assert created.master_billing_account == names[0]
+    assert client.get_billing_account(name=created.name).display_name == "Sub"
+
+    with pytest.raises(exceptions.NotFound):
+        client.get_billing_account(name="billingAccounts/unknown")
+
+
+def test_project_billing_info(server):
+    client = server.create_client(CloudBillingClient)
+    first, second, _ = server.dataset.accounts
+
+    projects = list(client.list_project_billing_info(name=first))
+    assert [project.project_id for project in projects] == [
+        "project-1",
+        "project-4",
+        "project-7",
+    ]
+
+    info = client.get_project_billing_info(name="projects/project-1")
+    assert info.billing_account_name == first
+    assert info.billing_enabled
+
+    info = client.update_project_billing_info(
+        name="projects/project-1", project_billing_info={"billing_account_name": ""},
+    )
+    assert not info.billing_enabled
+    info = client.update_project_billing_info(
+        name="projects/project-1",
+        project_billing_info={"billing_account_name": second},
+    )
+    assert info.billing_account_name == second
+    assert len(list(client.list_project_billing_info(name=second))) == 3
+
+    with pytest.raises(exceptions.NotFound):
+        client.get_project_billing_info(name="projects/unknown")
+    with pytest.raises(exceptions.NotFound):
+        client.update_project_billing_info(
+            name="projects/project-2",
+            project_billing_info={"billing_account_name": "billingAccounts/nope"},
+        )
+
+
+def test_iam(server):
+    client = server.create_client(CloudBillingClient)
+    resource = next(iter(server.dataset.accounts))
+
+    assert client.get_iam_policy(resource=resource) == policy.Policy()
+    new_policy = policy.Policy(etag=b"abc")
+    client.set_iam_policy(request={"resource": resource, "policy": new_policy})
+    assert client.get_iam_policy(resource=resource) == new_policy
+
+    response = client.test_iam_permissions(
+        resource=resource, permissions=["billing.accounts.get"]
+    )
+    assert list(response.permissions) == ["billing.accounts.get"]
+
+
+def test_injected_errors():
+    with FakeBillingServer(error_rate=1.0) as server:
+        client = server.create_client(CloudCatalogClient)
+        with pytest.raises(exceptions.ServiceUnavailable):
+            client.list_services(retry=None)
+
+    with FakeBillingServer(
+        error_rate=1.0, error_code=grpc.StatusCode.RESOURCE_EXHAUSTED
+    ) as server:
+        client = server.create_client(CloudCatalogClient)
+        with pytest.raises(exceptions.ResourceExhausted):
+            client.list_services(retry=None)
+
+
+def test_injected_latency():
+    delays = {"ListServices": 0.05}
+
+    with FakeBillingServer(latency=lambda method: delays.get(method, 0)) as server:
+        client = server.create_client(CloudCatalogClient)
+        start = time.monotonic()
+        list(client.list_services())
+        assert time.monotonic() - start >= 0.05
+
+
+def test_async_client(server):
+    async def list_skus():
+        client = server.create_client(CloudCatalogAsyncClient)
+        pager = await client.list_skus(parent="services/0000-0000-0001")
+        return [sku.name async for sku in pager]
+
+    loop = asyncio.new_event_loop()
+    try:
+        names = loop.run_until_complete(list_skus())
+    finally:
+        loop.close()
+    assert len(names) == 25
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from unittest import mock
+
+import grpc
+from grpc.experimental import aio
+import pytest
+
+from google.cloud.billing_v1.services import _forwarding_channel
+
+
+METHOD = "/google.cloud.billing.v1.CloudBilling/GetBillingAccount"
+
+
+def test_forwarding_channel():
+    channel = mock.Mock(spec=grpc.Channel)
+
+    with _forwarding_channel.ForwardingChannel(channel) as forwarding:
+        for name in ("unary_unary", "unary_stream", "stream_unary", "stream_stream"):
+            method = getattr(forwarding, name)
+            assert (
+                method(METHOD, request_serializer=str)
+                is getattr(channel, name).return_value
+            )
+            getattr(channel, name).assert_called_once_with(
+                METHOD, request_serializer=str
+            )
+        forwarding.subscribe(print, try_to_connect=True)
+        forwarding.unsubscribe(print)
+
+    channel.subscribe.assert_called_once_with(print, try_to_connect=True)
+    channel.unsubscribe.assert_called_once_with(print)
+    channel.close.assert_called_once_with()
+
+
+@pytest.mark.asyncio
+async def test_forwarding_aio_channel():
+    channel = mock.Mock(spec=aio.Channel)
+    channel.get_state.return_value = grpc.ChannelConnectivity.IDLE
+    channel.wait_for_state_change = mock.AsyncMock(return_value=None)
+    channel.channel_ready = mock.AsyncMock(return_value=None)
+    channel.close = mock.AsyncMock(return_value=None)
+
+    async with _forwarding_channel.ForwardingAioChannel(channel) as forwarding:
+        for name in ("unary_unary", "unary_stream", "stream_unary", "stream_stream"):
+            method = getattr(forwarding, name)
+            assert (
+                method(METHOD, request_serializer=str)
+                is getattr(channel, name).return_value
+            )
+            getattr(channel, name).assert_called_once_with(
+                METHOD, request_serializer=str
+            )
+        assert forwarding.get_state(True) == grpc.ChannelConnectivity.IDLE
+        await forwarding.wait_for_state_change(grpc.ChannelConnectivity.IDLE)
+        await forwarding.channel_ready()
+
+    channel.get_state.assert_called_once_with(True)
+    channel.wait_for_state_change.assert_awaited_once_with(
+        grpc.ChannelConnectivity.IDLE
+    )
+    channel.channel_ready.assert_awaited_once_with()
+    channel.close.assert_awaited_once_with(None)
@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import asyncio
+import concurrent.futures
+import itertools
+import threading
+
+import grpc
+from grpc.experimental import aio
+import mock
+import pytest
+
+from google.cloud.billing_v1.fake_server import FakeBillingServer
+from google.cloud.billing_v1.fake_server import SyntheticDataset
+from google.cloud.billing_v1.hedging import HedgingPolicy
+from google.cloud.billing_v1.retry_budget import RetryBudget
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingAsyncClient
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingClient
+
+
+METHOD = "/google.cloud.billing.v1.CloudBilling/GetBillingAccount"
+
+
+class _Attempts:
+    """Start attempts as futures the test completes."""
+
+    def __init__(self, *results):
+        self.futures = []
+        self._results = list(results)
+
+    def __call__(self):
+        future = concurrent.futures.Future()
+        result = self._results.pop(0)
+        if isinstance(result, Exception):
+            future.set_exception(result)
+        elif result is not None:
+            future.set_result(result)
+        self.futures.append(future)
+        return future
+
+
+def _later(delay, func, *args):
+    timer = threading.Timer(delay, func, args)
+    timer.start()
+    return timer
+
+
+def test_slow_call_is_hedged():
+    policy = HedgingPolicy(delay=0.01)
+    attempts = _Attempts(None, "hedge")
+
+    winner = policy.call(METHOD, attempts)
+
+    assert winner.result() == "hedge"
+    assert attempts.futures[0].cancelled()
+    assert (policy.calls, policy.hedged, policy.hedges_won) == (1, 1, 1)
+
+
+def test_fast_call_is_not_hedged():
+    policy = HedgingPolicy(delay=0.01)
+    attempts = _Attempts("primary")
+
+    assert policy.call(METHOD, attempts).result() == "primary"
+    assert policy.hedged == 0
+
+
+def test_failed_attempt_waits_for_the_other():
+    policy = HedgingPolicy(delay=0.01)
+    attempts = _Attempts(None, None)
+
+    _later(0.05, lambda: attempts.futures[0].set_exception(ValueError("slow")))
+    _later(0.1, lambda: attempts.futures[1].set_result("hedge"))
+    assert policy.call(METHOD, attempts).result() == "hedge"
+
+
+def test_all_attempts_fail():
+    policy = HedgingPolicy(delay=0.01)
+    attempts = _Attempts(None, ValueError("hedge"))
+
+    _later(0.05, lambda: attempts.futures[0].set_exception(ValueError("primary")))
+    with pytest.raises(ValueError, match="primary"):
+        policy.call(METHOD, attempts).result()
+
+
+def test_budget_caps_hedges():
+    policy = HedgingPolicy(
+        delay=0.01, budget=RetryBudget(ratio=0, min_retries_per_second=0)
+    )
+    attempts = _Attempts(None)
+
+    _later(0.05, lambda: attempts.futures[0].set_result("primary"))
+    assert policy.call(METHOD, attempts).result() == "primary"
+    assert len(attempts.futures) == 1
+    assert policy.budget.rejected == 1
+
+
+def test_delay_from_percentile():
+    policy = HedgingPolicy(percentile=90, sample_size=10, min_samples=5)
+
+    for latency in range(1, 5):
+        policy._record(METHOD, latency, False)
+    assert policy.hedge_delay(METHOD) is None
+
+    for latency in range(5, 21):
+        policy._record(METHOD, latency, False)
+    # The last ten samples are 11 to 20.
+    assert policy.hedge_delay(METHOD) == 20
+    assert policy.hedge_delay("/other") is None
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"delay": -1},
+        {"percentile": 0},
+        {"percentile": 101},
+        {"min_samples": 0},
+        {"sample_size": 5, "min_samples": 10},
+    ],
+)
+def test_invalid_arguments(kwargs):
+    with pytest.raises(ValueError):
+        HedgingPolicy(**kwargs)
+
+
+@pytest.mark.asyncio
+async def test_call_async():
+    policy = HedgingPolicy(delay=0.01)
+    loop = asyncio.get_event_loop()
+    calls = []
+
+    def start():
+        call = loop.create_future()
+        if calls:
+            call.set_result("hedge")
+        calls.append(call)
+        return call
+
+    assert await policy.call_async(METHOD, start) == "hedge"
+    assert calls[0].cancelled()
+    assert policy.hedges_won == 1
+
+
+def _slow_first_call(seconds):
+    counter = itertools.count()
+    return lambda method: seconds if next(counter) == 0 else 0
+
+
+def test_transport():
+    policy = HedgingPolicy(delay=0.05)
+    dataset = SyntheticDataset(accounts=1)
+    name = next(iter(dataset.accounts))
+
+    with FakeBillingServer(dataset, latency=_slow_first_call(0.5)) as server:
+        client = server.create_client(CloudBillingClient, hedging_policy=policy)
+        account = client.get_billing_account(name=name)
+        # Other methods are not hedged.
+        client.list_billing_accounts()
+
+    assert account.name == name
+    assert (policy.calls, policy.hedged, policy.hedges_won) == (1, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_async_transport():
+    policy = HedgingPolicy(delay=0.05)
+    dataset = SyntheticDataset(accounts=1)
+    name = next(iter(dataset.accounts))
+
+    with FakeBillingServer(dataset, latency=_slow_first_call(0.5)) as server:
+        client = server.create_client(CloudBillingAsyncClient, hedging_policy=policy)
+        account = await client.get_billing_account(name=name)
+
+    assert account.name == name
+    assert (policy.calls, policy.hedged, policy.hedges_won) == (1, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_call_async_failed_attempts():
+    policy = HedgingPolicy(delay=0.01)
+    loop = asyncio.get_event_loop()
+    calls = []
+
+    def start():
+        call = loop.create_future()
+        calls.append(call)
+        return call
+
+    # The primary fails after the hedge was sent; the hedge wins.
+    task = asyncio.ensure_future(policy.call_async(METHOD, start))
+    await asyncio.sleep(0.05)
+    calls[0].set_exception(ValueError("primary"))
+    await asyncio.sleep(0.01)
+    calls[1].set_result("hedge")
+    assert await task == "hedge"
+
+    # The primary fails before the hedge delay: it is returned at once.
+    task = asyncio.ensure_future(policy.call_async(METHOD, start))
+    await asyncio.sleep(0)
+    calls[2].set_exception(ValueError("fast"))
+    with pytest.raises(ValueError, match="fast"):
+        await task
+
+    # Both fail: the error of the last one is raised.
+    task = asyncio.ensure_future(policy.call_async(METHOD, start))
+    await asyncio.sleep(0.05)
+    calls[3].set_exception(ValueError("primary"))
+    calls[4].set_exception(ValueError("hedge"))
+    with pytest.raises(ValueError):
+        await task
+
+
+@pytest.mark.asyncio
+async def test_call_async_budget_caps_hedges():
+    policy = HedgingPolicy(
+        delay=0.01, budget=RetryBudget(ratio=0, min_retries_per_second=0)
+    )
+    loop = asyncio.get_event_loop()
+    call = loop.create_future()
+    loop.call_later(0.05, call.set_result, "primary")
+
+    assert await policy.call_async(METHOD, lambda: call) == "primary"
+    assert policy.budget.rejected == 1
+
+
+class _SlowCall:
+    cancelled = False
+
+    def __await__(self):
+        return asyncio.sleep(10).__await__()
+
+    def cancel(self):
+        self.cancelled = True
+        return True
+
+
+@pytest.mark.asyncio
+async def test_call_async_cancelled():
+    policy = HedgingPolicy(delay=10)
+    call = _SlowCall()
+    channel = mock.Mock(spec=aio.Channel)
+    channel.unary_unary.return_value.return_value = call
+
+    pending = policy.hedge_channel(channel).unary_unary(METHOD)("request")
+    await asyncio.sleep(0)
+    assert pending.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await pending
+
+    assert call.cancelled
+
+
+class _Futures:
+    """A ``future`` that records its timeouts and completes on a cue."""
+
+    def __init__(self):
+        self.timeouts = []
+        self.futures = []
+
+    def __call__(self, request, timeout=None, *args, **kwargs):
+        self.timeouts.append(timeout)
+        future = concurrent.futures.Future()
+        self.futures.append(future)
+        if len(self.futures) > 1:
+            future.set_result("hedge")
+        return future
+
+
+def test_hedge_gets_the_remaining_timeout():
+    policy = HedgingPolicy(delay=0.1)
+    channel = mock.Mock(spec=grpc.Channel)
+    channel.unary_unary.return_value.future.side_effect = futures = _Futures()
+    hedged = policy.hedge_channel(channel).unary_unary(METHOD)
+
+    response, call = hedged.with_call("request", timeout=5)
+    assert response == "hedge" and call is futures.futures[1]
+    assert 4.9 < futures.timeouts[0] <= 5
+    assert 4.5 < futures.timeouts[1] <= 4.9
+
+    assert hedged("request") == "hedge"
+    assert futures.timeouts[2:] == [None]
+
+
+@pytest.mark.asyncio
+async def test_async_hedge_gets_the_remaining_timeout():
+    policy = HedgingPolicy(delay=0.1)
+    channel = mock.Mock(spec=aio.Channel)
+    loop = asyncio.get_event_loop()
+    timeouts = []
+
+    def start(request, timeout=None, **kwargs):
+        timeouts.append(timeout)
+        call = loop.create_future()
+        if len(timeouts) > 1:
+            call.set_result("hedge")
+        return call
+
+    channel.unary_unary.return_value.side_effect = start
+    hedged = policy.hedge_channel(channel).unary_unary(METHOD)
+
+    assert await hedged("request", timeout=5, metadata=()) == "hedge"
+    assert 4.9 < timeouts[0] <= 5
+    assert 4.5 < timeouts[1] <= 4.9
+
+
+def test_hedged_channel():
+    policy = HedgingPolicy(delay=0.01)
+    channel = mock.Mock(spec=grpc.Channel)
+
+    with policy.hedge_channel(channel) as hedged:
+        # Only the calls of the policy's methods are hedged, and futures
+        # are not.
+        other = "/google.cloud.billing.v1.CloudBilling/UpdateBillingAccount"
+        assert hedged.unary_unary(other) is channel.unary_unary.return_value
+        future = hedged.unary_unary(METHOD).future("request", 5)
+        assert future is channel.unary_unary.return_value.future.return_value
+        channel.unary_unary.return_value.future.assert_called_once_with("request", 5)
+
+        hedged.unary_stream(METHOD)
+        hedged.stream_unary(METHOD)
+        hedged.stream_stream(METHOD)
+        hedged.subscribe(print, try_to_connect=True)
+        hedged.unsubscribe(print)
+
+    assert policy.calls == 0
+    channel.unary_stream.assert_called_once_with(METHOD)
+    channel.stream_unary.assert_called_once_with(METHOD)
+    channel.stream_stream.assert_called_once_with(METHOD)
+    channel.subscribe.assert_called_once_with(print, try_to_connect=True)
+    channel.unsubscribe.assert_called_once_with(print)
+    channel.close.assert_called_once_with()
+
+
+@pytest.mark.asyncio
+async def test_hedged_aio_channel():
+    policy = HedgingPolicy(delay=0.01)
+    channel = mock.Mock(spec=aio.Channel)
+    channel.get_state.return_value = grpc.ChannelConnectivity.READY
+    channel.wait_for_state_change = mock.AsyncMock(return_value=None)
+    channel.channel_ready = mock.AsyncMock(return_value=None)
+    channel.close = mock.AsyncMock(return_value=None)
+
+    async with policy.hedge_channel(channel) as hedged:
+        other = "/google.cloud.billing.v1.CloudBilling/UpdateBillingAccount"
+        assert hedged.unary_unary(other) is channel.unary_unary.return_value
+        assert hedged.get_state(True) == grpc.ChannelConnectivity.READY
+        await hedged.wait_for_state_change(grpc.ChannelConnectivity.IDLE)
+        await hedged.channel_ready()
+        hedged.unary_stream(METHOD)
+        hedged.stream_unary(METHOD)
+        hedged.stream_stream(METHOD)
+
+    channel.get_state.assert_called_once_with(True)
+    channel.close.assert_awaited_once_with(None)
+    channel.unary_stream.assert_called_once_with(METHOD)
+    channel.stream_unary.assert_called_once_with(METHOD)
+    channel.stream_stream.assert_called_once_with(METHOD)
+
+
+def test_repr():
+    policy = HedgingPolicy(delay=0.01)
+
+    assert repr(policy) == "HedgingPolicy<calls=0, hedged=0, hedges_won=0>"
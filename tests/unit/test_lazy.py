@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import importlib
+import subprocess
+import sys
+import types
+
+import mock
+import pytest
+
+from google.cloud import billing
+from google.cloud import billing_v1
+from google.cloud.billing_v1 import _lazy
+from google.cloud.billing_v1.services import _compat
+
+
+@pytest.fixture
+def package(monkeypatch):
+    package = types.ModuleType("lazy_package")
+    monkeypatch.setitem(sys.modules, "lazy_package", package)
+    return package
+
+
+def test_attach_loads_on_first_use(package):
+    package.__getattr__, package.__dir__ = _lazy.attach(
+        "lazy_package", {"OrderedDict": "collections", "dedent": "textwrap"}
+    )
+
+    import collections
+
+    assert "OrderedDict" not in vars(package)
+    assert package.__getattr__("OrderedDict") is collections.OrderedDict
+    # The name is now a plain attribute of the package.
+    assert vars(package)["OrderedDict"] is collections.OrderedDict
+    assert {"OrderedDict", "dedent"} <= set(package.__dir__())
+
+
+def test_attach_loads_at_once_on_python_36(package, monkeypatch):
+    monkeypatch.setattr(sys, "version_info", (3, 6, 15, "final", 0))
+
+    package.__getattr__, package.__dir__ = _lazy.attach(
+        "lazy_package", {"OrderedDict": "collections"}
+    )
+
+    import collections
+
+    assert vars(package)["OrderedDict"] is collections.OrderedDict
+
+
+def test_attach_unknown_name(package):
+    getattr_, _ = _lazy.attach("lazy_package", {})
+
+    with pytest.raises(AttributeError, match="octopus"):
+        getattr_("octopus")
+
+
+def test_packages_export_their_names():
+    for package in (billing, billing_v1):
+        assert set(package.__all__) <= set(dir(package))
+        for name in package.__all__:
+            assert getattr(package, name) is not None
+
+    assert billing.CloudBillingClient is billing_v1.CloudBillingClient
+    assert billing.Sku is billing_v1.types.Sku
+    with pytest.raises(AttributeError):
+        billing.NotAClient
+
+
+def test_import_is_light():
+    code = (
+        "import sys\n"
+        "import google.cloud.billing\n"
+        "from google.cloud.billing import CloudBillingClient\n"
+        "print(sorted({'grpc', 'pkg_resources', 'distutils'} & set(sys.modules)))\n"
+    )
+    output = subprocess.check_output([sys.executable, "-c", code])
+    # The client needs gRPC, but neither pkg_resources nor distutils.
+    assert output.decode().strip() == "['grpc']"
+
+
+def test_package_import_does_not_load_grpc():
+    code = "import sys\nimport google.cloud.billing\nprint('grpc' in sys.modules)\n"
+    output = subprocess.check_output([sys.executable, "-c", code])
+    assert output.decode().strip() == "False"
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [("true", True), ("Yes", True), ("1", True), ("false", False), ("OFF", False)],
+)
+def test_strtobool(value, expected):
+    assert _compat.strtobool(value) is expected
+
+
+def test_strtobool_invalid():
+    with pytest.raises(ValueError):
+        _compat.strtobool("maybe")
+
+
+def test_gapic_version():
+    version = _compat.gapic_version()
+    assert version is None or isinstance(version, str)
+
+    from google.cloud.billing_v1.services.cloud_billing import client
+
+    assert client.DEFAULT_CLIENT_INFO.gapic_version == version
+
+
+@pytest.fixture
+def uncached_version():
+    _compat.gapic_version.cache_clear()
+    yield
+    _compat.gapic_version.cache_clear()
+
+
+def test_gapic_version_not_installed(uncached_version, monkeypatch):
+    monkeypatch.setattr(_compat, "_DISTRIBUTION", "no-such-distribution")
+
+    assert _compat.gapic_version() is None
+
+
+def test_gapic_version_before_python_38(uncached_version, monkeypatch):
+    # importlib.metadata is new in Python 3.8.
+    monkeypatch.delattr(importlib, "metadata", raising=False)
+    monkeypatch.setitem(sys.modules, "importlib.metadata", None)
+    pkg_resources = types.ModuleType("pkg_resources")
+    pkg_resources.DistributionNotFound = type("DistributionNotFound", (Exception,), {})
+    pkg_resources.get_distribution = mock.Mock(return_value=mock.Mock(version="1.2.3"))
+    monkeypatch.setitem(sys.modules, "pkg_resources", pkg_resources)
+
+    assert _compat.gapic_version() == "1.2.3"
+    pkg_resources.get_distribution.assert_called_once_with("google-cloud-billing")
+
+    _compat.gapic_version.cache_clear()
+    pkg_resources.get_distribution.side_effect = pkg_resources.DistributionNotFound()
+    assert _compat.gapic_version() is None
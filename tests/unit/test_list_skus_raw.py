@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import mock
+import pytest
+
+from google.auth import credentials
+from google.cloud.billing_v1.services.cloud_catalog import CloudCatalogAsyncClient
+from google.cloud.billing_v1.services.cloud_catalog import CloudCatalogClient
+from google.cloud.billing_v1.services.cloud_catalog import pagers
+from google.cloud.billing_v1.services.cloud_catalog import transports
+from google.cloud.billing_v1.types import cloud_catalog
+
+
+def _raw_sku_pages():
+    return tuple(
+        cloud_catalog.ListSkusResponse.pb(response)
+        for response in (
+            cloud_catalog.ListSkusResponse(
+                skus=[cloud_catalog.Sku(name="a"), cloud_catalog.Sku(name="b"),],
+                next_page_token="abc",
+            ),
+            cloud_catalog.ListSkusResponse(skus=[cloud_catalog.Sku(name="c"),],),
+        )
+    ) + (RuntimeError,)
+
+
+def test_list_skus_raw():
+    client = CloudCatalogClient(credentials=credentials.AnonymousCredentials,)
+
+    # Mock the actual call within the gRPC stub, and fake the request.
+    with mock.patch.object(type(client.transport.list_skus_raw), "__call__") as call:
+        call.side_effect = _raw_sku_pages()
+        pager = client.list_skus_raw(parent="parent/value")
+        assert isinstance(pager, pagers.ListSkusRawPager)
+        results = [i for i in pager]
+
+        assert [i.name for i in results] == ["a", "b", "c"]
+        assert all(isinstance(i, cloud_catalog.Sku.pb()) for i in results)
+
+        _, args, kw = call.mock_calls[0]
+        assert args[0] == cloud_catalog.ListSkusRequest(parent="parent/value")
+        assert ("x-goog-request-params", "parent=parent/value",) in kw["metadata"]
+        _, args, _ = call.mock_calls[1]
+        assert args[0].page_token == "abc"
+
+
+@pytest.mark.parametrize(
+    "request_",
+    [cloud_catalog.ListSkusRequest(parent="parent/value"), {"parent": "parent/value"}],
+)
+def test_list_skus_raw_pages(request_):
+    client = CloudCatalogClient(credentials=credentials.AnonymousCredentials(),)
+
+    with mock.patch.object(type(client.transport.list_skus_raw), "__call__") as call:
+        call.side_effect = _raw_sku_pages()
+        pager = client.list_skus_raw(request=request_)
+        pages = list(pager.pages)
+
+    assert all(isinstance(p, cloud_catalog.ListSkusResponse.pb()) for p in pages)
+    assert [len(p.skus) for p in pages] == [2, 1]
+    assert pager.checkpoint() == cloud_catalog.ListSkusRequest(
+        parent="parent/value", page_token="abc"
+    )
+
+
+def test_list_skus_raw_flattened_error():
+    client = CloudCatalogClient(credentials=credentials.AnonymousCredentials(),)
+
+    with pytest.raises(ValueError):
+        client.list_skus_raw(
+            cloud_catalog.ListSkusRequest(), parent="parent_value",
+        )
+
+
+def test_list_skus_raw_response_deserializer():
+    channel = mock.Mock()
+    transports.CloudCatalogGrpcTransport(channel=channel)
+    payload = cloud_catalog.ListSkusResponse.serialize(
+        cloud_catalog.ListSkusResponse(skus=[cloud_catalog.Sku(name="a")])
+    )
+
+    deserialized = [
+        kw["response_deserializer"](payload)
+        for args, kw in channel.unary_unary.call_args_list
+        if args[0] == "/google.cloud.billing.v1.CloudCatalog/ListSkus"
+    ]
+
+    assert len(deserialized) == 2
+    assert {type(response) for response in deserialized} == {
+        cloud_catalog.ListSkusResponse,
+        cloud_catalog.ListSkusResponse.pb(),
+    }
+    assert all(response.skus[0].name == "a" for response in deserialized)
+
+
+def test_list_skus_raw_base_transport():
+    with mock.patch(
+        "google.cloud.billing_v1.services.cloud_catalog.transports.CloudCatalogTransport.__init__"
+    ) as transport:
+        transport.return_value = None
+        transport = transports.CloudCatalogTransport(
+            credentials=credentials.AnonymousCredentials(),
+        )
+
+    with pytest.raises(NotImplementedError):
+        transport.list_skus_raw
+
+
+@pytest.mark.asyncio
+async def test_list_skus_raw_async():
+    client = CloudCatalogAsyncClient(credentials=credentials.AnonymousCredentials,)
+
+    # Mock the actual call within the gRPC stub, and fake the request.
+    with mock.patch.object(
+        type(client.transport.list_skus_raw), "__call__", new_callable=mock.AsyncMock
+    ) as call:
+        call.side_effect = _raw_sku_pages()
+        async_pager = await client.list_skus_raw(parent="parent/value")
+        assert isinstance(async_pager, pagers.ListSkusRawAsyncPager)
+        responses = []
+        async for response in async_pager:
+            responses.append(response)
+
+        assert [i.name for i in responses] == ["a", "b", "c"]
+        assert all(isinstance(i, cloud_catalog.Sku.pb()) for i in responses)
+
+        _, args, _ = call.mock_calls[0]
+        assert args[0] == cloud_catalog.ListSkusRequest(parent="parent/value")
+
+
+@pytest.mark.asyncio
+async def test_list_skus_raw_async_pages():
+    client = CloudCatalogAsyncClient(credentials=credentials.AnonymousCredentials(),)
+
+    with mock.patch.object(
+        type(client.transport.list_skus_raw), "__call__", new_callable=mock.AsyncMock
+    ) as call:
+        call.side_effect = _raw_sku_pages()
+        async_pager = await client.list_skus_raw(request={},)
+        pages = [page async for page in async_pager.pages]
+
+    assert all(isinstance(p, cloud_catalog.ListSkusResponse.pb()) for p in pages)
+    assert [len(p.skus) for p in pages] == [2, 1]
+
+
+@pytest.mark.asyncio
+async def test_list_skus_raw_async_flattened_error():
+    client = CloudCatalogAsyncClient(credentials=credentials.AnonymousCredentials(),)
+
+    with pytest.raises(ValueError):
+        await client.list_skus_raw(
+            cloud_catalog.ListSkusRequest(), parent="parent_value",
+        )
@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import mock
+import pytest
+
+from google.api_core import grpc_helpers_async
+from google.auth import credentials
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingAsyncClient
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingClient
+from google.cloud.billing_v1.services.cloud_catalog import CloudCatalogAsyncClient
+from google.cloud.billing_v1.services.cloud_catalog import CloudCatalogClient
+from google.cloud.billing_v1.types import cloud_billing
+from google.cloud.billing_v1.types import cloud_catalog
+
+
+PAGES = 4
+
+
+def _sku_page(request, **kwargs):
+    page = int(request.page_token or 0)
+    return cloud_catalog.ListSkusResponse(
+        skus=[
+            cloud_catalog.Sku(
+                name="{}/skus/{}".format(request.parent, page),
+                description=request.currency_code,
+            )
+        ],
+        next_page_token=str(page + 1) if page + 1 < PAGES else "",
+    )
+
+
+def _make_client():
+    return CloudCatalogClient(credentials=credentials.AnonymousCredentials(),)
+
+
+@pytest.mark.parametrize("prefetch", [0, 2])
+def test_resume_from_checkpoint(prefetch):
+    client = _make_client()
+    request = cloud_catalog.ListSkusRequest(parent="services/a", currency_code="JPY")
+
+    with mock.patch.object(
+        type(client.transport.list_skus), "__call__", side_effect=_sku_page
+    ):
+        pager = client.list_skus(request=request, prefetch=prefetch)
+        pages = pager.pages
+        next(pages)
+        next(pages)
+        stored = cloud_catalog.ListSkusRequest.serialize(pager.checkpoint())
+        pages.close()
+
+        checkpoint = cloud_catalog.ListSkusRequest.deserialize(stored)
+        resumed = [sku.name for sku in client.list_skus(request=checkpoint)]
+
+    assert checkpoint.currency_code == "JPY"
+    assert resumed == ["services/a/skus/{}".format(i) for i in range(1, PAGES)]
+
+
+def test_checkpoint_next_page():
+    client = _make_client()
+
+    with mock.patch.object(
+        type(client.transport.list_skus), "__call__", side_effect=_sku_page
+    ):
+        pager = client.list_skus(parent="services/a")
+        first = pager.checkpoint()
+        after_first = pager.checkpoint(next_page=True)
+        for _ in pager.pages:
+            pass
+
+    assert first.page_token == ""
+    assert after_first.page_token == "1"
+    assert pager.checkpoint().page_token == str(PAGES - 1)
+    assert pager.checkpoint(next_page=True) is None
+
+
+def test_checkpoint_is_a_copy():
+    client = _make_client()
+
+    with mock.patch.object(
+        type(client.transport.list_skus), "__call__", side_effect=_sku_page
+    ):
+        pager = client.list_skus(parent="services/a")
+        checkpoint = pager.checkpoint()
+        list(pager)
+
+    assert checkpoint.page_token == ""
+
+
+def test_list_project_billing_info_checkpoint():
+    client = CloudBillingClient(credentials=credentials.AnonymousCredentials(),)
+
+    def call(request, **kwargs):
+        page = int(request.page_token or 0)
+        return cloud_billing.ListProjectBillingInfoResponse(
+            project_billing_info=[
+                cloud_billing.ProjectBillingInfo(name="projects/{}".format(page))
+            ],
+            next_page_token=str(page + 1) if page < 2 else "",
+        )
+
+    with mock.patch.object(
+        type(client.transport.list_project_billing_info), "__call__", side_effect=call
+    ):
+        pager = client.list_project_billing_info(name="billingAccounts/1")
+        next(iter(pager.pages))
+        checkpoint = pager.checkpoint(next_page=True)
+        resumed = client.list_project_billing_info(request=checkpoint)
+        names = [info.name for info in resumed]
+
+    assert checkpoint.name == "billingAccounts/1"
+    assert names == ["projects/1", "projects/2"]
+
+
+@pytest.mark.asyncio
+async def test_resume_from_checkpoint_async():
+    client = CloudCatalogAsyncClient(credentials=credentials.AnonymousCredentials(),)
+
+    def call(request, **kwargs):
+        return grpc_helpers_async.FakeUnaryUnaryCall(_sku_page(request))
+
+    with mock.patch.object(
+        type(client.transport.list_skus), "__call__", side_effect=call
+    ):
+        pager = await client.list_skus(parent="services/a")
+        pages = pager.pages
+        for _ in range(3):
+            await pages.__anext__()
+        await pages.aclose()
+        checkpoint = pager.checkpoint()
+        resumed = await client.list_skus(request=checkpoint)
+        names = [sku.name async for sku in resumed]
+
+    assert names == ["services/a/skus/2", "services/a/skus/3"]
+
+
+# Each listing: client method, sync and async client, response type, the
+# response field holding the items, the item type and the request fields.
+LISTINGS = (
+    (
+        "list_billing_accounts",
+        CloudBillingClient,
+        CloudBillingAsyncClient,
+        cloud_billing.ListBillingAccountsResponse,
+        "billing_accounts",
+        cloud_billing.BillingAccount,
+        {"filter": "open=true"},
+    ),
+    (
+        "list_project_billing_info",
+        CloudBillingClient,
+        CloudBillingAsyncClient,
+        cloud_billing.ListProjectBillingInfoResponse,
+        "project_billing_info",
+        cloud_billing.ProjectBillingInfo,
+        {"name": "billingAccounts/a"},
+    ),
+    (
+        "list_services",
+        CloudCatalogClient,
+        CloudCatalogAsyncClient,
+        cloud_catalog.ListServicesResponse,
+        "services",
+        cloud_catalog.Service,
+        {"page_size": 1},
+    ),
+    (
+        "list_skus",
+        CloudCatalogClient,
+        CloudCatalogAsyncClient,
+        cloud_catalog.ListSkusResponse,
+        "skus",
+        cloud_catalog.Sku,
+        {"parent": "services/a"},
+    ),
+)
+
+
+def _listing_pages(response_type, field, item_type):
+    def call(request, **kwargs):
+        page = int(request.page_token or 0)
+        return response_type(
+            {field: [item_type(name=str(page))]},
+            next_page_token=str(page + 1) if page + 1 < PAGES else "",
+        )
+
+    return call
+
+
+@pytest.mark.parametrize("prefetch", [0, 2])
+@pytest.mark.parametrize(
+    "method,client_class,_,response_type,field,item_type,fields", LISTINGS
+)
+def test_listing_checkpoint(
+    method, client_class, _, response_type, field, item_type, fields, prefetch
+):
+    client = client_class(credentials=credentials.AnonymousCredentials(),)
+    list_method = getattr(client, method)
+
+    with mock.patch.object(
+        type(getattr(client.transport, method)),
+        "__call__",
+        side_effect=_listing_pages(response_type, field, item_type),
+    ):
+        pager = list_method(request=fields, prefetch=prefetch)
+        pages = pager.pages
+        next(pages)
+        next(pages)
+        current = pager.checkpoint()
+        following = pager.checkpoint(next_page=True)
+        pages.close()
+
+        resumed = [item.name for item in list_method(request=current)]
+        skipped = [item.name for item in list_method(request=following)]
+
+        finished = list_method(request=fields)
+        list(finished)
+
+    for name, value in fields.items():
+        assert getattr(current, name) == value
+    assert resumed == [str(i) for i in range(1, PAGES)]
+    assert skipped == [str(i) for i in range(2, PAGES)]
+    assert finished.checkpoint().page_token == str(PAGES - 1)
+    assert finished.checkpoint(next_page=True) is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "method,_,client_class,response_type,field,item_type,fields", LISTINGS
+)
+async def test_listing_checkpoint_async(
+    method, _, client_class, response_type, field, item_type, fields
+):
+    client = client_class(credentials=credentials.AnonymousCredentials(),)
+    list_method = getattr(client, method)
+    pages = _listing_pages(response_type, field, item_type)
+
+    def call(request, **kwargs):
+        return grpc_helpers_async.FakeUnaryUnaryCall(pages(request))
+
+    with mock.patch.object(
+        type(getattr(client.transport, method)), "__call__", side_effect=call
+    ):
+        pager = await list_method(request=fields)
+        pager_pages = pager.pages
+        await pager_pages.__anext__()
+        await pager_pages.__anext__()
+        await pager_pages.aclose()
+        current = pager.checkpoint()
+        following = pager.checkpoint(next_page=True)
+
+        resumed = [item.name async for item in await list_method(request=current)]
+        skipped = [item.name async for item in await list_method(request=following)]
+
+        finished = await list_method(request=fields)
+        [item async for item in finished]
+
+    for name, value in fields.items():
+        assert getattr(current, name) == value
+    assert resumed == [str(i) for i in range(1, PAGES)]
+    assert skipped == [str(i) for i in range(2, PAGES)]
+    assert finished.checkpoint().page_token == str(PAGES - 1)
+    assert finished.checkpoint(next_page=True) is None
@@ -0,0 +1,438 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import asyncio
+import threading
+import time
+
+import mock
+import pytest
+
+from google.api_core import exceptions
+from google.api_core import grpc_helpers_async
+from google.auth import credentials
+from google.cloud.billing_v1.services import _prefetch
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingAsyncClient
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingClient
+from google.cloud.billing_v1.services.cloud_catalog import CloudCatalogAsyncClient
+from google.cloud.billing_v1.services.cloud_catalog import CloudCatalogClient
+from google.cloud.billing_v1.types import cloud_billing
+from google.cloud.billing_v1.types import cloud_catalog
+
+
+PAGES = 5
+
+
+def _sku_page(request, **kwargs):
+    page = int(request.page_token or 0)
+    if page == 3 and request.parent == "services/broken":
+        raise exceptions.ServiceUnavailable("unavailable")
+    return cloud_catalog.ListSkusResponse(
+        skus=[cloud_catalog.Sku(name="{}/skus/{}".format(request.parent, page))],
+        next_page_token=str(page + 1) if page + 1 < PAGES else "",
+    )
+
+
+def _make_client():
+    return CloudCatalogClient(credentials=credentials.AnonymousCredentials(),)
+
+
+@pytest.mark.parametrize("prefetch", [0, 1, 3])
+def test_list_skus_prefetch(prefetch):
+    client = _make_client()
+
+    with mock.patch.object(
+        type(client.transport.list_skus), "__call__", side_effect=_sku_page
+    ) as call:
+        pager = client.list_skus(parent="services/a", prefetch=prefetch)
+        names = [sku.name for sku in pager]
+
+    assert names == ["services/a/skus/{}".format(i) for i in range(PAGES)]
+    assert call.call_count == PAGES
+    # The pager keeps tracking the request and response it has reached.
+    assert pager._request.page_token == str(PAGES - 1)
+    assert pager.next_page_token == ""
+    for _, args, kwargs in call.mock_calls:
+        assert args[0].parent == "services/a"
+        assert "metadata" in kwargs
+
+
+def test_list_skus_prefetch_reads_ahead():
+    client = _make_client()
+    fetched = threading.Semaphore(0)
+
+    def call(request, **kwargs):
+        response = _sku_page(request)
+        fetched.release()
+        return response
+
+    with mock.patch.object(
+        type(client.transport.list_skus), "__call__", side_effect=call
+    ):
+        pages = client.list_skus(parent="services/a", prefetch=2).pages
+        next(pages)
+        next(pages)
+        # The second page is being consumed; pages 3 and 4 arrive meanwhile.
+        for _ in range(PAGES - 1):
+            assert fetched.acquire(timeout=5)
+        pages.close()
+
+
+def test_list_skus_prefetch_error():
+    client = _make_client()
+
+    with mock.patch.object(
+        type(client.transport.list_skus), "__call__", side_effect=_sku_page
+    ):
+        pager = client.list_skus(parent="services/broken", prefetch=2)
+        names = []
+        with pytest.raises(exceptions.ServiceUnavailable):
+            for sku in pager:
+                names.append(sku.name)
+
+    assert len(names) == 3
+
+
+def test_list_skus_prefetch_early_exit():
+    client = _make_client()
+
+    with mock.patch.object(
+        type(client.transport.list_skus), "__call__", side_effect=_sku_page
+    ) as call:
+        pages = client.list_skus(parent="services/a", prefetch=1).pages
+        next(pages)
+        next(pages)
+        pages.close()
+
+        deadline = time.time() + 5
+        while (
+            any(t.name == "PagePrefetch" for t in threading.enumerate())
+            and time.time() < deadline
+        ):
+            time.sleep(0.01)
+
+    assert not any(t.name == "PagePrefetch" for t in threading.enumerate())
+    assert call.call_count < PAGES
+
+
+def test_prefetch_pages_without_token():
+    fetch = mock.Mock()
+
+    assert list(_prefetch.prefetch_pages("", fetch, 2)) == []
+    fetch.assert_not_called()
+
+
+def _async_sku_page(request, **kwargs):
+    return grpc_helpers_async.FakeUnaryUnaryCall(_sku_page(request))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("prefetch", [0, 2])
+async def test_list_skus_prefetch_async(prefetch):
+    client = CloudCatalogAsyncClient(credentials=credentials.AnonymousCredentials(),)
+
+    with mock.patch.object(
+        type(client.transport.list_skus), "__call__", side_effect=_async_sku_page
+    ) as call:
+        pager = await client.list_skus(parent="services/a", prefetch=prefetch)
+        names = [sku.name async for sku in pager]
+
+    assert names == ["services/a/skus/{}".format(i) for i in range(PAGES)]
+    assert call.call_count == PAGES
+    assert pager.next_page_token == ""
+
+
+@pytest.mark.asyncio
+async def test_list_skus_prefetch_async_error():
+    client = CloudCatalogAsyncClient(credentials=credentials.AnonymousCredentials(),)
+
+    with mock.patch.object(
+        type(client.transport.list_skus), "__call__", side_effect=_async_sku_page
+    ):
+        pager = await client.list_skus(parent="services/broken", prefetch=2)
+        names = []
+        with pytest.raises(exceptions.ServiceUnavailable):
+            async for sku in pager:
+                names.append(sku.name)
+
+    assert len(names) == 3
+
+
+# Each listing: client method, sync and async client, response type, the
+# response field holding the items, the item type and the request fields.
+LISTINGS = (
+    (
+        "list_billing_accounts",
+        CloudBillingClient,
+        CloudBillingAsyncClient,
+        cloud_billing.ListBillingAccountsResponse,
+        "billing_accounts",
+        cloud_billing.BillingAccount,
+        {},
+    ),
+    (
+        "list_project_billing_info",
+        CloudBillingClient,
+        CloudBillingAsyncClient,
+        cloud_billing.ListProjectBillingInfoResponse,
+        "project_billing_info",
+        cloud_billing.ProjectBillingInfo,
+        {"name": "billingAccounts/a"},
+    ),
+    (
+        "list_services",
+        CloudCatalogClient,
+        CloudCatalogAsyncClient,
+        cloud_catalog.ListServicesResponse,
+        "services",
+        cloud_catalog.Service,
+        {},
+    ),
+    (
+        "list_skus",
+        CloudCatalogClient,
+        CloudCatalogAsyncClient,
+        cloud_catalog.ListSkusResponse,
+        "skus",
+        cloud_catalog.Sku,
+        {"parent": "services/a"},
+    ),
+)
+
+
+def _listing_pages(response_type, field, item_type, fail_at=None):
+    def call(request, **kwargs):
+        page = int(request.page_token or 0)
+        if page == fail_at:
+            raise exceptions.InvalidArgument("invalid")
+        return response_type(
+            {field: [item_type(name=str(page))]},
+            next_page_token=str(page + 1) if page + 1 < PAGES else "",
+        )
+
+    return call
+
+
+def _async_listing_pages(*args, **kwargs):
+    call = _listing_pages(*args, **kwargs)
+    return lambda request, **kw: grpc_helpers_async.FakeUnaryUnaryCall(call(request))
+
+
+@pytest.mark.parametrize("prefetch", [0, 2])
+@pytest.mark.parametrize(
+    "method,client_class,_,response_type,field,item_type,fields", LISTINGS
+)
+def test_prefetch_listing(
+    method, client_class, _, response_type, field, item_type, fields, prefetch
+):
+    client = client_class(credentials=credentials.AnonymousCredentials(),)
+
+    with mock.patch.object(
+        type(getattr(client.transport, method)),
+        "__call__",
+        side_effect=_listing_pages(response_type, field, item_type),
+    ) as call:
+        pager = getattr(client, method)(prefetch=prefetch, **fields)
+        names = [item.name for item in pager]
+
+    assert names == [str(i) for i in range(PAGES)]
+    assert call.call_count == PAGES
+    assert pager._request.page_token == str(PAGES - 1)
+    assert pager.next_page_token == ""
+    for _, args, _ in call.mock_calls:
+        for name, value in fields.items():
+            assert getattr(args[0], name) == value
+
+
+@pytest.mark.parametrize(
+    "method,client_class,_,response_type,field,item_type,fields", LISTINGS
+)
+def test_prefetch_listing_error(
+    method, client_class, _, response_type, field, item_type, fields
+):
+    client = client_class(credentials=credentials.AnonymousCredentials(),)
+
+    with mock.patch.object(
+        type(getattr(client.transport, method)),
+        "__call__",
+        side_effect=_listing_pages(response_type, field, item_type, fail_at=3),
+    ):
+        pager = getattr(client, method)(prefetch=2, **fields)
+        names = []
+        with pytest.raises(exceptions.InvalidArgument):
+            for item in pager:
+                names.append(item.name)
+
+    assert names == ["0", "1", "2"]
+
+
+@pytest.mark.parametrize(
+    "method,client_class,_,response_type,field,item_type,fields", LISTINGS
+)
+def test_prefetch_listing_early_exit(
+    method, client_class, _, response_type, field, item_type, fields
+):
+    client = client_class(credentials=credentials.AnonymousCredentials(),)
+
+    with mock.patch.object(
+        type(getattr(client.transport, method)),
+        "__call__",
+        side_effect=_listing_pages(response_type, field, item_type),
+    ) as call:
+        pages = getattr(client, method)(prefetch=1, **fields).pages
+        next(pages)
+        next(pages)
+        pages.close()
+
+        deadline = time.time() + 5
+        while (
+            any(t.name == "PagePrefetch" for t in threading.enumerate())
+            and time.time() < deadline
+        ):
+            time.sleep(0.01)
+
+    assert not any(t.name == "PagePrefetch" for t in threading.enumerate())
+    assert call.call_count < PAGES
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("prefetch", [0, 2])
+@pytest.mark.parametrize(
+    "method,_,client_class,response_type,field,item_type,fields", LISTINGS
+)
+async def test_prefetch_listing_async(
+    method, _, client_class, response_type, field, item_type, fields, prefetch
+):
+    client = client_class(credentials=credentials.AnonymousCredentials(),)
+
+    with mock.patch.object(
+        type(getattr(client.transport, method)),
+        "__call__",
+        side_effect=_async_listing_pages(response_type, field, item_type),
+    ) as call:
+        pager = await getattr(client, method)(prefetch=prefetch, **fields)
+        names = [item.name async for item in pager]
+
+    assert names == [str(i) for i in range(PAGES)]
+    assert call.call_count == PAGES
+    assert pager._request.page_token == str(PAGES - 1)
+    assert pager.next_page_token == ""
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "method,_,client_class,response_type,field,item_type,fields", LISTINGS
+)
+async def test_prefetch_listing_async_error(
+    method, _, client_class, response_type, field, item_type, fields
+):
+    client = client_class(credentials=credentials.AnonymousCredentials(),)
+
+    with mock.patch.object(
+        type(getattr(client.transport, method)),
+        "__call__",
+        side_effect=_async_listing_pages(response_type, field, item_type, fail_at=3),
+    ):
+        pager = await getattr(client, method)(prefetch=2, **fields)
+        names = []
+        with pytest.raises(exceptions.InvalidArgument):
+            async for item in pager:
+                names.append(item.name)
+
+    assert names == ["0", "1", "2"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "method,_,client_class,response_type,field,item_type,fields", LISTINGS
+)
+async def test_prefetch_listing_async_early_exit(
+    method, _, client_class, response_type, field, item_type, fields
+):
+    client = client_class(credentials=credentials.AnonymousCredentials(),)
+
+    with mock.patch.object(
+        type(getattr(client.transport, method)),
+        "__call__",
+        side_effect=_async_listing_pages(response_type, field, item_type),
+    ) as call:
+        pages = (await getattr(client, method)(prefetch=1, **fields)).pages
+        await pages.__anext__()
+        await pages.__anext__()
+        await pages.aclose()
+        await asyncio.sleep(0)
+
+    assert call.call_count < PAGES
+
+
+def test_prefetch_pages_stops_on_full_buffer():
+    pages = {
+        str(i): cloud_catalog.ListSkusResponse(next_page_token=str(i + 1))
+        for i in range(1, PAGES)
+    }
+    fetch = mock.Mock(side_effect=pages.__getitem__)
+
+    with mock.patch.object(_prefetch, "_PUT_POLL_INTERVAL", 0.01):
+        iterator = _prefetch.prefetch_pages("1", fetch, 1)
+        assert next(iterator) is pages["1"]
+        # The thread fills the buffer, then waits for room until the
+        # consumer stops.
+        deadline = time.time() + 5
+        while fetch.call_count < 3 and time.time() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        iterator.close()
+
+        deadline = time.time() + 5
+        while (
+            any(t.name == "PagePrefetch" for t in threading.enumerate())
+            and time.time() < deadline
+        ):
+            time.sleep(0.01)
+
+    assert not any(t.name == "PagePrefetch" for t in threading.enumerate())
+    assert fetch.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_prefetch_pages_async_without_token():
+    fetch = mock.Mock()
+
+    assert [page async for page in _prefetch.prefetch_pages_async("", fetch, 2)] == []
+    fetch.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_prefetch_pages_async_cancels_fetch():
+    cancelled = asyncio.Event()
+    first = cloud_catalog.ListSkusResponse(next_page_token="2")
+
+    async def fetch(token):
+        if token == "1":
+            return first
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    pages = _prefetch.prefetch_pages_async("1", fetch, 1)
+    assert await pages.__anext__() is first
+    await asyncio.sleep(0)
+    await pages.aclose()
+
+    await asyncio.wait_for(cancelled.wait(), 5)
@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import datetime
+
+import mock
+import pytest
+
+from google.auth import credentials
+from google.cloud.billing_v1 import price_history
+from google.cloud.billing_v1.services.cloud_catalog import CloudCatalogClient
+from google.cloud.billing_v1.types import cloud_catalog
+from google.protobuf import timestamp_pb2 as timestamp
+
+numpy = pytest.importorskip("numpy")
+
+
+DAY = 86400
+T0 = 1600000000
+
+
+def _info(seconds, summary):
+    return cloud_catalog.PricingInfo(
+        effective_time=timestamp.Timestamp(seconds=seconds), summary=summary,
+    )
+
+
+def _sku(sku_id, *infos):
+    return cloud_catalog.Sku(
+        name="services/s/skus/{}".format(sku_id),
+        sku_id=sku_id,
+        pricing_info=list(infos),
+    )
+
+
+def _timeline():
+    return price_history.PriceTimeline(
+        [
+            _sku("B", _info(T0 + 10 * DAY, "b1"), _info(T0, "b0")),
+            _sku("A", _info(T0 + 5 * DAY, "a1"), _info(T0 + 2 * DAY, "a0")),
+            # A second listing of B, e.g. from a later month.
+            _sku("B", _info(T0 + 20 * DAY, "b2"), _info(T0 + 10 * DAY, "dup")),
+            _sku("C"),
+        ]
+    )
+
+
+def _summaries(timeline, indexes):
+    return [timeline.pricing_info(i).summary if i >= 0 else None for i in indexes]
+
+
+def test_lookup_matches_reference():
+    timeline = _timeline()
+    skus = ["A", "A", "A", "A", "B", "B", "B", "B", "C", "Z"]
+    times = [
+        T0,
+        T0 + 2 * DAY,
+        T0 + 4 * DAY,
+        T0 + 30 * DAY,
+        T0 - 1,
+        T0 + 10 * DAY - 1,
+        T0 + 10 * DAY,
+        T0 + 25 * DAY,
+        T0 + 5 * DAY,
+        T0 + 5 * DAY,
+    ]
+
+    found = timeline.lookup(skus, times)
+
+    assert found.dtype == numpy.int64
+    assert _summaries(timeline, found) == [
+        None,
+        "a0",
+        "a0",
+        "a1",
+        None,
+        "b0",
+        "b1",
+        "b2",
+        None,
+        None,
+    ]
+    assert len(timeline) == 5
+    assert timeline.sku_ids == ["A", "B", "C"]
+
+
+def test_lookup_with_codes_and_datetime64():
+    timeline = _timeline()
+    codes = timeline.codes(["B", "missing", "A"])
+    times = numpy.array(
+        [T0 + 11 * DAY, T0 + 11 * DAY, T0 + 3 * DAY], dtype="datetime64[s]"
+    )
+
+    assert codes.tolist() == [1, -1, 0]
+    assert _summaries(timeline, timeline.lookup(codes, times)) == ["b1", None, "a0"]
+
+
+def test_lookup_broadcasts():
+    timeline = _timeline()
+
+    found = timeline.lookup("A", numpy.arange(T0, T0 + 10 * DAY, DAY))
+
+    assert _summaries(timeline, found) == [None, None] + ["a0"] * 3 + ["a1"] * 5
+
+
+def test_at():
+    timeline = _timeline()
+    when = datetime.datetime.fromtimestamp(T0 + 6 * DAY, datetime.timezone.utc)
+
+    assert timeline.at("A", when).summary == "a1"
+    assert timeline.at("A", T0) is None
+    assert timeline.at("Z", when) is None
+
+
+def test_pricing_info_rejects_missing_entry():
+    with pytest.raises(IndexError):
+        _timeline().pricing_info(-1)
+
+
+def test_requires_numpy():
+    with mock.patch.object(price_history, "numpy", None):
+        with pytest.raises(ImportError):
+            price_history.PriceTimeline([])
+
+
+def test_empty_timeline():
+    timeline = price_history.PriceTimeline([])
+
+    assert timeline.lookup(["A", "B"], [T0, T0]).tolist() == [-1, -1]
+    assert timeline.codes(["A"]).tolist() == [-1]
+
+
+UTC = datetime.timezone.utc
+
+
+def test_month_ranges_follow_pacific_months():
+    ranges = price_history.month_ranges(
+        datetime.datetime(2020, 1, 15, tzinfo=UTC),
+        datetime.datetime(2020, 4, 10, tzinfo=UTC),
+    )
+
+    assert ranges == [
+        (
+            datetime.datetime(2020, 1, 15, tzinfo=UTC),
+            datetime.datetime(2020, 2, 1, 8, tzinfo=UTC),
+        ),
+        (
+            datetime.datetime(2020, 2, 1, 8, tzinfo=UTC),
+            datetime.datetime(2020, 3, 1, 8, tzinfo=UTC),
+        ),
+        (
+            datetime.datetime(2020, 3, 1, 8, tzinfo=UTC),
+            datetime.datetime(2020, 4, 1, 7, tzinfo=UTC),
+        ),
+        (
+            datetime.datetime(2020, 4, 1, 7, tzinfo=UTC),
+            datetime.datetime(2020, 4, 10, tzinfo=UTC),
+        ),
+    ]
+
+
+@pytest.mark.parametrize(
+    "start,first_end",
+    [
+        # The first hour of a PDT month is still the previous month in PST.
+        (datetime.datetime(2020, 6, 1, 7, 30, tzinfo=UTC), (2020, 7, 1, 7)),
+        # Just before midnight PST on the last day of the year.
+        (datetime.datetime(2020, 12, 31, 23, tzinfo=UTC), (2021, 1, 1, 8)),
+        (datetime.datetime(2021, 1, 1, 8, tzinfo=UTC), (2021, 2, 1, 8)),
+        (datetime.datetime(2020, 10, 31, 23, tzinfo=UTC), (2020, 11, 1, 7)),
+    ],
+)
+def test_month_ranges_boundaries(start, first_end):
+    ranges = price_history.month_ranges(
+        start, datetime.datetime(2022, 1, 1, tzinfo=UTC)
+    )
+
+    assert ranges[0] == (start, datetime.datetime(*first_end, tzinfo=UTC))
+    for (_, end), (next_start, _) in zip(ranges, ranges[1:]):
+        assert end == next_start
+
+
+def test_month_ranges_rejects_bad_ranges():
+    start = datetime.datetime(2020, 1, 1, tzinfo=UTC)
+    with pytest.raises(ValueError):
+        price_history.month_ranges(start, start)
+    with pytest.raises(ValueError):
+        price_history.month_ranges(datetime.datetime(2020, 1, 1), start)
+
+
+@pytest.mark.parametrize(
+    "start,ok",
+    [
+        (datetime.datetime(2007, 3, 11, 9, 59, tzinfo=UTC), False),
+        (datetime.datetime(1999, 4, 1, tzinfo=UTC), False),
+        (datetime.datetime(2007, 3, 11, 10, tzinfo=UTC), True),
+    ],
+)
+def test_month_ranges_before_current_dst_rules(start, ok):
+    end = datetime.datetime(2007, 5, 1, tzinfo=UTC)
+    if ok:
+        assert price_history.month_ranges(start, end)[0] == (
+            start,
+            datetime.datetime(2007, 4, 1, 7, tzinfo=UTC),
+        )
+    else:
+        with pytest.raises(ValueError, match="2007-03-11"):
+            price_history.month_ranges(start, end)
+
+
+def test_fetch_price_history():
+    client = CloudCatalogClient(credentials=credentials.AnonymousCredentials(),)
+    month_starts = []
+
+    def call(request, **kwargs):
+        if isinstance(request, cloud_catalog.ListServicesRequest):
+            return cloud_catalog.ListServicesResponse(
+                services=[cloud_catalog.Service(name="services/s")]
+            )
+        month = request.start_time.month
+        month_starts.append((request.start_time, request.currency_code))
+        # The price rises in March; every month reports the price in
+        # effect at its start.
+        price = 2 if month >= 3 else 1
+        return cloud_catalog.ListSkusResponse(
+            skus=[
+                cloud_catalog.Sku(
+                    name="services/s/skus/A",
+                    sku_id="A",
+                    description="month {}".format(month),
+                    pricing_info=[
+                        cloud_catalog.PricingInfo(
+                            effective_time=request.start_time,
+                            summary="price {}".format(price),
+                        )
+                    ],
+                )
+            ]
+        )
+
+    with mock.patch.object(
+        type(client.transport.list_skus), "__call__", side_effect=call
+    ):
+        history = price_history.fetch_price_history(
+            client,
+            datetime.datetime(2020, 1, 10, tzinfo=UTC),
+            datetime.datetime(2020, 5, 1, tzinfo=UTC),
+            currency_code="EUR",
+        )
+
+    # 2020-05-01T00:00Z is still April in Los Angeles.
+    assert sorted(month_starts) == [
+        (datetime.datetime(2020, 1, 10, tzinfo=UTC), "EUR"),
+        (datetime.datetime(2020, 2, 1, 8, tzinfo=UTC), "EUR"),
+        (datetime.datetime(2020, 3, 1, 8, tzinfo=UTC), "EUR"),
+        (datetime.datetime(2020, 4, 1, 7, tzinfo=UTC), "EUR"),
+    ]
+    assert list(history) == ["services/s/skus/A"]
+    sku = history["services/s/skus/A"]
+    assert sku.description == "month 4"
+    assert [info.summary for info in sku.pricing_info] == ["price 1", "price 2"]
+    assert [info.effective_time.month for info in sku.pricing_info] == [1, 3]
+
+    timeline = price_history.PriceTimeline(history.values())
+    assert timeline.at("A", datetime.datetime(2020, 2, 1, tzinfo=UTC)).summary == (
+        "price 1"
+    )
+    assert timeline.at("A", datetime.datetime(2020, 4, 1, tzinfo=UTC)).summary == (
+        "price 2"
+    )
+
+
+def test_fetch_price_history_of_services():
+    client = CloudCatalogClient(credentials=credentials.AnonymousCredentials(),)
+
+    def call(request, **kwargs):
+        # The same SKU is listed under both services.
+        return cloud_catalog.ListSkusResponse(
+            skus=[
+                cloud_catalog.Sku(
+                    name="services/shared/skus/A",
+                    sku_id="A",
+                    description=request.parent,
+                    pricing_info=[_info(T0, "price")],
+                )
+            ]
+        )
+
+    with mock.patch.object(
+        type(client.transport.list_skus), "__call__", side_effect=call
+    ) as list_skus:
+        history = price_history.fetch_price_history(
+            client,
+            datetime.datetime(2020, 1, 10, tzinfo=UTC),
+            datetime.datetime(2020, 1, 20, tzinfo=UTC),
+            services=["services/one", "services/two"],
+            max_concurrency=1,
+        )
+
+    assert list_skus.call_count == 2
+    sku = history["services/shared/skus/A"]
+    # The first listing of a month wins.
+    assert sku.description == "services/one"
+    assert [info.summary for info in sku.pricing_info] == ["price"]
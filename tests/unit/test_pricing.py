@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import mock
+import pytest
+
+numpy = pytest.importorskip("numpy")
+
+from google.cloud.billing_v1 import pricing  # noqa: E402
+from google.cloud.billing_v1.types import cloud_catalog  # noqa: E402
+from google.type import money_pb2 as money  # noqa: E402
+
+
+def _expression(*tiers, factor=0.0):
+    return cloud_catalog.PricingExpression(
+        usage_unit="GiBy",
+        base_unit="By",
+        base_unit_conversion_factor=factor,
+        tiered_rates=[
+            cloud_catalog.PricingExpression.TierRate(
+                start_usage_amount=start,
+                unit_price=money.Money(currency_code="USD", units=units, nanos=nanos),
+            )
+            for start, units, nanos in tiers
+        ],
+    )
+
+
+def test_money_nanos_round_trip():
+    amount = money.Money(currency_code="USD", units=-3, nanos=-250000000)
+
+    assert pricing.money_to_nanos(amount) == -3250000000
+    assert pricing.nanos_to_money(-3250000000, "USD") == amount
+    assert pricing.nanos_to_money(1, "USD") == money.Money(currency_code="USD", nanos=1)
+
+
+def test_documented_example():
+    # The example from the PricingExpression docstring: the first 20 GB are
+    # free, the next 80 GB cost $10 each, and further usage $5 each.
+    compiled = pricing.TieredPricing.from_expression(
+        _expression((20, 10, 0), (100, 5, 0))
+    )
+
+    cost = compiled.cost([0, 20, 50, 100, 150])
+
+    numpy.testing.assert_array_equal(cost, [0, 0, 300, 800, 1050])
+    assert compiled.currency_code == "USD"
+
+
+def test_nanos_are_exact():
+    compiled = pricing.TieredPricing.from_expression(
+        _expression((0, 0, 1), (10, 123456789, 987654321))
+    )
+
+    cost = compiled.cost_nanos(numpy.array([3, 11], dtype=numpy.int64))
+
+    assert cost.dtype == numpy.int64
+    assert cost[0] == 3
+    assert cost[1] == 10 + 123456789987654321
+
+
+def test_cost_money():
+    compiled = pricing.TieredPricing.from_expression(_expression((0, 0, 400000000)))
+
+    assert compiled.cost_money(7) == money.Money(
+        currency_code="USD", units=2, nanos=800000000
+    )
+
+
+def test_base_units():
+    compiled = pricing.TieredPricing.from_expression(
+        _expression((0, 2, 0), factor=2 ** 30)
+    )
+
+    numpy.testing.assert_array_equal(
+        compiled.cost([2 ** 30, 3 * 2 ** 29], base_units=True), [2, 3]
+    )
+
+
+def test_base_units_without_factor():
+    compiled = pricing.TieredPricing.from_expression(_expression((0, 2, 0)))
+
+    with pytest.raises(ValueError):
+        compiled.cost([1], base_units=True)
+
+
+def test_matches_scalar_loop():
+    tiers = ((5, 0, 500000000), (25, 0, 250000000), (1000, 0, 100000000))
+    compiled = pricing.TieredPricing.from_expression(_expression(*tiers))
+    usage = numpy.random.RandomState(0).uniform(0, 2000, size=1000)
+
+    def scalar(quantity):
+        total = 0.0
+        for i, (start, units, nanos) in enumerate(tiers):
+            end = tiers[i + 1][0] if i + 1 < len(tiers) else float("inf")
+            if quantity > start:
+                total += (min(quantity, end) - start) * (units * 1e9 + nanos)
+        return round(total)
+
+    expected = [scalar(q) for q in usage]
+    numpy.testing.assert_array_equal(compiled.cost_nanos(usage), expected)
+
+
+def test_shape_is_preserved():
+    compiled = pricing.TieredPricing.from_expression(_expression((0, 1, 0)))
+
+    assert compiled.cost(numpy.ones((4, 3))).shape == (4, 3)
+
+
+def test_rejects_mixed_currencies():
+    expression = _expression((0, 1, 0), (10, 1, 0))
+    expression.tiered_rates[1].unit_price.currency_code = "EUR"
+
+    with pytest.raises(ValueError):
+        pricing.TieredPricing.from_expression(expression)
+
+
+def test_rejects_empty_and_unsorted_tiers():
+    with pytest.raises(ValueError):
+        pricing.TieredPricing.from_expression(cloud_catalog.PricingExpression())
+
+    with pytest.raises(ValueError):
+        pricing.TieredPricing([10, 0], [1, 1])
+
+
+@pytest.mark.parametrize("usage", [-5, numpy.nan, numpy.inf])
+def test_rejects_invalid_usage(usage):
+    compiled = pricing.TieredPricing.from_expression(_expression((0, 1, 0)))
+
+    with pytest.raises(ValueError):
+        compiled.cost_nanos([1, usage])
+
+
+def test_rejects_infinite_tiers():
+    with pytest.raises(ValueError):
+        pricing.TieredPricing([0, numpy.inf], [1, 1])
+
+
+def test_largest_cost():
+    compiled = pricing.TieredPricing([0], [10 ** 9])
+
+    cost = compiled.cost_nanos([9.2e9])
+
+    assert cost[0] == 9200000000000000000
+
+
+@pytest.mark.parametrize("usage", [[1e10, 9.3e9], [1e300]])
+def test_cost_overflow(usage):
+    compiled = pricing.TieredPricing([0], [10 ** 9])
+
+    with pytest.raises(OverflowError):
+        compiled.cost_nanos(usage)
+
+
+def test_accrued_cost_overflow():
+    # Each band fits, their sum does not.
+    with pytest.raises(OverflowError):
+        pricing.TieredPricing([0, 5e9, 1e10], [10 ** 9, 10 ** 9, 1])
+
+    compiled = pricing.TieredPricing([0, 5e9], [10 ** 9, 10 ** 9])
+    with pytest.raises(OverflowError):
+        compiled.cost_nanos([9.3e9])
+
+
+def test_without_currency():
+    expression = _expression((0, 1, 0))
+    expression.tiered_rates[0].unit_price.currency_code = ""
+
+    compiled = pricing.TieredPricing.from_expression(expression)
+
+    assert compiled.currency_code == ""
+
+
+def test_requires_numpy():
+    with mock.patch.object(pricing, "numpy", None):
+        with pytest.raises(ImportError):
+            pricing.TieredPricing([0], [1])
@@ -0,0 +1,465 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import asyncio
+import collections
+import threading
+import time
+
+import mock
+import pytest
+
+from google.api_core import exceptions
+from google.api_core import grpc_helpers_async
+from google.auth import credentials
+from google.cloud.billing_v1 import project_billing
+from google.cloud.billing_v1.fake_server import FakeBillingServer
+from google.cloud.billing_v1.fake_server import SyntheticDataset
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingAsyncClient
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingClient
+from google.cloud.billing_v1.types import cloud_billing
+
+
+PAGE_SIZE = 3
+
+# Ten projects per account; "orphan" is not linked to any.
+LINKS = {
+    "project-{}".format(number): "billingAccounts/{}".format(number // 10)
+    for number in range(30)
+}
+LINKS["orphan"] = ""
+
+
+def _info(project_id):
+    account = LINKS[project_id]
+    return cloud_billing.ProjectBillingInfo(
+        name="projects/{}/billingInfo".format(project_id),
+        project_id=project_id,
+        billing_account_name=account,
+        billing_enabled=bool(account),
+    )
+
+
+class _Backend:
+    def __init__(self, forbidden=()):
+        self.calls = collections.Counter()
+        self.forbidden = forbidden
+
+    def __call__(self, request, **kwargs):
+        if isinstance(request, cloud_billing.GetProjectBillingInfoRequest):
+            self.calls["get"] += 1
+            project_id = request.name.split("/")[1]
+            if project_id not in LINKS:
+                raise exceptions.NotFound(request.name)
+            return _info(project_id)
+
+        self.calls["list"] += 1
+        if request.name in self.forbidden:
+            raise exceptions.PermissionDenied(request.name)
+        projects = sorted(
+            project_id
+            for project_id, account in LINKS.items()
+            if account == request.name
+        )
+        start = int(request.page_token or 0)
+        end = start + PAGE_SIZE
+        return cloud_billing.ListProjectBillingInfoResponse(
+            project_billing_info=list(map(_info, projects[start:end])),
+            next_page_token=str(end) if end < len(projects) else "",
+        )
+
+
+def _run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def _batch_get(backend, project_ids, **kwargs):
+    client = CloudBillingClient(credentials=credentials.AnonymousCredentials())
+    stub = type(client.transport.get_project_billing_info)
+    with mock.patch.object(stub, "__call__", side_effect=backend):
+        return client.batch_get_project_billing_info(project_ids, **kwargs)
+
+
+def _batch_get_async(backend, project_ids, **kwargs):
+    async def batch_get():
+        client = CloudBillingAsyncClient(credentials=credentials.AnonymousCredentials())
+        stub = type(client.transport.get_project_billing_info)
+        with mock.patch.object(stub, "__call__") as call:
+            call.side_effect = lambda request, **kw: (
+                grpc_helpers_async.FakeUnaryUnaryCall(backend(request))
+            )
+            return await client.batch_get_project_billing_info(project_ids, **kwargs)
+
+    return _run(batch_get())
+
+
+@pytest.fixture(params=[_batch_get, _batch_get_async], ids=["sync", "async"])
+def batch_get(request):
+    return request.param
+
+
+def test_sweeps_hinted_accounts(batch_get):
+    backend = _Backend()
+    project_ids = ["project-{}".format(number) for number in range(20)] + ["orphan"]
+
+    infos = batch_get(
+        backend,
+        project_ids,
+        hint_accounts=["billingAccounts/0", "billingAccounts/1"],
+        max_concurrency=1,
+    )
+
+    assert list(infos) == project_ids
+    assert infos["project-12"].billing_account_name == "billingAccounts/1"
+    assert not infos["orphan"].billing_enabled
+    # Four pages per account, then a get for the project not found.
+    assert backend.calls == {"list": 8, "get": 1}
+
+
+def test_sweep_stops_once_everything_is_found(batch_get):
+    backend = _Backend()
+
+    infos = batch_get(
+        backend,
+        ["project-0", "project-1", "projects/project-2", "project-0"],
+        hint_accounts=["billingAccounts/0", "billingAccounts/2"],
+        max_concurrency=1,
+    )
+
+    assert list(infos) == ["project-0", "project-1", "project-2"]
+    assert backend.calls == {"list": 1}
+
+
+def test_sweep_gives_up_past_its_budget(batch_get):
+    backend = _Backend()
+    project_ids = ["project-{}".format(number) for number in (1, 21, 22)]
+
+    infos = batch_get(
+        backend,
+        project_ids,
+        hint_accounts=["billingAccounts/1", "billingAccounts/2"],
+        max_concurrency=1,
+    )
+
+    assert list(infos) == project_ids
+    # The sweep of account 1 uses up the budget of three RPCs without
+    # finding anything, and account 2 is never listed.
+    assert backend.calls == {"list": 3, "get": 3}
+
+
+def test_few_projects_are_fetched_directly(batch_get):
+    backend = _Backend()
+
+    infos = batch_get(
+        backend,
+        ["project-5"],
+        hint_accounts=["billingAccounts/0", "billingAccounts/1"],
+    )
+
+    assert infos["project-5"].project_id == "project-5"
+    assert backend.calls == {"get": 1}
+
+
+def test_list_strategy_has_no_budget(batch_get):
+    backend = _Backend()
+
+    batch_get(
+        backend,
+        ["project-29"],
+        hint_accounts=["billingAccounts/2"],
+        strategy=project_billing.STRATEGY_LIST,
+    )
+
+    assert backend.calls == {"list": 4}
+
+
+def test_get_strategy_ignores_hints(batch_get):
+    backend = _Backend()
+
+    batch_get(
+        backend,
+        ["project-0", "project-1"],
+        hint_accounts=["billingAccounts/0"],
+        strategy=project_billing.STRATEGY_GET,
+    )
+
+    assert backend.calls == {"get": 2}
+
+
+def test_unlistable_accounts_are_skipped(batch_get):
+    backend = _Backend(forbidden=["billingAccounts/0"])
+    project_ids = ["project-{}".format(number) for number in (0, 1, 10, 11)]
+
+    infos = batch_get(
+        backend,
+        project_ids,
+        hint_accounts=["billingAccounts/0", "billingAccounts/1"],
+        max_concurrency=1,
+    )
+
+    assert list(infos) == project_ids
+    # The failed list counts against the budget of four RPCs, which runs
+    # out while sweeping account 1.
+    assert backend.calls == {"list": 4, "get": 2}
+
+
+def test_get_errors_propagate(batch_get):
+    with pytest.raises(exceptions.NotFound):
+        batch_get(_Backend(), ["project-0", "missing"])
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{"strategy": "fastest"}, {"max_concurrency": 0}],
+)
+def test_invalid_arguments(batch_get, kwargs):
+    with pytest.raises(ValueError):
+        batch_get(_Backend(), ["project-0"], **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_async_client():
+    dataset = SyntheticDataset(accounts=3, projects=60)
+    project_ids = ["project-{}".format(number) for number in range(1, 61, 2)]
+
+    with FakeBillingServer(dataset, page_size=5) as server:
+        client = server.create_client(CloudBillingAsyncClient)
+        infos = await client.batch_get_project_billing_info(
+            project_ids, hint_accounts=list(dataset.accounts)[:2]
+        )
+
+    assert list(infos) == project_ids
+    for project_id, info in infos.items():
+        expected = dataset.projects[project_id]
+        assert info.billing_account_name == expected.billing_account_name
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket():
+    clock = _Clock()
+    bucket = project_billing.TokenBucket(rate=2, burst=2, timer=clock)
+
+    assert [bucket.reserve() for _ in range(4)] == [0, 0, 0.5, 1]
+    clock.now = 1.5
+    # The reservations queue up behind each other.
+    assert bucket.reserve() == 0
+    clock.now = 10
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0.5]
+
+
+@pytest.mark.parametrize("kwargs", [{"rate": 0}, {"rate": 1, "burst": 0}])
+def test_token_bucket_invalid_arguments(kwargs):
+    with pytest.raises(ValueError):
+        project_billing.TokenBucket(**kwargs)
+
+
+class _Updater:
+    def __init__(self, errors=None):
+        self.errors = errors or {}
+        self.times = []
+        self._lock = threading.Lock()
+
+    def __call__(self, request, **kwargs):
+        with self._lock:
+            self.times.append(time.monotonic())
+            errors = self.errors.get(request.name)
+            if errors:
+                raise errors.pop(0)
+        return cloud_billing.ProjectBillingInfo(
+            name=request.name + "/billingInfo",
+            billing_account_name=request.project_billing_info.billing_account_name,
+        )
+
+
+def _bulk_update(updater, updates, **kwargs):
+    client = CloudBillingClient(credentials=credentials.AnonymousCredentials())
+    stub = type(client.transport.update_project_billing_info)
+    with mock.patch.object(stub, "__call__", side_effect=updater):
+        return client.bulk_update_project_billing_info(updates, **kwargs)
+
+
+def _bulk_update_async(updater, updates, **kwargs):
+    async def bulk_update():
+        client = CloudBillingAsyncClient(credentials=credentials.AnonymousCredentials())
+        stub = type(client.transport.update_project_billing_info)
+        with mock.patch.object(stub, "__call__") as call:
+            call.side_effect = lambda request, **kw: (
+                grpc_helpers_async.FakeUnaryUnaryCall(updater(request))
+            )
+            return await client.bulk_update_project_billing_info(updates, **kwargs)
+
+    return _run(bulk_update())
+
+
+@pytest.fixture(params=[_bulk_update, _bulk_update_async], ids=["sync", "async"])
+def bulk_update(request):
+    return request.param
+
+
+def testbulk_update(bulk_update):
+    updater = _Updater(
+        errors={"projects/b": [exceptions.PermissionDenied("not an owner")]}
+    )
+
+    results = bulk_update(
+        updater,
+        [("a", "billingAccounts/1"), ("projects/b", "billingAccounts/1"), ("c", "")],
+    )
+
+    assert [result.project_id for result in results] == ["a", "b", "c"]
+    assert [result.ok for result in results] == [True, False, True]
+    assert results[0].info.billing_account_name == "billingAccounts/1"
+    assert results[2].info.billing_account_name == ""
+    assert isinstance(results[1].error, exceptions.PermissionDenied)
+    assert [result.attempts for result in results] == [1, 1, 1]
+
+
+def test_bulk_update_backs_off_when_exhausted(bulk_update):
+    updater = _Updater(
+        errors={
+            "projects/a": [exceptions.ResourceExhausted("quota")] * 2,
+            "projects/b": [exceptions.ResourceExhausted("quota")] * 3,
+        }
+    )
+
+    results = bulk_update(
+        updater,
+        {"a": "billingAccounts/1", "b": "billingAccounts/1"},
+        max_concurrency=1,
+        max_attempts=3,
+        initial_backoff=0.01,
+    )
+
+    assert results[0].ok and results[0].attempts == 3
+    assert not results[1].ok and results[1].attempts == 3
+    assert isinstance(results[1].error, exceptions.ResourceExhausted)
+    gaps = [later - earlier for earlier, later in zip(updater.times, updater.times[1:])]
+    # 0.01s and 0.02s after the failures of "a"; the success resets the
+    # backoff, so 0.01s and 0.02s again after those of "b".
+    assert gaps[0] >= 0.01 and gaps[1] >= 0.02
+    assert gaps[3] >= 0.01 and gaps[4] >= 0.02
+
+
+def test_bulk_update_rate_limit(bulk_update):
+    updater = _Updater()
+
+    bulk_update(
+        updater, {str(number): "" for number in range(5)}, rate=100, max_concurrency=5
+    )
+
+    assert updater.times[-1] - updater.times[0] >= 0.035
+
+
+def test_bulk_update_deadline(bulk_update):
+    updater = _Updater()
+
+    results = bulk_update(
+        updater, {str(number): "" for number in range(5)}, rate=10, deadline=0.25
+    )
+
+    assert [result.ok for result in results].count(True) == 3
+    for result in results[3:]:
+        assert isinstance(result.error, exceptions.DeadlineExceeded)
+        assert result.attempts == 0
+
+
+def test_bulk_update_deadline_while_timing_out(bulk_update):
+    updater = _Updater(
+        errors={"projects/a": [exceptions.DeadlineExceeded("timed out")] * 1000}
+    )
+    start = time.monotonic()
+
+    results = bulk_update(
+        updater,
+        {"a": "billingAccounts/1", "b": "billingAccounts/1"},
+        max_concurrency=1,
+        deadline=0.2,
+        max_attempts=1000,
+        initial_backoff=0.01,
+        max_backoff=0.01,
+    )
+
+    assert time.monotonic() - start < 1
+    assert isinstance(results[0].error, exceptions.DeadlineExceeded)
+    assert 1 < results[0].attempts < 1000
+    # The other updates still report their own outcome.
+    assert isinstance(results[1].error, exceptions.DeadlineExceeded)
+    assert results[1].attempts == 0
+
+
+def test_bulk_update_retries_transient_errors(bulk_update):
+    updater = _Updater(
+        errors={
+            "projects/a": [exceptions.ServiceUnavailable("unavailable")],
+            "projects/b": [exceptions.RetryError("gave up", None)],
+        }
+    )
+
+    results = bulk_update(
+        updater, {"a": "", "b": "", "c": ""}, max_concurrency=1, initial_backoff=0.01,
+    )
+
+    assert [result.ok for result in results] == [True, False, True]
+    assert [result.attempts for result in results] == [2, 1, 1]
+    assert isinstance(results[1].error, exceptions.RetryError)
+
+
+@pytest.mark.parametrize("kwargs", [{"max_concurrency": 0}, {"max_attempts": 0}])
+def test_bulk_update_invalid_arguments(bulk_update, kwargs):
+    with pytest.raises(ValueError):
+        bulk_update(_Updater(), {"a": ""}, **kwargs)
+
+
+def test_bulk_update_pauses_once_per_burst():
+    throttle = project_billing._Throttle(None, None, 1.0, 10.0)
+
+    throttle.exhausted()
+    # Failures of RPCs sent before the pause do not lengthen it.
+    throttle.exhausted()
+
+    assert 0.9 < throttle.delay() <= 1.0
+    assert throttle._backoff == 2.0
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_async_client():
+    client = CloudBillingAsyncClient(credentials=credentials.AnonymousCredentials())
+    updater = _Updater(errors={"projects/a": [exceptions.ResourceExhausted("quota")]})
+
+    with mock.patch.object(
+        type(client.transport.update_project_billing_info), "__call__"
+    ) as call:
+        call.side_effect = lambda request, **kwargs: (
+            grpc_helpers_async.FakeUnaryUnaryCall(updater(request))
+        )
+        results = await client.bulk_update_project_billing_info(
+            {"a": "billingAccounts/1", "b": "billingAccounts/2"}, initial_backoff=0.01
+        )
+
+    assert [result.ok for result in results] == [True, True]
+    assert [result.attempts for result in results] == [2, 1]
+    assert results[1].info.billing_account_name == "billingAccounts/2"
@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import mock
+import pytest
+
+from google.api_core import exceptions
+from google.api_core import grpc_helpers_async
+from google.auth import credentials
+from google.cloud.billing_v1.response_cache import ResponseCache
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingAsyncClient
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingClient
+from google.cloud.billing_v1.types import cloud_billing
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _info(name, account="billingAccounts/1"):
+    return cloud_billing.ProjectBillingInfo(
+        name=name + "/billingInfo",
+        billing_account_name=account,
+        billing_enabled=bool(account),
+    )
+
+
+def test_ttl():
+    clock = _Clock()
+    cache = ResponseCache(ttl=10, timer=clock)
+    cache.put("a", _info("projects/a"))
+
+    clock.now = 9.9
+    assert cache.get("a") == _info("projects/a")
+    clock.now = 10
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lru_eviction():
+    cache = ResponseCache(max_size=2)
+    cache.put("a", _info("projects/a"))
+    cache.put("b", _info("projects/b"))
+    cache.get("a")
+    cache.put("c", _info("projects/c"))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.evictions == 1
+
+
+def test_entries_are_copied():
+    cache = ResponseCache()
+    info = _info("projects/a")
+    cache.put("a", info)
+    info.billing_enabled = False
+    cache.get("a").billing_enabled = False
+
+    assert cache.get("a").billing_enabled
+
+
+def test_invalidate():
+    cache = ResponseCache()
+    cache.put("a", _info("projects/a"))
+    cache.put("b", _info("projects/b"))
+
+    cache.invalidate("a")
+    cache.invalidate("missing")
+    assert cache.get("a") is None
+    assert cache.get("b") is not None
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_put_after_invalidation_is_dropped():
+    cache = ResponseCache()
+    generation = cache.generation
+    cache.invalidate("a")
+
+    assert not cache.put("a", _info("projects/a"), generation)
+    assert cache.get("a") is None
+    assert cache.put("a", _info("projects/a"), cache.generation)
+
+
+@pytest.mark.parametrize("kwargs", [{"ttl": -1}, {"max_size": 0}])
+def test_invalid_arguments(kwargs):
+    with pytest.raises(ValueError):
+        ResponseCache(**kwargs)
+
+
+def _make_client(cache):
+    return CloudBillingClient(
+        credentials=credentials.AnonymousCredentials(), response_cache=cache,
+    )
+
+
+def test_client_get_project_billing_info():
+    client = _make_client(ResponseCache())
+    stub = type(client.transport.get_project_billing_info)
+
+    with mock.patch.object(stub, "__call__") as call:
+        call.side_effect = lambda request, **kwargs: _info(request.name)
+        first = client.get_project_billing_info(name="projects/a")
+        second = client.get_project_billing_info(name="projects/a")
+        client.get_project_billing_info(name="projects/b")
+
+    assert first == second == _info("projects/a")
+    assert call.call_count == 2
+
+
+def test_client_get_billing_account():
+    client = _make_client(ResponseCache())
+
+    with mock.patch.object(
+        type(client.transport.get_billing_account), "__call__"
+    ) as call:
+        call.side_effect = lambda request, **kwargs: cloud_billing.BillingAccount(
+            name=request.name
+        )
+        first = client.get_billing_account(name="billingAccounts/1")
+        second = client.get_billing_account(name="billingAccounts/1")
+
+    assert first == second
+    assert call.call_count == 1
+
+
+def test_client_update_invalidates():
+    client = _make_client(ResponseCache())
+    accounts = {"projects/a": "billingAccounts/1"}
+
+    def handle(request, **kwargs):
+        if isinstance(request, cloud_billing.UpdateProjectBillingInfoRequest):
+            accounts[request.name] = request.project_billing_info.billing_account_name
+        return _info(request.name, accounts[request.name])
+
+    with mock.patch.object(
+        type(client.transport.get_project_billing_info), "__call__"
+    ) as call:
+        call.side_effect = handle
+        assert client.get_project_billing_info(name="projects/a").billing_enabled
+        client.update_project_billing_info(
+            name="projects/a", project_billing_info={"billing_account_name": ""},
+        )
+        assert not client.get_project_billing_info(name="projects/a").billing_enabled
+
+    assert call.call_count == 3
+
+
+def test_client_failed_update_invalidates():
+    cache = ResponseCache()
+    client = _make_client(cache)
+
+    with mock.patch.object(
+        type(client.transport.get_billing_account), "__call__"
+    ) as call:
+        call.side_effect = lambda request, **kwargs: cloud_billing.BillingAccount(
+            name=request.name
+        )
+        client.get_billing_account(name="billingAccounts/1")
+        call.side_effect = exceptions.DeadlineExceeded("timed out")
+        with pytest.raises(exceptions.DeadlineExceeded):
+            client.update_billing_account(
+                name="billingAccounts/1", account={"display_name": "x"}, retry=None
+            )
+
+    assert cache.get((client._scope, "GetBillingAccount", "billingAccounts/1")) is None
+
+
+def test_clients_sharing_a_cache_do_not_share_entries():
+    cache = ResponseCache()
+    clients = [_make_client(cache), _make_client(cache)]
+    stub = type(clients[0].transport.get_project_billing_info)
+
+    with mock.patch.object(stub, "__call__") as call:
+        call.side_effect = lambda request, **kwargs: _info(request.name)
+        for client in clients * 2:
+            client.get_project_billing_info(name="projects/a")
+
+    # Each client may call as another principal, so each one reads its own
+    # entry.
+    assert call.call_count == 2
+    assert len(cache) == 2
+
+
+def test_client_without_cache():
+    client = _make_client(None)
+
+    with mock.patch.object(
+        type(client.transport.get_billing_account), "__call__"
+    ) as call:
+        call.return_value = cloud_billing.BillingAccount(name="billingAccounts/1")
+        client.get_billing_account(name="billingAccounts/1")
+        client.get_billing_account(name="billingAccounts/1")
+
+    assert call.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_async_client():
+    client = CloudBillingAsyncClient(
+        credentials=credentials.AnonymousCredentials(), response_cache=ResponseCache(),
+    )
+    accounts = {}
+
+    def handle(request, **kwargs):
+        if isinstance(request, cloud_billing.UpdateBillingAccountRequest):
+            accounts[request.name] = request.account.display_name
+        return grpc_helpers_async.FakeUnaryUnaryCall(
+            cloud_billing.BillingAccount(
+                name=request.name, display_name=accounts.get(request.name, "")
+            )
+        )
+
+    with mock.patch.object(
+        type(client.transport.get_billing_account), "__call__"
+    ) as call:
+        call.side_effect = handle
+        await client.get_billing_account(name="billingAccounts/1")
+        account = await client.get_billing_account(name="billingAccounts/1")
+        assert account.display_name == ""
+        await client.update_billing_account(
+            name="billingAccounts/1", account={"display_name": "Renamed"}
+        )
+        account = await client.get_billing_account(name="billingAccounts/1")
+
+    assert account.display_name == "Renamed"
+    assert call.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_async_client_project_billing_info():
+    client = CloudBillingAsyncClient(
+        credentials=credentials.AnonymousCredentials(), response_cache=ResponseCache(),
+    )
+    accounts = {"projects/a": "billingAccounts/1"}
+
+    def handle(request, **kwargs):
+        if isinstance(request, cloud_billing.UpdateProjectBillingInfoRequest):
+            accounts[request.name] = request.project_billing_info.billing_account_name
+        return grpc_helpers_async.FakeUnaryUnaryCall(
+            _info(request.name, accounts[request.name])
+        )
+
+    with mock.patch.object(
+        type(client.transport.get_project_billing_info), "__call__"
+    ) as call:
+        call.side_effect = handle
+        await client.get_project_billing_info(name="projects/a")
+        info = await client.get_project_billing_info(name="projects/a")
+        assert info.billing_enabled
+        await client.update_project_billing_info(
+            name="projects/a", project_billing_info={"billing_account_name": ""},
+        )
+        info = await client.get_project_billing_info(name="projects/a")
+
+    assert not info.billing_enabled
+    assert call.call_count == 3
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import mock
+import pytest
+
+from google.api_core import exceptions
+from google.auth import credentials
+from google.cloud.billing_v1.fake_server import FakeBillingServer
+from google.cloud.billing_v1.fake_server import SyntheticDataset
+from google.cloud.billing_v1.retry_budget import RetryBudget
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingAsyncClient
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingClient
+from google.cloud.billing_v1.services.cloud_billing import transports
+from google.cloud.billing_v1.types import cloud_billing
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _withdraw_all(budget):
+    count = 0
+    while budget.try_withdraw():
+        count += 1
+    return count
+
+
+def test_floor():
+    budget = RetryBudget(ratio=0.5, min_retries_per_second=0.3, timer=_Clock())
+
+    assert _withdraw_all(budget) == 3
+    assert budget.rejected == 1
+
+
+def test_ratio():
+    budget = RetryBudget(ratio=0.5, min_retries_per_second=0, timer=_Clock())
+    for _ in range(10):
+        budget.deposit()
+
+    assert _withdraw_all(budget) == 5
+
+
+def test_window():
+    clock = _Clock()
+    budget = RetryBudget(ratio=1, min_retries_per_second=0, window=10, timer=clock)
+    for _ in range(4):
+        budget.deposit()
+    assert _withdraw_all(budget) == 4
+
+    clock.now = 5
+    budget.deposit()
+    assert _withdraw_all(budget) == 1
+
+    # The calls and retries of the first second have expired.
+    clock.now = 11
+    assert _withdraw_all(budget) == 0
+    clock.now = 100
+    budget.deposit()
+    budget.deposit()
+    assert _withdraw_all(budget) == 2
+
+
+def test_limit_predicate():
+    budget = RetryBudget(ratio=0, min_retries_per_second=0.1, timer=_Clock())
+    predicate = budget.limit_predicate(
+        lambda exc: isinstance(exc, exceptions.ServiceUnavailable)
+    )
+
+    assert not predicate(exceptions.NotFound("gone"))
+    assert predicate(exceptions.ServiceUnavailable("down"))
+    assert not predicate(exceptions.ServiceUnavailable("down"))
+    assert budget.rejected == 1
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{"ratio": -1}, {"min_retries_per_second": -1}, {"window": 0}]
+)
+def test_invalid_arguments(kwargs):
+    with pytest.raises(ValueError):
+        RetryBudget(**kwargs)
+
+
+def test_transport_retries_within_budget():
+    budget = RetryBudget(ratio=0, min_retries_per_second=0.2)
+    client = CloudBillingClient(
+        transport=transports.CloudBillingGrpcTransport(
+            credentials=credentials.AnonymousCredentials(), retry_budget=budget
+        )
+    )
+
+    with mock.patch.object(
+        type(client.transport.get_billing_account), "__call__"
+    ) as call:
+        call.side_effect = exceptions.ServiceUnavailable("down")
+        with pytest.raises(exceptions.ServiceUnavailable):
+            client.get_billing_account(name="billingAccounts/1")
+        assert call.call_count == 3
+
+        # The budget is spent: the next call fails at once.
+        with pytest.raises(exceptions.ServiceUnavailable):
+            client.get_billing_account(name="billingAccounts/1")
+        assert call.call_count == 4
+
+        call.side_effect = None
+        call.return_value = cloud_billing.BillingAccount(name="billingAccounts/1")
+        client.get_billing_account(name="billingAccounts/1")
+
+    assert budget.rejected == 2
+
+
+@pytest.mark.asyncio
+async def test_async_transport_counts_calls():
+    budget = RetryBudget(ratio=1, min_retries_per_second=0)
+
+    with FakeBillingServer(SyntheticDataset(accounts=1)) as server:
+        client = server.create_client(CloudBillingAsyncClient, retry_budget=budget)
+        await client.list_billing_accounts()
+        await client.list_billing_accounts()
+
+    assert _withdraw_all(budget) == 2
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import grpc
+from grpc.experimental import aio
+import mock
+import pytest
+
+from google import auth
+from google.api_core import exceptions
+from google.auth import credentials
+from google.auth import crypt
+import google.auth.transport.grpc
+from google.cloud.billing_v1.concurrency_limiter import AdaptiveConcurrencyLimiter
+from google.cloud.billing_v1.fake_server import FakeBillingServer
+from google.cloud.billing_v1.fake_server import SyntheticDataset
+from google.cloud.billing_v1.services import _channel_pool
+from google.cloud.billing_v1.services import _warmup
+from google.cloud.billing_v1.services.cloud_billing import transports as billing
+from google.cloud.billing_v1.shared_channel import SharedAsyncChannel
+from google.cloud.billing_v1.shared_channel import SharedChannel
+from google.oauth2 import service_account
+
+
+DATASET = SyntheticDataset(accounts=1, services=1)
+
+
+def _patch_create_channel(transport_class, create):
+    return mock.patch.object(transport_class, "create_channel", side_effect=create)
+
+
+def test_clients_share_one_channel():
+    creds = credentials.AnonymousCredentials()
+
+    with FakeBillingServer(DATASET) as server, _patch_create_channel(
+        billing.CloudBillingGrpcTransport,
+        lambda host, **kwargs: grpc.insecure_channel(server.address),
+    ) as create_channel:
+        with SharedChannel(credentials=creds) as shared:
+            billing_client, catalog_client = shared.clients()
+            shared.warmup(timeout=5)
+
+            assert len(list(billing_client.list_billing_accounts())) == 1
+            assert len(list(catalog_client.list_services())) == 1
+            assert billing_client.transport.grpc_channel is shared.channel
+            assert catalog_client.transport.grpc_channel is shared.channel
+
+    create_channel.assert_called_once()
+    args, kwargs = create_channel.call_args
+    assert args == ("cloudbilling.googleapis.com:443",)
+    assert kwargs["credentials"] is creds is shared.credentials
+
+
+def test_transport_arguments():
+    limiter = AdaptiveConcurrencyLimiter()
+
+    with _patch_create_channel(
+        billing.CloudBillingGrpcTransport, lambda host, **kwargs: mock.Mock()
+    ):
+        shared = SharedChannel(credentials=credentials.AnonymousCredentials())
+        client = shared.catalog_client(concurrency_limiter=limiter)
+
+    assert client.transport.grpc_channel is not shared.channel
+    assert client.transport.grpc_channel._channel is shared.channel
+
+
+def test_channel_pool():
+    with _patch_create_channel(
+        billing.CloudBillingGrpcTransport, lambda host, **kwargs: mock.Mock()
+    ) as create_channel:
+        shared = SharedChannel(
+            credentials=credentials.AnonymousCredentials(), channel_pool_size=3
+        )
+
+    assert isinstance(shared.channel, _channel_pool.ChannelPool)
+    assert create_channel.call_count == 3
+
+
+def test_default_credentials():
+    creds = credentials.AnonymousCredentials()
+
+    with mock.patch.object(auth, "default", return_value=(creds, None)) as default:
+        with _patch_create_channel(
+            billing.CloudBillingGrpcTransport, lambda host, **kwargs: mock.Mock()
+        ):
+            shared = SharedChannel(quota_project_id="octopus")
+
+    default.assert_called_once_with(
+        scopes=billing.CloudBillingTransport.AUTH_SCOPES, quota_project_id="octopus"
+    )
+    assert shared.credentials is creds
+
+
+def _service_account():
+    return service_account.Credentials(
+        mock.Mock(spec=crypt.Signer),
+        "billing@octopus.iam.gserviceaccount.com",
+        "https://oauth2.googleapis.com/token",
+    )
+
+
+def _patch_metadata_plugin():
+    plugin_class = google.auth.transport.grpc.AuthMetadataPlugin
+    return mock.patch.object(
+        plugin_class, "__init__", autospec=True, side_effect=plugin_class.__init__
+    )
+
+
+@pytest.mark.parametrize("channel_pool_size", [1, 2])
+def test_channel_uses_the_shared_credentials(channel_pool_size):
+    with _patch_metadata_plugin() as plugin:
+        shared = SharedChannel(
+            credentials=_service_account(),
+            quota_project_id="octopus",
+            channel_pool_size=channel_pool_size,
+        )
+
+    # The channel sends the tokens of the very credentials warmup refreshes.
+    assert plugin.call_count == channel_pool_size
+    for (_, channel_credentials, _), _ in plugin.call_args_list:
+        assert channel_credentials is shared.credentials
+    assert shared.credentials.quota_project_id == "octopus"
+    assert not shared.credentials.requires_scopes
+    shared.close()
+
+
+@pytest.mark.asyncio
+async def test_async_channel_uses_the_shared_credentials():
+    with _patch_metadata_plugin() as plugin:
+        shared = SharedAsyncChannel(
+            credentials=_service_account(), quota_project_id="octopus"
+        )
+
+    (_, channel_credentials, _), _ = plugin.call_args
+    assert channel_credentials is shared.credentials
+    assert shared.credentials.quota_project_id == "octopus"
+    await shared.close()
+
+
+def test_duplicate_credentials():
+    with pytest.raises(exceptions.DuplicateCredentialArgs):
+        SharedChannel(
+            credentials=credentials.AnonymousCredentials(),
+            credentials_file="credentials.json",
+        )
+
+
+@pytest.mark.asyncio
+async def test_async_clients_share_one_channel():
+    with FakeBillingServer(DATASET) as server, _patch_create_channel(
+        billing.CloudBillingGrpcAsyncIOTransport,
+        lambda host, **kwargs: aio.insecure_channel(server.address),
+    ):
+        async with SharedAsyncChannel(
+            credentials=credentials.AnonymousCredentials()
+        ) as shared:
+            billing_client, catalog_client = shared.clients()
+            await shared.warmup(timeout=5)
+
+            accounts = await billing_client.list_billing_accounts()
+            services = await catalog_client.list_services()
+            assert len(accounts.billing_accounts) == len(services.services) == 1
+            assert catalog_client.transport.grpc_channel is shared.channel
+
+
+def test_async_channel_is_not_pooled():
+    with pytest.raises(ValueError):
+        SharedAsyncChannel(
+            credentials=credentials.AnonymousCredentials(), channel_pool_size=2
+        )
+
+
+def test_credentials_file():
+    creds = _service_account()
+
+    with mock.patch.object(
+        auth, "load_credentials_from_file", return_value=(creds, None)
+    ) as load, _patch_create_channel(
+        billing.CloudBillingGrpcTransport, lambda host, **kwargs: mock.Mock()
+    ):
+        shared = SharedChannel(credentials_file="credentials.json", scopes=["a"])
+
+    load.assert_called_once_with(
+        "credentials.json", scopes=["a"], quota_project_id=None
+    )
+    assert shared.credentials.scopes == ["a"]
+
+
+def test_connect():
+    shared = SharedChannel(credentials=credentials.AnonymousCredentials())
+
+    with mock.patch.object(_warmup, "start") as start:
+        shared.connect()
+
+    start.assert_called_once_with([shared.channel], shared.credentials)
+    assert repr(shared) == "SharedChannel<host='cloudbilling.googleapis.com:443'>"
+    shared.close()
+
+
+@pytest.mark.asyncio
+async def test_async_channel_needs_async_with():
+    shared = SharedAsyncChannel(credentials=credentials.AnonymousCredentials())
+
+    with pytest.raises(TypeError):
+        shared.__enter__()
+    await shared.close()
@@ -0,0 +1,368 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+import mock
+import pytest
+
+from google.api_core import exceptions
+from google.api_core import grpc_helpers_async
+from google.auth import credentials
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingAsyncClient
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingClient
+from google.cloud.billing_v1.singleflight import Singleflight
+from google.cloud.billing_v1.types import cloud_billing
+from google.iam.v1 import iam_policy_pb2 as iam_policy  # type: ignore
+from google.iam.v1 import policy_pb2 as policy  # type: ignore
+
+
+CALLERS = 8
+
+
+def _account(request, **kwargs):
+    return cloud_billing.BillingAccount(name=request.name, display_name="Account")
+
+
+def _wait_for_callers(singleflight, count):
+    deadline = time.monotonic() + 5
+    while singleflight.calls < count and time.monotonic() < deadline:
+        # Whether the callers are still arriving is up to the scheduler.
+        time.sleep(0.001)  # pragma: NO COVER
+
+
+def _make_client(singleflight):
+    return CloudBillingClient(
+        credentials=credentials.AnonymousCredentials(), singleflight=singleflight,
+    )
+
+
+def test_call_coalesces_threads():
+    singleflight = Singleflight()
+    release = threading.Event()
+    func = mock.Mock(side_effect=lambda: release.wait(5) and "response")
+
+    with concurrent.futures.ThreadPoolExecutor(CALLERS) as executor:
+        futures = [
+            executor.submit(singleflight.call, "key", func) for _ in range(CALLERS)
+        ]
+        _wait_for_callers(singleflight, CALLERS)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert func.call_count == 1
+    assert results == ["response"] * CALLERS
+    assert singleflight.coalesced == CALLERS - 1
+    assert singleflight.sent == 1
+
+
+def test_call_shares_errors():
+    singleflight = Singleflight()
+    release = threading.Event()
+
+    def fail():
+        release.wait(5)
+        raise exceptions.ServiceUnavailable("down")
+
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        futures = [executor.submit(singleflight.call, "key", fail) for _ in range(2)]
+        _wait_for_callers(singleflight, 2)
+        release.set()
+        for future in futures:
+            with pytest.raises(exceptions.ServiceUnavailable):
+                future.result()
+
+    # The failed call is not remembered.
+    assert singleflight.call("key", lambda: "again") == "again"
+
+
+def test_leader_changes_do_not_reach_followers():
+    singleflight = Singleflight()
+    release = threading.Event()
+    sent = cloud_billing.BillingAccount(name="billingAccounts/1", display_name="A")
+
+    def send():
+        release.wait(5)
+        return sent
+
+    def lead():
+        account = singleflight.call("key", send)
+        account.display_name = "Changed"
+        return account
+
+    with concurrent.futures.ThreadPoolExecutor(CALLERS) as executor:
+        leader = executor.submit(lead)
+        _wait_for_callers(singleflight, 1)
+        followers = [
+            executor.submit(singleflight.call, "key", send) for _ in range(CALLERS - 1)
+        ]
+        _wait_for_callers(singleflight, CALLERS)
+        release.set()
+        accounts = [future.result() for future in followers]
+
+    assert leader.result().display_name == "Changed"
+    assert [account.display_name for account in accounts] == ["A"] * (CALLERS - 1)
+    # The shared response itself is never handed out.
+    assert sent.display_name == "A"
+    assert all(account is not sent for account in accounts + [leader.result()])
+
+
+def test_client_coalesces_identical_requests():
+    singleflight = Singleflight()
+    client = _make_client(singleflight)
+    release = threading.Event()
+
+    def get(request, **kwargs):
+        release.wait(5)
+        return _account(request)
+
+    with mock.patch.object(
+        type(client.transport.get_billing_account), "__call__", side_effect=get
+    ) as call:
+        with concurrent.futures.ThreadPoolExecutor(CALLERS) as executor:
+            futures = [
+                executor.submit(
+                    client.get_billing_account,
+                    name="billingAccounts/{}".format(number % 2),
+                )
+                for number in range(CALLERS)
+            ]
+            _wait_for_callers(singleflight, CALLERS)
+            release.set()
+            accounts = [future.result() for future in futures]
+
+    assert call.call_count == 2
+    assert singleflight.coalesced == CALLERS - 2
+    assert [account.name for account in accounts] == [
+        "billingAccounts/{}".format(number % 2) for number in range(CALLERS)
+    ]
+    # Every caller owns its response.
+    accounts[0].display_name = "Changed"
+    assert accounts[2].display_name == "Account"
+
+
+def test_clients_sharing_a_singleflight_are_not_coalesced():
+    singleflight = Singleflight()
+    clients = [_make_client(singleflight), _make_client(singleflight)]
+    release = threading.Event()
+
+    def get(request, **kwargs):
+        release.wait(5)
+        return _account(request)
+
+    with mock.patch.object(
+        type(clients[0].transport.get_billing_account), "__call__", side_effect=get
+    ) as call:
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            futures = [
+                executor.submit(client.get_billing_account, name="billingAccounts/1")
+                for client in clients * 2
+            ]
+            _wait_for_callers(singleflight, 4)
+            release.set()
+            for future in futures:
+                future.result()
+
+    # One RPC per client: the clients may call as different principals.
+    assert call.call_count == 2
+    assert singleflight.coalesced == 2
+
+
+def test_client_sequential_calls_are_not_coalesced():
+    singleflight = Singleflight()
+    client = _make_client(singleflight)
+
+    with mock.patch.object(
+        type(client.transport.get_project_billing_info), "__call__"
+    ) as call:
+        call.return_value = cloud_billing.ProjectBillingInfo(name="projects/a")
+        client.get_project_billing_info(name="projects/a")
+        client.get_project_billing_info(name="projects/a")
+
+    assert call.call_count == 2
+    assert singleflight.coalesced == 0
+
+
+def test_client_iam_requests():
+    singleflight = Singleflight()
+    client = _make_client(singleflight)
+
+    with mock.patch.object(type(client.transport.get_iam_policy), "__call__") as call:
+        call.side_effect = [
+            policy.Policy(version=3),
+            iam_policy.TestIamPermissionsResponse(permissions=["a"]),
+        ]
+        assert client.get_iam_policy(resource="billingAccounts/1").version == 3
+        response = client.test_iam_permissions(
+            resource="billingAccounts/1", permissions=["a", "b"]
+        )
+
+    assert list(response.permissions) == ["a"]
+    assert call.call_count == 2
+    assert singleflight.coalesced == 0
+
+
+@pytest.mark.asyncio
+async def test_async_client_coalesces():
+    singleflight = Singleflight()
+    client = CloudBillingAsyncClient(
+        credentials=credentials.AnonymousCredentials(), singleflight=singleflight,
+    )
+
+    with mock.patch.object(
+        type(client.transport.get_billing_account), "__call__"
+    ) as call:
+        call.side_effect = lambda request, **kwargs: (
+            grpc_helpers_async.FakeUnaryUnaryCall(_account(request))
+        )
+        accounts = await asyncio.gather(
+            *[
+                client.get_billing_account(name="billingAccounts/1")
+                for _ in range(CALLERS)
+            ]
+        )
+
+    assert call.call_count == 1
+    assert singleflight.coalesced == CALLERS - 1
+    assert all(account.name == "billingAccounts/1" for account in accounts)
+    assert len({id(account) for account in accounts}) == CALLERS
+
+
+@pytest.mark.asyncio
+async def test_async_client_project_billing_info():
+    singleflight = Singleflight()
+    client = CloudBillingAsyncClient(
+        credentials=credentials.AnonymousCredentials(), singleflight=singleflight,
+    )
+
+    with mock.patch.object(
+        type(client.transport.get_project_billing_info), "__call__"
+    ) as call:
+        call.side_effect = lambda request, **kwargs: (
+            grpc_helpers_async.FakeUnaryUnaryCall(
+                cloud_billing.ProjectBillingInfo(name=request.name)
+            )
+        )
+        infos = await asyncio.gather(
+            client.get_project_billing_info(name="projects/a"),
+            client.get_project_billing_info(name="projects/a"),
+        )
+
+    assert call.call_count == 1
+    assert [info.name for info in infos] == ["projects/a", "projects/a"]
+
+
+@pytest.mark.asyncio
+async def test_async_iam_requests():
+    singleflight = Singleflight()
+    client = CloudBillingAsyncClient(
+        credentials=credentials.AnonymousCredentials(), singleflight=singleflight,
+    )
+
+    with mock.patch.object(type(client.transport.get_iam_policy), "__call__") as call:
+        call.return_value = grpc_helpers_async.FakeUnaryUnaryCall(
+            policy.Policy(version=3)
+        )
+        policies = await asyncio.gather(
+            client.get_iam_policy(request={"resource": "billingAccounts/1"}),
+            client.get_iam_policy(request={"resource": "billingAccounts/1"}),
+            client.get_iam_policy(request={"resource": "billingAccounts/2"}),
+        )
+
+    assert call.call_count == 2
+    assert [item.version for item in policies] == [3, 3, 3]
+    assert isinstance(policies[1], policy.Policy)
+
+    with mock.patch.object(
+        type(client.transport.test_iam_permissions), "__call__"
+    ) as call:
+        call.return_value = grpc_helpers_async.FakeUnaryUnaryCall(
+            iam_policy.TestIamPermissionsResponse(permissions=["a"])
+        )
+        responses = await asyncio.gather(
+            *[
+                client.test_iam_permissions(
+                    resource="billingAccounts/1", permissions=["a", "b"]
+                )
+                for _ in range(2)
+            ]
+        )
+
+    assert call.call_count == 1
+    assert [list(item.permissions) for item in responses] == [["a"], ["a"]]
+
+
+@pytest.mark.asyncio
+async def test_call_async_cancelled_caller():
+    singleflight = Singleflight()
+    release = asyncio.Event()
+
+    async def send():
+        await release.wait()
+        return iam_policy.TestIamPermissionsResponse(permissions=["a"])
+
+    first = asyncio.ensure_future(singleflight.call_async("key", send))
+    second = asyncio.ensure_future(singleflight.call_async("key", send))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+
+    response = await second
+    assert list(response.permissions) == ["a"]
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert singleflight.coalesced == 1
+
+
+@pytest.mark.asyncio
+async def test_call_async_leader_changes_do_not_reach_followers():
+    singleflight = Singleflight()
+    release = asyncio.Event()
+    sent = cloud_billing.BillingAccount(name="billingAccounts/1", display_name="A")
+
+    async def send():
+        await release.wait()
+        return sent
+
+    async def lead():
+        account = await singleflight.call_async("key", send)
+        account.display_name = "Changed"
+        return account
+
+    leader = asyncio.ensure_future(lead())
+    await asyncio.sleep(0)
+    followers = [singleflight.call_async("key", send) for _ in range(CALLERS - 1)]
+    release.set()
+    accounts = await asyncio.gather(*followers)
+
+    assert (await leader).display_name == "Changed"
+    assert [account.display_name for account in accounts] == ["A"] * (CALLERS - 1)
+    assert sent.display_name == "A"
+
+
+@pytest.mark.asyncio
+async def test_forget_replaced_task():
+    singleflight = Singleflight()
+    task = asyncio.get_event_loop().create_future()
+    task.cancel()
+
+    # A task that is no longer the one in flight for its key is ignored.
+    singleflight._forget("key", task)
+    assert singleflight._tasks == {}
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import itertools
+
+import pytest
+
+from google.cloud.billing_v1.sku_index import DIMENSIONS
+from google.cloud.billing_v1.sku_index import SkuIndex
+from google.cloud.billing_v1.types import cloud_catalog
+
+
+REGIONS = ["europe-west4", "us-central1", "asia-east1"]
+GROUPS = ["GPU", "CPU", "RAM"]
+USAGE_TYPES = ["OnDemand", "Preemptible"]
+
+
+def _sku(number, regions, group, usage_type, service="services/compute"):
+    return cloud_catalog.Sku(
+        name="{}/skus/{}".format(service, number),
+        service_regions=regions,
+        category=cloud_catalog.Category(
+            resource_family="Compute", resource_group=group, usage_type=usage_type,
+        ),
+    )
+
+
+def _catalog():
+    skus = []
+    for number, (region, group, usage_type) in enumerate(
+        itertools.product(REGIONS, GROUPS, USAGE_TYPES)
+    ):
+        skus.append(_sku(number, [region], group, usage_type))
+    skus.append(_sku(100, REGIONS[:2], "GPU", "Preemptible"))
+    skus.append(_sku(200, ["global"], "", "", service="services/storage"))
+    return skus
+
+
+def _scan(skus, region=None, group=None, usage_type=None):
+    return [
+        sku
+        for sku in skus
+        if (region is None or region in sku.service_regions)
+        and (group is None or sku.category.resource_group == group)
+        and (usage_type is None or sku.category.usage_type == usage_type)
+    ]
+
+
+def test_query_matches_linear_scan():
+    skus = _catalog()
+    index = SkuIndex(skus)
+
+    for region, group, usage_type in itertools.product(
+        REGIONS + [None], GROUPS + [None], USAGE_TYPES + [None]
+    ):
+        filters = {}
+        if region is not None:
+            filters["service_region"] = region
+        if group is not None:
+            filters["resource_group"] = group
+        if usage_type is not None:
+            filters["usage_type"] = usage_type
+        expected = _scan(skus, region, group, usage_type)
+        assert index.query(**filters) == expected
+        assert index.count(**filters) == len(expected)
+
+
+def test_query_any_of_values():
+    index = SkuIndex(_catalog())
+
+    names = [
+        sku.name
+        for sku in index.query(
+            service_region=["europe-west4", "asia-east1"],
+            resource_group="GPU",
+            usage_type="Preemptible",
+        )
+    ]
+
+    assert names == [
+        "services/compute/skus/1",
+        "services/compute/skus/13",
+        "services/compute/skus/100",
+    ]
+
+
+def test_query_service_and_unset_fields():
+    index = SkuIndex(_catalog())
+
+    assert [sku.name for sku in index.query(service="services/storage")] == [
+        "services/storage/skus/200"
+    ]
+    assert index.count(resource_group="") == 1
+    assert index.query(service_region="mars-north1") == []
+    assert index.query(resource_group="GPU", usage_type="Missing") == []
+
+
+def test_incremental_add():
+    skus = _catalog()
+    index = SkuIndex()
+
+    for count, sku in enumerate(skus, start=1):
+        assert index.add(sku)
+        # Queries in between must see every SKU added so far.
+        assert index.query(resource_group="GPU") == _scan(skus[:count], group="GPU")
+
+    assert len(index) == len(skus)
+    assert not index.add(skus[0])
+    assert index.extend(skus) == 0
+    assert len(index) == len(skus)
+    assert skus[0].name in index
+
+
+def test_values():
+    index = SkuIndex(_catalog())
+
+    assert index.values("usage_type") == ["", "OnDemand", "Preemptible"]
+    assert index.values("service") == ["services/compute", "services/storage"]
+    assert set(DIMENSIONS) == {
+        "service",
+        "service_region",
+        "resource_family",
+        "resource_group",
+        "usage_type",
+    }
+
+
+def test_unknown_dimension():
+    index = SkuIndex(_catalog())
+
+    with pytest.raises(ValueError):
+        index.query(region="europe-west4")
+    with pytest.raises(ValueError):
+        index.values("region")
+
+
+def test_empty_index():
+    index = SkuIndex()
+
+    assert index.query() == []
+    assert index.count(resource_group="GPU") == 0
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import threading
+
+import grpc
+from grpc.experimental import aio
+import mock
+import pytest
+
+from google.api_core import exceptions
+from google.auth import credentials
+from google.cloud.billing_v1.fake_server import FakeBillingServer
+from google.cloud.billing_v1.fake_server import SyntheticDataset
+from google.cloud.billing_v1.services import _channel_pool
+from google.cloud.billing_v1.services import _warmup
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingAsyncClient
+from google.cloud.billing_v1.services.cloud_billing import CloudBillingClient
+from google.cloud.billing_v1.services.cloud_billing.transports import (
+    CloudBillingGrpcTransport,
+)
+from google.cloud.billing_v1.services.cloud_billing.transports import (
+    CloudBillingTransport,
+)
+from google.cloud.billing_v1.services.cloud_catalog import CloudCatalogAsyncClient
+from google.cloud.billing_v1.services.cloud_catalog import CloudCatalogClient
+from google.cloud.billing_v1.services.cloud_catalog import transports
+
+
+# Nothing listens on this port, so channels to it never become ready.
+UNREACHABLE = "localhost:1"
+
+
+def _credentials(valid):
+    return mock.Mock(spec=credentials.Credentials, valid=valid)
+
+
+def test_channels_of():
+    channel = mock.Mock(spec=grpc.Channel)
+    pool = _channel_pool.ChannelPool([channel, channel])
+
+    assert _warmup.channels_of(channel) == [channel]
+    assert _warmup.channels_of(pool) == [channel, channel]
+
+
+def test_refresh_credentials():
+    expired = _credentials(valid=False)
+    valid = _credentials(valid=True)
+
+    _warmup.refresh_credentials(expired)
+    _warmup.refresh_credentials(valid)
+    _warmup.refresh_credentials(credentials.AnonymousCredentials())
+    _warmup.refresh_credentials(None)
+
+    expired.refresh.assert_called_once()
+    valid.refresh.assert_not_called()
+
+
+def test_start_refreshes_in_background():
+    refreshed = threading.Event()
+    creds = _credentials(valid=False)
+    creds.refresh.side_effect = lambda request: refreshed.set()
+
+    _warmup.start([], creds)
+
+    assert refreshed.wait(timeout=5)
+
+
+def test_start_ignores_refresh_errors():
+    refreshed = threading.Event()
+    creds = _credentials(valid=False)
+
+    def refresh(request):
+        refreshed.set()
+        raise ValueError("offline")
+
+    creds.refresh.side_effect = refresh
+    _warmup.start([], creds)
+
+    assert refreshed.wait(timeout=5)
+
+
+def test_warmup():
+    dataset = SyntheticDataset(services=1)
+
+    with FakeBillingServer(dataset) as server:
+        client = server.create_client(CloudCatalogClient)
+        client.warmup(timeout=5)
+        assert len(list(client.list_services())) == 1
+
+
+def test_warm_up_bounds_the_token_fetch():
+    release = threading.Event()
+    creds = _credentials(valid=False)
+    creds.refresh.side_effect = lambda request: release.wait(5)
+
+    try:
+        with pytest.raises(exceptions.DeadlineExceeded):
+            _warmup.warm_up([], creds, timeout=0.1)
+    finally:
+        release.set()
+
+
+def test_warm_up_refresh_error():
+    creds = _credentials(valid=False)
+    creds.refresh.side_effect = ValueError("offline")
+
+    with pytest.raises(ValueError):
+        _warmup.warm_up([], creds, timeout=5)
+    _warmup.warm_up([], None)
+
+
+def test_warmup_timeout():
+    transport = transports.CloudCatalogGrpcTransport(
+        channel=grpc.insecure_channel(UNREACHABLE)
+    )
+
+    with pytest.raises(exceptions.DeadlineExceeded):
+        transport.warmup(timeout=0.1)
+
+
+def test_eager_connect():
+    with mock.patch.object(_warmup, "start") as start:
+        transport = transports.CloudCatalogGrpcTransport(
+            channel=grpc.insecure_channel(UNREACHABLE), eager_connect=True
+        )
+
+    start.assert_called_once_with(transport._warmup_channels, transport._credentials)
+
+
+@pytest.mark.parametrize(
+    "client_class,transport_class",
+    [
+        (CloudBillingClient, CloudBillingGrpcTransport),
+        (CloudCatalogClient, transports.CloudCatalogGrpcTransport),
+    ],
+)
+def test_client_eager_connect(client_class, transport_class):
+    transport = transport_class(channel=grpc.insecure_channel(UNREACHABLE))
+
+    with mock.patch.object(transport, "connect") as connect:
+        client_class(transport=transport)
+        connect.assert_not_called()
+        client_class(transport=transport, eager_connect=True)
+        connect.assert_called_once_with()
+
+
+@pytest.mark.parametrize(
+    "transport_class", [CloudBillingTransport, transports.CloudCatalogTransport]
+)
+def test_base_transport_warmup(transport_class):
+    with mock.patch.object(transport_class, "__init__", return_value=None):
+        transport = transport_class(credentials=credentials.AnonymousCredentials(),)
+
+    with pytest.raises(NotImplementedError):
+        transport.connect()
+    with pytest.raises(NotImplementedError):
+        transport.warmup()
+
+
+def test_eager_connect_with_channel_pool():
+    channels = [grpc.insecure_channel(UNREACHABLE) for _ in range(2)]
+
+    with mock.patch.object(grpc, "channel_ready_future") as ready:
+        CloudBillingClient(
+            transport=CloudBillingGrpcTransport(
+                channel=_channel_pool.ChannelPool(channels), eager_connect=True
+            )
+        )
+
+    assert [call[0][0] for call in ready.call_args_list] == channels
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "client_class", [CloudBillingAsyncClient, CloudCatalogAsyncClient]
+)
+async def test_async_warmup(client_class):
+    dataset = SyntheticDataset(accounts=1)
+
+    with FakeBillingServer(dataset) as server:
+        client = server.create_client(client_class, eager_connect=True)
+        await client.warmup(timeout=5)
+        assert (
+            client.transport.grpc_channel.get_state() == grpc.ChannelConnectivity.READY
+        )
+
+
+@pytest.mark.asyncio
+async def test_async_eager_connect():
+    with mock.patch.object(_warmup, "start") as start:
+        transport = transports.CloudCatalogGrpcAsyncIOTransport(
+            channel=aio.insecure_channel(UNREACHABLE), eager_connect=True
+        )
+
+    start.assert_called_once_with(transport._warmup_channels, transport._credentials)
+
+
+@pytest.mark.asyncio
+async def test_async_warmup_timeout():
+    transport = transports.CloudCatalogGrpcAsyncIOTransport(
+        channel=aio.insecure_channel(UNREACHABLE)
+    )
+
+    with pytest.raises(exceptions.DeadlineExceeded):
+        await transport.warmup(timeout=0.1)